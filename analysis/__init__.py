@@ -1,14 +1,21 @@
 """
 Multi-Timeframe Analysis Module for Arbion Trading Platform.
-Provides MultiTimeframeAnalyzer, ConfluenceFilter, and related dataclasses.
+Provides MultiTimeframeAnalyzer, ConfluenceFilter, StreamingIndicatorEngine,
+CandleStore, and related dataclasses.
 """
 
 from analysis.multi_timeframe import MultiTimeframeAnalyzer, TimeframeSignal
 from analysis.confluence_filter import ConfluenceFilter, ConfluenceResult
+from analysis.indicator_engine import StreamingIndicatorEngine, get_indicator_engine
+from analysis.candle_store import CandleStore, get_candle_store
 
 __all__ = [
     'MultiTimeframeAnalyzer',
     'TimeframeSignal',
     'ConfluenceFilter',
     'ConfluenceResult',
+    'StreamingIndicatorEngine',
+    'get_indicator_engine',
+    'CandleStore',
+    'get_candle_store',
 ]
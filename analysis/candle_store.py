@@ -0,0 +1,203 @@
+"""
+Local OHLCV Candle Store for Arbion Trading Platform.
+
+Persists candles per (symbol, timeframe) as column-major NumPy arrays on disk
+(one ``.npy`` file holding timestamp/open/high/low/close/volume rows) that are
+memory-mapped on read.  ``sync`` asks the provider only for the tail that is
+missing since the last stored bar, so repeated multi-timeframe scans stop
+re-downloading the full ``YF_PERIODS`` / ``CB_LOOKBACKS`` window.
+"""
+
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+from analysis.multi_timeframe import CB_LOOKBACKS, TIMEFRAMES
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ("timestamp", "open", "high", "low", "close", "volume")
+
+DEFAULT_STORE_DIR = os.path.join(tempfile.gettempdir(), "arbion_candles")
+DEFAULT_MAX_BARS = 5000
+
+_SAFE_SYMBOL = re.compile(r"[^A-Z0-9._-]")
+
+# Called with the epoch second to fetch from (None = full lookback)
+TailFetcher = Callable[[Optional[int]], Optional[pd.DataFrame]]
+
+
+def frame_to_columns(df: pd.DataFrame) -> Optional[np.ndarray]:
+    """Convert a fetcher frame into a (6, n) float64 array sorted by timestamp.
+
+    Accepts Coinbase-style frames (``timestamp`` column of epoch seconds) and
+    yfinance-style frames (DatetimeIndex).
+    """
+    if df is None or df.empty:
+        return None
+    if "timestamp" in df.columns:
+        ts = df["timestamp"].to_numpy(dtype=np.float64)
+    else:
+        index = pd.DatetimeIndex(df.index)
+        index = index.tz_localize("UTC") if index.tz is None else index.tz_convert("UTC")
+        epoch = pd.Timestamp("1970-01-01", tz="UTC")
+        ts = ((index - epoch) // pd.Timedelta(seconds=1)).to_numpy(dtype=np.float64)
+    data = np.vstack([ts] + [df[col].to_numpy(dtype=np.float64) for col in COLUMNS[1:]])
+    return data[:, np.argsort(data[0], kind="stable")]
+
+
+def columns_to_frame(data: np.ndarray) -> pd.DataFrame:
+    frame = pd.DataFrame({col: np.array(data[i]) for i, col in enumerate(COLUMNS)})
+    frame["timestamp"] = frame["timestamp"].astype(np.int64)
+    return frame
+
+
+def merge_columns(existing: Optional[np.ndarray], incoming: np.ndarray) -> np.ndarray:
+    """Union two column blocks by timestamp; incoming bars replace stored ones."""
+    if existing is None or existing.shape[1] == 0:
+        return incoming
+    keep = ~np.isin(existing[0], incoming[0])
+    merged = np.hstack([existing[:, keep], incoming])
+    return merged[:, np.argsort(merged[0], kind="stable")]
+
+
+class CandleStore:
+    """On-disk candle cache keyed by (symbol, timeframe)."""
+
+    def __init__(self, root: str = None, max_bars: int = None):
+        self.root = root or os.environ.get("CANDLE_STORE_DIR", DEFAULT_STORE_DIR)
+        self.max_bars = max_bars or int(os.environ.get("CANDLE_STORE_MAX_BARS", DEFAULT_MAX_BARS))
+        self._lock = threading.Lock()
+        self._series_locks = {}
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, symbol: str, timeframe: str) -> str:
+        if timeframe not in TIMEFRAMES:
+            raise ValueError(f"Unsupported timeframe: {timeframe}")
+        safe = _SAFE_SYMBOL.sub("_", symbol.upper().strip())
+        return os.path.join(self.root, timeframe, f"{safe}.npy")
+
+    def _series_lock(self, symbol: str, timeframe: str) -> threading.Lock:
+        key = (symbol.upper().strip(), timeframe)
+        with self._lock:
+            return self._series_locks.setdefault(key, threading.Lock())
+
+    # ------------------------------------------------------------------
+    # Raw column access
+    # ------------------------------------------------------------------
+
+    def read(self, symbol: str, timeframe: str) -> Optional[np.ndarray]:
+        """Memory-map the stored (6, n) column block, or None if absent/corrupt."""
+        path = self._path(symbol, timeframe)
+        if not os.path.exists(path):
+            return None
+        try:
+            data = np.load(path, mmap_mode="r")
+        except (OSError, ValueError) as e:
+            logger.warning("Discarding unreadable candle file %s: %s", path, e)
+            return None
+        if data.ndim != 2 or data.shape[0] != len(COLUMNS):
+            return None
+        return data
+
+    def write(self, symbol: str, timeframe: str, data: np.ndarray) -> None:
+        """Atomically replace the stored block (trimmed to ``max_bars``)."""
+        path = self._path(symbol, timeframe)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = np.ascontiguousarray(data[:, -self.max_bars:], dtype=np.float64)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                np.save(fh, data)
+            os.replace(tmp, path)
+        except Exception:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+    def last_timestamp(self, symbol: str, timeframe: str) -> Optional[int]:
+        data = self.read(symbol, timeframe)
+        if data is None or data.shape[1] == 0:
+            return None
+        return int(data[0, -1])
+
+    # ------------------------------------------------------------------
+    # Frame API
+    # ------------------------------------------------------------------
+
+    def load(self, symbol: str, timeframe: str, lookback: int = None) -> Optional[pd.DataFrame]:
+        """Return stored candles as an OHLCV frame with a ``timestamp`` column.
+
+        *lookback* (seconds, default ``CB_LOOKBACKS[timeframe]``) limits the
+        result to the trailing window measured from the newest bar.
+        """
+        data = self.read(symbol, timeframe)
+        if data is None or data.shape[1] == 0:
+            return None
+        lookback = CB_LOOKBACKS[timeframe] if lookback is None else lookback
+        start = np.searchsorted(data[0], data[0, -1] - lookback, side="left")
+        return columns_to_frame(data[:, start:])
+
+    def sync(self, symbol: str, timeframe: str, fetch_tail: TailFetcher,
+             now: float = None) -> Optional[pd.DataFrame]:
+        """Bring the stored series up to date and return the lookback window.
+
+        Only bars from the last stored timestamp onward are requested, so the
+        still-forming candle is refreshed and anything newer is appended.  An
+        empty or stale store (older than one lookback) triggers a full fetch.
+        If the provider call fails the stored candles are served as-is.
+        """
+        now = time.time() if now is None else now
+        lookback = CB_LOOKBACKS[timeframe]
+
+        with self._series_lock(symbol, timeframe):
+            existing = self.read(symbol, timeframe)
+            if existing is not None and existing.shape[1] == 0:
+                existing = None
+            since = None
+            if existing is not None and now - existing[0, -1] <= lookback:
+                since = int(existing[0, -1])
+
+            try:
+                incoming = frame_to_columns(fetch_tail(since))
+            except Exception as e:
+                logger.warning("Candle tail fetch failed for %s/%s: %s", symbol, timeframe, e)
+                incoming = None
+
+            if incoming is not None:
+                base = existing if since is not None else None
+                merged = merge_columns(None if base is None else np.array(base), incoming)
+                self.write(symbol, timeframe, merged)
+            elif existing is None:
+                return None
+
+        return self.load(symbol, timeframe, lookback)
+
+    def clear(self, symbol: str = None, timeframe: str = None) -> None:
+        """Delete stored candles for one series, one symbol, or everything."""
+        timeframes = [timeframe] if timeframe else TIMEFRAMES
+        for tf in timeframes:
+            tf_dir = os.path.join(self.root, tf)
+            if not os.path.isdir(tf_dir):
+                continue
+            for name in os.listdir(tf_dir):
+                if symbol is None or name == os.path.basename(self._path(symbol, tf)):
+                    os.unlink(os.path.join(tf_dir, name))
+
+
+_candle_store = None
+
+
+def get_candle_store() -> CandleStore:
+    """Get or create the shared per-process candle store."""
+    global _candle_store
+    if _candle_store is None:
+        _candle_store = CandleStore()
+    return _candle_store
@@ -0,0 +1,442 @@
+"""
+Streaming Indicator Engine for Arbion Trading Platform.
+
+Keeps O(1) rolling state per (ticker, timeframe) so that appending a candle
+updates EMA20/50, RSI-14, MACD, Bollinger Bands and relative volume without
+re-walking the full lookback.  Every accumulator mirrors the exact floating
+point recurrence pandas uses (``ewm`` with ``ignore_na=False``, Kahan-summed
+``rolling().mean()`` and Welford ``rolling().std()``), so a stream's snapshot
+is identical to ``compute_indicators`` run over the same bars.
+"""
+
+import copy
+import logging
+import math
+import threading
+from collections import deque
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from analysis.multi_timeframe import summarize_indicators
+
+logger = logging.getLogger(__name__)
+
+_NAN = float("nan")
+# pandas treats an update as ill-conditioned below ~3 significant digits
+_INV_COND_TOL = float(np.finfo(np.float64).eps) * 1e3
+
+
+# ---------------------------------------------------------------------------
+# Incremental accumulators (twins of the pandas window kernels)
+# ---------------------------------------------------------------------------
+
+class _EwmMean:
+    """Incremental ``Series.ewm(com=..., adjust=...).mean()``."""
+
+    __slots__ = ("com", "adjust", "min_periods", "old_wt_factor", "new_wt",
+                 "weighted", "old_wt", "nobs", "started")
+
+    def __init__(self, com: float, adjust: bool, min_periods: int = 0):
+        alpha = 1. / (1. + com)
+        self.com = com
+        self.adjust = adjust
+        self.min_periods = max(int(min_periods), 1)
+        self.old_wt_factor = 1. - alpha
+        self.new_wt = 1. if adjust else alpha
+        self.weighted = _NAN
+        self.old_wt = 1.
+        self.nobs = 0
+        self.started = False
+
+    @classmethod
+    def from_span(cls, span: int, adjust: bool = False) -> "_EwmMean":
+        return cls(float((span - 1) / 2), adjust)
+
+    @classmethod
+    def from_alpha(cls, alpha: float, adjust: bool = True, min_periods: int = 0) -> "_EwmMean":
+        return cls(float((1 - alpha) / alpha), adjust, min_periods)
+
+    def push(self, cur: float) -> float:
+        is_observation = cur == cur
+        self.nobs += is_observation
+        if not self.started:
+            self.started = True
+            self.weighted = cur
+        elif self.weighted == self.weighted:
+            self.old_wt *= self.old_wt_factor
+            if is_observation:
+                if self.weighted != cur:
+                    if not self.adjust and self.com == 1:
+                        self.new_wt = 1. - self.old_wt
+                    self.weighted = self.old_wt * self.weighted + self.new_wt * cur
+                    self.weighted /= (self.old_wt + self.new_wt)
+                if self.adjust:
+                    self.old_wt += self.new_wt
+                else:
+                    self.old_wt = 1.
+        elif is_observation:
+            self.weighted = cur
+        return self.weighted if self.nobs >= self.min_periods else _NAN
+
+
+class _RollingMeanStd:
+    """Incremental fixed-window ``rolling(window).mean()`` / ``.std()``.
+
+    Holds the window in a ring buffer so removals are O(1); the mean uses
+    pandas' Kahan add/remove compensation and the variance its Welford
+    update, including the recompute on catastrophic cancellation.
+    """
+
+    __slots__ = ("window", "values", "count",
+                 "m_nobs", "m_sum", "m_neg_ct", "m_comp_add", "m_comp_remove",
+                 "m_same", "m_prev",
+                 "v_nobs", "v_mean", "v_ssqdm", "v_comp_add", "v_comp_remove",
+                 "v_unstable")
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values: deque = deque(maxlen=window)
+        self.count = 0
+        self.m_nobs = self.m_neg_ct = self.m_same = 0
+        self.m_sum = self.m_comp_add = self.m_comp_remove = 0.
+        self.m_prev = _NAN
+        self.v_nobs = self.v_mean = self.v_ssqdm = 0.
+        self.v_comp_add = self.v_comp_remove = 0.
+        self.v_unstable = False
+
+    # -- mean ---------------------------------------------------------------
+    def _add_mean(self, val: float) -> None:
+        if val == val:
+            self.m_nobs += 1
+            y = val - self.m_comp_add
+            t = self.m_sum + y
+            self.m_comp_add = t - self.m_sum - y
+            self.m_sum = t
+            if math.copysign(1., val) < 0:
+                self.m_neg_ct += 1
+            if val == self.m_prev:
+                self.m_same += 1
+            else:
+                self.m_same = 1
+            self.m_prev = val
+
+    def _remove_mean(self, val: float) -> None:
+        if val == val:
+            self.m_nobs -= 1
+            y = - val - self.m_comp_remove
+            t = self.m_sum + y
+            self.m_comp_remove = t - self.m_sum - y
+            self.m_sum = t
+            if math.copysign(1., val) < 0:
+                self.m_neg_ct -= 1
+
+    # -- variance -----------------------------------------------------------
+    def _add_var(self, val: float) -> None:
+        if val != val:
+            return
+        prev_m2 = self.v_ssqdm
+        self.v_nobs = self.v_nobs + 1
+        prev_mean = self.v_mean - self.v_comp_add
+        y = val - self.v_comp_add
+        t = y - self.v_mean
+        self.v_comp_add = t + self.v_mean - y
+        if self.v_nobs:
+            self.v_mean = self.v_mean + t / self.v_nobs
+        else:
+            self.v_mean = 0.
+        self.v_ssqdm = self.v_ssqdm + (val - prev_mean) * (val - self.v_mean)
+        if prev_m2 * _INV_COND_TOL > self.v_ssqdm:
+            self.v_unstable = True
+
+    def _remove_var(self, val: float) -> None:
+        if val == val:
+            prev_m2 = self.v_ssqdm
+            self.v_nobs = self.v_nobs - 1
+            if self.v_nobs:
+                prev_mean = self.v_mean - self.v_comp_remove
+                y = val - self.v_comp_remove
+                t = y - self.v_mean
+                self.v_comp_remove = t + self.v_mean - y
+                self.v_mean = self.v_mean - t / self.v_nobs
+                self.v_ssqdm = self.v_ssqdm - (val - prev_mean) * (val - self.v_mean)
+                if prev_m2 * _INV_COND_TOL > self.v_ssqdm:
+                    self.v_unstable = True
+            else:
+                self.v_mean = 0.
+                self.v_ssqdm = 0.
+                self.v_unstable = False
+
+    def _recompute_var(self) -> None:
+        self.v_nobs = self.v_mean = self.v_ssqdm = 0.
+        self.v_comp_add = self.v_comp_remove = 0.
+        for val in self.values:
+            self._add_var(val)
+        self.v_unstable = False
+
+    # -- public -------------------------------------------------------------
+    def push(self, val: float) -> None:
+        if self.count == 0:
+            self.m_prev = val
+        evicted = self.values[0] if len(self.values) == self.window else None
+        self.values.append(val)
+        self.count += 1
+        if evicted is not None:
+            self._remove_mean(evicted)
+        self._add_mean(val)
+
+        if self.count == 1:
+            self._recompute_var()
+        else:
+            if evicted is not None:
+                self._remove_var(evicted)
+            self._add_var(val)
+            if self.v_unstable:
+                self._recompute_var()
+
+    def mean(self) -> float:
+        nobs = self.m_nobs
+        if nobs >= self.window and nobs > 0:
+            result = self.m_sum / nobs
+            if self.m_same >= nobs:
+                result = self.m_prev
+            elif self.m_neg_ct == 0 and result < 0:
+                result = 0.
+            elif self.m_neg_ct == nobs and result > 0:
+                result = 0.
+            return result
+        return _NAN
+
+    def std(self) -> float:
+        nobs = self.v_nobs
+        if nobs >= self.window and nobs > 1:
+            var = self.v_ssqdm / (nobs - 1.)
+            return 0. if var < 0 else math.sqrt(var)
+        return _NAN
+
+    def copy(self) -> "_RollingMeanStd":
+        clone = copy.copy(self)
+        clone.values = deque(self.values, maxlen=self.window)
+        return clone
+
+
+# ---------------------------------------------------------------------------
+# Per-stream state
+# ---------------------------------------------------------------------------
+
+class IndicatorStream:
+    """Rolling indicator state for one (ticker, timeframe) series."""
+
+    def __init__(self):
+        self.bars = 0
+        self.first_key: Optional[Hashable] = None
+        self.last_key: Optional[Hashable] = None
+        self.last_bar: Optional[Tuple[float, float]] = None
+        self._prev_state: Optional[Dict[str, Any]] = None
+
+        self._ema20 = _EwmMean.from_span(20)
+        self._ema50 = _EwmMean.from_span(50)
+        self._ema12 = _EwmMean.from_span(12)
+        self._ema26 = _EwmMean.from_span(26)
+        self._signal = _EwmMean.from_span(9)
+        self._avg_gain = _EwmMean.from_alpha(1 / 14, min_periods=14)
+        self._avg_loss = _EwmMean.from_alpha(1 / 14, min_periods=14)
+        self._bb = _RollingMeanStd(20)
+        self._vol = _RollingMeanStd(20)
+
+        self._prev_close = _NAN
+        self._cur: Dict[str, float] = {}
+        self._prev: Dict[str, float] = {}
+
+    def _state(self) -> Dict[str, Any]:
+        state = {k: copy.copy(v) for k, v in self.__dict__.items()
+                 if k not in ("_bb", "_vol", "_prev_state")}
+        state["_bb"] = self._bb.copy()
+        state["_vol"] = self._vol.copy()
+        return state
+
+    def push(self, close: float, volume: float, key: Hashable = None) -> None:
+        """Append one closed (or in-progress) bar."""
+        close = float(close)
+        volume = float(volume)
+        self._prev_state = self._state()
+
+        ema20 = self._ema20.push(close)
+        ema50 = self._ema50.push(close)
+        macd = self._ema12.push(close) - self._ema26.push(close)
+        signal = self._signal.push(macd)
+
+        delta = close - self._prev_close if self.bars else _NAN
+        if delta != delta:
+            gain = loss = _NAN
+        else:
+            gain = delta if delta > 0 else 0.
+            loss = -(delta if delta < 0 else 0.)
+        avg_gain = self._avg_gain.push(gain)
+        avg_loss = self._avg_loss.push(loss)
+        rs = avg_gain / (avg_loss if avg_loss != 0 else _NAN)
+        rsi = 100 - (100 / (1 + rs))
+
+        self._bb.push(close)
+        self._vol.push(volume)
+        sma = self._bb.mean()
+        std = self._bb.std()
+
+        self._prev = self._cur
+        self._cur = {
+            "ema20": ema20, "ema50": ema50, "rsi": rsi,
+            "macd": macd, "signal": signal, "hist": macd - signal,
+            "close": close, "bb_mid": sma,
+            "bb_upper": sma + 2.0 * std, "bb_lower": sma - 2.0 * std,
+            "volume": volume, "vol_avg": self._vol.mean(),
+        }
+        self._prev_close = close
+        if not self.bars:
+            self.first_key = key
+        self.bars += 1
+        self.last_key = key
+        self.last_bar = (close, volume)
+
+    def revise_last(self, close: float, volume: float, key: Hashable = None) -> None:
+        """Replace the most recent bar (e.g. a still-forming candle)."""
+        if self._prev_state is None:
+            raise ValueError("No bar to revise")
+        self.__dict__.update(self._prev_state)
+        self.push(close, volume, key)
+
+    def snapshot(self) -> Optional[Dict[str, Any]]:
+        """Indicator dict identical to ``compute_indicators`` over the pushed bars."""
+        if not self.bars:
+            return None
+        cur = self._cur
+        prev = self._prev if self.bars >= 2 else cur
+        return summarize_indicators(
+            np.float64(cur["ema20"]), np.float64(cur["ema50"]),
+            np.float64(prev["ema20"]), np.float64(prev["ema50"]),
+            cur["rsi"],
+            cur["macd"], cur["signal"], cur["hist"],
+            prev["hist"] if self.bars >= 2 else 0.0,
+            cur["close"], cur["bb_upper"], cur["bb_mid"], cur["bb_lower"],
+            cur["volume"], cur["vol_avg"],
+        )
+
+
+# ---------------------------------------------------------------------------
+# Engine
+# ---------------------------------------------------------------------------
+
+def _bar_keys(df: pd.DataFrame) -> List[Hashable]:
+    """Stable per-bar identity: ``timestamp`` column (Coinbase) or the index (yfinance)."""
+    if "timestamp" in df.columns:
+        return df["timestamp"].tolist()
+    return list(df.index)
+
+
+class StreamingIndicatorEngine:
+    """Process-wide registry of IndicatorStream objects keyed by (ticker, timeframe)."""
+
+    def __init__(self):
+        self._streams: Dict[Tuple[str, str], IndicatorStream] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(ticker: str, timeframe: str) -> Tuple[str, str]:
+        return ticker.upper().strip(), timeframe
+
+    def append(self, ticker: str, timeframe: str, close: float, volume: float,
+               key: Hashable = None) -> Dict[str, Any]:
+        """Push one candle and return the refreshed indicator dict.
+
+        A candle whose *key* matches the last one replaces it instead of
+        appending, so in-progress bars can be streamed repeatedly.
+        """
+        with self._lock:
+            stream = self._streams.setdefault(self._key(ticker, timeframe), IndicatorStream())
+            if key is not None and stream.bars and key == stream.last_key:
+                stream.revise_last(close, volume, key)
+            else:
+                stream.push(close, volume, key)
+            return stream.snapshot()
+
+    def extend(self, ticker: str, timeframe: str,
+               bars: Iterable[Tuple[Hashable, float, float]]) -> Optional[Dict[str, Any]]:
+        """Push ``(key, close, volume)`` tuples in order and return the final snapshot."""
+        result = None
+        for key, close, volume in bars:
+            result = self.append(ticker, timeframe, close, volume, key)
+        return result
+
+    def update_from_frame(self, ticker: str, timeframe: str, df: pd.DataFrame) -> Dict[str, Any]:
+        """Synchronise a stream with a freshly fetched OHLCV frame.
+
+        Only bars newer than the last one consumed are pushed; the last seen
+        bar is revised if its values changed.  If the frame does not start at
+        the stream's first bar (the lookback window slid) or no longer lines
+        up with the bars consumed (gap or provider rewrite), the stream is
+        rebuilt from the frame, so the result always equals
+        ``compute_indicators(df)``.
+        """
+        keys = _bar_keys(df)
+        closes = df["close"].to_numpy(dtype=np.float64)
+        volumes = df["volume"].to_numpy(dtype=np.float64)
+
+        with self._lock:
+            skey = self._key(ticker, timeframe)
+            stream = self._streams.get(skey)
+            start = 0
+            if stream is not None and stream.bars:
+                pos = None
+                if keys and keys[0] == stream.first_key:
+                    for i in range(len(keys) - 1, -1, -1):
+                        if keys[i] == stream.last_key:
+                            pos = i
+                            break
+                if pos is None or pos + 1 != stream.bars:
+                    stream = None
+                else:
+                    bar = (float(closes[pos]), float(volumes[pos]))
+                    if bar != stream.last_bar:
+                        stream.revise_last(bar[0], bar[1], keys[pos])
+                    start = pos + 1
+            if stream is None:
+                stream = IndicatorStream()
+                self._streams[skey] = stream
+
+            for i in range(start, len(keys)):
+                stream.push(closes[i], volumes[i], keys[i])
+            return stream.snapshot()
+
+    def snapshot(self, ticker: str, timeframe: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            stream = self._streams.get(self._key(ticker, timeframe))
+            return stream.snapshot() if stream else None
+
+    def bar_count(self, ticker: str, timeframe: str) -> int:
+        with self._lock:
+            stream = self._streams.get(self._key(ticker, timeframe))
+            return stream.bars if stream else 0
+
+    def reset(self, ticker: str = None, timeframe: str = None) -> None:
+        """Drop state for one stream, one ticker, or everything."""
+        with self._lock:
+            if ticker is None:
+                self._streams.clear()
+                return
+            tkr = ticker.upper().strip()
+            for key in [k for k in self._streams if k[0] == tkr and timeframe in (None, k[1])]:
+                del self._streams[key]
+
+
+_indicator_engine = None
+_indicator_engine_lock = threading.Lock()
+
+
+def get_indicator_engine() -> StreamingIndicatorEngine:
+    """Get or create the shared per-process indicator engine."""
+    global _indicator_engine
+    if _indicator_engine is None:
+        with _indicator_engine_lock:
+            if _indicator_engine is None:
+                _indicator_engine = StreamingIndicatorEngine()
+    return _indicator_engine
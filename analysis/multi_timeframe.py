@@ -8,9 +8,12 @@ position, and relative volume per timeframe.
 """
 
 import logging
+import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from dataclasses import dataclass, field, asdict
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional, Any
 
 import numpy as np
@@ -41,6 +44,20 @@ CB_LOOKBACKS = {
     "1d": 180 * 24 * 3600,    # ~6 months
 }
 
+# Concurrent analysis: worker pool size, per-source in-flight limits and the
+# default wall-clock budget for one analyze_many() call
+MTF_MAX_WORKERS = int(os.environ.get("MTF_MAX_WORKERS", "16"))
+SOURCE_CONCURRENCY = {
+    "yfinance": int(os.environ.get("MTF_YFINANCE_CONCURRENCY", "8")),
+    "coinbase": int(os.environ.get("MTF_COINBASE_CONCURRENCY", "4")),
+}
+DEFAULT_DEADLINE_SECONDS = float(os.environ.get("MTF_DEADLINE_SECONDS", "20"))
+
+_SOURCE_LIMITS = {
+    source: threading.BoundedSemaphore(max(1, limit))
+    for source, limit in SOURCE_CONCURRENCY.items()
+}
+
 # Well-known crypto tickers (checked case-insensitively)
 CRYPTO_TICKERS = {
     "BTC", "ETH", "SOL", "DOGE", "XRP", "ADA", "AVAX", "DOT", "MATIC",
@@ -116,16 +133,6 @@ def compute_indicators(df: pd.DataFrame) -> Dict[str, Any]:
     prev_ema20 = ema20.iloc[-2] if len(ema20) >= 2 else last_ema20
     prev_ema50 = ema50.iloc[-2] if len(ema50) >= 2 else last_ema50
 
-    # Crossover detection: current above and previous below (or vice versa)
-    if last_ema20 > last_ema50:
-        trend = "bullish"
-    elif last_ema20 < last_ema50:
-        trend = "bearish"
-    else:
-        trend = "neutral"
-
-    fresh_cross = (last_ema20 > last_ema50) != (prev_ema20 > prev_ema50)
-
     # --- RSI ---
     rsi_series = _rsi(close)
     last_rsi = float(rsi_series.iloc[-1]) if not rsi_series.empty else 50.0
@@ -136,9 +143,6 @@ def compute_indicators(df: pd.DataFrame) -> Dict[str, Any]:
     last_signal = float(signal_line.iloc[-1]) if not signal_line.empty else 0.0
     last_hist = float(histogram.iloc[-1]) if not histogram.empty else 0.0
     prev_hist = float(histogram.iloc[-2]) if len(histogram) >= 2 else 0.0
-    macd_crossover = "bullish" if last_hist > 0 and prev_hist <= 0 else (
-        "bearish" if last_hist < 0 and prev_hist >= 0 else "none"
-    )
 
     # --- Bollinger Bands ---
     bb_upper, bb_mid, bb_lower = _bollinger_bands(close)
@@ -147,6 +151,47 @@ def compute_indicators(df: pd.DataFrame) -> Dict[str, Any]:
     last_bb_lower = float(bb_lower.iloc[-1]) if not bb_lower.empty else last_close
     last_bb_mid = float(bb_mid.iloc[-1]) if not bb_mid.empty else last_close
 
+    # --- Relative volume ---
+    vol_avg_20 = volume.rolling(window=20).mean()
+    last_vol = float(volume.iloc[-1]) if not volume.empty else 0
+    last_vol_avg = float(vol_avg_20.iloc[-1]) if not vol_avg_20.empty else 1
+
+    return summarize_indicators(
+        last_ema20, last_ema50, prev_ema20, prev_ema50,
+        last_rsi,
+        last_macd, last_signal, last_hist, prev_hist,
+        last_close, last_bb_upper, last_bb_mid, last_bb_lower,
+        last_vol, last_vol_avg,
+    )
+
+
+def summarize_indicators(
+    last_ema20, last_ema50, prev_ema20, prev_ema50,
+    last_rsi: float,
+    last_macd: float, last_signal: float, last_hist: float, prev_hist: float,
+    last_close: float, last_bb_upper: float, last_bb_mid: float, last_bb_lower: float,
+    last_vol: float, last_vol_avg: float,
+) -> Dict[str, Any]:
+    """Turn the latest indicator values into the TimeframeSignal.indicators dict.
+
+    Shared by ``compute_indicators`` (full recompute) and
+    ``analysis.indicator_engine`` (incremental updates) so both paths derive
+    trend, crossovers and the strength score identically.
+    """
+    # Crossover detection: current above and previous below (or vice versa)
+    if last_ema20 > last_ema50:
+        trend = "bullish"
+    elif last_ema20 < last_ema50:
+        trend = "bearish"
+    else:
+        trend = "neutral"
+
+    fresh_cross = (last_ema20 > last_ema50) != (prev_ema20 > prev_ema50)
+
+    macd_crossover = "bullish" if last_hist > 0 and prev_hist <= 0 else (
+        "bearish" if last_hist < 0 and prev_hist >= 0 else "none"
+    )
+
     if last_close > last_bb_upper:
         bb_position = "above"
     elif last_close < last_bb_lower:
@@ -154,10 +199,6 @@ def compute_indicators(df: pd.DataFrame) -> Dict[str, Any]:
     else:
         bb_position = "inside"
 
-    # --- Relative volume ---
-    vol_avg_20 = volume.rolling(window=20).mean()
-    last_vol = float(volume.iloc[-1]) if not volume.empty else 0
-    last_vol_avg = float(vol_avg_20.iloc[-1]) if not vol_avg_20.empty else 1
     relative_volume = round(last_vol / last_vol_avg, 2) if last_vol_avg > 0 else 0.0
 
     # --- Strength score (0-100) ---
@@ -224,18 +265,28 @@ def _is_crypto(ticker: str) -> bool:
     return base in CRYPTO_TICKERS
 
 
-def _fetch_yfinance(ticker: str, timeframe: str) -> Optional[pd.DataFrame]:
-    """Fetch OHLCV from yfinance for equities."""
+def _fetch_yfinance(ticker: str, timeframe: str, start: int = None) -> Optional[pd.DataFrame]:
+    """Fetch OHLCV from yfinance for equities.
+
+    *start* (epoch seconds) limits the request to bars from that time onward;
+    by default the full ``YF_PERIODS`` lookback is fetched.
+    """
     try:
         import yfinance as yf
-        data = yf.download(
-            ticker,
-            period=YF_PERIODS[timeframe],
-            interval=YF_INTERVALS[timeframe],
-            progress=False,
-            auto_adjust=True,
-        )
-        if data.empty:
+        if start is None:
+            window = {"period": YF_PERIODS[timeframe]}
+        else:
+            window = {"start": datetime.fromtimestamp(start, tz=timezone.utc)}
+        # Ticker.history is what yf.download runs per symbol, minus the
+        # module-level result dict that makes concurrent downloads unsafe.
+        with _SOURCE_LIMITS["yfinance"]:
+            data = yf.Ticker(ticker).history(
+                interval=YF_INTERVALS[timeframe],
+                auto_adjust=True,
+                actions=False,
+                **window,
+            )
+        if data is None or data.empty:
             return None
         # Flatten multi-level columns from yfinance if present
         if isinstance(data.columns, pd.MultiIndex):
@@ -254,11 +305,13 @@ def _fetch_yfinance(ticker: str, timeframe: str) -> Optional[pd.DataFrame]:
         return None
 
 
-def _fetch_coinbase_candles(ticker: str, timeframe: str, user_id: str = None) -> Optional[pd.DataFrame]:
+def _fetch_coinbase_candles(ticker: str, timeframe: str, user_id: str = None,
+                            start: int = None) -> Optional[pd.DataFrame]:
     """Fetch OHLCV candles from Coinbase Advanced Trade API.
 
     Falls back to yfinance with a -USD suffix when the user has no Coinbase
-    credentials configured (common for lightweight / demo usage).
+    credentials configured (common for lightweight / demo usage).  *start*
+    (epoch seconds) limits the request to the tail from that time onward.
     """
     base = ticker.upper().split("-")[0].split("/")[0]
     product_id = f"{base}-USD"
@@ -270,11 +323,11 @@ def _fetch_coinbase_candles(ticker: str, timeframe: str, user_id: str = None) ->
             raise ValueError("No Coinbase credentials")
 
         now = int(time.time())
-        start = str(now - CB_LOOKBACKS[timeframe])
-        end = str(now)
+        since = now - CB_LOOKBACKS[timeframe] if start is None else int(start)
         granularity = CB_GRANULARITIES[timeframe]
 
-        resp = client.get_product_candles(product_id, start, end, granularity)
+        with _SOURCE_LIMITS["coinbase"]:
+            resp = client.get_product_candles(product_id, str(since), str(now), granularity)
         candles = resp.get("candles", [])
         if not candles:
             raise ValueError("Empty candle response")
@@ -297,7 +350,18 @@ def _fetch_coinbase_candles(ticker: str, timeframe: str, user_id: str = None) ->
     except Exception as e:
         logger.warning("Coinbase candle fetch failed for %s/%s (%s); falling back to yfinance",
                         product_id, timeframe, e)
-        return _fetch_yfinance(product_id, timeframe)
+        return _fetch_yfinance(product_id, timeframe, start)
+
+
+def _current_flask_app():
+    """Return the active Flask app (for propagating context to workers), if any."""
+    try:
+        from flask import current_app, has_app_context
+        if has_app_context():
+            return current_app._get_current_object()
+    except ImportError:
+        pass
+    return None
 
 
 # ---------------------------------------------------------------------------
@@ -305,10 +369,28 @@ def _fetch_coinbase_candles(ticker: str, timeframe: str, user_id: str = None) ->
 # ---------------------------------------------------------------------------
 
 class MultiTimeframeAnalyzer:
-    """Fetches OHLCV across 3 timeframes and computes technical indicators."""
+    """Fetches OHLCV across 3 timeframes and computes technical indicators.
+
+    When *indicator_engine* (an ``analysis.indicator_engine.StreamingIndicatorEngine``)
+    is supplied, indicators are updated incrementally from the bars that are new
+    since the previous call instead of being recomputed over the full lookback.
 
-    def __init__(self, user_id: str = None):
+    With ``concurrent=True`` the timeframes of a ticker are fetched in parallel;
+    ``analyze_many`` always fans out over every (ticker, timeframe) pair.
+
+    A *candle_store* (``analysis.candle_store.CandleStore``) keeps candles on
+    disk so each call only requests the bars missing since the last one.
+    """
+
+    def __init__(self, user_id: str = None, indicator_engine=None,
+                 concurrent: bool = False, max_workers: int = None,
+                 deadline: float = None, candle_store=None):
         self.user_id = user_id
+        self.indicator_engine = indicator_engine
+        self.candle_store = candle_store
+        self.concurrent = concurrent
+        self.max_workers = max_workers or MTF_MAX_WORKERS
+        self.deadline = DEFAULT_DEADLINE_SECONDS if deadline is None else deadline
 
     def analyze(self, ticker: str) -> List[TimeframeSignal]:
         """Run multi-timeframe analysis for *ticker*.
@@ -318,37 +400,152 @@ class MultiTimeframeAnalyzer:
         strength 0 is returned so callers always receive 3 items.
         """
         ticker = ticker.upper().strip()
+        if self.concurrent:
+            return self.analyze_many([ticker])[ticker]
+
         crypto = _is_crypto(ticker)
-        signals: List[TimeframeSignal] = []
+        return [self._analyze_timeframe(ticker, tf, crypto) for tf in TIMEFRAMES]
 
-        for tf in TIMEFRAMES:
-            try:
-                if crypto:
-                    df = _fetch_coinbase_candles(ticker, tf, self.user_id)
-                else:
-                    df = _fetch_yfinance(ticker, tf)
-
-                if df is None or len(df) < 50:
-                    logger.warning("Insufficient data for %s/%s (%d rows)",
-                                   ticker, tf, len(df) if df is not None else 0)
-                    signals.append(TimeframeSignal(
-                        timeframe=tf, trend="neutral", strength=0,
-                        indicators={"error": "insufficient_data"},
-                    ))
-                    continue
+    def analyze_many(self, tickers: List[str], deadline: float = None) -> Dict[str, List[TimeframeSignal]]:
+        """Analyze several tickers with all (ticker, timeframe) fetches in flight at once.
 
-                indicators = compute_indicators(df)
-                signals.append(TimeframeSignal(
-                    timeframe=tf,
-                    trend=indicators["trend"],
-                    strength=indicators["strength"],
-                    indicators=indicators,
-                ))
-            except Exception as e:
-                logger.error("Multi-timeframe analysis error for %s/%s: %s", ticker, tf, e)
-                signals.append(TimeframeSignal(
+        Work runs on a bounded thread pool; provider calls are additionally
+        capped per source (``SOURCE_CONCURRENCY``).  Pairs still pending when
+        *deadline* seconds have elapsed are reported as neutral signals with
+        ``indicators={"error": "deadline_exceeded"}`` and their results are
+        discarded.  Without an indicator engine, each timeframe is scored for
+        all tickers at once via ``analysis.batch_indicators``.
+
+        Returns ``{ticker: [5m, 1h, 1d signals]}`` in input order.
+        """
+        deadline = self.deadline if deadline is None else deadline
+        ordered = list(dict.fromkeys(t.upper().strip() for t in tickers if t and t.strip()))
+        if not ordered:
+            return {}
+
+        pairs = [(ticker, tf) for ticker in ordered for tf in TIMEFRAMES]
+        crypto = {ticker: _is_crypto(ticker) for ticker in ordered}
+
+        # Coinbase credentials are loaded through Flask-SQLAlchemy, so workers
+        # need the caller's app context.
+        app = _current_flask_app()
+
+        def run(ticker: str, tf: str) -> Optional[pd.DataFrame]:
+            if app is None:
+                return self._load_frame(ticker, tf, crypto[ticker])
+            with app.app_context():
+                return self._load_frame(ticker, tf, crypto[ticker])
+
+        executor = ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(pairs)),
+            thread_name_prefix="mtf",
+        )
+        try:
+            futures = {pair: executor.submit(run, *pair) for pair in pairs}
+            wait(futures.values(), timeout=deadline)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        frames: Dict[tuple, Optional[pd.DataFrame]] = {}
+        errors: Dict[tuple, str] = {}
+        timed_out = []
+        for pair, future in futures.items():
+            if not future.done() or future.cancelled():
+                timed_out.append(pair)
+                errors[pair] = "deadline_exceeded"
+            elif future.exception() is not None:
+                logger.error("Multi-timeframe fetch error for %s/%s: %s", *pair, future.exception())
+                errors[pair] = str(future.exception())
+            else:
+                frames[pair] = future.result()
+        if timed_out:
+            logger.warning("MTF deadline of %.1fs exceeded for %s", deadline,
+                           ", ".join(f"{t}/{tf}" for t, tf in timed_out))
+
+        # Without a streaming engine, score each timeframe for all tickers in
+        # one vectorized pass once there are enough tickers to amortize the
+        # bar loop; smaller sets are scored per frame below.
+        batched: Dict[tuple, Dict[str, Any]] = {}
+        if self.indicator_engine is None:
+            from analysis.batch_indicators import batch_pays_off, compute_indicators_for_frames
+            for tf in TIMEFRAMES:
+                usable = {
+                    ticker: df for (ticker, ptf), df in frames.items()
+                    if ptf == tf and df is not None and len(df) >= 50
+                }
+                if not batch_pays_off(len(usable), max((len(df) for df in usable.values()), default=0)):
+                    continue
+                try:
+                    for ticker, indicators in compute_indicators_for_frames(usable).items():
+                        batched[(ticker, tf)] = indicators
+                except Exception as e:
+                    logger.error("Batch indicator computation failed for %s: %s", tf, e)
+
+        results: Dict[str, List[TimeframeSignal]] = {ticker: [] for ticker in ordered}
+        for ticker, tf in pairs:
+            if (ticker, tf) in errors:
+                signal = TimeframeSignal(
                     timeframe=tf, trend="neutral", strength=0,
-                    indicators={"error": str(e)},
-                ))
+                    indicators={"error": errors[(ticker, tf)]},
+                )
+            else:
+                signal = self._signal_from_frame(
+                    ticker, tf, frames[(ticker, tf)], batched.get((ticker, tf)),
+                )
+            results[ticker].append(signal)
+        return results
+
+    def _fetch(self, ticker: str, tf: str, crypto: bool, start: int = None) -> Optional[pd.DataFrame]:
+        if crypto:
+            return _fetch_coinbase_candles(ticker, tf, self.user_id, start)
+        return _fetch_yfinance(ticker, tf, start)
+
+    def _load_frame(self, ticker: str, tf: str, crypto: bool) -> Optional[pd.DataFrame]:
+        """Fetch candles for one timeframe, through the candle store when configured."""
+        if self.candle_store is not None:
+            return self.candle_store.sync(
+                ticker, tf, lambda start: self._fetch(ticker, tf, crypto, start),
+            )
+        return self._fetch(ticker, tf, crypto)
+
+    def _signal_from_frame(self, ticker: str, tf: str, df: Optional[pd.DataFrame],
+                           indicators: Dict[str, Any] = None) -> TimeframeSignal:
+        """Score one timeframe's candles (or reuse precomputed *indicators*); never raises."""
+        try:
+            if df is None or len(df) < 50:
+                logger.warning("Insufficient data for %s/%s (%d rows)",
+                               ticker, tf, len(df) if df is not None else 0)
+                return TimeframeSignal(
+                    timeframe=tf, trend="neutral", strength=0,
+                    indicators={"error": "insufficient_data"},
+                )
 
-        return signals
+            if indicators is None:
+                if self.indicator_engine is not None:
+                    indicators = self.indicator_engine.update_from_frame(ticker, tf, df)
+                else:
+                    indicators = compute_indicators(df)
+            return TimeframeSignal(
+                timeframe=tf,
+                trend=indicators["trend"],
+                strength=indicators["strength"],
+                indicators=indicators,
+            )
+        except Exception as e:
+            logger.error("Multi-timeframe analysis error for %s/%s: %s", ticker, tf, e)
+            return TimeframeSignal(
+                timeframe=tf, trend="neutral", strength=0,
+                indicators={"error": str(e)},
+            )
+
+    def _analyze_timeframe(self, ticker: str, tf: str, crypto: bool) -> TimeframeSignal:
+        """Fetch and score one timeframe; never raises."""
+        try:
+            df = self._load_frame(ticker, tf, crypto)
+        except Exception as e:
+            logger.error("Multi-timeframe analysis error for %s/%s: %s", ticker, tf, e)
+            return TimeframeSignal(
+                timeframe=tf, trend="neutral", strength=0,
+                indicators={"error": str(e)},
+            )
+        return self._signal_from_frame(ticker, tf, df)
@@ -4,19 +4,28 @@ Flask blueprint providing MTF and confluence endpoints.
 """
 
 import logging
+import os
 from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
 
 logger = logging.getLogger(__name__)
 
+# Each ticker costs three provider fetches, so one request can't queue an unbounded scan
+MTF_BATCH_MAX_TICKERS = int(os.environ.get("MTF_BATCH_MAX_TICKERS", "50"))
+
 analysis_bp = Blueprint('analysis', __name__)
 
 
 def _get_analyzer():
     """Lazy import to avoid circular imports at module load time."""
     from analysis.multi_timeframe import MultiTimeframeAnalyzer
+    from analysis.indicator_engine import get_indicator_engine
+    from analysis.candle_store import get_candle_store
     user_id = str(current_user.id) if current_user and current_user.is_authenticated else None
-    return MultiTimeframeAnalyzer(user_id=user_id)
+    return MultiTimeframeAnalyzer(
+        user_id=user_id, indicator_engine=get_indicator_engine(), concurrent=True,
+        candle_store=get_candle_store(),
+    )
 
 
 def _get_filter():
@@ -71,3 +80,48 @@ def get_confluence_score(ticker: str):
     except Exception as e:
         logger.error("Confluence analysis failed for %s: %s", ticker, e)
         return jsonify({'success': False, 'error': str(e)}), 500
+
+
+# ------------------------------------------------------------------
+# GET /api/analysis/confluence/batch?tickers=AAPL,BTC,SPY
+# ------------------------------------------------------------------
+@analysis_bp.route('/api/analysis/confluence/batch', methods=['GET'])
+@login_required
+def get_batch_confluence():
+    """Return confluence scores for a watchlist (comma-separated tickers).
+
+    All (ticker, timeframe) fetches run concurrently, so the scan costs
+    roughly one provider round trip instead of three per ticker.
+    """
+    try:
+        raw = request.args.get('tickers', '')
+        if not raw:
+            return jsonify({'success': False, 'error': 'tickers query parameter is required'}), 400
+
+        tickers = list(dict.fromkeys(t.strip().upper() for t in raw.split(',') if t.strip()))
+        if not tickers:
+            return jsonify({'success': False, 'error': 'No valid tickers provided'}), 400
+        if len(tickers) > MTF_BATCH_MAX_TICKERS:
+            return jsonify({
+                'success': False,
+                'error': f'At most {MTF_BATCH_MAX_TICKERS} tickers per request ({len(tickers)} given)',
+            }), 400
+
+        analyzer = _get_analyzer()
+        cf = _get_filter()
+        signals_by_ticker = analyzer.analyze_many(tickers)
+
+        results = {
+            ticker: cf.evaluate(signals).to_dict()
+            for ticker, signals in signals_by_ticker.items()
+        }
+
+        return jsonify({
+            'success': True,
+            'confluence': results,
+            'count': len(results),
+        })
+
+    except Exception as e:
+        logger.error("Batch confluence analysis failed: %s", e)
+        return jsonify({'success': False, 'error': str(e)}), 500
@@ -7,13 +7,33 @@ execution loop after signal/confluence checks pass.
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict, Optional
+import threading
+from typing import Any, Dict, Optional, Tuple
 
 from neural import NeuralEngineFactory
 
 logger = logging.getLogger(__name__)
 
 
+_async_engines: Dict[Tuple[Optional[str], Optional[str]], Any] = {}
+_async_engines_lock = threading.Lock()
+
+
+def _get_engine(config: Dict[str, Any]):
+    provider, model = config.get("AI_PROVIDER"), config.get("AI_MODEL")
+    if not config.get("NEURAL_ASYNC_ENABLED", False):
+        return NeuralEngineFactory.create(provider=provider, model=model)
+    # Async engines own a client bound to the shared event loop; reuse them
+    key = (provider, model)
+    engine = _async_engines.get(key)
+    if engine is None:
+        with _async_engines_lock:
+            engine = _async_engines.get(key)
+            if engine is None:
+                engine = _async_engines[key] = NeuralEngineFactory.create_async(provider=provider, model=model)
+    return engine
+
+
 def apply_neural_veto(
     *,
     config: Dict[str, Any],
@@ -28,7 +48,7 @@ def apply_neural_veto(
     if not config.get("NEURAL_ENGINE_ENABLED", False):
         return {"allowed": True, "position_size": position_size, "neural_analysis": None}
 
-    engine = NeuralEngineFactory.create(provider=config.get("AI_PROVIDER"), model=config.get("AI_MODEL"))
+    engine = _get_engine(config)
     analysis = engine.analyze_trade(
         ticker=ticker,
         market_data=latest_data,
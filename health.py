@@ -188,6 +188,7 @@ def metrics():
     try:
         from app import db
         from models import User, Trade, SystemLog
+        from utils.http_pool import http_pool_stats
         from datetime import timedelta
 
         # Count active trades (last 24 hours)
@@ -216,7 +217,8 @@ def metrics():
             },
             'logs': {
                 'last_hour': recent_logs
-            }
+            },
+            'http': http_pool_stats()
         }
 
         return jsonify(metrics_data), 200
@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Awaitable, Dict, List, Optional
+
+from .base_engine import BaseNeuralEngine, NeuralAnalysis
+from .common import analysis_from_envelope, async_retry_with_backoff, build_envelope
+from .prompts import (
+    TRADING_SYSTEM_PROMPT,
+    build_market_brief_prompt,
+    build_portfolio_review_prompt,
+    build_trade_analysis_prompt,
+    build_trade_explanation_prompt,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMITS = {
+    "claude": {"rpm": 50, "tpm": 40_000},
+    "openai": {"rpm": 500, "tpm": 30_000},
+}
+
+
+class TokenBucket:
+    """Per-minute budget that hands out reservations instead of blocking.
+
+    ``reserve`` always debits immediately (the level may go negative) and
+    returns how long the caller must wait before its reservation is covered,
+    so concurrent callers are queued fairly in reservation order.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            self.level -= min(amount, self.capacity)
+            return 0.0 if self.level >= 0 else -self.level / self.rate
+
+    def adjust(self, delta: float) -> None:
+        """Correct a reservation once the real cost is known (positive = refund)."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.level = min(self.capacity, self.level + delta)
+
+
+class ProviderRateLimiter:
+    """Requests-per-minute and tokens-per-minute buckets for one provider."""
+
+    def __init__(self, rpm: float, tpm: float):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+
+    async def acquire(self, estimated_tokens: int) -> None:
+        delay = max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def settle(self, estimated_tokens: int, actual_tokens: int) -> None:
+        self.tokens.adjust(estimated_tokens - actual_tokens)
+
+
+_limiters: Dict[str, ProviderRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str) -> ProviderRateLimiter:
+    """Process-wide limiter per provider, sized from NEURAL_<PROVIDER>_RPM/_TPM."""
+    with _limiters_lock:
+        if provider not in _limiters:
+            defaults = DEFAULT_LIMITS.get(provider, {"rpm": 60, "tpm": 60_000})
+            prefix = f"NEURAL_{provider.upper()}"
+            _limiters[provider] = ProviderRateLimiter(
+                rpm=float(os.environ.get(f"{prefix}_RPM", defaults["rpm"])),
+                tpm=float(os.environ.get(f"{prefix}_TPM", defaults["tpm"])),
+            )
+        return _limiters[provider]
+
+
+class _LoopThread:
+    """Single background event loop that sync callers submit coroutines to."""
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="neural-async-loop", daemon=True).start()
+            return self._loop
+
+    def run(self, coro: Awaitable, timeout: Optional[float] = None):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop()).result(timeout)
+
+
+_loop_thread = _LoopThread()
+
+
+def run_sync(coro: Awaitable, timeout: Optional[float] = None):
+    """Run *coro* on the shared neural event loop and wait for its result."""
+    return _loop_thread.run(coro, timeout)
+
+
+class AsyncNeuralEngine(BaseNeuralEngine):
+    """Pipelined wrapper around a Claude/OpenAI engine.
+
+    Requests go through the provider's async SDK client on a shared event
+    loop, throttled by a token bucket (RPM + TPM) instead of a one-at-a-time
+    semaphore, so up to ``max_in_flight`` calls overlap.  The wrapped engine
+    still supplies the request shape, response parsing and Redis cache.
+    """
+
+    def __init__(self, engine: BaseNeuralEngine, max_in_flight: int = None):
+        self.engine = engine
+        self.provider = engine.provider
+        self.model = engine.model
+        self.max_in_flight = max_in_flight or int(os.environ.get("NEURAL_MAX_IN_FLIGHT", "8"))
+        self.limiter = get_rate_limiter(engine.provider.value)
+
+    def _estimate_tokens(self, user_prompt: str) -> int:
+        # ~4 characters per token, plus the full completion budget
+        return (len(TRADING_SYSTEM_PROMPT) + len(user_prompt)) // 4 + self.engine.max_tokens
+
+    async def _ainvoke_json(self, user_prompt: str) -> Dict[str, Any]:
+        start = time.time()
+        cache_key = self.engine.cache.key({
+            "provider": self.provider.value,
+            "model": self.model,
+            "prompt": user_prompt,
+        })
+        cached = self.engine.cache.get(cache_key)
+        if cached:
+            return json.loads(cached)
+
+        estimated = self._estimate_tokens(user_prompt)
+
+        async def _call():
+            await self.limiter.acquire(estimated)
+            return await self.engine._acreate(user_prompt)
+
+        response = await async_retry_with_backoff(_call)
+        raw_response, parsed, input_tokens, output_tokens = self.engine._extract(response)
+        self.limiter.settle(estimated, input_tokens + output_tokens)
+
+        envelope = build_envelope(self.provider.value, self.model, start, raw_response, parsed, input_tokens, output_tokens)
+        self.engine.cache.set(cache_key, json.dumps(envelope))
+        return envelope
+
+    # ------------------------------------------------------------------
+    # Async API
+    # ------------------------------------------------------------------
+
+    async def analyze_trade_async(self, ticker, market_data, signals, sentiment=None, regime=None) -> NeuralAnalysis:
+        user_prompt = build_trade_analysis_prompt(ticker, market_data, signals, sentiment, regime)
+        feature_cache = self.engine.feature_cache
+        feature_key = feature_cache.key(self.provider.value, self.model, ticker, market_data, signals, sentiment, regime)
+        try:
+            envelope = feature_cache.get(self.provider.value, feature_key)
+            if envelope is None:
+                envelope = await self._ainvoke_json(user_prompt)
+                feature_cache.set(feature_key, envelope)
+            return analysis_from_envelope(envelope, self.provider.value, self.model)
+        except json.JSONDecodeError as exc:
+            logger.error("%s returned invalid JSON: %s", self.provider.value, exc)
+            return self.engine._neutral(f"AI response parse error: {exc}")
+        except Exception as exc:
+            logger.error("%s API error: %s", self.provider.value, exc)
+            return self.engine._neutral(f"{self.provider.value} API error: {exc}")
+
+    async def analyze_trades_batch_async(self, requests: List[Dict[str, Any]]) -> List[NeuralAnalysis]:
+        """Analyze many setups keeping at most ``max_in_flight`` requests outstanding."""
+        gate = asyncio.Semaphore(self.max_in_flight)
+
+        async def _one(req):
+            async with gate:
+                return await self.analyze_trade_async(
+                    req["ticker"],
+                    req.get("market_data", {}),
+                    req.get("signals", {}),
+                    req.get("sentiment"),
+                    req.get("regime"),
+                )
+
+        return list(await asyncio.gather(*(_one(req) for req in requests)))
+
+    async def analyze_portfolio_async(self, positions, market_overview) -> Dict[str, Any]:
+        try:
+            prompt = build_portfolio_review_prompt(positions, market_overview)
+            return (await self._ainvoke_json(prompt))["parsed"]
+        except Exception as exc:
+            logger.error("%s portfolio analysis failed: %s", self.provider.value, exc)
+            return {"error": str(exc), "overall_risk": "EXTREME"}
+
+    async def explain_trade_async(self, trade_record) -> str:
+        try:
+            prompt = build_trade_explanation_prompt(trade_record)
+            parsed = (await self._ainvoke_json(prompt))["parsed"]
+            return parsed.get("lesson") or parsed.get("what_happened", "No explanation available")
+        except Exception as exc:
+            logger.error("%s trade explanation failed: %s", self.provider.value, exc)
+            return f"Unable to explain trade: {exc}"
+
+    async def generate_market_brief_async(self, watchlist, market_data) -> str:
+        try:
+            prompt = build_market_brief_prompt(watchlist, market_data)
+            return json.dumps((await self._ainvoke_json(prompt))["parsed"])
+        except Exception as exc:
+            logger.error("%s market brief failed: %s", self.provider.value, exc)
+            return json.dumps({"error": str(exc)})
+
+    # ------------------------------------------------------------------
+    # Sync API (BaseNeuralEngine)
+    # ------------------------------------------------------------------
+
+    def analyze_trade(self, ticker, market_data, signals, sentiment=None, regime=None) -> NeuralAnalysis:
+        return run_sync(self.analyze_trade_async(ticker, market_data, signals, sentiment, regime))
+
+    def analyze_trades_batch(self, requests: List[Dict[str, Any]]) -> List[NeuralAnalysis]:
+        """Sync entry point for ``analyze_trades_batch_async``; results keep request order."""
+        return run_sync(self.analyze_trades_batch_async(requests))
+
+    def analyze_portfolio(self, positions: List[Dict[str, Any]], market_overview: Dict[str, Any]) -> Dict[str, Any]:
+        return run_sync(self.analyze_portfolio_async(positions, market_overview))
+
+    def explain_trade(self, trade_record: Dict[str, Any]) -> str:
+        return run_sync(self.explain_trade_async(trade_record))
+
+    def generate_market_brief(self, watchlist: List[str], market_data: Dict[str, Any]) -> str:
+        return run_sync(self.generate_market_brief_async(watchlist, market_data))
@@ -4,12 +4,13 @@ import json
 import logging
 import os
 import time
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-from anthropic import Anthropic
+from anthropic import Anthropic, AsyncAnthropic
 
 from .base_engine import AIProvider, BaseNeuralEngine, NeuralAnalysis
-from .common import RedisCache, RateLimitQueue, retry_with_backoff, update_usage
+from .common import RedisCache, RateLimitQueue, analysis_from_envelope, build_envelope, retry_with_backoff
+from .feature_cache import FeatureBucketCache
 from .prompts import (
     TRADING_SYSTEM_PROMPT,
     build_market_brief_prompt,
@@ -28,7 +29,32 @@ class ClaudeNeuralEngine(BaseNeuralEngine):
         self.max_tokens = max_tokens
         self.provider = AIProvider.CLAUDE
         self.cache = RedisCache()
+        self.feature_cache = FeatureBucketCache(self.cache)
         self.queue = RateLimitQueue(max_concurrent=1)
+        self._async_client = None
+
+    def _request_kwargs(self, user_prompt: str) -> Dict[str, Any]:
+        return dict(
+            model=self.model,
+            max_tokens=self.max_tokens,
+            system=TRADING_SYSTEM_PROMPT,
+            messages=[{"role": "user", "content": user_prompt}],
+        )
+
+    def _extract(self, message) -> Tuple[str, Dict[str, Any], int, int]:
+        raw_response = message.content[0].text
+        parsed = json.loads(raw_response.strip().removeprefix("```json").removesuffix("```").strip())
+        input_tokens = getattr(message.usage, "input_tokens", 0)
+        output_tokens = getattr(message.usage, "output_tokens", 0)
+        return raw_response, parsed, input_tokens, output_tokens
+
+    def _get_async_client(self) -> AsyncAnthropic:
+        if self._async_client is None:
+            self._async_client = AsyncAnthropic(api_key=self.client.api_key)
+        return self._async_client
+
+    async def _acreate(self, user_prompt: str):
+        return await self._get_async_client().messages.create(**self._request_kwargs(user_prompt))
 
     def _invoke_json(self, user_prompt: str) -> Dict[str, Any]:
         start = time.time()
@@ -43,33 +69,13 @@ class ClaudeNeuralEngine(BaseNeuralEngine):
             return json.loads(cached)
 
         def _call():
-            return self.client.messages.create(
-                model=self.model,
-                max_tokens=self.max_tokens,
-                system=TRADING_SYSTEM_PROMPT,
-                messages=[{"role": "user", "content": user_prompt}],
-            )
+            return self.client.messages.create(**self._request_kwargs(user_prompt))
 
         message = retry_with_backoff(lambda: self.queue.run(_call))
-        raw_response = message.content[0].text
-        parsed = json.loads(raw_response.strip().removeprefix("```json").removesuffix("```").strip())
+        raw_response, parsed, input_tokens, output_tokens = self._extract(message)
 
-        latency = (time.time() - start) * 1000
-        input_tokens = getattr(message.usage, "input_tokens", 0)
-        output_tokens = getattr(message.usage, "output_tokens", 0)
-        cost = update_usage(self.provider.value, input_tokens, output_tokens, latency, self.model)
-
-        envelope = {
-            "parsed": parsed,
-            "raw": raw_response,
-            "latency_ms": latency,
-            "tokens_used": input_tokens + output_tokens,
-            "input_tokens": input_tokens,
-            "output_tokens": output_tokens,
-            "cost_usd": cost,
-        }
+        envelope = build_envelope(self.provider.value, self.model, start, raw_response, parsed, input_tokens, output_tokens)
         self.cache.set(cache_key, json.dumps(envelope))
-        logger.info("Neural(%s) model=%s tokens=%s cost=$%.6f latency=%.2fms", self.provider.value, self.model, envelope["tokens_used"], cost, latency)
         return envelope
 
     def _neutral(self, reason: str) -> NeuralAnalysis:
@@ -100,26 +106,13 @@ class ClaudeNeuralEngine(BaseNeuralEngine):
         regime: Optional[str] = None,
     ) -> NeuralAnalysis:
         user_prompt = build_trade_analysis_prompt(ticker, market_data, signals, sentiment, regime)
+        feature_key = self.feature_cache.key(self.provider.value, self.model, ticker, market_data, signals, sentiment, regime)
         try:
-            envelope = self._invoke_json(user_prompt)
-            parsed = envelope["parsed"]
-            return NeuralAnalysis(
-                direction=parsed.get("direction", "NEUTRAL"),
-                confidence=float(parsed.get("confidence", 0.0)),
-                reasoning=parsed.get("reasoning", "No reasoning provided"),
-                key_factors=parsed.get("key_factors", []),
-                risk_assessment=parsed.get("risk_assessment", "HIGH"),
-                suggested_position_size=float(parsed.get("suggested_position_size", 0.0)),
-                suggested_sl_pct=parsed.get("suggested_sl_pct"),
-                suggested_tp_pct=parsed.get("suggested_tp_pct"),
-                market_context=parsed.get("market_context", "Unknown"),
-                contrarian_view=parsed.get("contrarian_view", "Unknown"),
-                raw_response=envelope["raw"],
-                provider=self.provider.value,
-                model=self.model,
-                tokens_used=int(envelope["tokens_used"]),
-                latency_ms=float(envelope["latency_ms"]),
-            )
+            envelope = self.feature_cache.get(self.provider.value, feature_key)
+            if envelope is None:
+                envelope = self._invoke_json(user_prompt)
+                self.feature_cache.set(feature_key, envelope)
+            return analysis_from_envelope(envelope, self.provider.value, self.model)
         except json.JSONDecodeError as exc:
             logger.error("Claude returned invalid JSON: %s", exc)
             return self._neutral(f"AI response parse error: {exc}")
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import json
 import logging
@@ -11,6 +12,8 @@ from typing import Any, Dict, Optional
 
 import redis
 
+from .base_engine import NeuralAnalysis
+
 logger = logging.getLogger(__name__)
 
 USAGE_STATE: Dict[str, Dict[str, float]] = defaultdict(lambda: {
@@ -20,6 +23,9 @@ USAGE_STATE: Dict[str, Dict[str, float]] = defaultdict(lambda: {
     "output_tokens": 0,
     "cost_usd": 0.0,
     "total_latency_ms": 0.0,
+    "cache_hits": 0,
+    "cache_misses": 0,
+    "cache_saved_usd": 0.0,
 })
 
 
@@ -50,13 +56,54 @@ def update_usage(provider: str, input_tokens: int, output_tokens: int, latency_m
     return cost
 
 
+def build_envelope(provider: str, model: str, start: float, raw_response: str, parsed: Dict[str, Any],
+                   input_tokens: int, output_tokens: int) -> Dict[str, Any]:
+    latency = (time.time() - start) * 1000
+    cost = update_usage(provider, input_tokens, output_tokens, latency, model)
+    envelope = {
+        "parsed": parsed,
+        "raw": raw_response,
+        "latency_ms": latency,
+        "tokens_used": input_tokens + output_tokens,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "cost_usd": cost,
+    }
+    logger.info("Neural(%s) model=%s tokens=%s cost=$%.6f latency=%.2fms", provider, model, envelope["tokens_used"], cost, latency)
+    return envelope
+
+
+def analysis_from_envelope(envelope: Dict[str, Any], provider: str, model: str) -> NeuralAnalysis:
+    """NeuralAnalysis from a cached or fresh ``build_envelope`` result."""
+    parsed = envelope["parsed"]
+    return NeuralAnalysis(
+        direction=parsed.get("direction", "NEUTRAL"),
+        confidence=float(parsed.get("confidence", 0.0)),
+        reasoning=parsed.get("reasoning", "No reasoning provided"),
+        key_factors=parsed.get("key_factors", []),
+        risk_assessment=parsed.get("risk_assessment", "HIGH"),
+        suggested_position_size=float(parsed.get("suggested_position_size", 0.0)),
+        suggested_sl_pct=parsed.get("suggested_sl_pct"),
+        suggested_tp_pct=parsed.get("suggested_tp_pct"),
+        market_context=parsed.get("market_context", "Unknown"),
+        contrarian_view=parsed.get("contrarian_view", "Unknown"),
+        raw_response=envelope["raw"],
+        provider=provider,
+        model=model,
+        tokens_used=int(envelope["tokens_used"]),
+        latency_ms=float(envelope["latency_ms"]),
+    )
+
+
 def usage_snapshot() -> Dict[str, Dict[str, float]]:
     out = {}
     for provider, state in USAGE_STATE.items():
         calls = max(int(state["calls"]), 1)
+        lookups = state["cache_hits"] + state["cache_misses"]
         out[provider] = {
             **state,
             "avg_latency_ms": state["total_latency_ms"] / calls,
+            "cache_hit_rate": state["cache_hits"] / lookups if lookups else 0.0,
         }
     return out
 
@@ -103,6 +150,10 @@ class RateLimitQueue:
             return fn(*args, **kwargs)
 
 
+def _is_transient(exc: Exception) -> bool:
+    return any(k in str(exc).lower() for k in ["timeout", "rate", "429", "temporar", "connection"])
+
+
 def retry_with_backoff(func, retries: int = None):
     retries = retries or int(os.environ.get("NEURAL_MAX_RETRIES", "3"))
     delays = [1, 2, 4]
@@ -112,8 +163,23 @@ def retry_with_backoff(func, retries: int = None):
             return func()
         except Exception as exc:
             last_exc = exc
-            transient = any(k in str(exc).lower() for k in ["timeout", "rate", "429", "temporar", "connection"])
-            if attempt >= retries - 1 or not transient:
+            if attempt >= retries - 1 or not _is_transient(exc):
                 raise
             time.sleep(delays[min(attempt, len(delays) - 1)])
     raise last_exc
+
+
+async def async_retry_with_backoff(coro_factory, retries: int = None):
+    """``retry_with_backoff`` for coroutines; waits with ``asyncio.sleep`` so the loop keeps running."""
+    retries = retries or int(os.environ.get("NEURAL_MAX_RETRIES", "3"))
+    delays = [1, 2, 4]
+    last_exc = None
+    for attempt in range(retries):
+        try:
+            return await coro_factory()
+        except Exception as exc:
+            last_exc = exc
+            if attempt >= retries - 1 or not _is_transient(exc):
+                raise
+            await asyncio.sleep(delays[min(attempt, len(delays) - 1)])
+    raise last_exc
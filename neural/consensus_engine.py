@@ -1,10 +1,14 @@
 from __future__ import annotations
 
+import asyncio
 import logging
+import os
 from collections import Counter
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Any, Dict, List, Optional
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
+from .async_engine import AsyncNeuralEngine, run_sync
 from .base_engine import BaseNeuralEngine, NeuralAnalysis
 from .engine_factory import NeuralEngineFactory
 
@@ -14,7 +18,8 @@ logger = logging.getLogger(__name__)
 class ConsensusNeuralEngine(BaseNeuralEngine):
     """Runs analysis through multiple AI providers and requires consensus."""
 
-    def __init__(self, providers: List[str] = None, consensus_mode: str = "majority"):
+    def __init__(self, providers: List[str] = None, consensus_mode: str = "majority", async_mode: bool = False,
+                 early_exit: bool = None, deadline: float = None):
         self.engines = []
         providers = providers or ["claude", "openai"]
         for provider_name in providers:
@@ -28,26 +33,196 @@ class ConsensusNeuralEngine(BaseNeuralEngine):
 
         self.consensus_mode = consensus_mode
 
-    def _consensus_direction(self, directions: List[str]) -> Optional[str]:
+        # Early exit decides as soon as the outcome can no longer change and
+        # leaves the slower providers' answers behind
+        if early_exit is None:
+            early_exit = os.environ.get("NEURAL_CONSENSUS_EARLY_EXIT", "false").lower() in ("1", "true", "yes")
+        self.early_exit = early_exit
+
+        # Seconds to wait for providers before returning whatever has arrived
+        if deadline is None:
+            deadline = float(os.environ.get("NEURAL_CONSENSUS_DEADLINE", "60"))
+        self.deadline = deadline
+
+        # Async mode pipelines provider calls on the shared neural event loop
+        # instead of creating a thread pool per call
+        self.async_mode = async_mode
+        self.async_engines = [
+            AsyncNeuralEngine(engine) if hasattr(engine, "_acreate") else None
+            for engine in self.engines
+        ] if async_mode else []
+
+    def _consensus_direction(self, directions: List[str], total: int = None) -> Optional[str]:
+        """Agreed direction, counted against *total* providers.
+
+        Providers that failed or missed the deadline still count towards
+        *total*: they are dissent in unanimous mode and non-votes in
+        majority mode, so one fast answer can never stand in for the panel.
+        """
+        total = max(total or 0, len(directions))
         counts = Counter(directions)
         top, count = counts.most_common(1)[0]
         if self.consensus_mode == "unanimous":
-            return top if count == len(directions) else None
-        return top if count > len(directions) / 2 else None
+            return top if count == total else None
+        return top if count > total / 2 else None
 
-    def analyze_trade(self, ticker, market_data, signals, sentiment=None, regime=None) -> NeuralAnalysis:
-        results: List[NeuralAnalysis] = []
-        with ThreadPoolExecutor(max_workers=len(self.engines)) as executor:
-            futures = [
-                executor.submit(engine.analyze_trade, ticker, market_data, signals, sentiment, regime)
-                for engine in self.engines
+    def _is_settled(self, directions: List[str]) -> bool:
+        """True once the remaining providers can no longer change the consensus outcome."""
+        total = len(self.engines)
+        remaining = total - len(directions)
+        if remaining == 0:
+            return True
+        counts = Counter(directions)
+        if self.consensus_mode == "unanimous":
+            # A single dissent already rules out unanimity
+            return len(counts) > 1
+        top_count = counts.most_common(1)[0][1]
+        return top_count > total / 2 or top_count + remaining <= total / 2
+
+    @staticmethod
+    def _provider_name(engine) -> str:
+        provider = getattr(engine, "provider", None)
+        return getattr(provider, "value", None) or type(engine).__name__
+
+    def _fan_out(self, method: str, *args, deadline: float = None,
+                 stop: Callable[[List[Any]], bool] = None) -> Tuple[List[Tuple[Any, Any]], List[Any]]:
+        """Call *method* on every engine concurrently.
+
+        Returns ``(completed, missing)``: ``completed`` holds ``(engine, result)``
+        pairs in completion order, ``missing`` the engines that failed, missed
+        *deadline* or were no longer needed once *stop* returned True.
+        """
+        if self.async_mode:
+            return run_sync(self._fan_out_async(method, *args, deadline=deadline, stop=stop))
+
+        completed: List[Tuple[Any, Any]] = []
+        executor = ThreadPoolExecutor(max_workers=len(self.engines))
+        futures = {executor.submit(getattr(engine, method), *args): engine for engine in self.engines}
+        try:
+            for future in as_completed(futures, timeout=deadline):
+                engine = futures[future]
+                try:
+                    completed.append((engine, future.result()))
+                except Exception as exc:
+                    logger.warning("%s %s failed: %s", self._provider_name(engine), method, exc)
+                if stop and stop([result for _, result in completed]):
+                    break
+        except FuturesTimeoutError:
+            logger.warning("Consensus %s hit its %.1fs deadline", method, deadline)
+        finally:
+            # Stragglers keep running in the background; their answers are ignored
+            executor.shutdown(wait=False, cancel_futures=True)
+        return completed, self._missing(completed)
+
+    async def _fan_out_async(self, method: str, *args, deadline: float = None,
+                             stop: Callable[[List[Any]], bool] = None) -> Tuple[List[Tuple[Any, Any]], List[Any]]:
+        tasks = {}
+        for engine, async_engine in zip(self.engines, self.async_engines):
+            if async_engine is not None:
+                coro = getattr(async_engine, f"{method}_async")(*args)
+            else:
+                coro = asyncio.to_thread(getattr(engine, method), *args)
+            tasks[asyncio.ensure_future(coro)] = engine
+
+        loop = asyncio.get_running_loop()
+        expires = None if deadline is None else loop.time() + deadline
+        completed: List[Tuple[Any, Any]] = []
+        pending = set(tasks)
+        while pending:
+            timeout = None if expires is None else max(0.0, expires - loop.time())
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                logger.warning("Consensus %s hit its %.1fs deadline", method, deadline)
+                break
+            for task in done:
+                try:
+                    completed.append((tasks[task], task.result()))
+                except Exception as exc:
+                    logger.warning("%s %s failed: %s", self._provider_name(tasks[task]), method, exc)
+            if stop and stop([result for _, result in completed]):
+                break
+
+        for task in pending:
+            task.cancel()
+        return completed, self._missing(completed)
+
+    def _missing(self, completed: List[Tuple[Any, Any]]) -> List[Any]:
+        answered = {id(engine) for engine, _ in completed}
+        return [engine for engine in self.engines if id(engine) not in answered]
+
+    def _in_engine_order(self, completed: List[Tuple[Any, Any]]) -> List[Tuple[Any, Any]]:
+        order = {id(engine): i for i, engine in enumerate(self.engines)}
+        return sorted(completed, key=lambda pair: order[id(pair[0])])
+
+    def _trade_stop_rule(self) -> Optional[Callable[[List[NeuralAnalysis]], bool]]:
+        if not self.early_exit:
+            return None
+        return lambda results: self._is_settled([r.direction for r in results])
+
+    async def analyze_trade_async(self, ticker, market_data, signals, sentiment=None, regime=None) -> NeuralAnalysis:
+        completed, missing = await self._fan_out_async(
+            "analyze_trade", ticker, market_data, signals, sentiment, regime,
+            deadline=self.deadline, stop=self._trade_stop_rule(),
+        )
+        return self._merge_results(ticker, [r for _, r in completed], [self._provider_name(e) for e in missing])
+
+    def analyze_trades_batch(self, requests: List[Dict[str, Any]]) -> List[NeuralAnalysis]:
+        """Consensus for many setups; in async mode every provider call is pipelined."""
+        if not self.async_mode:
+            return [
+                self.analyze_trade(req["ticker"], req.get("market_data", {}), req.get("signals", {}),
+                                   req.get("sentiment"), req.get("regime"))
+                for req in requests
             ]
-            for future in as_completed(futures):
-                results.append(future.result())
+
+        async def _batch():
+            return await asyncio.gather(*(
+                self.analyze_trade_async(req["ticker"], req.get("market_data", {}), req.get("signals", {}),
+                                         req.get("sentiment"), req.get("regime"))
+                for req in requests
+            ))
+
+        return list(run_sync(_batch()))
+
+    def analyze_trade(self, ticker, market_data, signals, sentiment=None, regime=None) -> NeuralAnalysis:
+        if self.async_mode:
+            return run_sync(self.analyze_trade_async(ticker, market_data, signals, sentiment, regime))
+
+        completed, missing = self._fan_out(
+            "analyze_trade", ticker, market_data, signals, sentiment, regime,
+            deadline=self.deadline, stop=self._trade_stop_rule(),
+        )
+        return self._merge_results(ticker, [r for _, r in completed], [self._provider_name(e) for e in missing])
+
+    def _merge_results(self, ticker: str, results: List[NeuralAnalysis], skipped: List[str] = None) -> NeuralAnalysis:
+        skipped = list(skipped or [])
+        if skipped:
+            logger.info("Consensus for %s settled without providers: %s", ticker, skipped)
+
+        if not results:
+            return NeuralAnalysis(
+                direction="NEUTRAL",
+                confidence=0.0,
+                reasoning="No provider answered before the consensus deadline",
+                key_factors=["consensus_timeout"],
+                risk_assessment="EXTREME",
+                suggested_position_size=0.0,
+                suggested_sl_pct=None,
+                suggested_tp_pct=None,
+                market_context="Consensus unavailable",
+                contrarian_view="No analysis available; no trade",
+                raw_response="",
+                provider="consensus",
+                model="",
+                tokens_used=0,
+                latency_ms=self.deadline * 1000 if self.deadline else 0.0,
+                skipped_providers=skipped,
+            )
 
         directions = [result.direction for result in results]
-        agreed_direction = self._consensus_direction(directions)
+        agreed_direction = self._consensus_direction(directions, total=len(results) + len(skipped))
         reasoning_map = [f"{result.provider}:{result.reasoning}" for result in results]
+        reasoning_map += [f"{name}:no answer" for name in skipped]
 
         if not agreed_direction:
             logger.info("Neural disagreement for %s: %s", ticker, reasoning_map)
@@ -67,6 +242,7 @@ class ConsensusNeuralEngine(BaseNeuralEngine):
                 model=",".join(r.model for r in results),
                 tokens_used=sum(r.tokens_used for r in results),
                 latency_ms=max(r.latency_ms for r in results),
+                skipped_providers=skipped,
             )
 
         agreeing = [r for r in results if r.direction == agreed_direction]
@@ -91,16 +267,33 @@ class ConsensusNeuralEngine(BaseNeuralEngine):
             model=",".join(r.model for r in results),
             tokens_used=sum(r.tokens_used for r in results),
             latency_ms=max(r.latency_ms for r in results),
+            skipped_providers=skipped,
         )
 
-    def analyze_portfolio(self, positions: List[Dict[str, Any]], market_overview: Dict[str, Any]) -> Dict[str, Any]:
-        responses = [engine.analyze_portfolio(positions, market_overview) for engine in self.engines]
-        return {"provider_count": len(self.engines), "responses": responses}
+    def analyze_portfolio(self, positions: List[Dict[str, Any]], market_overview: Dict[str, Any],
+                          deadline: float = None) -> Dict[str, Any]:
+        completed, missing = self._fan_out(
+            "analyze_portfolio", positions, market_overview,
+            deadline=self.deadline if deadline is None else deadline,
+        )
+        ordered = self._in_engine_order(completed)
+        return {
+            "provider_count": len(self.engines),
+            "responses": [response for _, response in ordered],
+            "providers": [self._provider_name(engine) for engine, _ in ordered],
+            "missing_providers": [self._provider_name(engine) for engine in missing],
+        }
 
-    def explain_trade(self, trade_record: Dict[str, Any]) -> str:
-        explanations = [engine.explain_trade(trade_record) for engine in self.engines]
-        return "\n".join(explanations)
+    def explain_trade(self, trade_record: Dict[str, Any], deadline: float = None) -> str:
+        completed, _ = self._fan_out(
+            "explain_trade", trade_record,
+            deadline=self.deadline if deadline is None else deadline,
+        )
+        return "\n".join(explanation for _, explanation in self._in_engine_order(completed))
 
-    def generate_market_brief(self, watchlist: List[str], market_data: Dict[str, Any]) -> str:
-        briefs = [engine.generate_market_brief(watchlist, market_data) for engine in self.engines]
-        return "\n".join(briefs)
+    def generate_market_brief(self, watchlist: List[str], market_data: Dict[str, Any], deadline: float = None) -> str:
+        completed, _ = self._fan_out(
+            "generate_market_brief", watchlist, market_data,
+            deadline=self.deadline if deadline is None else deadline,
+        )
+        return "\n".join(brief for _, brief in self._in_engine_order(completed))
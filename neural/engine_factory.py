@@ -44,6 +44,21 @@ class NeuralEngineFactory:
         logger.info("Neural engine initialized: %s (model: %s)", provider_enum.value, model or "default")
         return engine_class(model=model)
 
+    @classmethod
+    def create_async(cls, provider: str = None, model: str = None) -> BaseNeuralEngine:
+        """Like ``create`` but returns an engine whose calls are pipelined and token-bucket limited."""
+        if (provider or os.environ.get("AI_PROVIDER", "auto")) == "consensus":
+            from .consensus_engine import ConsensusNeuralEngine
+
+            return ConsensusNeuralEngine(
+                consensus_mode=os.environ.get("NEURAL_CONSENSUS_MODE", "unanimous"),
+                async_mode=True,
+            )
+
+        from .async_engine import AsyncNeuralEngine
+
+        return AsyncNeuralEngine(cls.create(provider=provider, model=model))
+
     @classmethod
     def register_provider(cls, provider: AIProvider, engine_class):
         cls._engines[provider] = engine_class
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from .common import USAGE_STATE, RedisCache
+
+logger = logging.getLogger(__name__)
+
+# Keys whose values change every call without changing the setup
+VOLATILE_KEYS = {"timestamp", "time", "created_at", "updated_at", "generated_at", "as_of"}
+# Strings longer than this are free text (e.g. prior reasoning), not features
+MAX_FEATURE_STRING = 32
+
+RSI_ZONES = [(30, "oversold"), (45, "weak"), (55, "neutral"), (70, "strong")]
+# Signal keys holding a price level (stops, targets, moving averages, bands)
+PRICE_KEY_PATTERN = re.compile(
+    r"(?:^|_)(?:price|stop|target|take_profit|entry|close|open|high|low|sma|ema|vwap|bb|support|resistance|level)"
+    r"\d*(?:_|$)"
+)
+
+
+def _price_band(price: Any, band_pct: float) -> Any:
+    """Log-spaced band index so a band is ``band_pct`` wide at any price level."""
+    try:
+        price = float(price)
+    except (TypeError, ValueError):
+        return str(price)
+    if price <= 0 or math.isnan(price):
+        return None
+    return int(math.floor(math.log(price) / math.log1p(band_pct / 100.0)))
+
+
+def _rsi_zone(value: float) -> str:
+    for upper, zone in RSI_ZONES:
+        if value < upper:
+            return zone
+    return "overbought"
+
+
+def _bin(value: Any, width: float) -> Any:
+    try:
+        return int(math.floor(float(value) / width))
+    except (TypeError, ValueError):
+        return None
+
+
+def _quantize(key: str, value: Any, price_band_pct: float = 0.5) -> Any:
+    """Canonical, coarse form of one signal value."""
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        if isinstance(value, float) and math.isnan(value):
+            return None
+        if "rsi" in key.lower():
+            return _rsi_zone(value)
+        # Price levels get the same relative band as spot; 2 s.f. would be ~10% wide
+        if PRICE_KEY_PATTERN.search(key.lower()):
+            return _price_band(value, price_band_pct)
+        # Two significant figures for every other numeric feature
+        return float(f"{value:.2g}")
+    if isinstance(value, str):
+        return value.strip().upper() if len(value) <= MAX_FEATURE_STRING else None
+    if isinstance(value, dict):
+        return _canonical(value, price_band_pct)
+    if isinstance(value, (list, tuple)):
+        return [_quantize(key, v, price_band_pct) for v in value]
+    return str(value)
+
+
+def _canonical(data: Optional[Dict[str, Any]], price_band_pct: float = 0.5) -> Dict[str, Any]:
+    if not data:
+        return {}
+    out = {}
+    for key, value in data.items():
+        if str(key).lower() in VOLATILE_KEYS:
+            continue
+        quantized = _quantize(str(key), value, price_band_pct)
+        if quantized is not None:
+            out[str(key)] = quantized
+    return out
+
+
+def trade_features(
+    ticker: str,
+    market_data: Dict[str, Any],
+    signals: Dict[str, Any],
+    sentiment: Optional[Dict[str, Any]] = None,
+    regime: Optional[str] = None,
+    price_band_pct: float = 0.5,
+    sentiment_bin: float = 0.25,
+    level_band_pct: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Bucket the inputs of ``build_trade_analysis_prompt`` into a canonical feature dict.
+
+    Price-like signals (stops, targets, moving averages) are banded
+    ``level_band_pct`` wide, defaulting to the spot ``price_band_pct``.
+    """
+    market_data = market_data or {}
+    sentiment = sentiment or {}
+    return {
+        "ticker": ticker.upper(),
+        "asset_class": str(market_data.get("asset_class", "UNKNOWN")).upper(),
+        "price_band": _price_band(market_data.get("current_price", market_data.get("price")), price_band_pct),
+        "volume_trend": _quantize("volume_trend", market_data.get("volume_trend")),
+        "atr_quintile": _bin(market_data.get("atr_percentile"), 20),
+        "signals": _canonical(signals, price_band_pct if level_band_pct is None else level_band_pct),
+        "sentiment": {
+            "score_bin": _bin(sentiment.get("score"), sentiment_bin),
+            "momentum": _bin(sentiment.get("momentum"), sentiment_bin),
+            "label": _quantize("label", sentiment.get("label")),
+        } if sentiment else None,
+        "regime": (regime or "UNKNOWN").upper(),
+    }
+
+
+class FeatureBucketCache:
+    """Trade-analysis cache keyed on quantized features rather than exact prompt text.
+
+    Two setups that differ only by a cent of price or a point of RSI inside
+    the same zone share an entry, so repeated loop iterations reuse the last
+    analysis until ``NEURAL_FEATURE_CACHE_TTL`` seconds have passed.  Entries
+    live in Redis when available, otherwise in a bounded in-process LRU.
+    """
+
+    def __init__(self, redis_cache: Optional[RedisCache] = None):
+        self.enabled = os.environ.get("NEURAL_FEATURE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+        self.ttl = int(os.environ.get("NEURAL_FEATURE_CACHE_TTL", "120"))
+        self.price_band_pct = float(os.environ.get("NEURAL_CACHE_PRICE_BAND_PCT", "0.5"))
+        self.level_band_pct = float(os.environ.get("NEURAL_CACHE_LEVEL_BAND_PCT", str(self.price_band_pct)))
+        self.sentiment_bin = float(os.environ.get("NEURAL_CACHE_SENTIMENT_BIN", "0.25"))
+        self.max_local_entries = int(os.environ.get("NEURAL_FEATURE_CACHE_SIZE", "2048"))
+        self.redis = redis_cache
+        self._local: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, provider: str, model: str, ticker: str, market_data: Dict[str, Any],
+            signals: Dict[str, Any], sentiment: Optional[Dict[str, Any]] = None,
+            regime: Optional[str] = None) -> str:
+        features = trade_features(ticker, market_data, signals, sentiment, regime,
+                                  self.price_band_pct, self.sentiment_bin, self.level_band_pct)
+        stable = json.dumps({"provider": provider, "model": model, "features": features}, sort_keys=True, default=str)
+        return f"neural:features:{hashlib.sha256(stable.encode('utf-8')).hexdigest()}"
+
+    def get(self, provider: str, key: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        envelope = self._read(key)
+        state = USAGE_STATE[provider]
+        if envelope is None:
+            state["cache_misses"] += 1
+            return None
+        state["cache_hits"] += 1
+        state["cache_saved_usd"] += float(envelope.get("cost_usd", 0.0))
+        return envelope
+
+    def set(self, key: str, envelope: Dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+        if self.redis and self.redis.client:
+            try:
+                self.redis.client.setex(key, self.ttl, json.dumps(envelope))
+                return
+            except Exception as exc:
+                logger.debug("Feature cache write to Redis failed: %s", exc)
+        with self._lock:
+            self._local[key] = (time.monotonic() + self.ttl, envelope)
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_local_entries:
+                self._local.popitem(last=False)
+
+    def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.redis and self.redis.client:
+            try:
+                cached = self.redis.get(key)
+                return json.loads(cached) if cached else None
+            except Exception as exc:
+                logger.debug("Feature cache read from Redis failed: %s", exc)
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return None
+            expires, envelope = entry
+            if time.monotonic() >= expires:
+                del self._local[key]
+                return None
+            self._local.move_to_end(key)
+            return envelope
@@ -110,232 +110,28 @@ def get_dashboard_market_data():
 
     return market_data
 
-def get_account_balance():
-    """Get REAL-TIME account balance from connected APIs with live data"""
+def get_account_balance(force_refresh=False):
+    """Get REAL-TIME account balance from connected APIs with live data
+
+    Providers are queried concurrently, each bounded by a timeout, and
+    recent balances are served from a short-TTL cache.
+    """
     from models import APICredential
-    from utils.encryption import decrypt_credentials
-    from utils.real_time_data import RealTimeDataFetcher
-    
-    balance_data = {
-        'total': 0,
-        'breakdown': {},
-        'accounts': [],
-        'last_updated': datetime.utcnow().isoformat(),
-        'errors': []
-    }
-    
+    from utils.balance_aggregator import BalanceAggregator
+
     try:
         from app import db
-        # Initialize real-time data fetcher
-        fetcher = RealTimeDataFetcher(current_user.id)
-        
+
         # Get user's API credentials
         credentials = APICredential.query.filter_by(
             user_id=current_user.id,
             is_active=True
         ).all()
-        
+
         logging.info(f"Processing {len(credentials)} API credentials for real-time balance")
-        
-        for cred in credentials:
-            account_info = {
-                'provider': cred.provider,
-                'balance': 0,
-                'currency': 'USD',
-                'account_type': 'unknown',
-                'status': 'disconnected',
-                'last_updated': datetime.utcnow().isoformat()
-            }
-            
-            try:
-                decrypted_creds = decrypt_credentials(cred.encrypted_credentials)
-                logging.info(f"Processing {cred.provider} credentials for user {current_user.id}")
-                
-                if cred.provider == 'coinbase':
-                    # Get LIVE Coinbase balance using OAuth helper for automatic token refresh
-                    try:
-                        from utils.coinbase_oauth import CoinbaseOAuth
-
-                        # Always use OAuth helper to ensure tokens are refreshed if needed
-                        coinbase_oauth = CoinbaseOAuth(user_id=current_user.id)
-                        access_token = coinbase_oauth.get_valid_token(cred.encrypted_credentials)
-
-                        if access_token:
-                            # Use user_id for v2 API support
-                            result = fetcher.get_live_coinbase_balance(access_token=access_token, user_id=str(current_user.id))
-
-                            if result.get('success'):
-                                account_info['balance'] = result['balance']
-                                account_info['status'] = 'connected'
-                                account_info['account_type'] = 'crypto'
-                                account_info['holdings'] = result.get('holdings', [])
-                                account_info['last_updated'] = result['timestamp']
-                                account_info['api_version'] = result.get('api_version', 'v1')
-                                cred.test_status = 'success'
-                                logging.info(f"Coinbase balance fetched: ${result['balance']:.2f} using {result.get('api_version', 'v1')} API")
-                            else:
-                                account_info['status'] = 'error'
-                                error_msg = f"Coinbase: {result.get('error', 'Failed to fetch balance')}"
-                                balance_data['errors'].append(error_msg)
-                                cred.test_status = 'failed'
-                                logging.error(f"Coinbase API error: {error_msg}")
-                        else:
-                            account_info['status'] = 'error'
-                            error_msg = 'Coinbase: Token expired and refresh failed. Please re-authenticate in API Settings.'
-                            balance_data['errors'].append(error_msg)
-                            cred.test_status = 'failed'
-                            logging.error(f"Coinbase token error for user {current_user.id}: {error_msg}")
-
-                    except Exception as e:
-                        account_info['status'] = 'error'
-                        error_msg = f'Coinbase: {str(e)}'
-                        balance_data['errors'].append(error_msg)
-                        cred.test_status = 'failed'
-                        logging.error(f"Coinbase error for user {current_user.id}: {str(e)}")
-                        import traceback
-                        traceback.print_exc()
-                
-                elif cred.provider == 'schwab':
-                    # Get LIVE Schwab balance using OAuth helper for automatic token refresh
-                    try:
-                        from utils.schwab_oauth import SchwabOAuth
-
-                        # Check for legacy credentials
-                        if 'api_key' in decrypted_creds and 'secret' in decrypted_creds and 'access_token' not in decrypted_creds:
-                            account_info['status'] = 'error'
-                            error_msg = 'Schwab: OAuth2 authentication required. Please re-authenticate in API Settings.'
-                            balance_data['errors'].append(error_msg)
-                            cred.test_status = 'failed'
-                            logging.warning(f"Schwab legacy credentials detected for user {current_user.id} - OAuth2 required")
-                        else:
-                            # Always use OAuth helper to ensure tokens are refreshed if needed
-                            schwab_oauth = SchwabOAuth(user_id=current_user.id)
-                            access_token = schwab_oauth.get_valid_token(cred.encrypted_credentials)
-
-                            if access_token:
-                                # Fetch balance and positions
-                                result = fetcher.get_live_schwab_balance(str(current_user.id))
-                                positions_result = fetcher.get_live_schwab_positions(str(current_user.id))
-
-                                if result.get('success'):
-                                    account_info['balance'] = result['balance']
-                                    account_info['status'] = 'connected'
-                                    account_info['account_type'] = 'brokerage'
-                                    account_info['accounts'] = result.get('accounts', [])
-
-                                    # Add positions to accounts
-                                    if positions_result.get('success'):
-                                        position_map = {p['account_number']: p.get('positions', []) for p in positions_result.get('accounts', [])}
-                                        for acc in account_info['accounts']:
-                                            acc['positions'] = position_map.get(acc['account_number'], [])
-
-                                    account_info['last_updated'] = result['timestamp']
-                                    cred.test_status = 'success'
-                                    logging.info(f"Schwab balance fetched: ${result['balance']:.2f} from {len(account_info['accounts'])} accounts")
-                                else:
-                                    account_info['status'] = 'error'
-                                    error_msg = f"Schwab: {result.get('error', 'Failed to fetch balance')}"
-                                    balance_data['errors'].append(error_msg)
-                                    cred.test_status = 'failed'
-                                    logging.error(f"Schwab API error: {error_msg}")
-                            else:
-                                account_info['status'] = 'error'
-                                error_msg = 'Schwab: Token expired and refresh failed. Please re-authenticate in API Settings.'
-                                balance_data['errors'].append(error_msg)
-                                cred.test_status = 'failed'
-                                logging.error(f"Schwab token error for user {current_user.id}: {error_msg}")
-
-                    except Exception as e:
-                        account_info['status'] = 'error'
-                        error_msg = f'Schwab: {str(e)}'
-                        balance_data['errors'].append(error_msg)
-                        cred.test_status = 'failed'
-                        logging.error(f"Schwab error for user {current_user.id}: {str(e)}")
-                        import traceback
-                        traceback.print_exc()
-                
 
-                elif cred.provider == 'alpaca':
-                    try:
-                        paper = bool(decrypted_creds.get('paper', True))
-                        result = fetcher.get_live_alpaca_balance(
-                            decrypted_creds.get('api_key'),
-                            decrypted_creds.get('secret_key'),
-                            paper=paper
-                        )
-
-                        if result.get('success'):
-                            account_info['balance'] = result['balance']
-                            account_info['status'] = 'connected'
-                            account_info['account_type'] = 'brokerage'
-                            account_info['last_updated'] = result['timestamp']
-                            account_info['details'] = result.get('account', {})
-                            cred.test_status = 'success'
-                        else:
-                            account_info['status'] = 'error'
-                            error_msg = f"Alpaca: {result.get('error', 'Failed to fetch balance')}"
-                            balance_data['errors'].append(error_msg)
-                            cred.test_status = 'failed'
-                    except Exception as e:
-                        account_info['status'] = 'error'
-                        error_msg = f'Alpaca: {str(e)}'
-                        balance_data['errors'].append(error_msg)
-                        cred.test_status = 'failed'
-                        logging.error(f"Alpaca error for user {current_user.id}: {str(e)}")
-
-                elif cred.provider == 'etrade':
-                    # Get LIVE E-trade balance using OAuth 1.0a
-                    required_fields = ['client_key', 'client_secret', 'access_token', 'access_secret']
-                    if all(field in decrypted_creds for field in required_fields):
-                        client_key = decrypted_creds['client_key']
-                        client_secret = decrypted_creds['client_secret']
-                        access_token = decrypted_creds['access_token']
-                        access_secret = decrypted_creds['access_secret']
-                        
-                        result = fetcher.get_live_etrade_balance(client_key, client_secret, access_token, access_secret)
-                        positions_result = fetcher.get_live_etrade_positions(client_key, client_secret, access_token, access_secret)
-                        
-                        if result.get('success'):
-                            account_info['balance'] = result['balance']
-                            account_info['status'] = 'connected'
-                            account_info['account_type'] = 'brokerage'
-                            account_info['accounts'] = result.get('accounts', [])
-                            if positions_result.get('success'):
-                                position_map = {p['account_id']: p.get('positions', []) for p in positions_result.get('accounts', [])}
-                                for acc in account_info['accounts']:
-                                    acc['positions'] = position_map.get(acc.get('account_id'), [])
-                            account_info['last_updated'] = result['timestamp']
-                            cred.test_status = 'success'
-                            logging.info(f"E-trade balance fetched: ${result['balance']:.2f}")
-                        else:
-                            account_info['status'] = 'error'
-                            error_msg = f"E-trade: {result.get('error', 'Unknown error')}"
-                            balance_data['errors'].append(error_msg)
-                            cred.test_status = 'failed'
-                            logging.error(f"E-trade error: {error_msg}")
-                    else:
-                        account_info['status'] = 'error'
-                        error_msg = 'E-trade: OAuth 1.0a credentials missing. Please configure E-trade OAuth credentials.'
-                        balance_data['errors'].append(error_msg)
-                        cred.test_status = 'failed'
-                        logging.warning(f"E-trade credentials incomplete for user {current_user.id}")
-                
-                # Add to accounts list and update totals
-                balance_data['accounts'].append(account_info)
-                if account_info['status'] == 'connected' and account_info['balance'] > 0:
-                    balance_data['total'] += account_info['balance']
-                    balance_data['breakdown'][cred.provider] = account_info['balance']
-                
-                # Update last tested timestamp
-                cred.last_tested = datetime.utcnow()
-                
-            except Exception as e:
-                logging.error(f"Error processing {cred.provider} credentials: {str(e)}")
-                account_info['status'] = 'error'
-                balance_data['errors'].append(f'{cred.provider}: {str(e)}')
-                cred.test_status = 'failed'
-                balance_data['accounts'].append(account_info)
-        
+        balance_data = BalanceAggregator(current_user.id).aggregate(credentials, force_refresh=force_refresh)
+
         # Update database with test results
         try:
             db.session.commit()
@@ -343,10 +139,10 @@ def get_account_balance():
             logging.error(f"Error updating credential test status: {str(e)}")
             db.session.rollback()
             # Continue anyway - balance data is still valid
-        
+
         logging.info(f"Real-time balance fetch complete. Total: ${balance_data['total']:.2f}")
         return balance_data
-    
+
     except Exception as e:
         logging.error(f"Error in get_account_balance: {str(e)}")
         return {
@@ -1965,7 +1761,8 @@ def debug_account_balance():
 def get_live_balance():
     """API endpoint for real-time account balance updates"""
     try:
-        balance_data = get_account_balance()
+        force_refresh = request.args.get('refresh', '').lower() in ('1', 'true', 'yes')
+        balance_data = get_account_balance(force_refresh=force_refresh)
         return jsonify(balance_data)
     except Exception as e:
         return jsonify({
@@ -2709,6 +2506,34 @@ def comprehensive_market_data():
         logging.error(f"Error fetching comprehensive market data: {str(e)}")
         return jsonify({'success': False, 'error': str(e)})
 
+@main_bp.route('/api/market-screener')
+@login_required
+def market_screener():
+    """Technical indicator screen across many symbols (vectorized)"""
+    try:
+        from utils.comprehensive_market_data import ComprehensiveMarketDataProvider
+        
+        comprehensive_provider = ComprehensiveMarketDataProvider()
+        
+        raw = request.args.get('symbols', '')
+        symbols = [s.strip().upper() for s in raw.split(',') if s.strip()]
+        limit = min(request.args.get('limit', 50, type=int), 500)
+        period = request.args.get('period', '6mo')
+        interval = request.args.get('interval', '1d')
+        
+        screen = comprehensive_provider.get_technical_screen(symbols or None, limit, period, interval)
+        
+        return jsonify({
+            'success': True,
+            'data': screen,
+            'total_symbols': len(screen),
+            'timestamp': datetime.utcnow().isoformat()
+        })
+        
+    except Exception as e:
+        logging.error(f"Error computing market screener: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)})
+
 
 # ========================================
 # TRADE ANALYTICS AND PERFORMANCE ROUTES
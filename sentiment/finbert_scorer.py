@@ -0,0 +1,162 @@
+"""
+FinBERT Scoring Service - batched, deduplicated inference with a per-text cache.
+Texts from every source and ticker in a cycle are scored together: duplicates
+collapse to one content hash, known hashes come from cache, and only unseen
+texts go through the pipeline, sorted by length so each batch pads minimally.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+NEUTRAL_SCORE = {"score": 0.0, "confidence": 0.0}
+
+
+def text_hash(text: str) -> str:
+    """Content hash of a text, insensitive to case and whitespace."""
+    normalised = " ".join(text.split()).lower()
+    return hashlib.sha1(normalised.encode("utf-8")).hexdigest()
+
+
+def label_to_score(result: Dict[str, Any]) -> Dict[str, float]:
+    """Map a FinBERT {label, score} output to the -1.0 .. 1.0 range."""
+    label = result["label"].lower()
+    conf = float(result["score"])
+    if label == "positive":
+        score = conf
+    elif label == "negative":
+        score = -conf
+    else:  # neutral
+        score = 0.0
+    return {"score": score, "confidence": conf}
+
+
+class FinBERTScoringService:
+    """Process-wide FinBERT scorer.
+
+    Scores never change for the same text and model, so they are cached
+    without expiry: in a bounded in-process LRU, and in Redis (no timeout)
+    when a cache backend is supplied so workers share them.
+    """
+
+    CACHE_PREFIX = "arbion_finbert_"
+
+    def __init__(self, pipeline_factory=None, redis=None,
+                 batch_size: Optional[int] = None, max_entries: Optional[int] = None):
+        if pipeline_factory is None:
+            from sentiment.sentiment_engine import _get_finbert_pipeline
+            pipeline_factory = _get_finbert_pipeline
+        self._pipeline_factory = pipeline_factory
+        self._redis = redis
+        self.batch_size = batch_size or int(os.environ.get("FINBERT_BATCH_SIZE", "32"))
+        self.max_entries = max_entries or int(os.environ.get("FINBERT_SCORE_CACHE_SIZE", "50000"))
+        self._scores: "OrderedDict[str, Dict[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Serialises pipeline calls; the model is not safe to share across threads
+        self._inference_lock = threading.Lock()
+        self.stats = {"requested": 0, "unique": 0, "cache_hits": 0, "inferred": 0}
+
+    # ------------------------------------------------------------------
+    # Cache helpers
+    # ------------------------------------------------------------------
+    def _remember(self, scores: Dict[str, Dict[str, float]]) -> None:
+        with self._lock:
+            for key, value in scores.items():
+                self._scores[key] = value
+                self._scores.move_to_end(key)
+            while len(self._scores) > self.max_entries:
+                self._scores.popitem(last=False)
+
+    def _lookup_local(self, keys: Iterable[str]) -> Dict[str, Dict[str, float]]:
+        found = {}
+        with self._lock:
+            for key in keys:
+                value = self._scores.get(key)
+                if value is not None:
+                    self._scores.move_to_end(key)
+                    found[key] = value
+        return found
+
+    def _lookup_redis(self, keys: List[str]) -> Dict[str, Dict[str, float]]:
+        if self._redis is None or not keys:
+            return {}
+        try:
+            values = self._redis.get_many(*[self.CACHE_PREFIX + k for k in keys])
+        except Exception as e:
+            logger.debug(f"FinBERT score cache read error: {e}")
+            return {}
+        return {key: value for key, value in zip(keys, values) if value is not None}
+
+    def _store_redis(self, scores: Dict[str, Dict[str, float]]) -> None:
+        if self._redis is None or not scores:
+            return
+        try:
+            self._redis.set_many({self.CACHE_PREFIX + k: v for k, v in scores.items()}, timeout=0)
+        except Exception as e:
+            logger.debug(f"FinBERT score cache write error: {e}")
+
+    # ------------------------------------------------------------------
+    # Inference
+    # ------------------------------------------------------------------
+    def _infer(self, texts: Dict[str, str]) -> Dict[str, Dict[str, float]]:
+        """Run unseen texts through FinBERT in length-sorted batches."""
+        ordered = sorted(texts.items(), key=lambda item: len(item[1]))
+        pipe = self._pipeline_factory()
+        scores = {}
+        with self._inference_lock:
+            for start in range(0, len(ordered), self.batch_size):
+                chunk = ordered[start:start + self.batch_size]
+                raw_results = pipe([text for _, text in chunk], batch_size=len(chunk))
+                for (key, _), result in zip(chunk, raw_results):
+                    scores[key] = label_to_score(result)
+        return scores
+
+    def score(self, texts: List[str]) -> List[Dict[str, float]]:
+        """Score texts, returning one {"score", "confidence"} dict per input in order."""
+        if not texts:
+            return []
+
+        keys = [text_hash(text) for text in texts]
+        unique: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            unique.setdefault(key, text)
+        scores = self._lookup_local(unique)
+        remote = self._lookup_redis([k for k in unique if k not in scores])
+        if remote:
+            self._remember(remote)
+            scores.update(remote)
+
+        missing = {k: t for k, t in unique.items() if k not in scores}
+        if missing:
+            fresh = self._infer(missing)
+            self._remember(fresh)
+            self._store_redis(fresh)
+            scores.update(fresh)
+
+        with self._lock:
+            self.stats["requested"] += len(texts)
+            self.stats["unique"] += len(unique)
+            self.stats["cache_hits"] += len(unique) - len(missing)
+            self.stats["inferred"] += len(missing)
+        if missing:
+            logger.info(f"FinBERT scored {len(missing)} new of {len(unique)} unique texts ({len(texts)} requested)")
+        return [scores.get(key, NEUTRAL_SCORE) for key in keys]
+
+
+_scoring_service = None
+_scoring_service_lock = threading.Lock()
+
+
+def get_scoring_service(redis=None) -> FinBERTScoringService:
+    """Shared scorer so every SentimentEngine instance reuses the same score cache."""
+    global _scoring_service
+    if _scoring_service is None:
+        with _scoring_service_lock:
+            if _scoring_service is None:
+                _scoring_service = FinBERTScoringService(redis=redis)
+    return _scoring_service
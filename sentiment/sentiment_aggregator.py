@@ -4,11 +4,15 @@ Combines Finnhub, Alpha Vantage (news) and Reddit scores with configurable weigh
 computes 4-hour sentiment momentum, and emits SentimentSignal dataclasses.
 """
 
+import heapq
 import logging
-from datetime import datetime, timedelta
+import time
+from datetime import datetime
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass, asdict
 
+from sentiment.timeseries import get_sentiment_series
+
 logger = logging.getLogger(__name__)
 
 
@@ -37,17 +41,9 @@ class SentimentAggregator:
     # How far back to look for momentum calculation
     MOMENTUM_WINDOW_HOURS = 4
 
-    def __init__(self):
-        # Redis for historical score storage (momentum calculation)
-        self._redis = None
-        try:
-            from app import cache
-            self._redis = cache
-        except Exception:
-            logger.warning("Redis unavailable for sentiment aggregator; momentum will default to 0")
-
-        # In-memory fallback for momentum history
-        self._history: Dict[str, List[Dict]] = {}
+    def __init__(self, series=None):
+        # Timestamped score history for momentum (Redis sorted sets or in-memory buffers)
+        self._series = series if series is not None else get_sentiment_series()
 
     # ------------------------------------------------------------------
     # Public API
@@ -63,10 +59,9 @@ class SentimentAggregator:
             - timestamp: str
         """
         ticker = analysis.get("ticker", "")
-        sources = analysis.get("sources", {})
 
         # Compute weighted score across sources
-        weighted_score, total_weight, total_confidence = self._weighted_average(sources)
+        weighted_score, total_weight, total_confidence = self._weighted_average(analysis.get("sources", {}))
 
         # Compute momentum
         momentum = self._compute_momentum(ticker, weighted_score)
@@ -74,6 +69,11 @@ class SentimentAggregator:
         # Store current score for future momentum calculations
         self._store_score(ticker, weighted_score)
 
+        return self._signal(ticker, weighted_score, momentum, total_confidence, analysis)
+
+    @staticmethod
+    def _signal(ticker: str, weighted_score: float, momentum: float,
+                total_confidence: float, analysis: Dict[str, Any]) -> SentimentSignal:
         return SentimentSignal(
             ticker=ticker,
             score=round(max(-1.0, min(1.0, weighted_score)), 4),
@@ -84,20 +84,30 @@ class SentimentAggregator:
         )
 
     def aggregate_batch(self, analyses: Dict[str, Dict]) -> Dict[str, SentimentSignal]:
-        """Aggregate multiple tickers. Input: {ticker: analysis_dict}."""
+        """Aggregate multiple tickers. Input: {ticker: analysis_dict}.
+
+        History reads and writes for the whole batch each go to the series
+        in a single call (one Redis pipeline round trip apiece).
+        """
+        scored = {}
+        for key, analysis in analyses.items():
+            weighted_score, _, total_confidence = self._weighted_average(analysis.get("sources", {}))
+            scored[key] = (analysis.get("ticker", ""), weighted_score, total_confidence)
+
+        tickers = {ticker for ticker, _, _ in scored.values()}
+        bases = self._momentum_bases(tickers)
+        self._store_scores({ticker: score for ticker, score, _ in scored.values()})
+
         signals = {}
-        for ticker, analysis in analyses.items():
-            signals[ticker] = self.aggregate(analysis)
+        for key, (ticker, weighted_score, total_confidence) in scored.items():
+            base = bases.get(ticker)
+            momentum = 0.0 if base is None else weighted_score - base
+            signals[key] = self._signal(ticker, weighted_score, momentum, total_confidence, analyses[key])
         return signals
 
     def get_trending(self, signals: Dict[str, SentimentSignal], top_n: int = 10) -> List[SentimentSignal]:
         """Return top-N tickers sorted by absolute momentum (most momentum first)."""
-        sorted_signals = sorted(
-            signals.values(),
-            key=lambda s: abs(s.momentum),
-            reverse=True,
-        )
-        return sorted_signals[:top_n]
+        return heapq.nlargest(top_n, signals.values(), key=lambda s: abs(s.momentum))
 
     # ------------------------------------------------------------------
     # Weighted average
@@ -140,62 +150,30 @@ class SentimentAggregator:
     # ------------------------------------------------------------------
     # Momentum (is sentiment improving or declining over 4 hours?)
     # ------------------------------------------------------------------
+    def _momentum_bases(self, tickers) -> Dict[str, Optional[float]]:
+        """Baseline score per ticker: mean of scores older than the window, else the earliest kept."""
+        now = time.time()
+        cutoff = now - self.MOMENTUM_WINDOW_HOURS * 3600
+        try:
+            return self._series.momentum_bases(tickers, cutoff, now)
+        except Exception as e:
+            logger.debug(f"Sentiment history read error: {e}")
+            return {}
+
     def _compute_momentum(self, ticker: str, current_score: float) -> float:
         """Compute score delta over the momentum window."""
-        history = self._load_history(ticker)
-        if not history:
+        base = self._momentum_bases([ticker]).get(ticker)
+        if base is None:
             return 0.0
+        return current_score - base
 
-        cutoff = datetime.utcnow() - timedelta(hours=self.MOMENTUM_WINDOW_HOURS)
-        older_scores = [
-            h["score"] for h in history
-            if datetime.fromisoformat(h["timestamp"]) <= cutoff
-        ]
-
-        if not older_scores:
-            # Not enough history yet; use earliest available
-            oldest = history[0]["score"] if history else current_score
-            return current_score - oldest
-
-        avg_old = sum(older_scores) / len(older_scores)
-        return current_score - avg_old
+    def _store_scores(self, scores: Dict[str, float]) -> None:
+        """Persist timestamped scores for momentum tracking."""
+        try:
+            self._series.append_many(scores)
+        except Exception as e:
+            logger.debug(f"Sentiment history write error: {e}")
 
     def _store_score(self, ticker: str, score: float) -> None:
         """Persist a timestamped score for momentum tracking."""
-        entry = {"score": score, "timestamp": datetime.utcnow().isoformat()}
-        cache_key = f"arbion_sentiment_history_{ticker}"
-
-        # Try Redis first
-        if self._redis is not None:
-            try:
-                history = self._redis.get(cache_key) or []
-                history.append(entry)
-                # Keep only last 24 hours
-                cutoff = (datetime.utcnow() - timedelta(hours=24)).isoformat()
-                history = [h for h in history if h["timestamp"] >= cutoff]
-                self._redis.set(cache_key, history, timeout=86400)
-                return
-            except Exception as e:
-                logger.debug(f"Redis history write error: {e}")
-
-        # Fallback to in-memory
-        if ticker not in self._history:
-            self._history[ticker] = []
-        self._history[ticker].append(entry)
-        # Prune old entries
-        cutoff = (datetime.utcnow() - timedelta(hours=24)).isoformat()
-        self._history[ticker] = [h for h in self._history[ticker] if h["timestamp"] >= cutoff]
-
-    def _load_history(self, ticker: str) -> List[Dict]:
-        """Load historical scores for a ticker."""
-        cache_key = f"arbion_sentiment_history_{ticker}"
-
-        if self._redis is not None:
-            try:
-                history = self._redis.get(cache_key)
-                if history:
-                    return history
-            except Exception as e:
-                logger.debug(f"Redis history read error: {e}")
-
-        return self._history.get(ticker, [])
+        self._store_scores({ticker: score})
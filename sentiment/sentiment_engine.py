@@ -8,11 +8,16 @@ import os
 import json
 import logging
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, asdict
 
 import requests
+from flask import current_app, has_app_context
+
+from sentiment.finbert_scorer import get_scoring_service
+from sentiment.source_budget import budget_skip_count, get_source_budget
 
 logger = logging.getLogger(__name__)
 
@@ -57,6 +62,8 @@ class SentimentEngine:
     # Redis cache key prefix and TTL
     CACHE_PREFIX = "arbion_sentiment_"
     CACHE_TTL = 900  # 15 minutes
+    # Results built while a source was budget-skipped are missing that source
+    DEGRADED_CACHE_TTL = 60
 
     def __init__(self):
         self.finnhub_key = os.environ.get("FINNHUB_API_KEY", "")
@@ -74,6 +81,9 @@ class SentimentEngine:
         # PRAW Reddit client (lazy)
         self._reddit = None
 
+        self.concurrent_fetch = os.environ.get("SENTIMENT_CONCURRENT_FETCH", "true").lower() in ("1", "true", "yes")
+        self.fetch_workers = int(os.environ.get("SENTIMENT_FETCH_WORKERS", "16"))
+
     # ------------------------------------------------------------------
     # Cache helpers
     # ------------------------------------------------------------------
@@ -90,11 +100,11 @@ class SentimentEngine:
             logger.debug(f"Cache read error: {e}")
             return None
 
-    def _set_cache(self, key: str, data: Any) -> None:
+    def _set_cache(self, key: str, data: Any, timeout: Optional[int] = None) -> None:
         if self._redis is None:
             return
         try:
-            self._redis.set(key, data, timeout=self.CACHE_TTL)
+            self._redis.set(key, data, timeout=self.CACHE_TTL if timeout is None else timeout)
         except Exception as e:
             logger.debug(f"Cache write error: {e}")
 
@@ -106,26 +116,12 @@ class SentimentEngine:
 
         Returns list of {"score": float, "confidence": float} dicts.
         FinBERT labels: positive, negative, neutral.
-        We map to -1.0 .. 1.0 range.
+        We map to -1.0 .. 1.0 range.  Scoring goes through the shared
+        FinBERTScoringService, so repeated texts are never re-inferred.
         """
         if not texts:
             return []
-
-        pipe = _get_finbert_pipeline()
-        raw_results = pipe(texts, batch_size=16)
-
-        scored = []
-        for result in raw_results:
-            label = result["label"].lower()
-            conf = result["score"]
-            if label == "positive":
-                score = conf
-            elif label == "negative":
-                score = -conf
-            else:  # neutral
-                score = 0.0
-            scored.append({"score": score, "confidence": conf})
-        return scored
+        return get_scoring_service(self._redis).score(texts)
 
     def score_single(self, text: str) -> Dict[str, float]:
         """Score a single text."""
@@ -146,12 +142,16 @@ class SentimentEngine:
             logger.warning("FINNHUB_API_KEY not set; skipping Finnhub general news")
             return []
 
+        budget = get_source_budget("finnhub")
         try:
-            resp = requests.get(
-                "https://finnhub.io/api/v1/news",
-                params={"category": "general", "token": self.finnhub_key},
-                timeout=10,
-            )
+            with budget:
+                if not budget.acquire():
+                    return []
+                resp = requests.get(
+                    "https://finnhub.io/api/v1/news",
+                    params={"category": "general", "token": self.finnhub_key},
+                    timeout=10,
+                )
             resp.raise_for_status()
             articles = resp.json()[:limit]
             self._set_cache(cache_key, articles)
@@ -171,19 +171,23 @@ class SentimentEngine:
             logger.warning("FINNHUB_API_KEY not set; skipping Finnhub company news")
             return []
 
+        budget = get_source_budget("finnhub")
         try:
             date_to = datetime.utcnow().strftime("%Y-%m-%d")
             date_from = (datetime.utcnow() - timedelta(days=days_back)).strftime("%Y-%m-%d")
-            resp = requests.get(
-                "https://finnhub.io/api/v1/company-news",
-                params={
-                    "symbol": ticker,
-                    "from": date_from,
-                    "to": date_to,
-                    "token": self.finnhub_key,
-                },
-                timeout=10,
-            )
+            with budget:
+                if not budget.acquire():
+                    return []
+                resp = requests.get(
+                    "https://finnhub.io/api/v1/company-news",
+                    params={
+                        "symbol": ticker,
+                        "from": date_from,
+                        "to": date_to,
+                        "token": self.finnhub_key,
+                    },
+                    timeout=10,
+                )
             resp.raise_for_status()
             articles = resp.json()[:limit]
             self._set_cache(cache_key, articles)
@@ -206,17 +210,21 @@ class SentimentEngine:
             logger.warning("ALPHA_VANTAGE_KEY not set; skipping Alpha Vantage sentiment")
             return []
 
+        budget = get_source_budget("alphavantage")
         try:
-            resp = requests.get(
-                "https://www.alphavantage.co/query",
-                params={
-                    "function": "NEWS_SENTIMENT",
-                    "tickers": ticker,
-                    "limit": limit,
-                    "apikey": self.alpha_vantage_key,
-                },
-                timeout=15,
-            )
+            with budget:
+                if not budget.acquire():
+                    return []
+                resp = requests.get(
+                    "https://www.alphavantage.co/query",
+                    params={
+                        "function": "NEWS_SENTIMENT",
+                        "tickers": ticker,
+                        "limit": limit,
+                        "apikey": self.alpha_vantage_key,
+                    },
+                    timeout=15,
+                )
             resp.raise_for_status()
             data = resp.json()
             articles = data.get("feed", [])[:limit]
@@ -271,20 +279,24 @@ class SentimentEngine:
             subreddits = ["wallstreetbets", "stocks", "cryptocurrency"]
 
         posts: List[Dict] = []
-        for sub_name in subreddits:
-            try:
-                subreddit = reddit.subreddit(sub_name)
-                for submission in subreddit.search(ticker, sort="new", time_filter="day", limit=limit):
-                    posts.append({
-                        "title": submission.title,
-                        "selftext": (submission.selftext or "")[:500],
-                        "score": submission.score,
-                        "num_comments": submission.num_comments,
-                        "subreddit": sub_name,
-                        "created_utc": submission.created_utc,
-                    })
-            except Exception as e:
-                logger.error(f"Reddit fetch failed for r/{sub_name}: {e}")
+        budget = get_source_budget("reddit")
+        with budget:
+            for sub_name in subreddits:
+                if not budget.acquire():
+                    break
+                try:
+                    subreddit = reddit.subreddit(sub_name)
+                    for submission in subreddit.search(ticker, sort="new", time_filter="day", limit=limit):
+                        posts.append({
+                            "title": submission.title,
+                            "selftext": (submission.selftext or "")[:500],
+                            "score": submission.score,
+                            "num_comments": submission.num_comments,
+                            "subreddit": sub_name,
+                            "created_utc": submission.created_utc,
+                        })
+                except Exception as e:
+                    logger.error(f"Reddit fetch failed for r/{sub_name}: {e}")
 
         self._set_cache(cache_key, posts)
         return posts
@@ -292,94 +304,92 @@ class SentimentEngine:
     # ------------------------------------------------------------------
     # Unified analysis per ticker
     # ------------------------------------------------------------------
-    def analyze_ticker(self, ticker: str) -> Dict[str, Any]:
-        """Run full sentiment analysis for a single ticker.
+    def _fetch_sources(self, tickers: List[str], concurrent: bool) -> Tuple[List[Dict], Dict[str, Dict[str, List[Dict]]]]:
+        """Fetch the general feed once plus every per-ticker source.
 
-        Returns {
-            "ticker": str,
-            "score": float,          # normalised -1.0 .. 1.0
-            "confidence": float,     # 0.0 .. 1.0
-            "sources": { "finnhub": [...], "alphavantage": [...], "reddit": [...] },
-            "details": [ SentimentResult ... ],
-            "timestamp": str (ISO)
-        }
+        Returns (general_news, {ticker: {"finnhub": [...], "alphavantage": [...], "reddit": [...]}}).
+        In concurrent mode every request runs at once, bounded by the per-source
+        budgets, so the batch takes as long as the slowest source.
         """
-        # Check top-level cache
-        top_cache_key = self._cache_key(ticker, "full_analysis")
-        cached = self._get_cached(top_cache_key)
-        if cached is not None:
-            return cached
+        fetchers = {
+            "finnhub": self.fetch_finnhub_company_news,
+            "alphavantage": self.fetch_alpha_vantage_sentiment,
+            "reddit": self.fetch_reddit_posts,
+        }
+        if not concurrent:
+            general = self.fetch_finnhub_general_news()
+            return general, {t: {source: fetch(t) for source, fetch in fetchers.items()} for t in tickers}
 
-        all_results: List[SentimentResult] = []
+        app = current_app._get_current_object() if has_app_context() else None
+
+        def _run(fetch, *args):
+            try:
+                if app is None:
+                    return fetch(*args)
+                with app.app_context():
+                    return fetch(*args)
+            except Exception as e:
+                logger.error(f"Sentiment source fetch failed for {args or 'general news'}: {e}")
+                return []
+
+        workers = max(1, min(self.fetch_workers, 1 + len(fetchers) * len(tickers)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sentiment-fetch") as pool:
+            general_future = pool.submit(_run, self.fetch_finnhub_general_news)
+            futures = {
+                (t, source): pool.submit(_run, fetch, t)
+                for t in tickers for source, fetch in fetchers.items()
+            }
+            fetched: Dict[str, Dict[str, List[Dict]]] = {t: {} for t in tickers}
+            for (t, source), future in futures.items():
+                fetched[t][source] = future.result()
+            return general_future.result(), fetched
+
+    def _collect_texts(self, ticker: str, general_news: List[Dict],
+                       fetched: Dict[str, List[Dict]]) -> List[Tuple[str, str]]:
+        """Turn one ticker's fetched articles and posts into (source, text) pairs."""
+        items: List[Tuple[str, str]] = []
 
         # --- Finnhub (company-specific + general mentioning ticker) ---
-        finnhub_articles = self.fetch_finnhub_company_news(ticker)
-        finnhub_general = self.fetch_finnhub_general_news()
-        # Filter general news that mentions the ticker
         ticker_lower = ticker.lower()
         relevant_general = [
-            a for a in finnhub_general
+            a for a in general_news
             if ticker_lower in (a.get("headline", "") + " " + a.get("summary", "")).lower()
         ]
-        finnhub_texts = []
-        for a in finnhub_articles + relevant_general:
+        for a in fetched.get("finnhub", []) + relevant_general:
             text = a.get("headline", "") or a.get("summary", "")
             if text:
-                finnhub_texts.append(text)
-
-        if finnhub_texts:
-            scores = self.score_texts(finnhub_texts)
-            for text, scored in zip(finnhub_texts, scores):
-                all_results.append(SentimentResult(
-                    text=text[:200],
-                    score=scored["score"],
-                    confidence=scored["confidence"],
-                    source="finnhub",
-                    ticker=ticker,
-                    timestamp=datetime.utcnow(),
-                ))
+                items.append(("finnhub", text))
 
         # --- Alpha Vantage ---
-        av_articles = self.fetch_alpha_vantage_sentiment(ticker)
-        av_texts = []
-        for a in av_articles:
+        for a in fetched.get("alphavantage", []):
             text = a.get("title", "") or a.get("summary", "")
             if text:
-                av_texts.append(text)
-
-        if av_texts:
-            scores = self.score_texts(av_texts)
-            for text, scored in zip(av_texts, scores):
-                all_results.append(SentimentResult(
-                    text=text[:200],
-                    score=scored["score"],
-                    confidence=scored["confidence"],
-                    source="alphavantage",
-                    ticker=ticker,
-                    timestamp=datetime.utcnow(),
-                ))
+                items.append(("alphavantage", text))
 
         # --- Reddit ---
-        reddit_posts = self.fetch_reddit_posts(ticker)
-        reddit_texts = []
-        for p in reddit_posts:
+        for p in fetched.get("reddit", []):
             text = p.get("title", "")
             body = p.get("selftext", "")
             combined = f"{text}. {body}" if body else text
             if combined:
-                reddit_texts.append(combined)
-
-        if reddit_texts:
-            scores = self.score_texts(reddit_texts)
-            for text, scored in zip(reddit_texts, scores):
-                all_results.append(SentimentResult(
-                    text=text[:200],
-                    score=scored["score"],
-                    confidence=scored["confidence"],
-                    source="reddit",
-                    ticker=ticker,
-                    timestamp=datetime.utcnow(),
-                ))
+                items.append(("reddit", combined))
+
+        return items
+
+    def _build_analysis(self, ticker: str, items: List[Tuple[str, str]],
+                        scores: List[Dict[str, float]]) -> Dict[str, Any]:
+        """Aggregate scored (source, text) pairs into the per-ticker result."""
+        all_results = [
+            SentimentResult(
+                text=text[:200],
+                score=scored["score"],
+                confidence=scored["confidence"],
+                source=source,
+                ticker=ticker,
+                timestamp=datetime.utcnow(),
+            )
+            for (source, text), scored in zip(items, scores)
+        ]
 
         # --- Aggregate ---
         if all_results:
@@ -400,7 +410,7 @@ class SentimentEngine:
                 "confidence": round(r.confidence, 4),
             })
 
-        result = {
+        return {
             "ticker": ticker,
             "score": round(max(-1.0, min(1.0, overall_score)), 4),
             "confidence": round(min(1.0, overall_confidence), 4),
@@ -409,12 +419,59 @@ class SentimentEngine:
             "timestamp": datetime.utcnow().isoformat(),
         }
 
-        self._set_cache(top_cache_key, result)
-        return result
+    def analyze_ticker(self, ticker: str) -> Dict[str, Any]:
+        """Run full sentiment analysis for a single ticker.
+
+        Returns {
+            "ticker": str,
+            "score": float,          # normalised -1.0 .. 1.0
+            "confidence": float,     # 0.0 .. 1.0
+            "sources": { "finnhub": [...], "alphavantage": [...], "reddit": [...] },
+            "details": [ SentimentResult ... ],
+            "timestamp": str (ISO)
+        }
+        """
+        return self.analyze_tickers([ticker])[ticker]
+
+    def analyze_tickers(self, tickers: List[str], concurrent: Optional[bool] = None) -> Dict[str, Dict]:
+        """Analyze multiple tickers. Returns {ticker: analysis_dict}.
+
+        Sources are fetched concurrently across tickers (unless ``concurrent``
+        is False or SENTIMENT_CONCURRENT_FETCH is off), with the general news
+        feed fetched once for the whole batch.  Texts from every source and
+        ticker are then scored in one deduplicated FinBERT pass, so a headline
+        mentioning several tickers is inferred once.
+        """
+        if concurrent is None:
+            concurrent = self.concurrent_fetch
 
-    def analyze_tickers(self, tickers: List[str]) -> Dict[str, Dict]:
-        """Analyze multiple tickers. Returns {ticker: analysis_dict}."""
-        results = {}
+        results: Dict[str, Dict] = {}
+        pending: Dict[str, str] = {}
         for ticker in tickers:
-            results[ticker] = self.analyze_ticker(ticker.upper())
+            symbol = ticker.upper()
+            # Check top-level cache
+            cached = self._get_cached(self._cache_key(symbol, "full_analysis"))
+            if cached is not None:
+                results[ticker] = cached
+            else:
+                pending[ticker] = symbol
+
+        collected: Dict[str, List[Tuple[str, str]]] = {}
+        ttl = self.CACHE_TTL
+        if pending:
+            skips_before = budget_skip_count()
+            general_news, fetched = self._fetch_sources(list(dict.fromkeys(pending.values())), concurrent)
+            if budget_skip_count() != skips_before:
+                # A skipped source came back empty; retry it soon instead of serving the gap for 15 minutes
+                ttl = self.DEGRADED_CACHE_TTL
+            for ticker, symbol in pending.items():
+                collected[ticker] = self._collect_texts(symbol, general_news, fetched[symbol])
+
+        flat = [text for items in collected.values() for _, text in items]
+        scores = iter(self.score_texts(flat))
+        for ticker, items in collected.items():
+            symbol = pending[ticker]
+            result = self._build_analysis(symbol, items, [next(scores) for _ in items])
+            self._set_cache(self._cache_key(symbol, "full_analysis"), result, ttl)
+            results[ticker] = result
         return results
@@ -0,0 +1,89 @@
+"""
+Per-source request budgets for sentiment fetching.
+Each news/social source gets a requests-per-minute bucket and a concurrency
+cap, shared process-wide, so concurrent fetches across tickers respect tight
+quotas (Alpha Vantage) and single-threaded clients (PRAW).
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOURCE_LIMITS = {
+    "finnhub": {"rpm": 60, "concurrency": 8},
+    "alphavantage": {"rpm": 5, "concurrency": 1},
+    # PRAW clients are not thread-safe, so Reddit searches run one at a time
+    "reddit": {"rpm": 60, "concurrency": 1},
+}
+
+
+class SourceBudget:
+    """Requests-per-minute bucket plus a concurrency cap for one source.
+
+    ``acquire`` waits for a token only up to ``max_wait`` seconds; past that
+    it returns False so the caller skips the source instead of stalling the
+    whole batch behind an exhausted quota.
+    """
+
+    def __init__(self, name: str, per_minute: float, concurrency: int, max_wait: float):
+        self.name = name
+        self.capacity = max(1.0, float(per_minute))
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self.max_wait = max_wait
+        self.skipped = 0
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(1, concurrency))
+
+    def acquire(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+            self.updated = now
+            wait = 0.0 if self.level >= 1 else (1 - self.level) / self.rate
+            if wait > self.max_wait:
+                self.skipped += 1
+                logger.warning(f"{self.name} request budget exhausted; skipping (next slot in {wait:.0f}s)")
+                return False
+            self.level -= 1
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    def __enter__(self):
+        self._slots.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self._slots.release()
+        return False
+
+
+_budgets: Dict[str, SourceBudget] = {}
+_budgets_lock = threading.Lock()
+
+
+def get_source_budget(source: str) -> SourceBudget:
+    """Process-wide budget per source, sized from SENTIMENT_<SOURCE>_RPM/_CONCURRENCY."""
+    with _budgets_lock:
+        if source not in _budgets:
+            defaults = DEFAULT_SOURCE_LIMITS.get(source, {"rpm": 60, "concurrency": 4})
+            prefix = f"SENTIMENT_{source.upper()}"
+            _budgets[source] = SourceBudget(
+                source,
+                per_minute=float(os.environ.get(f"{prefix}_RPM", defaults["rpm"])),
+                concurrency=int(os.environ.get(f"{prefix}_CONCURRENCY", defaults["concurrency"])),
+                max_wait=float(os.environ.get("SENTIMENT_BUDGET_MAX_WAIT", "2")),
+            )
+        return _budgets[source]
+
+
+def budget_skip_count() -> int:
+    """Requests skipped so far across every source budget (compare before/after a fetch)."""
+    with _budgets_lock:
+        return sum(budget.skipped for budget in _budgets.values())
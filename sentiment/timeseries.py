@@ -0,0 +1,165 @@
+"""
+Sentiment Time Series - compact per-ticker score history for momentum.
+Scores are stored as (epoch seconds, score) points: in Redis sorted sets
+(score = timestamp) when Redis is reachable, otherwise in array-backed
+in-memory buffers.  Both support O(log n) append, windowed range queries
+and trimming of points older than the retention window.
+"""
+
+import bisect
+import logging
+import os
+import threading
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Point = Tuple[float, float]
+
+RETENTION_SECONDS = int(os.environ.get("SENTIMENT_HISTORY_RETENTION", str(24 * 3600)))
+
+
+def _encode(ts: float, score: float) -> str:
+    # Members must be unique within a set, so the timestamp is part of the member
+    return f"{ts:.6f}:{score:.6f}"
+
+
+def _decode(member) -> Point:
+    if isinstance(member, bytes):
+        member = member.decode("utf-8")
+    ts, score = member.split(":", 1)
+    return float(ts), float(score)
+
+
+def _base_score(older: List[Point], earliest: Optional[Point]) -> Optional[float]:
+    """Mean of points at or before the cutoff, else the earliest retained point."""
+    if older:
+        return sum(score for _, score in older) / len(older)
+    return earliest[1] if earliest else None
+
+
+class MemorySentimentSeries:
+    """In-process backend: one pair of append-only ``array('d')`` per ticker.
+
+    Points arrive in time order, so windows are found with bisect and trimming
+    only advances a start offset; the arrays are compacted once more than half
+    of them is expired.
+    """
+
+    def __init__(self, retention: int = RETENTION_SECONDS):
+        self.retention = retention
+        self._series: Dict[str, List] = {}  # ticker -> [timestamps, scores, start]
+        self._lock = threading.Lock()
+
+    def _trim(self, entry: List, now: float) -> None:
+        timestamps, scores, start = entry
+        start = bisect.bisect_left(timestamps, now - self.retention, lo=start)
+        if start > len(timestamps) // 2:
+            entry[0], entry[1], start = timestamps[start:], scores[start:], 0
+        entry[2] = start
+
+    def append_many(self, points: Dict[str, float], ts: Optional[float] = None) -> None:
+        now = time.time() if ts is None else ts
+        with self._lock:
+            for ticker, score in points.items():
+                entry = self._series.setdefault(ticker, [array("d"), array("d"), 0])
+                timestamps, scores, _ = entry
+                if timestamps and now < timestamps[-1]:
+                    # Out-of-order point: keep the arrays sorted
+                    i = bisect.bisect_right(timestamps, now)
+                    timestamps.insert(i, now)
+                    scores.insert(i, score)
+                else:
+                    timestamps.append(now)
+                    scores.append(score)
+                self._trim(entry, now)
+
+    def window(self, ticker: str, start: float, end: float) -> List[Point]:
+        with self._lock:
+            entry = self._series.get(ticker)
+            if entry is None:
+                return []
+            timestamps, scores, offset = entry
+            lo = bisect.bisect_left(timestamps, start, lo=offset)
+            hi = bisect.bisect_right(timestamps, end, lo=lo)
+            return list(zip(timestamps[lo:hi], scores[lo:hi]))
+
+    def momentum_bases(self, tickers: Iterable[str], cutoff: float, now: Optional[float] = None) -> Dict[str, Optional[float]]:
+        now = time.time() if now is None else now
+        since = now - self.retention
+        bases = {}
+        for ticker in tickers:
+            older = self.window(ticker, since, cutoff)
+            earliest = None if older else next(iter(self.window(ticker, since, float("inf"))), None)
+            bases[ticker] = _base_score(older, earliest)
+        return bases
+
+
+class RedisSentimentSeries:
+    """Redis backend: one sorted set per ticker, scored by epoch seconds.
+
+    Appends and reads for a whole batch of tickers go out in one pipeline;
+    expired points are trimmed server-side with ZREMRANGEBYSCORE.
+    """
+
+    KEY_PREFIX = "arbion_sentiment_ts:"
+
+    def __init__(self, client, retention: int = RETENTION_SECONDS):
+        self.client = client
+        self.retention = retention
+
+    def _key(self, ticker: str) -> str:
+        return f"{self.KEY_PREFIX}{ticker}"
+
+    def append_many(self, points: Dict[str, float], ts: Optional[float] = None) -> None:
+        now = time.time() if ts is None else ts
+        pipe = self.client.pipeline(transaction=False)
+        for ticker, score in points.items():
+            key = self._key(ticker)
+            pipe.zadd(key, {_encode(now, score): now})
+            pipe.zremrangebyscore(key, "-inf", f"({now - self.retention}")
+            pipe.expire(key, self.retention)
+        pipe.execute()
+
+    def window(self, ticker: str, start: float, end: float) -> List[Point]:
+        return [_decode(m) for m in self.client.zrangebyscore(self._key(ticker), start, end)]
+
+    def momentum_bases(self, tickers: Iterable[str], cutoff: float, now: Optional[float] = None) -> Dict[str, Optional[float]]:
+        now = time.time() if now is None else now
+        since = now - self.retention
+        tickers = list(tickers)
+        pipe = self.client.pipeline(transaction=False)
+        for ticker in tickers:
+            key = self._key(ticker)
+            pipe.zrangebyscore(key, since, cutoff)
+            pipe.zrangebyscore(key, since, "+inf", start=0, num=1)
+        replies = pipe.execute()
+        bases = {}
+        for i, ticker in enumerate(tickers):
+            older = [_decode(m) for m in replies[2 * i]]
+            earliest = [_decode(m) for m in replies[2 * i + 1]]
+            bases[ticker] = _base_score(older, earliest[0] if earliest else None)
+        return bases
+
+
+_series = None
+_series_lock = threading.Lock()
+
+
+def get_sentiment_series():
+    """Process-wide series: Redis sorted sets when reachable, else in-memory buffers."""
+    global _series
+    if _series is None:
+        with _series_lock:
+            if _series is None:
+                try:
+                    import redis
+                    client = redis.from_url(os.environ.get("REDIS_URL", "redis://localhost:6379/1"))
+                    client.ping()
+                    _series = RedisSentimentSeries(client)
+                except Exception as e:
+                    logger.warning(f"Redis unavailable for sentiment history; using in-memory series: {e}")
+                    _series = MemorySentimentSeries()
+    return _series
@@ -10,13 +10,25 @@ from utils.openai_trader import OpenAITrader
 from utils.market_data import MarketDataProvider
 from utils.risk_management import RiskManager
 from utils.options_trading import WheelStrategy, CollarStrategy, AIStrategyHelper, OptionsCalculator
+from utils.market_snapshot import MarketSnapshot
 import json
 import asyncio
 import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app, has_app_context
+
+# Users processed concurrently per strategy (1 = serial)
+AUTO_TRADING_MAX_WORKERS = int(os.environ.get('AUTO_TRADING_MAX_WORKERS', '8'))
 
 class AutoTradingEngine:
-    def __init__(self):
+    WHEEL_WATCHLIST = ['AAPL', 'MSFT', 'GOOGL', 'TSLA', 'NVDA']
+    COLLAR_WATCHLIST = ['SPY', 'QQQ', 'IWM']  # ETFs for collar strategy
+    AI_WATCHLIST = ['AAPL', 'GOOGL', 'MSFT', 'NVDA', 'TSLA']
+
+    def __init__(self, max_workers=None):
         self.logger = logging.getLogger(__name__)
+        self.max_workers = max(1, max_workers or AUTO_TRADING_MAX_WORKERS)
         self.market_data = MarketDataProvider()
         self.risk_manager = RiskManager()
 
@@ -29,20 +41,29 @@ class AutoTradingEngine:
         # Batch logging for performance
         self._log_buffer = []
         self._log_buffer_max_size = 10
+        self._log_lock = threading.Lock()
+
+        # Per-thread user attribution for partitioned strategy runs
+        self._user_context = threading.local()
 
     def log_system_event(self, level, message, module='auto_trading', user_id=None):
         """Log system events to database with batching for performance"""
         try:
+            if user_id is None:
+                user_id = getattr(self._user_context, 'user_id', None)
+
             # Add to buffer
-            self._log_buffer.append({
-                'level': level,
-                'message': message,
-                'module': module,
-                'user_id': user_id
-            })
+            with self._log_lock:
+                self._log_buffer.append({
+                    'level': level,
+                    'message': message,
+                    'module': module,
+                    'user_id': user_id
+                })
+                should_flush = len(self._log_buffer) >= self._log_buffer_max_size
 
             # Flush if buffer is full
-            if len(self._log_buffer) >= self._log_buffer_max_size:
+            if should_flush:
                 self._flush_logs()
 
         except Exception as e:
@@ -50,13 +71,15 @@ class AutoTradingEngine:
 
     def _flush_logs(self):
         """Flush buffered logs to database"""
-        if not self._log_buffer:
+        with self._log_lock:
+            pending, self._log_buffer = self._log_buffer, []
+        if not pending:
             return
 
         try:
             from app import app
             with app.app_context():
-                for log_data in self._log_buffer:
+                for log_data in pending:
                     log_entry = SystemLog(
                         level=log_data['level'],
                         message=log_data['message'],
@@ -65,11 +88,64 @@ class AutoTradingEngine:
                     )
                     db.session.add(log_entry)
                 db.session.commit()
-                self._log_buffer.clear()
         except Exception as e:
+            # Buffer was already swapped out, so failed logs are dropped
+            # rather than accumulating
             self.logger.error(f"Failed to flush logs: {str(e)}")
-            # Clear buffer anyway to prevent memory buildup
-            self._log_buffer.clear()
+
+    def build_market_snapshot(self, wheel=True, collar=True, ai=True):
+        """Fetch quotes, option chains and sentiment once for every enabled watchlist"""
+        option_symbols = (self.WHEEL_WATCHLIST if wheel else []) + (self.COLLAR_WATCHLIST if collar else [])
+        sentiment_symbols = self.AI_WATCHLIST if ai else []
+        snapshot = MarketSnapshot.build(
+            option_symbols + sentiment_symbols,
+            option_symbols=option_symbols,
+            sentiment_symbols=sentiment_symbols,
+            market_data=self.market_data,
+            price_fallback=self._get_simulated_stock_price
+        )
+        self.log_system_event('info', f'Market snapshot ready for {len(snapshot.symbols)} symbols')
+        return snapshot
+
+    def _active_user_ids(self):
+        """IDs of active users; workers reload what they need in their own session"""
+        return [row.id for row in db.session.query(User.id).filter_by(is_active=True).all()]
+
+    def _run_for_user(self, run_user, user_id, strategy_name):
+        """Run one user's strategy with log attribution and isolated failure"""
+        self._user_context.user_id = user_id
+        try:
+            return bool(run_user(user_id))
+        except Exception as e:
+            db.session.rollback()
+            self.log_system_event('error', f'Error in {strategy_name} strategy for user {user_id}: {str(e)}')
+            return False
+        finally:
+            self._user_context.user_id = None
+
+    def _run_partitioned(self, user_ids, run_user, strategy_name):
+        """
+        Shard per-user strategy runs across a worker pool and merge the results.
+
+        Each worker runs inside its own application context, so it gets its own
+        scoped DB session (removed when the context tears down).  Falls back to
+        a serial loop in the caller's session when only one worker is needed.
+
+        Returns:
+            Number of users whose run reported success
+        """
+        workers = min(self.max_workers, len(user_ids))
+        if workers <= 1 or not has_app_context():
+            return sum(1 for uid in user_ids if self._run_for_user(run_user, uid, strategy_name))
+
+        app = current_app._get_current_object()
+
+        def _worker(user_id):
+            with app.app_context():
+                return self._run_for_user(run_user, user_id, strategy_name)
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f'auto-{strategy_name}') as pool:
+            return sum(1 for ok in pool.map(_worker, user_ids) if ok)
     
     def run_auto_trading_cycle(self):
         """Main auto-trading cycle"""
@@ -85,15 +161,22 @@ class AutoTradingEngine:
                     self.log_system_event('info', 'Auto-trading is disabled')
                     return
                 
+                # One frozen market view shared by every strategy and user
+                snapshot = self.build_market_snapshot(
+                    wheel=settings.wheel_enabled,
+                    collar=settings.collar_enabled,
+                    ai=settings.ai_enabled
+                )
+                
                 # Run enabled strategies
                 if settings.wheel_enabled:
-                    self.run_wheel_strategy(settings.simulation_mode)
+                    self.run_wheel_strategy(settings.simulation_mode, snapshot)
                 
                 if settings.collar_enabled:
-                    self.run_collar_strategy(settings.simulation_mode)
+                    self.run_collar_strategy(settings.simulation_mode, snapshot)
                 
                 if settings.ai_enabled:
-                    self.run_ai_strategy(settings.simulation_mode)
+                    self.run_ai_strategy(settings.simulation_mode, snapshot)
                 
                 # Update last run time
                 settings.last_run = datetime.utcnow()
@@ -109,7 +192,7 @@ class AutoTradingEngine:
             # Always flush remaining logs at end of cycle
             self._flush_logs()
     
-    def run_wheel_strategy(self, simulation_mode=True):
+    def run_wheel_strategy(self, simulation_mode=True, snapshot=None):
         """Run the wheel options strategy with multi-user support"""
         try:
             self.log_system_event('info', 'Starting wheel strategy execution')
@@ -120,51 +203,50 @@ class AutoTradingEngine:
                 'target_dte': 30,
                 'profit_target': 0.50,
                 'max_positions': 5,
-                'watchlist': ['AAPL', 'MSFT', 'GOOGL', 'TSLA', 'NVDA']
+                'watchlist': self.WHEEL_WATCHLIST
             }
+            snapshot = snapshot or self.build_market_snapshot(collar=False, ai=False)
             
             # Get users with active credentials
-            users = User.query.filter_by(is_active=True).all()
-            successful_executions = 0
-            
-            for user in users:
-                try:
-                    # Get user's API credentials
-                    creds = APICredential.query.filter_by(
-                        user_id=user.id,
-                        provider='schwab',
-                        is_active=True
-                    ).first()
-                    
-                    if not creds:
-                        self.log_system_event('warning', f'No Schwab credentials found for user {user.id}')
-                        continue
-                    
-                    # Execute wheel strategy
-                    result = self.execute_wheel_logic(creds, wheel_params, user.id, simulation_mode)
-                    if result:
-                        successful_executions += 1
-                    
-                except Exception as e:
-                    self.log_system_event('error', f'Error in wheel strategy for user {user.id}: {str(e)}')
-                    continue
+            user_ids = self._active_user_ids()
+            successful_executions = self._run_partitioned(
+                user_ids,
+                lambda user_id: self._run_wheel_for_user(user_id, wheel_params, simulation_mode, snapshot),
+                'wheel'
+            )
             
             self.log_system_event('info', f'Wheel strategy execution completed. Successful executions: {successful_executions}')
             
         except Exception as e:
             self.log_system_event('error', f'Error in wheel strategy: {str(e)}')
             logging.error(f"Error in wheel strategy: {str(e)}")
+
+    def _run_wheel_for_user(self, user_id, params, simulation_mode, snapshot):
+        # Get user's API credentials
+        creds = APICredential.query.filter_by(
+            user_id=user_id,
+            provider='schwab',
+            is_active=True
+        ).first()
+
+        if not creds:
+            self.log_system_event('warning', f'No Schwab credentials found for user {user_id}')
+            return False
+
+        return self.execute_wheel_logic(creds, params, user_id, simulation_mode, snapshot)
     
-    def execute_wheel_logic(self, user_creds, params, user_id, simulation_mode):
+    def execute_wheel_logic(self, user_creds, params, user_id, simulation_mode, snapshot=None):
         """Execute wheel strategy logic with enhanced multi-user support"""
         try:
+            snapshot = snapshot or self.build_market_snapshot(collar=False, ai=False)
+
             # Execute wheel strategy for each symbol in watchlist
             trades_executed = 0
 
             for symbol in params['watchlist']:
                 try:
-                    # Get current stock price (simulated for now)
-                    stock_price = self._get_simulated_stock_price(symbol)
+                    # Get current stock price from the cycle snapshot
+                    stock_price = snapshot.price(symbol)
 
                     # Check if user has existing position in this stock
                     has_shares = self._check_user_has_shares(user_id, symbol)
@@ -178,7 +260,7 @@ class AutoTradingEngine:
                         if self.sell_covered_call(
                             user_id, symbol, stock_price,
                             params['target_delta'], params['target_dte'],
-                            simulation_mode
+                            simulation_mode, option_chain=snapshot.option_chain(symbol)
                         ):
                             trades_executed += 1
                     else:
@@ -186,7 +268,7 @@ class AutoTradingEngine:
                         if self.sell_cash_secured_put(
                             user_id, symbol, stock_price,
                             params['target_delta'], params['target_dte'],
-                            simulation_mode
+                            simulation_mode, option_chain=snapshot.option_chain(symbol)
                         ):
                             trades_executed += 1
 
@@ -201,7 +283,8 @@ class AutoTradingEngine:
             self.log_system_event('error', f'Error in wheel strategy execution for user {user_id}: {str(e)}')
             return False
     
-    def sell_covered_call(self, user_id, symbol, stock_price, delta, dte, simulation_mode):
+    def sell_covered_call(self, user_id, symbol, stock_price, delta, dte, simulation_mode,
+                          option_chain=None):
         """Sell covered call for wheel strategy"""
         try:
             # Get covered call details using options calculator
@@ -210,7 +293,8 @@ class AutoTradingEngine:
                 stock_price=stock_price,
                 target_delta=delta,
                 dte=dte,
-                shares_owned=100
+                shares_owned=100,
+                option_chain=option_chain
             )
 
             if not cc_details:
@@ -223,6 +307,7 @@ class AutoTradingEngine:
                 'stock_price': cc_details['stock_price'],
                 'strike': cc_details['strike'],
                 'delta': cc_details['delta'],
+                'implied_volatility': cc_details['implied_volatility'],
                 'premium': cc_details['premium'],
                 'premium_collected': cc_details['premium_collected'],
                 'expiration_date': cc_details['expiration_date'],
@@ -262,7 +347,8 @@ class AutoTradingEngine:
             self.log_system_event('error', f'Error selling covered call: {str(e)}')
             return False
     
-    def sell_cash_secured_put(self, user_id, symbol, stock_price, delta, dte, simulation_mode):
+    def sell_cash_secured_put(self, user_id, symbol, stock_price, delta, dte, simulation_mode,
+                              option_chain=None):
         """Sell cash-secured put for wheel strategy"""
         try:
             # Get cash-secured put details using options calculator
@@ -270,7 +356,8 @@ class AutoTradingEngine:
                 symbol=symbol,
                 stock_price=stock_price,
                 target_delta=delta,
-                dte=dte
+                dte=dte,
+                option_chain=option_chain
             )
 
             if not csp_details:
@@ -283,6 +370,7 @@ class AutoTradingEngine:
                 'stock_price': csp_details['stock_price'],
                 'strike': csp_details['strike'],
                 'delta': csp_details['delta'],
+                'implied_volatility': csp_details['implied_volatility'],
                 'premium': csp_details['premium'],
                 'premium_collected': csp_details['premium_collected'],
                 'expiration_date': csp_details['expiration_date'],
@@ -323,7 +411,7 @@ class AutoTradingEngine:
             self.log_system_event('error', f'Error selling cash-secured put: {str(e)}')
             return False
     
-    def run_collar_strategy(self, simulation_mode=True):
+    def run_collar_strategy(self, simulation_mode=True, snapshot=None):
         """Run collar strategy with multi-user support"""
         try:
             self.log_system_event('info', 'Starting collar strategy execution')
@@ -333,50 +421,49 @@ class AutoTradingEngine:
                 'protection_delta': 0.20,  # Put delta for downside protection
                 'call_delta': 0.30,        # Call delta for upside cap
                 'target_dte': 30,
-                'watchlist': ['SPY', 'QQQ', 'IWM']  # ETFs for collar strategy
+                'watchlist': self.COLLAR_WATCHLIST
             }
+            snapshot = snapshot or self.build_market_snapshot(wheel=False, ai=False)
             
             # Get users with active credentials
-            users = User.query.filter_by(is_active=True).all()
-            successful_executions = 0
-            
-            for user in users:
-                try:
-                    # Get user's API credentials
-                    creds = APICredential.query.filter_by(
-                        user_id=user.id,
-                        provider='schwab',
-                        is_active=True
-                    ).first()
-                    
-                    if not creds:
-                        continue
-                    
-                    # Execute collar strategy
-                    result = self.execute_collar_logic(user.id, collar_params, simulation_mode)
-                    if result:
-                        successful_executions += 1
-                    
-                except Exception as e:
-                    self.log_system_event('error', f'Error in collar strategy for user {user.id}: {str(e)}')
-                    continue
+            user_ids = self._active_user_ids()
+            successful_executions = self._run_partitioned(
+                user_ids,
+                lambda user_id: self._run_collar_for_user(user_id, collar_params, simulation_mode, snapshot),
+                'collar'
+            )
             
             self.log_system_event('info', f'Collar strategy execution completed. Successful executions: {successful_executions}')
             
         except Exception as e:
             self.log_system_event('error', f'Error in collar strategy: {str(e)}')
             logging.error(f"Error in collar strategy: {str(e)}")
+
+    def _run_collar_for_user(self, user_id, params, simulation_mode, snapshot):
+        # Get user's API credentials
+        creds = APICredential.query.filter_by(
+            user_id=user_id,
+            provider='schwab',
+            is_active=True
+        ).first()
+
+        if not creds:
+            return False
+
+        return self.execute_collar_logic(user_id, params, simulation_mode, snapshot)
     
-    def execute_collar_logic(self, user_id, params, simulation_mode):
+    def execute_collar_logic(self, user_id, params, simulation_mode, snapshot=None):
         """Execute collar strategy logic"""
         try:
+            snapshot = snapshot or self.build_market_snapshot(wheel=False, ai=False)
+
             # Create collar trades (buy put, sell call)
             trades_executed = 0
 
             for symbol in params['watchlist']:
                 try:
-                    # Get current stock price
-                    stock_price = self._get_simulated_stock_price(symbol)
+                    # Get current stock price from the cycle snapshot
+                    stock_price = snapshot.price(symbol)
 
                     # Check if user has shares (collar requires owning stock)
                     has_shares = self._check_user_has_shares(user_id, symbol)
@@ -392,7 +479,8 @@ class AutoTradingEngine:
                         shares_owned=100,
                         put_delta=params['protection_delta'],
                         call_delta=params['call_delta'],
-                        dte=params['target_dte']
+                        dte=params['target_dte'],
+                        option_chain=snapshot.option_chain(symbol)
                     )
 
                     if not collar_details:
@@ -479,43 +567,40 @@ class AutoTradingEngine:
             self.log_system_event('error', f'Error in collar strategy execution: {str(e)}')
             return False
     
-    def run_ai_strategy(self, simulation_mode=True):
+    def run_ai_strategy(self, simulation_mode=True, snapshot=None):
         """Run AI-driven strategy with multi-user support"""
         try:
             self.log_system_event('info', 'Starting AI strategy execution')
+            snapshot = snapshot or self.build_market_snapshot(wheel=False, collar=False)
             
             # Get users with active credentials
-            users = User.query.filter_by(is_active=True).all()
-            successful_executions = 0
-            
-            for user in users:
-                try:
-                    # Get user's OpenAI credentials
-                    openai_creds = APICredential.query.filter_by(
-                        user_id=user.id,
-                        provider='openai',
-                        is_active=True
-                    ).first()
-                    
-                    if not openai_creds:
-                        continue
-                    
-                    # Execute AI strategy
-                    result = self.execute_ai_logic(user.id, simulation_mode)
-                    if result:
-                        successful_executions += 1
-                    
-                except Exception as e:
-                    self.log_system_event('error', f'Error in AI strategy for user {user.id}: {str(e)}')
-                    continue
+            user_ids = self._active_user_ids()
+            successful_executions = self._run_partitioned(
+                user_ids,
+                lambda user_id: self._run_ai_for_user(user_id, simulation_mode, snapshot),
+                'AI'
+            )
             
             self.log_system_event('info', f'AI strategy execution completed. Successful executions: {successful_executions}')
             
         except Exception as e:
             self.log_system_event('error', f'Error in AI strategy: {str(e)}')
             logging.error(f"Error in AI strategy: {str(e)}")
+
+    def _run_ai_for_user(self, user_id, simulation_mode, snapshot):
+        # Get user's OpenAI credentials
+        openai_creds = APICredential.query.filter_by(
+            user_id=user_id,
+            provider='openai',
+            is_active=True
+        ).first()
+
+        if not openai_creds:
+            return False
+
+        return self.execute_ai_logic(user_id, simulation_mode, snapshot)
     
-    def execute_ai_logic(self, user_id, simulation_mode):
+    def execute_ai_logic(self, user_id, simulation_mode, snapshot=None):
         """Execute AI-driven strategy logic using OpenAI"""
         try:
             # Initialize OpenAI trader for this user
@@ -530,38 +615,34 @@ class AutoTradingEngine:
                 )
                 return False
 
-            # Define AI strategy watchlist
-            ai_watchlist = ['AAPL', 'GOOGL', 'MSFT', 'NVDA', 'TSLA']
+            snapshot = snapshot or self.build_market_snapshot(wheel=False, collar=False)
             trades_executed = 0
 
-            for symbol in ai_watchlist:
+            for symbol in self.AI_WATCHLIST:
                 try:
-                    # Get current market data
-                    stock_price = self._get_simulated_stock_price(symbol)
-                    market_data = {
-                        'price': stock_price,
-                        'change': random.uniform(-5, 5),
-                        'change_percent': random.uniform(-2, 2),
-                        'volume': random.randint(1000000, 10000000)
-                    }
+                    # Get current market data from the cycle snapshot
+                    quote = snapshot.quote(symbol)
+                    stock_price = quote['price']
+                    if quote.get('simulated'):
+                        market_data = {
+                            'price': stock_price,
+                            'change': random.uniform(-5, 5),
+                            'change_percent': random.uniform(-2, 2),
+                            'volume': random.randint(1000000, 10000000)
+                        }
+                    else:
+                        market_data = {
+                            'price': stock_price,
+                            'change': quote.get('change', 0),
+                            'change_percent': quote.get('change_percent', 0),
+                            'volume': quote.get('volume', 0)
+                        }
 
                     # Analyze market conditions using AI helper
                     analysis = self.ai_helper.analyze_market_conditions(symbol, market_data)
 
-                    # Fetch FinBERT sentiment features
-                    sentiment_score = 0.0
-                    sentiment_momentum = 0.0
-                    try:
-                        from sentiment.sentiment_engine import SentimentEngine
-                        from sentiment.sentiment_aggregator import SentimentAggregator
-                        _sent_engine = SentimentEngine()
-                        _sent_agg = SentimentAggregator()
-                        _sent_analysis = _sent_engine.analyze_ticker(symbol)
-                        _sent_signal = _sent_agg.aggregate(_sent_analysis)
-                        sentiment_score = _sent_signal.score
-                        sentiment_momentum = _sent_signal.momentum
-                    except Exception as se:
-                        self.logger.debug(f"Sentiment unavailable for {symbol}: {se}")
+                    # FinBERT sentiment features, computed once per cycle
+                    sentiment_score, sentiment_momentum = snapshot.sentiment(symbol)
 
                     # Use OpenAI to generate trading strategy recommendation
                     strategy_prompt = f"""Analyze {symbol} trading opportunity:
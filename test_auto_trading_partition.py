@@ -0,0 +1,72 @@
+import threading
+
+import pytest
+from flask import Flask, g
+
+from tasks.auto_trading_tasks import AutoTradingEngine
+from utils.market_snapshot import MarketSnapshot
+
+
+def _engine(monkeypatch, max_workers):
+    engine = AutoTradingEngine(max_workers=max_workers)
+    monkeypatch.setattr(engine, '_flush_logs', lambda: None)
+    engine._log_buffer_max_size = 10_000
+    return engine
+
+
+def test_partitioned_run_isolates_users_and_attributes_logs(monkeypatch):
+    engine = _engine(monkeypatch, max_workers=4)
+    contexts = {}
+    barrier = threading.Barrier(4, timeout=5)
+
+    def run_user(user_id):
+        barrier.wait()
+        g.marker = user_id
+        contexts[user_id] = id(g._get_current_object())
+        engine.log_system_event('info', f'processed {user_id}')
+        if user_id == 3:
+            raise RuntimeError('boom')
+        return user_id % 2 == 0
+
+    app = Flask(__name__)
+    with app.app_context():
+        monkeypatch.setattr('tasks.auto_trading_tasks.db.session.rollback', lambda: None)
+        successes = engine._run_partitioned([1, 2, 3, 4], run_user, 'wheel')
+
+    assert successes == 2
+    assert len(set(contexts.values())) == 4
+    attributed = {(entry['message'], entry['user_id']) for entry in engine._log_buffer}
+    assert {(f'processed {uid}', uid) for uid in (1, 2, 3, 4)} <= attributed
+    assert ('Error in wheel strategy for user 3: boom', 3) in attributed
+
+
+def test_market_snapshot_fetches_union_once_and_freezes(monkeypatch):
+    engine = _engine(monkeypatch, max_workers=1)
+    quote_calls, chain_calls = [], []
+
+    class FakeProvider:
+        def get_stock_quote(self, symbol):
+            quote_calls.append(symbol)
+            return None if symbol == 'IWM' else {'symbol': symbol, 'price': 10.0, 'change_percent': 1.0}
+
+        def get_option_chain(self, symbol):
+            chain_calls.append(symbol)
+            return {'symbol': symbol, 'calls': [{'strike': 10.0}], 'puts': []}
+
+    engine.market_data = FakeProvider()
+    monkeypatch.setattr(engine, '_get_simulated_stock_price', lambda symbol: 42.0)
+    monkeypatch.setattr(MarketSnapshot, '_fetch_sentiment',
+                        staticmethod(lambda symbols: {s: {'score': 0.5, 'momentum': 0.1} for s in symbols}))
+
+    snapshot = engine.build_market_snapshot()
+
+    union = set(engine.WHEEL_WATCHLIST + engine.COLLAR_WATCHLIST + engine.AI_WATCHLIST)
+    assert sorted(quote_calls) == sorted(union)
+    assert sorted(chain_calls) == sorted(set(engine.WHEEL_WATCHLIST + engine.COLLAR_WATCHLIST))
+    assert snapshot.price('AAPL') == 10.0
+    assert snapshot.price('IWM') == 42.0 and snapshot.quote('IWM')['simulated']
+    assert snapshot.sentiment('NVDA') == (0.5, 0.1)
+    assert snapshot.sentiment('SPY') == (0.0, 0.0)
+    with pytest.raises(TypeError):
+        snapshot.quote('AAPL')['price'] = 1.0
+    assert isinstance(snapshot.option_chain('SPY')['calls'], tuple)
@@ -0,0 +1,125 @@
+import time
+from types import SimpleNamespace
+
+from flask import Flask
+
+from utils import balance_aggregator
+from utils.balance_aggregator import BalanceAggregator, invalidate_balance_cache
+
+
+def _fetcher(balance, delay, calls):
+    def fetch(fetcher, user_id, encrypted, creds):
+        calls.append(encrypted)
+        time.sleep(delay)
+        account = balance_aggregator._empty_account(encrypted)
+        account.update({'balance': balance, 'status': 'connected'})
+        return account, None
+    return fetch
+
+
+def test_fans_out_with_timeout_cache_and_stale_fallback(monkeypatch):
+    calls = []
+    monkeypatch.setattr('utils.encryption.decrypt_credentials', lambda blob: {})
+    monkeypatch.setitem(balance_aggregator.PROVIDER_FETCHERS, 'coinbase', _fetcher(100.0, 0.3, calls))
+    monkeypatch.setitem(balance_aggregator.PROVIDER_FETCHERS, 'schwab', _fetcher(250.0, 0.3, calls))
+    monkeypatch.setitem(balance_aggregator.PROVIDER_FETCHERS, 'alpaca', _fetcher(50.0, 1.5, calls))
+    creds = [SimpleNamespace(id=i, provider=p, encrypted_credentials=p, test_status=None, last_tested=None)
+             for i, p in enumerate(['coinbase', 'schwab', 'alpaca'], start=1)]
+    invalidate_balance_cache(7)
+
+    app = Flask(__name__)
+    with app.app_context():
+        start = time.monotonic()
+        first = BalanceAggregator(7, timeout=1.0, ttl=30).aggregate(creds)
+        assert time.monotonic() - start < 1.4  # bounded by the timeout, not the sum
+
+        assert first['total'] == 350.0
+        by_provider = {a['provider']: a for a in first['accounts']}
+        assert by_provider['coinbase']['freshness']['source'] == 'live'
+        assert by_provider['alpaca']['status'] == 'timeout'
+        assert first['errors'] == ['Alpaca: timed out after 1s']
+
+        time.sleep(0.7)  # let the straggler finish and land in the cache
+        calls.clear()
+        start = time.monotonic()
+        second = BalanceAggregator(7, timeout=1.0, ttl=30).aggregate(creds)
+        assert time.monotonic() - start < 0.2
+        assert calls == []
+        assert second['total'] == 400.0
+        assert {a['freshness']['source'] for a in second['accounts']} == {'cache'}
+
+        monkeypatch.setitem(balance_aggregator.PROVIDER_FETCHERS, 'alpaca', _fetcher(75.0, 1.5, calls))
+        third = BalanceAggregator(7, timeout=0.5, ttl=30).aggregate(creds, force_refresh=True)
+        alpaca = next(a for a in third['accounts'] if a['provider'] == 'alpaca')
+        assert alpaca['freshness']['source'] == 'stale'
+        assert alpaca['balance'] == 50.0
+        assert third['errors'] == []
+    invalidate_balance_cache(7)
+
+
+
+def test_credentials_without_a_balance_fetcher_keep_their_test_status(monkeypatch):
+    calls = []
+    monkeypatch.setattr('utils.encryption.decrypt_credentials', lambda blob: {})
+    monkeypatch.setitem(balance_aggregator.PROVIDER_FETCHERS, 'coinbase', _fetcher(100.0, 0.0, calls))
+    creds = [SimpleNamespace(id=1, provider='coinbase', encrypted_credentials='coinbase', test_status=None,
+                             last_tested=None),
+             SimpleNamespace(id=2, provider='openai', encrypted_credentials='openai', test_status='success',
+                             last_tested=None)]
+    invalidate_balance_cache(8)
+
+    with Flask(__name__).app_context():
+        result = BalanceAggregator(8, timeout=1.0, ttl=30).aggregate(creds)
+
+    assert calls == ['coinbase'] and result['total'] == 100.0 and result['errors'] == []
+    assert creds[0].test_status == 'success'
+    assert creds[1].test_status == 'success' and creds[1].last_tested is not None
+    assert {a['provider'] for a in result['accounts']} == {'coinbase', 'openai'}
+    invalidate_balance_cache(8)
+
+def test_credential_and_trade_changes_invalidate_cached_balances(tmp_path):
+    from app import db
+    from models import APICredential, Trade, User
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'balances.db'}"
+    db.init_app(app)
+
+    def cache_user(user_id):
+        balance_aggregator._cache[(user_id, 1)] = (time.monotonic(), {'balance': 1.0})
+
+    def cached(user_id):
+        return (user_id, 1) in balance_aggregator._cache
+
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(id=7, username='u7', email='u7@example.com', password_hash='x'))
+        cred = APICredential(user_id=7, provider='schwab', encrypted_credentials=b'x', is_active=True)
+        db.session.add(cred)
+        db.session.commit()
+
+        cache_user(7)
+        cred.test_status = 'success'  # bookkeeping written by the aggregator itself
+        db.session.commit()
+        assert cached(7)
+
+        cred.encrypted_credentials = b'y'
+        db.session.commit()
+        assert not cached(7)
+
+        cache_user(7)
+        trade = Trade(user_id=7, provider='schwab', symbol='AAPL', side='buy', quantity=1)
+        db.session.add(trade)
+        db.session.commit()
+        assert not cached(7)
+
+        cache_user(7)
+        trade.status = 'executed'
+        db.session.commit()
+        assert not cached(7)
+
+        cache_user(7)
+        db.session.delete(cred)
+        db.session.commit()
+        assert not cached(7)
+        db.drop_all()
@@ -0,0 +1,58 @@
+import pandas as pd
+
+from utils import batch_quotes, enhanced_market_data
+from utils.enhanced_market_data import EnhancedMarketDataProvider
+
+
+def _fake_download(calls):
+    def download(symbols, **kwargs):
+        # Downloads are serialized and adjusted like the per-symbol Ticker.history path
+        assert batch_quotes._download_lock.locked() and kwargs['auto_adjust'] is True
+        calls.append(list(symbols))
+        index = pd.date_range('2024-01-01', periods=2)
+        frames = {}
+        for i, symbol in enumerate(symbols):
+            if symbol == 'BAD':
+                continue
+            base = 100.0 + i
+            frames[symbol] = pd.DataFrame({
+                'Open': [base, base], 'High': [base + 2, base + 3], 'Low': [base - 1, base - 1],
+                'Close': [base, base * 1.01], 'Adj Close': [base, base * 1.01], 'Volume': [1000, 2000],
+            }, index=index)
+        return pd.concat(frames, axis=1)
+    return download
+
+
+def test_batch_quotes_chunk_requests_and_fill_per_symbol_cache(monkeypatch):
+    calls = []
+    monkeypatch.setattr(batch_quotes.yf, 'download', _fake_download(calls))
+    monkeypatch.setattr(batch_quotes, 'QUOTE_BATCH_SIZE', 2)
+    provider = EnhancedMarketDataProvider()
+
+    symbols = ['AAPL', 'MSFT', 'BAD', 'NVDA', 'AMD']
+    quotes = provider.get_multiple_quotes(symbols)
+
+    assert sorted(len(c) for c in calls) == [1, 2, 2]
+    assert list(quotes) == ['AAPL', 'MSFT', 'NVDA', 'AMD']
+    assert quotes['AAPL']['change_percent'] == 1.0
+    assert quotes['AAPL']['volume'] == 2000 and quotes['AAPL']['name'] == 'AAPL'
+
+    # Second call is served from the per-symbol cache, only the miss is retried
+    calls.clear()
+    provider.get_multiple_quotes(symbols)
+    assert calls == [['BAD']]
+
+    # Single-symbol quotes never see the batch placeholders, and the batch reuses full quotes
+    class FakeTicker:
+        info = {'shortName': 'Microsoft Corp', 'marketCap': 3e12, 'previousClose': 400.0}
+
+        def __init__(self, symbol):
+            pass
+
+        def history(self, **kwargs):
+            return pd.DataFrame({'Open': [400.0], 'High': [405.0], 'Low': [399.0], 'Close': [404.0]})
+
+    monkeypatch.setattr(enhanced_market_data.yf, 'Ticker', FakeTicker)
+    full = provider.get_real_time_quote('MSFT')
+    assert full['name'] == 'Microsoft Corp' and full['market_cap'] == 3e12
+    assert provider.get_multiple_quotes(['MSFT'])['MSFT'] is full
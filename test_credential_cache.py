@@ -0,0 +1,42 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+from utils import encryption
+
+
+def test_key_is_derived_once_and_decrypted_credentials_are_cached(monkeypatch):
+    monkeypatch.delenv('ENCRYPTION_KEY', raising=False)
+    monkeypatch.setenv('ENCRYPTION_SECRET', 'cache-test-secret')
+    monkeypatch.setenv('ENCRYPTION_SALT', 'cache-test-salt')
+    derivations = []
+    real_derive = encryption.PBKDF2HMAC.derive
+    monkeypatch.setattr(encryption.PBKDF2HMAC, 'derive',
+                        lambda self, password: derivations.append(password) or real_derive(self, password))
+    encryption._resolve_encryption_key.cache_clear()
+    encryption.invalidate_credential_cache()
+
+    blob = encryption.encrypt_credentials({'access_token': 'a1', 'scopes': ['read']})
+    assert encryption.decrypt_credentials(blob)['access_token'] == 'a1'
+    assert len(derivations) == 1
+
+    decrypts = []
+    real_decrypt = encryption.decrypt_credentials
+    monkeypatch.setattr(encryption, 'decrypt_credentials', lambda data: decrypts.append(data) or real_decrypt(data))
+    cred = SimpleNamespace(id=42, updated_at=datetime(2026, 1, 1), encrypted_credentials=blob)
+
+    first = encryption.decrypt_credential(cred)
+    first['scopes'].append('mutated')
+    assert encryption.decrypt_credential(cred) == {'access_token': 'a1', 'scopes': ['read']}
+    assert len(decrypts) == 1
+
+    # A refreshed blob is never served from the old entry, flushed or not
+    cred.encrypted_credentials = encryption.encrypt_credentials({'access_token': 'a2'})
+    assert encryption.decrypt_credential(cred)['access_token'] == 'a2'
+    cred.updated_at = datetime(2026, 1, 2)
+    assert encryption.decrypt_credential(cred)['access_token'] == 'a2'
+    assert len(decrypts) == 3 and len(derivations) == 1
+
+    encryption.invalidate_credential_cache(42)
+    encryption.decrypt_credential(cred)
+    assert len(decrypts) == 4
+    encryption._resolve_encryption_key.cache_clear()
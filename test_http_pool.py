@@ -0,0 +1,60 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from utils import http_pool
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    ports = []
+    failures = 0
+
+    def do_GET(self):
+        _Handler.ports.append(self.client_address[1])
+        if _Handler.failures:
+            _Handler.failures -= 1
+            status, body = 503, b'busy'
+        else:
+            status, body = 200, b'{"ok": true}'
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Set-Cookie', 'session=user-a')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(http_pool, 'HTTP_BACKOFF_FACTOR', 0)
+    monkeypatch.setattr(http_pool, '_http_session', None)
+    http_pool.reset_http_pool_stats()
+    _Handler.ports, _Handler.failures = [], 0
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{httpd.server_address[1]}'
+    httpd.shutdown()
+
+
+def test_shared_session_keeps_connections_alive_and_drops_cookies(server):
+    session = http_pool.get_http_session()
+    assert http_pool.get_http_session() is session
+
+    for _ in range(5):
+        assert session.get(f'{server}/quote', timeout=5).json() == {'ok': True}
+
+    assert len(set(_Handler.ports)) == 1  # one pooled connection reused
+    assert len(session.cookies) == 0
+    stats = http_pool.http_pool_stats()['127.0.0.1']
+    assert stats['requests'] == 5 and stats['errors'] == 0
+
+
+def test_idempotent_requests_retry_transient_status(server):
+    _Handler.failures = 2
+    response = http_pool.get_http_session().get(f'{server}/quote', timeout=5)
+    assert response.status_code == 200
+    assert len(_Handler.ports) == 3
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+
+from analysis.indicator_engine import IndicatorStream, StreamingIndicatorEngine
+from analysis.multi_timeframe import compute_indicators
+
+
+def _frame(n, seed=0, flat_prefix=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    close[:flat_prefix] = close[0]
+    volume = rng.integers(1, 1_000_000, n).astype(float)
+    index = pd.date_range('2024-01-01', periods=n, freq='h')
+    return pd.DataFrame({'close': close, 'volume': volume}, index=index)
+
+
+def _assert_identical(expected, actual):
+    assert expected.keys() == actual.keys()
+    for key, value in expected.items():
+        other = actual[key]
+        assert type(value) is type(other), key
+        if isinstance(value, float) and value != value:
+            assert other != other, key
+        else:
+            assert repr(value) == repr(other), key
+
+
+def test_stream_matches_compute_indicators_bar_by_bar():
+    df = _frame(180, seed=1, flat_prefix=40)
+    stream = IndicatorStream()
+    for i, (close, volume) in enumerate(zip(df['close'], df['volume'])):
+        stream.push(close, volume, df.index[i])
+        if i in (0, 1, 13, 19, 20, 49, 120, 179):
+            _assert_identical(compute_indicators(df.iloc[:i + 1]), stream.snapshot())
+
+
+def test_update_from_frame_only_consumes_new_bars():
+    df = _frame(300, seed=2)
+    engine = StreamingIndicatorEngine()
+    engine.update_from_frame('aapl', '1h', df.iloc[:250])
+    result = engine.update_from_frame('AAPL', '1h', df.iloc[:260])
+    assert engine.bar_count('AAPL', '1h') == 260
+    _assert_identical(compute_indicators(df.iloc[:260]), result)
+
+
+def test_update_from_frame_revises_forming_candle():
+    df = _frame(120, seed=3)
+    engine = StreamingIndicatorEngine()
+    engine.update_from_frame('BTC', '5m', df)
+    revised = df.copy()
+    revised.iloc[-1, 0] += 2.5
+    result = engine.update_from_frame('BTC', '5m', revised)
+    assert engine.bar_count('BTC', '5m') == 120
+    _assert_identical(compute_indicators(revised), result)
+
+
+def test_update_from_frame_rebuilds_when_history_is_missing():
+    df = _frame(200, seed=4)
+    engine = StreamingIndicatorEngine()
+    engine.update_from_frame('MSFT', '1d', df.iloc[:100])
+    result = engine.update_from_frame('MSFT', '1d', df.iloc[150:])
+    assert engine.bar_count('MSFT', '1d') == 50
+    _assert_identical(compute_indicators(df.iloc[150:]), result)
+
+
+def test_batch_matches_compute_indicators_for_ragged_universe():
+    from analysis.batch_indicators import compute_indicators_for_frames
+
+    frames = {
+        'AAA': _frame(200, seed=5, flat_prefix=60),
+        'BBB': _frame(75, seed=6),
+        'CCC': _frame(1, seed=7),
+        'DDD': _frame(19, seed=8),
+    }
+    frames['EEE'] = _frame(120, seed=9)
+    frames['EEE'].iloc[40, 0] = np.nan
+
+    results = compute_indicators_for_frames(frames)
+
+    assert set(results) == set(frames)
+    for symbol, df in frames.items():
+        _assert_identical(compute_indicators(df), results[symbol])
+
+
+def test_update_from_frame_rebuilds_when_the_window_slides():
+    df = _frame(300, seed=5)
+    engine = StreamingIndicatorEngine()
+    engine.update_from_frame('AAPL', '1h', df.iloc[:250])
+    result = engine.update_from_frame('AAPL', '1h', df.iloc[10:260])
+
+    assert engine.bar_count('AAPL', '1h') == 250
+    _assert_identical(compute_indicators(df.iloc[10:260]), result)
+
+    # Polling the same window again revises the stream instead of rebuilding it
+    stream = engine._streams[('AAPL', '1h')]
+    revised = df.iloc[10:260].copy()
+    revised.iloc[-1, 0] += 1.5
+    _assert_identical(compute_indicators(revised), engine.update_from_frame('AAPL', '1h', revised))
+    assert engine._streams[('AAPL', '1h')] is stream
@@ -0,0 +1,108 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import analysis.multi_timeframe as mtf
+
+
+def _frame(n=120):
+    close = 100 + np.cumsum(np.random.default_rng(0).normal(0, 1, n))
+    return pd.DataFrame({'open': close, 'high': close, 'low': close,
+                         'close': close, 'volume': np.full(n, 1000.0)})
+
+
+def test_analyze_many_fetches_pairs_concurrently(monkeypatch):
+    in_flight = []
+    peak = []
+    lock = threading.Lock()
+
+    def fake_fetch(ticker, timeframe, start=None):
+        with lock:
+            in_flight.append(1)
+            peak.append(len(in_flight))
+        time.sleep(0.05)
+        with lock:
+            in_flight.pop()
+        return _frame()
+
+    monkeypatch.setattr(mtf, '_fetch_yfinance', fake_fetch)
+    analyzer = mtf.MultiTimeframeAnalyzer(max_workers=8)
+
+    started = time.monotonic()
+    results = analyzer.analyze_many(['aapl', 'MSFT', 'AAPL'])
+    elapsed = time.monotonic() - started
+
+    assert list(results) == ['AAPL', 'MSFT']
+    for signals in results.values():
+        assert [s.timeframe for s in signals] == mtf.TIMEFRAMES
+        assert all('error' not in s.indicators for s in signals)
+    assert max(peak) > 1
+    assert elapsed < 0.05 * 6
+
+
+def test_analyze_many_marks_stragglers_after_deadline(monkeypatch):
+    def fake_fetch(ticker, timeframe, start=None):
+        if timeframe == '1d':
+            time.sleep(0.5)
+        return _frame()
+
+    monkeypatch.setattr(mtf, '_fetch_yfinance', fake_fetch)
+    analyzer = mtf.MultiTimeframeAnalyzer(concurrent=True, deadline=0.1)
+
+    signals = analyzer.analyze('SPY')
+
+    by_tf = {s.timeframe: s for s in signals}
+    assert by_tf['1d'].indicators == {'error': 'deadline_exceeded'}
+    assert by_tf['1d'].strength == 0
+    assert 'error' not in by_tf['5m'].indicators
+
+
+def test_candle_store_only_requests_missing_tail(monkeypatch, tmp_path):
+    from analysis.candle_store import CandleStore
+
+    hour = 3600
+    now = 1_700_000_000
+    full = _frame(200)
+    full['timestamp'] = now - hour * (200 - np.arange(200))
+    requested = []
+
+    def fake_fetch(ticker, timeframe, start=None):
+        requested.append(start)
+        if start is None:
+            return full.iloc[:190].copy()
+        return full[full['timestamp'] >= start].copy()
+
+    monkeypatch.setattr(mtf, '_fetch_yfinance', fake_fetch)
+    store = CandleStore(root=str(tmp_path))
+
+    first = store.sync('AAPL', '1h', lambda start: fake_fetch('AAPL', '1h', start), now=now)
+    second = store.sync('AAPL', '1h', lambda start: fake_fetch('AAPL', '1h', start), now=now)
+
+    assert requested == [None, int(full['timestamp'].iloc[189])]
+    assert len(first) == 190
+    assert len(second) == 200
+    assert second['timestamp'].is_monotonic_increasing
+    assert np.allclose(second['close'], full['close'])
+
+    analyzer = mtf.MultiTimeframeAnalyzer(candle_store=store)
+    signals = analyzer.analyze('AAPL')
+    assert all('error' not in s.indicators for s in signals)
+
+
+def test_analyze_many_batches_only_large_ticker_sets(monkeypatch):
+    import analysis.batch_indicators as batch
+
+    monkeypatch.setattr(mtf, '_fetch_yfinance', lambda ticker, timeframe, start=None: _frame())
+    batched_sizes = []
+    real = batch.compute_indicators_for_frames
+    monkeypatch.setattr(batch, 'compute_indicators_for_frames',
+                        lambda frames: batched_sizes.append(len(frames)) or real(frames))
+    analyzer = mtf.MultiTimeframeAnalyzer(max_workers=8)
+
+    small = analyzer.analyze_many(['AAPL', 'MSFT'])
+    assert batched_sizes == []
+    large = analyzer.analyze_many([f'T{i}' for i in range(16)])
+    assert batched_sizes == [16] * len(mtf.TIMEFRAMES)
+    assert large['T0'][0].indicators == small['AAPL'][0].indicators
@@ -0,0 +1,119 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+from neural.async_engine import AsyncNeuralEngine, ProviderRateLimiter, TokenBucket
+from neural.base_engine import AIProvider
+from neural.feature_cache import FeatureBucketCache
+
+
+class _NoCache:
+    def key(self, payload):
+        return json.dumps(payload, sort_keys=True)
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        pass
+
+
+class _FakeEngine:
+    provider = AIProvider.CLAUDE
+    model = "fake-model"
+    max_tokens = 100
+
+    def __init__(self, delay=0.1, failures=0):
+        self.cache = _NoCache()
+        self.feature_cache = FeatureBucketCache()
+        self.delay = delay
+        self.failures = failures
+        self.in_flight = 0
+        self.peak = 0
+
+    async def _acreate(self, user_prompt):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("429 rate limited")
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        ticker = user_prompt.split("TICKER: ")[1].split("\n")[0]
+        return SimpleNamespace(text=json.dumps({"direction": "LONG", "confidence": 0.8, "reasoning": ticker}))
+
+    def _extract(self, response):
+        return response.text, json.loads(response.text), 10, 5
+
+    def _neutral(self, reason):
+        raise AssertionError(reason)
+
+
+def _unlimited(engine):
+    engine.limiter = ProviderRateLimiter(rpm=10_000, tpm=10_000_000)
+    return engine
+
+
+def test_batch_keeps_requests_in_flight_and_preserves_order():
+    fake = _FakeEngine(delay=0.2)
+    engine = _unlimited(AsyncNeuralEngine(fake, max_in_flight=4))
+    tickers = [f"T{i}" for i in range(8)]
+
+    start = time.monotonic()
+    results = engine.analyze_trades_batch([{"ticker": t, "market_data": {}, "signals": {}} for t in tickers])
+    elapsed = time.monotonic() - start
+
+    assert [r.reasoning for r in results] == tickers
+    assert fake.peak == 4
+    assert elapsed < 1.0  # two waves of 0.2s, not eight serial calls
+
+
+def test_transient_errors_back_off_without_blocking_other_requests(monkeypatch):
+    monkeypatch.setenv("NEURAL_MAX_RETRIES", "3")
+    fake = _FakeEngine(delay=0.0, failures=1)
+    engine = _unlimited(AsyncNeuralEngine(fake))
+    sleeps = []
+    real_sleep = asyncio.sleep
+
+    async def fast_sleep(seconds):
+        sleeps.append(seconds)
+        await real_sleep(0)
+
+    monkeypatch.setattr("neural.common.asyncio.sleep", fast_sleep)
+    result = engine.analyze_trade("AAPL", {}, {})
+    assert result.direction == "LONG"
+    assert sleeps[0] == 1
+
+
+def test_token_bucket_reservations_queue_callers():
+    bucket = TokenBucket(per_minute=60)
+    assert bucket.reserve(60) == 0.0
+    wait = bucket.reserve(30)
+    assert 29.0 < wait <= 30.0
+    bucket.adjust(30)
+    assert bucket.reserve(1) <= 1.0
+
+
+def test_trade_loop_builds_one_async_engine_per_model(monkeypatch):
+    import threading
+
+    from execution import trade_loop
+
+    created = []
+
+    def create_async(provider=None, model=None):
+        time.sleep(0.05)
+        created.append((provider, model))
+        return SimpleNamespace(analyze_trade=lambda **kwargs: None)
+
+    monkeypatch.setattr(trade_loop.NeuralEngineFactory, "create_async", staticmethod(create_async))
+    monkeypatch.setattr(trade_loop, "_async_engines", {})
+    config = {"AI_PROVIDER": "claude", "AI_MODEL": "m", "NEURAL_ASYNC_ENABLED": True}
+    threads = [threading.Thread(target=trade_loop._get_engine, args=(config,)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert created == [("claude", "m")]
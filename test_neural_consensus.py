@@ -0,0 +1,104 @@
+import time
+from types import SimpleNamespace
+
+from neural.base_engine import NeuralAnalysis
+from neural.consensus_engine import ConsensusNeuralEngine
+
+
+class _FakeEngine:
+    def __init__(self, name, direction, delay):
+        self.provider = SimpleNamespace(value=name)
+        self.direction = direction
+        self.delay = delay
+
+    def analyze_trade(self, ticker, market_data, signals, sentiment=None, regime=None):
+        time.sleep(self.delay)
+        return NeuralAnalysis(
+            direction=self.direction, confidence=0.8, reasoning=self.provider.value,
+            key_factors=[], risk_assessment="LOW", suggested_position_size=0.5,
+            suggested_sl_pct=None, suggested_tp_pct=None, market_context="", contrarian_view="",
+            raw_response="", provider=self.provider.value, model=self.provider.value,
+            tokens_used=1, latency_ms=self.delay * 1000,
+        )
+
+
+def _consensus(monkeypatch, specs, mode, early_exit=True):
+    engines = iter(_FakeEngine(*spec) for spec in specs)
+    monkeypatch.setattr("neural.consensus_engine.NeuralEngineFactory.create", lambda provider: next(engines))
+    return ConsensusNeuralEngine(providers=[s[0] for s in specs], consensus_mode=mode, early_exit=early_exit)
+
+
+def test_unanimous_exits_on_first_dissent(monkeypatch):
+    engine = _consensus(monkeypatch, [("a", "LONG", 0.01), ("b", "SHORT", 0.05), ("c", "LONG", 1.5)], "unanimous")
+    start = time.monotonic()
+    result = engine.analyze_trade("AAPL", {}, {})
+    assert time.monotonic() - start < 1.0
+    assert result.direction == "NEUTRAL"
+    assert result.skipped_providers == ["c"]
+
+
+def test_majority_exits_once_settled(monkeypatch):
+    engine = _consensus(monkeypatch, [("a", "LONG", 0.01), ("b", "LONG", 0.05), ("c", "SHORT", 1.5)], "majority")
+    start = time.monotonic()
+    result = engine.analyze_trade("AAPL", {}, {})
+    assert time.monotonic() - start < 1.0
+    assert result.direction == "LONG"
+    assert result.model == "a,b"
+    assert result.skipped_providers == ["c"]
+
+
+def test_majority_waits_while_outcome_is_open(monkeypatch):
+    engine = _consensus(monkeypatch, [("a", "LONG", 0.01), ("b", "SHORT", 0.05), ("c", "LONG", 0.2)], "majority")
+    result = engine.analyze_trade("AAPL", {}, {})
+    assert result.direction == "LONG"
+    assert result.skipped_providers == []
+
+
+def test_async_mode_cancels_stragglers(monkeypatch):
+    engine = _consensus(monkeypatch, [("a", "LONG", 0.01), ("b", "SHORT", 0.05), ("c", "LONG", 1.5)], "unanimous")
+    engine.async_mode = True
+    engine.async_engines = [None] * len(engine.engines)
+    start = time.monotonic()
+    result = engine.analyze_trade("AAPL", {}, {})
+    assert time.monotonic() - start < 1.0
+    assert result.skipped_providers == ["c"]
+
+
+def test_portfolio_review_fans_out_and_returns_partial_results_at_deadline(monkeypatch):
+    engine = _consensus(monkeypatch, [("a", "LONG", 0.3), ("b", "LONG", 0.3), ("c", "LONG", 2.0)], "majority",
+                        early_exit=False)
+    for fake in engine.engines:
+        fake.analyze_portfolio = lambda positions, overview, fake=fake: (
+            time.sleep(fake.delay) or {"overall_risk": "LOW", "by": fake.provider.value}
+        )
+
+    start = time.monotonic()
+    review = engine.analyze_portfolio([], {}, deadline=1.0)
+    elapsed = time.monotonic() - start
+
+    assert elapsed < 1.5  # max of provider latencies, capped by the deadline
+    assert review["providers"] == ["a", "b"]
+    assert [r["by"] for r in review["responses"]] == ["a", "b"]
+    assert review["missing_providers"] == ["c"]
+
+
+def test_slow_dissenter_past_the_deadline_still_blocks_unanimous_trade(monkeypatch):
+    for async_mode in (False, True):
+        engine = _consensus(monkeypatch, [("openai", "BUY", 0.01), ("claude", "SELL", 1.0)], "unanimous",
+                            early_exit=False)
+        engine.deadline = 0.2
+        if async_mode:
+            engine.async_mode = True
+            engine.async_engines = [None] * len(engine.engines)
+        result = engine.analyze_trade("AAPL", {}, {})
+        assert result.direction == "NEUTRAL" and result.confidence == 0.0
+        assert result.skipped_providers == ["claude"]
+
+
+def test_majority_counts_missing_providers_as_non_votes(monkeypatch):
+    engine = _consensus(monkeypatch, [("a", "LONG", 0.01), ("b", "SHORT", 1.0), ("c", "SHORT", 1.0)], "majority",
+                        early_exit=False)
+    engine.deadline = 0.2
+    result = engine.analyze_trade("AAPL", {}, {})
+    assert result.direction == "NEUTRAL"
+    assert result.skipped_providers == ["b", "c"]
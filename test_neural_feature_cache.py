@@ -0,0 +1,63 @@
+from neural.base_engine import AIProvider
+from neural.claude_engine import ClaudeNeuralEngine
+from neural.common import USAGE_STATE, usage_snapshot
+from neural.feature_cache import FeatureBucketCache
+
+
+def _key(cache, price=187.42, rsi=41.3, sentiment=0.31, **signals):
+    return cache.key(
+        "claude", "m", "AAPL",
+        {"current_price": price, "asset_class": "EQUITY"},
+        {"rsi": rsi, "trend": "bullish", "timestamp": signals.pop("timestamp", "t0"), **signals},
+        {"score": sentiment},
+        "trending",
+    )
+
+
+def test_key_ignores_noise_but_tracks_bucket_changes():
+    cache = FeatureBucketCache()
+    base = _key(cache)
+    assert _key(cache, price=187.43, rsi=43.9, sentiment=0.45, timestamp="t1") == base
+    assert _key(cache, price=195.0) != base
+    assert _key(cache, rsi=29.0) != base
+    assert _key(cache, sentiment=-0.2) != base
+    assert _key(cache, macd=1.234) != _key(cache, macd=-1.234)
+
+
+def test_price_levels_are_banded_like_spot(monkeypatch):
+    cache = FeatureBucketCache()
+    assert _key(cache, stop_loss=104.0, ema20=181.3) == _key(cache, stop_loss=104.2, ema20=181.5)
+    # Two significant figures would put both stops in the 1.0e2 bucket
+    assert _key(cache, stop_loss=104.0) != _key(cache, stop_loss=108.0)
+    assert _key(cache, price_target=212.0) != _key(cache, price_target=206.0)
+
+    monkeypatch.setenv("NEURAL_CACHE_LEVEL_BAND_PCT", "5")
+    wide = FeatureBucketCache()
+    assert _key(wide, stop_loss=104.0) == _key(wide, stop_loss=105.0)
+
+
+def test_engine_reuses_analysis_within_bucket_and_reports_hit_rate(monkeypatch):
+    USAGE_STATE.pop("claude", None)
+    engine = ClaudeNeuralEngine.__new__(ClaudeNeuralEngine)
+    engine.provider = AIProvider.CLAUDE
+    engine.model = "m"
+    engine.feature_cache = FeatureBucketCache()
+    calls = []
+
+    def fake_invoke(prompt):
+        calls.append(prompt)
+        return {"parsed": {"direction": "LONG", "confidence": 0.7}, "raw": "{}",
+                "latency_ms": 900.0, "tokens_used": 10, "cost_usd": 0.01}
+
+    monkeypatch.setattr(engine, "_invoke_json", fake_invoke)
+
+    first = engine.analyze_trade("AAPL", {"current_price": 100.00}, {"rsi": 50.0})
+    second = engine.analyze_trade("AAPL", {"current_price": 100.01}, {"rsi": 51.0})
+    engine.analyze_trade("AAPL", {"current_price": 100.00}, {"rsi": 75.0})
+
+    assert len(calls) == 2
+    assert second.to_dict() == first.to_dict()
+    stats = usage_snapshot()["claude"]
+    assert stats["cache_hits"] == 1 and stats["cache_misses"] == 2
+    assert abs(stats["cache_hit_rate"] - 1 / 3) < 1e-9
+    assert abs(stats["cache_saved_usd"] - 0.01) < 1e-9
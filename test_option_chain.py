@@ -0,0 +1,103 @@
+import threading
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+import utils.option_chain as option_chain
+from utils.market_data import MarketDataProvider
+from utils.option_chain import OptionChain, OptionChainCache, days_to_expiration
+from utils.options_pricing import black_scholes
+from utils.options_trading import WheelStrategy
+
+NOW = datetime(2026, 3, 2, 16)
+SPOT = 100.0
+
+
+def _frames(expiration, strikes=np.arange(70.0, 131.0, 1.0)):
+    days = days_to_expiration(expiration, NOW)
+    frames = []
+    for is_call in (True, False):
+        price = black_scholes(SPOT, strikes, days, 0.3, is_call)['price']
+        frames.append(pd.DataFrame({'strike': strikes, 'bid': price - 0.02, 'ask': price + 0.02,
+                                    'lastPrice': price, 'volume': 10, 'openInterest': 100,
+                                    'impliedVolatility': 0.0}))
+    return tuple(frames)
+
+
+def test_columnar_chain_filters_and_serializes_at_the_edge():
+    expirations = ['2026-03-09', '2026-03-30', '2026-04-17', '2026-06-19']
+    chain = OptionChain.from_frames('XYZ', SPOT, {e: _frames(e) for e in expirations}, now=NOW)
+
+    assert len(chain) == 4 * 2 * 61
+    assert np.allclose(chain['iv'][chain['vega'] > 0.01], 0.3, atol=1e-4)
+
+    puts = chain.filter(is_call=False, abs_delta=(0.25, 0.35), dte=(20, 50))
+    assert len(puts) > 0 and not puts.is_call.any()
+    assert set(np.asarray(chain.expirations)[puts.expiry_index]) == {'2026-03-30', '2026-04-17'}
+    assert ((np.abs(puts['delta']) >= 0.25) & (np.abs(puts['delta']) <= 0.35)).all()
+
+    payload = chain.to_dict('2026-03-30')
+    assert payload['expirations'] == expirations and len(payload['calls']) == len(payload['puts']) == 61
+    assert set(payload['puts'][0]) >= {'strike', 'bid', 'ask', 'implied_volatility', 'delta', 'gamma'}
+
+    csp = WheelStrategy().get_cash_secured_put_details('XYZ', SPOT, target_delta=0.30, dte=45, option_chain=chain)
+    assert csp['pricing_source'] == 'chain' and csp['expiration_date'] == '2026-04-17'
+    assert abs(abs(csp['delta']) - 0.30) < 0.02
+
+
+def test_expirations_load_concurrently_and_chain_is_cached(monkeypatch):
+    expirations = ['2026-03-09', '2026-03-30', '2026-04-17']
+    calls = []
+
+    class FakeTicker:
+        options = tuple(expirations)
+
+        def __init__(self, symbol):
+            self.symbol = symbol
+
+        def option_chain(self, expiration):
+            calls.append((expiration, threading.get_ident()))
+            time.sleep(0.2)
+            frames = _frames(expiration)
+            return SimpleNamespace(calls=frames[0], puts=frames[1])
+
+    monkeypatch.setattr(option_chain.yf, 'Ticker', FakeTicker)
+    monkeypatch.setattr(option_chain, '_chain_cache', OptionChainCache(ttl=60))
+    provider = MarketDataProvider()
+    monkeypatch.setattr(provider, 'get_stock_quote', lambda symbol: {'price': SPOT})
+
+    start = time.monotonic()
+    chain = provider.get_option_chain_columns('XYZ')
+    assert time.monotonic() - start < 0.5
+    assert chain.expirations == tuple(expirations) and len({ident for _, ident in calls}) == 3
+
+    assert provider.get_option_chain_columns('xyz') is chain and len(calls) == 3
+    assert provider.get_option_chain('XYZ')['expiration'] == '2026-03-09'
+
+
+def test_collar_legs_share_one_expiration():
+    from utils.options_trading import CollarStrategy
+
+    # Calls are only priced in the earlier expiration, puts only in the later one
+    near, far = _frames('2026-03-30'), _frames('2026-04-17')
+    chain = OptionChain.from_frames('XYZ', SPOT, {'2026-03-30': (near[0], None), '2026-04-17': (None, far[1]),
+                                                  '2026-04-10': _frames('2026-04-10')}, now=NOW)
+
+    collar = CollarStrategy().get_collar_details('XYZ', SPOT, dte=45, option_chain=chain)
+    assert collar['expiration_date'] == '2026-04-10'
+    assert collar['put_source'] == collar['call_source'] == collar['pricing_source'] == 'chain'
+
+    lopsided = OptionChain.from_frames('XYZ', SPOT, {'2026-03-30': (near[0], None),
+                                                     '2026-04-17': (None, far[1])}, now=NOW)
+    collar = CollarStrategy().get_collar_details('XYZ', SPOT, dte=45, option_chain=lopsided)
+    assert collar['put_source'] == collar['call_source'] == 'model' and collar['days_to_expiration'] == 45
+
+
+def test_expiration_day_counts_down_to_the_new_york_close():
+    # 16:00 New York is 21:00 UTC in winter and 20:00 UTC in summer
+    assert days_to_expiration('2026-03-06', datetime(2026, 3, 6, 17)) == 4 / 24
+    assert days_to_expiration('2026-07-17', datetime(2026, 7, 17, 16)) == 4 / 24
+    assert days_to_expiration('2026-07-17', datetime(2026, 7, 17, 20, 30)) == 0.0
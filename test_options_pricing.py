@@ -0,0 +1,68 @@
+import math
+
+import numpy as np
+
+import utils.options_pricing as pricing
+from utils.options_pricing import black_scholes, price_chain, strike_for_delta
+from utils.options_trading import WheelStrategy
+
+
+def test_chain_prices_satisfy_parity_and_greeks_match_finite_differences():
+    strikes = np.arange(80, 121, 5.0)
+    days = np.array([7, 30, 90])
+    calls = price_chain(100.0, strikes, days, 0.3, is_call=True, rate=0.04)
+    puts = price_chain(100.0, strikes, days, 0.3, is_call=False, rate=0.04)
+    assert calls['price'].shape == (len(strikes), len(days))
+
+    t = days / 365.0
+    parity = 100.0 - strikes[:, None] * np.exp(-0.04 * t)[None, :]
+    assert np.allclose(calls['price'] - puts['price'], parity, atol=1e-9)
+
+    bump = 1e-3
+    up = black_scholes(100.0 + bump, strikes, 30, 0.3, False)['price']
+    down = black_scholes(100.0 - bump, strikes, 30, 0.3, False)['price']
+    assert np.allclose(puts['delta'][:, 1], (up - down) / (2 * bump), atol=1e-6)
+    vega_up = black_scholes(100.0, strikes, 30, 0.31, False)['price']
+    assert np.allclose(puts['vega'][:, 1], vega_up - puts['price'][:, 1], atol=2e-3)
+
+    expired = black_scholes(100.0, [90.0, 110.0], 0, 0.3, True)
+    assert expired['price'].tolist() == [10.0, 0.0] and expired['delta'].tolist() == [1.0, 0.0]
+
+
+def test_target_delta_strikes_solve_across_underlyings_and_without_scipy(monkeypatch):
+    prices = np.array([12.5, 98.0, 250.0, 4100.0])
+    for scipy_available in (True, False):
+        monkeypatch.setattr(pricing, 'SCIPY_AVAILABLE', scipy_available and pricing.SCIPY_AVAILABLE)
+        strikes = strike_for_delta(prices, 0.30, 30, 0.35, is_call=False)
+        deltas = black_scholes(prices, strikes, 30, 0.35, is_call=False)['delta']
+        assert np.allclose(deltas, -0.30, atol=1e-6)
+        assert abs(float(pricing.norm_cdf(1.3)) - 0.5 * math.erfc(-1.3 / math.sqrt(2))) < 1e-7
+
+    strike, delta = WheelStrategy().find_strike_for_target_delta(100.0, 0.30, 30, is_call=True)
+    assert strike > 100.0 and delta == 0.30
+
+
+def test_iv_solver_recovers_chain_vols_and_wheel_uses_listed_contract():
+    spot, days = 450.0, 30.0
+    strikes = np.arange(380.0, 521.0, 5.0)
+    vols = 0.18 + 0.4 * (strikes / spot - 1) ** 2
+    is_call = np.arange(strikes.size) % 2 == 0
+    prices = black_scholes(spot, strikes, days, vols, is_call)['price']
+
+    greeks = pricing.chain_greeks(spot, strikes, days, prices, is_call)
+    assert np.allclose(greeks['iv'], vols, atol=1e-5)
+    assert np.isnan(pricing.implied_volatility(0.01, 100.0, 50.0, 30, True))  # below intrinsic
+
+    puts = black_scholes(spot, strikes, days, vols, False)
+    chain = {'expiration': '2026-11-20', 'days_to_expiration': 29.6, 'calls': [], 'puts': [
+        {'strike': k, 'bid': p - 0.05, 'ask': p + 0.05, 'delta': d, 'implied_volatility': v}
+        for k, p, d, v in zip(strikes, puts['price'], puts['delta'], vols)
+    ]}
+    csp = WheelStrategy().get_cash_secured_put_details('SPY', spot, target_delta=0.30, dte=30, option_chain=chain)
+    best = strikes[np.argmin(np.abs(np.abs(puts['delta']) - 0.30))]
+    assert csp['pricing_source'] == 'chain' and csp['strike'] == best
+    assert csp['expiration_date'] == '2026-11-20' and csp['days_to_expiration'] == 30
+
+    far = dict(chain, days_to_expiration=2.0)
+    model = WheelStrategy().get_cash_secured_put_details('SPY', spot, target_delta=0.30, dte=30, option_chain=far)
+    assert model['pricing_source'] == 'model' and model['implied_volatility'] > 0.18
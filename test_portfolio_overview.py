@@ -0,0 +1,28 @@
+import json
+from datetime import datetime
+
+from utils.portfolio_analytics import PortfolioAnalytics
+
+
+def test_single_pass_aggregation_matches_per_trade_breakdowns():
+    rows = [
+        ('wheel', 'schwab', 1000.0, datetime(2026, 3, 2, 15), json.dumps({'pnl': 120.5, 'fill': 10})),
+        (None, 'schwab', 500.0, datetime(2026, 3, 2, 10), json.dumps({'pnl': -40})),
+        ('wheel', 'coinbase', None, datetime(2026, 3, 1, 9), json.dumps({'order_id': 'x'})),
+        ('ai', 'coinbase', 250.0, datetime(2026, 3, 1, 8), '{"pnl": "bad"'),
+        ('ai', 'coinbase', 250.0, datetime(2026, 3, 1, 7), json.dumps({'pnl': -10})),
+    ]
+
+    totals = PortfolioAnalytics()._aggregate_trade_rows(iter(rows))
+
+    assert totals['total_trades'] == 5 and totals['total_volume'] == 2000.0
+    assert totals['total_pnl'] == 70.5
+    assert (totals['winning_trades'], totals['losing_trades']) == (1, 2)
+    assert (totals['gross_profit'], totals['gross_loss']) == (120.5, -50)
+    assert totals['strategy_performance'] == {
+        'wheel': {'trades': 2, 'pnl': 120.5, 'volume': 1000.0},
+        'manual': {'trades': 1, 'pnl': -40, 'volume': 500.0},
+        'ai': {'trades': 2, 'pnl': -10, 'volume': 500.0},
+    }
+    assert totals['provider_performance']['coinbase'] == {'trades': 3, 'pnl': -10, 'volume': 500.0}
+    assert list(totals['daily_pnl'].items()) == [('2026-03-02', 80.5), ('2026-03-01', -10)]
@@ -0,0 +1,101 @@
+import time
+
+import sentiment.sentiment_engine as sentiment_engine
+from sentiment.finbert_scorer import FinBERTScoringService
+from sentiment.sentiment_engine import SentimentEngine
+from sentiment.source_budget import SourceBudget
+
+
+class _FakePipeline:
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, texts, batch_size):
+        self.batches.append(list(texts))
+        return [{"label": "negative" if "falls" in t else "positive", "score": 0.9} for t in texts]
+
+
+def _engine(monkeypatch, pipe):
+    service = FinBERTScoringService(pipeline_factory=lambda: pipe, batch_size=2)
+    monkeypatch.setattr(sentiment_engine, "get_scoring_service", lambda redis=None: service)
+    engine = SentimentEngine()
+    engine._redis = None
+    general = [{"headline": "AAPL and MSFT rally on AI demand"}]
+    monkeypatch.setattr(engine, "fetch_finnhub_general_news", lambda limit=20: general)
+    monkeypatch.setattr(engine, "fetch_finnhub_company_news",
+                        lambda t, days_back=2, limit=20: [{"headline": f"{t} falls after earnings"}])
+    monkeypatch.setattr(engine, "fetch_alpha_vantage_sentiment",
+                        lambda t, limit=20: [{"title": "AAPL and MSFT   rally on AI demand"}])
+    monkeypatch.setattr(engine, "fetch_reddit_posts", lambda t, subreddits=None, limit=15: [])
+    return engine, service
+
+
+def test_cycle_scores_each_unique_text_once_in_length_sorted_batches(monkeypatch):
+    pipe = _FakePipeline()
+    engine, service = _engine(monkeypatch, pipe)
+
+    results = engine.analyze_tickers(["aapl", "msft"])
+
+    inferred = [text for batch in pipe.batches for text in batch]
+    assert sorted(inferred) == sorted(["AAPL falls after earnings", "MSFT falls after earnings",
+                                       "AAPL and MSFT rally on AI demand"])
+    assert all(len(b) <= 2 for b in pipe.batches)
+    assert [len(t) for t in inferred] == sorted(len(t) for t in inferred)
+    assert results["aapl"]["sources_count"] == 3
+    assert results["msft"]["sources"]["finnhub"][0]["score"] == -0.9
+    assert service.stats["requested"] == 6 and service.stats["inferred"] == 3
+
+    pipe.batches.clear()
+    engine.analyze_tickers(["AAPL"])
+    assert pipe.batches == []
+
+
+def test_sources_are_fetched_concurrently_with_general_news_once(monkeypatch):
+    engine, _ = _engine(monkeypatch, _FakePipeline())
+    calls = {"general": 0}
+
+    def slow(result):
+        def fetch(*args, **kwargs):
+            time.sleep(0.2)
+            return result
+        return fetch
+
+    def general(limit=20):
+        calls["general"] += 1
+        return [{"headline": "NVDA and AMD beat estimates"}]
+
+    monkeypatch.setattr(engine, "fetch_finnhub_general_news", general)
+    monkeypatch.setattr(engine, "fetch_finnhub_company_news", slow([]))
+    monkeypatch.setattr(engine, "fetch_alpha_vantage_sentiment", slow([{"title": "Chips rally"}]))
+    monkeypatch.setattr(engine, "fetch_reddit_posts", slow([]))
+
+    start = time.monotonic()
+    results = engine.analyze_tickers(["NVDA", "AMD", "INTC"], concurrent=True)
+    assert time.monotonic() - start < 0.5  # nine 0.2s fetches overlap
+    assert calls["general"] == 1
+    assert results["NVDA"]["sources_count"] == 2 and results["INTC"]["sources_count"] == 1
+
+
+def test_results_missing_a_budget_skipped_source_are_cached_briefly(monkeypatch):
+    from sentiment.source_budget import get_source_budget
+
+    engine, _ = _engine(monkeypatch, _FakePipeline())
+    writes = {}
+    engine._redis = type("Cache", (), {"get": lambda self, key: None,
+                                       "set": lambda self, key, data, timeout: writes.update({key: timeout})})()
+
+    engine.analyze_tickers(["AAPL"], concurrent=False)
+    assert writes == {engine._cache_key("AAPL", "full_analysis"): SentimentEngine.CACHE_TTL}
+
+    def skipped(t, limit=20):
+        get_source_budget("alphavantage").skipped += 1
+        return []
+
+    monkeypatch.setattr(engine, "fetch_alpha_vantage_sentiment", skipped)
+    engine.analyze_tickers(["MSFT"], concurrent=False)
+    assert writes[engine._cache_key("MSFT", "full_analysis")] == SentimentEngine.DEGRADED_CACHE_TTL
+
+def test_source_budget_skips_instead_of_stalling():
+    budget = SourceBudget("alphavantage", per_minute=2, concurrency=1, max_wait=0.1)
+    assert budget.acquire() and budget.acquire()
+    assert budget.acquire() is False and budget.skipped == 1
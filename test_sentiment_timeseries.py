@@ -0,0 +1,38 @@
+from sentiment.sentiment_aggregator import SentimentAggregator
+from sentiment.timeseries import MemorySentimentSeries
+
+HOUR = 3600.0
+
+
+def test_memory_series_windows_and_trims_by_retention():
+    series = MemorySentimentSeries(retention=10 * HOUR)
+    for hour in range(20):
+        series.append_many({"AAPL": hour / 100}, ts=hour * HOUR)
+
+    assert series.window("AAPL", 0, 100 * HOUR)[0] == (9 * HOUR, 0.09)
+    assert [score for _, score in series.window("AAPL", 12 * HOUR, 14 * HOUR)] == [0.12, 0.13, 0.14]
+    assert len(series._series["AAPL"][0]) <= 20
+    assert series.window("MSFT", 0, 100 * HOUR) == []
+
+
+def test_batch_momentum_uses_scores_older_than_the_window(monkeypatch):
+    series = MemorySentimentSeries()
+    now = 1_000_000.0
+    series.append_many({"AAPL": 0.1, "MSFT": -0.2}, ts=now - 6 * HOUR)
+    series.append_many({"AAPL": 0.3}, ts=now - 5 * HOUR)
+    series.append_many({"MSFT": 0.0}, ts=now - 1 * HOUR)
+    monkeypatch.setattr("sentiment.sentiment_aggregator.time.time", lambda: now)
+    monkeypatch.setattr("sentiment.timeseries.time.time", lambda: now)
+
+    aggregator = SentimentAggregator(series=series)
+    analyses = {
+        t: {"ticker": t, "sources": {"finnhub": [{"score": 0.5, "confidence": 0.9}]}, "sources_count": 1}
+        for t in ("AAPL", "MSFT", "NVDA")
+    }
+    signals = aggregator.aggregate_batch(analyses)
+
+    assert signals["AAPL"].momentum == 0.3     # 0.5 - mean(0.1, 0.3)
+    assert signals["MSFT"].momentum == 0.7     # 0.5 - (-0.2); the 1h-old point is inside the window
+    assert signals["NVDA"].momentum == 0.0     # no history yet
+    assert series.window("NVDA", now, now) == [(now, 0.5)]
+    assert [s.ticker for s in aggregator.get_trending(signals, top_n=2)] == ["MSFT", "AAPL"]
@@ -0,0 +1,127 @@
+import time
+from types import SimpleNamespace
+
+from utils.stop_engine import StopLossEngine
+
+
+def _trade(trade_id, symbol, side, stop=None, take_profit=None, user_id=1, provider='schwab'):
+    return SimpleNamespace(id=trade_id, user_id=user_id, provider=provider, symbol=symbol, side=side,
+                           status='executed', stop_loss_price=stop, take_profit_price=take_profit)
+
+
+def _engine():
+    closed = []
+
+    def close(trade_id, client, reason):
+        closed.append((trade_id, client, reason))
+        return True, 'closed'
+
+    engine = StopLossEngine(close_position=close, client_factory=lambda user_id, provider: f"client-{user_id}",
+                            heartbeat=False, resync_seconds=0)
+    return engine, closed
+
+
+def test_ticks_fire_only_crossed_levels_once():
+    engine, closed = _engine()
+    engine.add_trade(_trade(1, 'AAPL', 'buy', stop=95, take_profit=120))
+    engine.add_trade(_trade(2, 'AAPL', 'buy', stop=90))
+    engine.add_trade(_trade(3, 'AAPL', 'sell', stop=105, take_profit=80))
+    engine.add_trade(_trade(4, 'MSFT', 'buy', stop=300))
+    # force_close_position can't close Coinbase positions, so they are never armed
+    engine.add_trade(_trade(5, 'AAPL', 'buy', stop=99, provider='coinbase'))
+
+    assert engine.on_tick('AAPL', 100) == []
+    assert {t.trade_id for t in engine.on_tick('AAPL', 94.5)} == {1}
+    assert {(t.trade_id, t.kind) for t in engine.on_tick('aapl', 106)} == {(3, 'stop_loss')}
+    # Trade 1 is gone from the index, so its take-profit no longer fires
+    assert engine.on_tick('AAPL', 125) == []
+    assert engine.on_tick('AAPL', 89) and engine.symbols() == ['MSFT']
+    engine.shutdown()
+
+    assert sorted(closed) == [(1, 'client-1', 'stop_loss_triggered'),
+                              (2, 'client-1', 'stop_loss_triggered'),
+                              (3, 'client-1', 'stop_loss_triggered')]
+    assert engine.stats['fired'] == 3 and engine.stats['closed'] == 3
+
+
+def test_stream_adapter_and_coverage():
+    engine, closed = _engine()
+    engine.add_trade(_trade(1, 'NVDA', 'sell', take_profit=400))
+    engine.add_trade(_trade(2, 'AMD', 'buy', take_profit=180, user_id=2))
+
+    engine.handle_schwab_level_one({'key': 'NVDA', '1': 398.0})  # partial update, no last price
+    engine.handle_schwab_level_one({'service': 'LEVELONE_EQUITIES',
+                                    'content': [{'key': 'NVDA', 'LAST_PRICE': 399.5}]})
+    engine.handle_schwab_level_one({'key': 'AMD', '3': 181.25})  # schwabdev numeric fields
+    engine.shutdown()
+
+    assert sorted(closed) == [(1, 'client-1', 'take_profit_triggered'),
+                              (2, 'client-2', 'take_profit_triggered')]
+    assert engine.streamed_symbols(['nvda', 'AMD', 'TSLA']) == {'NVDA', 'AMD'}
+
+
+def test_batched_poll_quotes_each_user_once_and_closes_crossed_trades(monkeypatch):
+    from unittest.mock import MagicMock
+
+    from utils.risk_management import RiskManager
+
+    trades = [_trade(1, 'AAPL', 'buy', stop=95), _trade(2, 'AAPL', 'buy', stop=90),
+              _trade(3, 'TSLA', 'sell', stop=250), _trade(4, 'MSFT', 'buy', stop=300),
+              _trade(5, 'AAPL', 'sell', stop=99, user_id=2), _trade(6, 'NVDA', 'buy', stop=500)]
+    query = MagicMock()
+    query.filter.return_value.all.return_value = trades
+    monkeypatch.setattr('models.Trade', MagicMock(query=query))
+
+    class Client:
+        def __init__(self, quotes):
+            self.quotes, self.calls = quotes, []
+
+        def get_market_data(self, symbols):
+            self.calls.append(symbols)
+            return {s: {'quote': {'mark': self.quotes[s]}} for s in symbols if s in self.quotes}
+
+    clients = {1: Client({'AAPL': 94.0, 'TSLA': 251.0, 'MSFT': 310.0}), 2: Client({'AAPL': 94.0})}
+    manager = RiskManager()
+    closed = []
+    monkeypatch.setattr(manager, 'force_close_position',
+                        lambda trade_id, client, reason: closed.append((trade_id, client)) or (True, 'ok'))
+
+    result = manager.monitor_stop_losses_batch(clients, skip_symbols={'nvda'})
+
+    assert clients[1].calls == [['AAPL', 'MSFT', 'TSLA']] and clients[2].calls == [['AAPL']]
+    assert closed == [(1, clients[1]), (3, clients[1])]
+    assert result['quote_requests'] == 2 and result['trades_streamed'] == 1
+    assert result['trades_monitored'] == 5 and result['positions_closed'] == 2
+
+
+def test_resync_does_not_rearm_a_trade_whose_close_is_in_flight(monkeypatch):
+    import threading
+    from unittest.mock import MagicMock
+
+    release, closed = threading.Event(), []
+
+    def slow_close(trade_id, client, reason):
+        release.wait(2)
+        closed.append(trade_id)
+        return len(closed) > 1, 'rejected' if len(closed) == 1 else 'closed'
+
+    trade = _trade(1, 'AAPL', 'buy', stop=95)
+    query = MagicMock()
+    query.filter.return_value.all.return_value = [trade]  # still 'executed' until the close lands
+    monkeypatch.setattr('models.Trade', MagicMock(query=query))
+    engine = StopLossEngine(close_position=slow_close, client_factory=lambda user_id, provider: None,
+                            heartbeat=False, resync_seconds=0)
+    engine.add_trade(trade)
+
+    assert len(engine.on_tick('AAPL', 94)) == 1
+    engine.sync()
+    assert engine.on_tick('AAPL', 93) == [] and engine.symbols() == []
+
+    release.set()
+    while engine._closing:
+        time.sleep(0.01)
+    # The close failed, so the next resync arms the trade again for a retry
+    engine.sync()
+    assert len(engine.on_tick('AAPL', 93)) == 1
+    engine.shutdown()
+    assert closed == [1, 1] and engine.stats['failed'] == 1 and engine.stats['closed'] == 1
@@ -0,0 +1,29 @@
+from utils.comprehensive_market_data import ComprehensiveMarketDataProvider
+from utils.symbol_universe import EXACT, FUZZY, NAME_PREFIX, SYMBOL_PREFIX, SymbolUniverse, get_symbol_universe
+
+
+def test_universe_search_ranks_exact_prefix_name_then_fuzzy():
+    universe = SymbolUniverse([
+        {'symbol': 'COF', 'name': 'Capital One Financial Corporation', 'sector': 'Financial Services'},
+        {'symbol': 'cof', 'name': 'Duplicate', 'sector': 'Other'},
+        {'symbol': 'COIN', 'name': 'Coinbase Global Inc.', 'sector': 'Financial Services'},
+        {'symbol': 'KO', 'name': 'The Coca-Cola Company', 'sector': 'Consumer Defensive'},
+        {'symbol': 'CO', 'name': 'Example Co', 'sector': 'Industrials'},
+    ])
+
+    assert len(universe) == 4
+    assert universe.get('cof')['name'] == 'Capital One Financial Corporation'
+    assert [(r['symbol'], r['match']) for r in universe.search('co', 10)] == [
+        ('CO', EXACT), ('COF', SYMBOL_PREFIX), ('COIN', SYMBOL_PREFIX), ('KO', NAME_PREFIX),
+    ]
+    assert universe.search('capital one')[0]['symbol'] == 'COF'
+    assert [(r['symbol'], r['match']) for r in universe.search('coinbse')] == [('COIN', FUZZY)]
+    assert universe.sector('KO') == 'Consumer Defensive' and universe.sector('ZZZ') is None
+
+
+def test_shipped_listing_is_deduplicated_and_backs_market_provider():
+    symbols = get_symbol_universe().symbols
+    assert len(symbols) == len(set(symbols))
+    assert symbols.count('COF') == 1 and symbols.count('PYPL') == 1
+    assert ComprehensiveMarketDataProvider().all_stock_symbols == symbols
+    assert get_symbol_universe().search('apple', 1)[0]['symbol'] == 'AAPL'
@@ -0,0 +1,123 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import Flask
+from sqlalchemy import event
+
+from app import db
+from models import APICredential, User
+from utils.encryption import decrypt_credentials, encrypt_credentials
+from utils.token_manager import TokenManager
+
+
+def _credential(user_id, provider, expires_in_minutes, **fields):
+    creds = {'access_token': f'old-{user_id}', 'refresh_token': f'rt-{user_id}'}
+    if expires_in_minutes is not None:
+        creds['expires_at'] = (datetime.utcnow() + timedelta(minutes=expires_in_minutes)).isoformat()
+    return APICredential(user_id=user_id, provider=provider, encrypted_credentials=encrypt_credentials(creds),
+                         is_active=True, **fields)
+
+
+def test_sweep_refreshes_only_expiring_tokens_concurrently_with_one_commit(monkeypatch, tmp_path):
+    monkeypatch.setenv('ENCRYPTION_KEY', 'DQd9rDhD1N3zBG7mYkTfW0-f8hMzm2cWtxC8cO5Lj4k=')
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'tokens.db'}"
+    db.init_app(app)
+
+    in_flight, peak, calls = {}, {}, []
+    lock = threading.Lock()
+
+    def provider_refresh(user_id, provider, refresh_token_value):
+        with lock:
+            calls.append(user_id)
+            in_flight[provider] = in_flight.get(provider, 0) + 1
+            peak[provider] = max(peak.get(provider, 0), in_flight[provider])
+        time.sleep(0.1)
+        with lock:
+            in_flight[provider] -= 1
+        if user_id == 6:
+            return {'success': False, 'reauth_required': True, 'message': 'invalid_grant'}
+        return {'success': True, 'credentials': {'access_token': f'new-{user_id}', 'refresh_token': 'rt2',
+                                                 'expires_at': (datetime.utcnow() + timedelta(hours=1)).isoformat()}}
+
+    monkeypatch.setattr(TokenManager, '_call_provider_refresh', staticmethod(provider_refresh))
+
+    with app.app_context():
+        db.create_all()
+        for i in range(1, 9):
+            db.session.add(User(id=i, username=f'u{i}', email=f'u{i}@example.com', password_hash='x'))
+        db.session.add_all([
+            _credential(1, 'schwab', 3),
+            _credential(2, 'schwab', None),  # no expiry recorded -> refresh first
+            _credential(3, 'schwab', 8),
+            _credential(4, 'schwab', 120),  # outside the window, never touched
+            _credential(5, 'coinbase', 1),
+            _credential(6, 'coinbase', 2),
+            _credential(7, 'openai', 1, credential_type='api_key'),
+            _credential(8, 'coinbase', 1, status='reauth_required', last_error='revoked'),
+        ])
+        db.session.commit()
+
+        commits = []
+
+        def count_commit(session):
+            commits.append(1)
+
+        event.listen(db.session, 'after_commit', count_commit)
+        try:
+            start = time.monotonic()
+            result = TokenManager.validate_all_tokens(window_seconds=600, max_per_provider=2)
+            elapsed = time.monotonic() - start
+        finally:
+            event.remove(db.session, 'after_commit', count_commit)
+
+        # Soonest expiry first: the 8-minute Schwab token waits for a free slot
+        assert sorted(calls) == [1, 2, 3, 5, 6] and [c for c in calls if c <= 4][-1] == 3
+        assert peak == {'schwab': 2, 'coinbase': 2} and elapsed < 0.35
+        assert len(commits) == 2  # one per provider, as each pool finishes
+        assert result['due'] == 5 and result['refreshed'] == 4 and result['skipped_api_keys'] == 1
+        assert {r['user_id'] for r in result['reauth_required']} == {6, 8}
+
+        rows = {c.user_id: c for c in APICredential.query.all()}
+        assert decrypt_credentials(rows[3].encrypted_credentials)['access_token'] == 'new-3'
+        assert decrypt_credentials(rows[4].encrypted_credentials)['access_token'] == 'old-4'
+        assert rows[6].status == 'reauth_required' and rows[1].status == 'active'
+        db.drop_all()
+
+
+def test_one_bad_outcome_does_not_roll_back_other_rotated_tokens(monkeypatch, tmp_path):
+    monkeypatch.setenv('ENCRYPTION_KEY', 'DQd9rDhD1N3zBG7mYkTfW0-f8hMzm2cWtxC8cO5Lj4k=')
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'tokens.db'}"
+    db.init_app(app)
+
+    def provider_refresh(user_id, provider, refresh_token_value):
+        return {'success': True, 'credentials': {'access_token': f'new-{user_id}', 'refresh_token': f'rotated-{user_id}',
+                                                 'expires_at': (datetime.utcnow() + timedelta(hours=1)).isoformat()}}
+
+    real_apply = TokenManager._apply_refresh_outcome
+
+    def flaky_apply(credential, outcome):
+        if credential.user_id == 2:
+            raise RuntimeError('boom')
+        return real_apply(credential, outcome)
+
+    monkeypatch.setattr(TokenManager, '_call_provider_refresh', staticmethod(provider_refresh))
+    monkeypatch.setattr(TokenManager, '_apply_refresh_outcome', staticmethod(flaky_apply))
+
+    with app.app_context():
+        db.create_all()
+        for i in (1, 2, 3):
+            db.session.add(User(id=i, username=f'u{i}', email=f'u{i}@example.com', password_hash='x'))
+            db.session.add(_credential(i, 'coinbase', 1))
+        db.session.commit()
+
+        result = TokenManager.validate_all_tokens(window_seconds=600)
+        db.session.expire_all()
+
+        assert result['refreshed'] == 2 and result['errors'] == 1
+        rows = {c.user_id: decrypt_credentials(c.encrypted_credentials) for c in APICredential.query.all()}
+        assert rows[1]['refresh_token'] == 'rotated-1' and rows[3]['refresh_token'] == 'rotated-3'
+        assert rows[2]['refresh_token'] == 'rt-2'
+        db.drop_all()
@@ -18,7 +18,7 @@ from flask_login import current_user
 from utils.openai_auth_manager import create_auth_manager
 from utils.schwabdev_integration import create_schwabdev_manager
 from utils.enhanced_openai_client import EnhancedOpenAIClient
-from neural import NeuralEngineFactory
+from execution.trade_loop import apply_neural_veto
 
 logger = logging.getLogger(__name__)
 
@@ -504,7 +504,7 @@ class AITradingBot:
                 from analysis.multi_timeframe import MultiTimeframeAnalyzer
                 from analysis.confluence_filter import ConfluenceFilter
 
-                mtf_analyzer = MultiTimeframeAnalyzer(user_id=self.user_id)
+                mtf_analyzer = MultiTimeframeAnalyzer(user_id=self.user_id, concurrent=True)
                 tf_signals = mtf_analyzer.analyze(signal.symbol)
                 confluence = ConfluenceFilter().evaluate(tf_signals)
 
@@ -532,37 +532,28 @@ class AITradingBot:
             # --- Optional neural AI confirmation layer ---
             if self.config.get('NEURAL_ENGINE_ENABLED', False):
                 try:
-                    neural_engine = NeuralEngineFactory.create(
-                        provider=self.config.get('AI_PROVIDER'),
-                        model=self.config.get('AI_MODEL'),
-                    )
-                    neural_analysis = neural_engine.analyze_trade(
+                    # NEURAL_ASYNC_ENABLED in the bot config reuses one pipelined engine across cycles
+                    decision = apply_neural_veto(
+                        config=self.config,
                         ticker=signal.symbol,
-                        market_data={
+                        latest_data={
                             'current_price': signal.price_target,
                             'asset_class': 'EQUITY',
                         },
-                        signals=asdict(signal),
-                        sentiment=None,
+                        signal_payload=asdict(signal),
+                        sentiment_payload=None,
                         regime=self.config.get('market_regime'),
+                        position_size=signal.quantity,
                     )
-                    confidence_threshold = float(self.config.get('NEURAL_CONFIDENCE_THRESHOLD', 0.4))
-                    if neural_analysis.direction == 'NEUTRAL' or neural_analysis.confidence < confidence_threshold:
-                        logger.info(
-                            "Trade vetoed by neural engine for %s: direction=%s confidence=%.3f",
-                            signal.symbol,
-                            neural_analysis.direction,
-                            neural_analysis.confidence,
-                        )
+                    if not decision['allowed']:
                         return {
                             'success': False,
                             'error': 'neural engine vetoed trade',
-                            'neural_analysis': neural_analysis.to_dict(),
+                            'neural_analysis': decision['neural_analysis'],
                             'signal': asdict(signal),
                         }
 
-                    adjusted_qty = max(0, int(signal.quantity * neural_analysis.suggested_position_size))
-                    signal.quantity = adjusted_qty
+                    signal.quantity = max(0, int(decision['position_size']))
                 except Exception as e:
                     logger.warning("Neural engine unavailable, vetoing trade for safety: %s", e)
                     return {
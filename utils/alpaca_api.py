@@ -13,6 +13,8 @@ from typing import Any, Dict, Mapping, Optional
 
 import requests
 
+from utils.http_pool import get_http_session
+
 
 class AlpacaAPIClient:
     """Thin Alpaca client with generic request support for all documented US endpoints."""
@@ -141,7 +143,7 @@ class AlpacaAPIClient:
             raise ValueError("Unsupported HTTP method")
 
         url = f"{self._base_url(domain)}{self._clean_path(path)}"
-        response = requests.request(
+        response = get_http_session().request(
             method,
             url,
             headers=self._headers(domain, content_type=content_type),
@@ -0,0 +1,338 @@
+"""
+Concurrent Multi-Broker Balance Aggregator
+Fans balance/position lookups out across every connected provider at once,
+bounds each provider by a timeout, and keeps a short-TTL per-provider cache so
+the dashboard renders in max(provider latency) instead of the sum.
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import event, inspect
+
+logger = logging.getLogger(__name__)
+
+BALANCE_PROVIDER_TIMEOUT = float(os.environ.get('BALANCE_PROVIDER_TIMEOUT', '8'))
+BALANCE_CACHE_TTL = float(os.environ.get('BALANCE_CACHE_TTL', '30'))
+# Last known good balance may stand in for a timed-out provider up to this age
+BALANCE_STALE_MAX_AGE = float(os.environ.get('BALANCE_STALE_MAX_AGE', '300'))
+BALANCE_MAX_WORKERS = int(os.environ.get('BALANCE_MAX_WORKERS', '16'))
+
+PROVIDER_LABELS = {
+    'coinbase': 'Coinbase',
+    'schwab': 'Schwab',
+    'alpaca': 'Alpaca',
+    'etrade': 'E-trade',
+}
+
+# Shared pool so a slow broker never holds a request thread past its timeout
+_executor = ThreadPoolExecutor(max_workers=BALANCE_MAX_WORKERS, thread_name_prefix='balance')
+
+# (user_id, credential_id) -> (monotonic fetched_at, account_info)
+_cache: Dict[Tuple[int, int], Tuple[float, Dict[str, Any]]] = {}
+_cache_lock = threading.Lock()
+
+
+def _empty_account(provider: str) -> Dict[str, Any]:
+    return {
+        'provider': provider,
+        'balance': 0,
+        'currency': 'USD',
+        'account_type': 'unknown',
+        'status': 'disconnected',
+        'last_updated': datetime.utcnow().isoformat()
+    }
+
+
+# ---------------------------------------------------------------------------
+# Per-provider fetchers: return (account_info, error message or None)
+# ---------------------------------------------------------------------------
+
+def _fetch_coinbase(fetcher, user_id: int, encrypted: str, creds: Dict) -> Tuple[Dict, Optional[str]]:
+    from utils.coinbase_oauth import CoinbaseOAuth
+
+    account_info = _empty_account('coinbase')
+    # Always use OAuth helper to ensure tokens are refreshed if needed
+    access_token = CoinbaseOAuth(user_id=user_id).get_valid_token(encrypted)
+    if not access_token:
+        return account_info, 'Coinbase: Token expired and refresh failed. Please re-authenticate in API Settings.'
+
+    result = fetcher.get_live_coinbase_balance(access_token=access_token, user_id=str(user_id))
+    if not result.get('success'):
+        return account_info, f"Coinbase: {result.get('error', 'Failed to fetch balance')}"
+
+    account_info.update({
+        'balance': result['balance'],
+        'status': 'connected',
+        'account_type': 'crypto',
+        'holdings': result.get('holdings', []),
+        'last_updated': result['timestamp'],
+        'api_version': result.get('api_version', 'v1'),
+    })
+    logger.info(f"Coinbase balance fetched: ${result['balance']:.2f} using {result.get('api_version', 'v1')} API")
+    return account_info, None
+
+
+def _fetch_schwab(fetcher, user_id: int, encrypted: str, creds: Dict) -> Tuple[Dict, Optional[str]]:
+    from utils.schwab_oauth import SchwabOAuth
+
+    account_info = _empty_account('schwab')
+    # Check for legacy credentials
+    if 'api_key' in creds and 'secret' in creds and 'access_token' not in creds:
+        logger.warning(f"Schwab legacy credentials detected for user {user_id} - OAuth2 required")
+        return account_info, 'Schwab: OAuth2 authentication required. Please re-authenticate in API Settings.'
+
+    access_token = SchwabOAuth(user_id=user_id).get_valid_token(encrypted)
+    if not access_token:
+        return account_info, 'Schwab: Token expired and refresh failed. Please re-authenticate in API Settings.'
+
+    # Fetch balance and positions
+    result = fetcher.get_live_schwab_balance(str(user_id))
+    positions_result = fetcher.get_live_schwab_positions(str(user_id))
+
+    if not result.get('success'):
+        return account_info, f"Schwab: {result.get('error', 'Failed to fetch balance')}"
+
+    account_info.update({
+        'balance': result['balance'],
+        'status': 'connected',
+        'account_type': 'brokerage',
+        'accounts': result.get('accounts', []),
+        'last_updated': result['timestamp'],
+    })
+    if positions_result.get('success'):
+        position_map = {p['account_number']: p.get('positions', []) for p in positions_result.get('accounts', [])}
+        for acc in account_info['accounts']:
+            acc['positions'] = position_map.get(acc['account_number'], [])
+    logger.info(f"Schwab balance fetched: ${result['balance']:.2f} from {len(account_info['accounts'])} accounts")
+    return account_info, None
+
+
+def _fetch_alpaca(fetcher, user_id: int, encrypted: str, creds: Dict) -> Tuple[Dict, Optional[str]]:
+    account_info = _empty_account('alpaca')
+    result = fetcher.get_live_alpaca_balance(
+        creds.get('api_key'),
+        creds.get('secret_key'),
+        paper=bool(creds.get('paper', True))
+    )
+    if not result.get('success'):
+        return account_info, f"Alpaca: {result.get('error', 'Failed to fetch balance')}"
+
+    account_info.update({
+        'balance': result['balance'],
+        'status': 'connected',
+        'account_type': 'brokerage',
+        'last_updated': result['timestamp'],
+        'details': result.get('account', {}),
+    })
+    return account_info, None
+
+
+def _fetch_etrade(fetcher, user_id: int, encrypted: str, creds: Dict) -> Tuple[Dict, Optional[str]]:
+    account_info = _empty_account('etrade')
+    required_fields = ['client_key', 'client_secret', 'access_token', 'access_secret']
+    if not all(field in creds for field in required_fields):
+        logger.warning(f"E-trade credentials incomplete for user {user_id}")
+        return account_info, 'E-trade: OAuth 1.0a credentials missing. Please configure E-trade OAuth credentials.'
+
+    keys = [creds[field] for field in required_fields]
+    result = fetcher.get_live_etrade_balance(*keys)
+    positions_result = fetcher.get_live_etrade_positions(*keys)
+
+    if not result.get('success'):
+        return account_info, f"E-trade: {result.get('error', 'Unknown error')}"
+
+    account_info.update({
+        'balance': result['balance'],
+        'status': 'connected',
+        'account_type': 'brokerage',
+        'accounts': result.get('accounts', []),
+        'last_updated': result['timestamp'],
+    })
+    if positions_result.get('success'):
+        position_map = {p['account_id']: p.get('positions', []) for p in positions_result.get('accounts', [])}
+        for acc in account_info['accounts']:
+            acc['positions'] = position_map.get(acc.get('account_id'), [])
+    logger.info(f"E-trade balance fetched: ${result['balance']:.2f}")
+    return account_info, None
+
+
+PROVIDER_FETCHERS = {
+    'coinbase': _fetch_coinbase,
+    'schwab': _fetch_schwab,
+    'alpaca': _fetch_alpaca,
+    'etrade': _fetch_etrade,
+}
+
+
+def _in_app_context(app, fn):
+    def _run(*args, **kwargs):
+        with app.app_context():
+            return fn(*args, **kwargs)
+    return _run
+
+
+class BalanceAggregator:
+    """Concurrent, cached balance lookup across a user's connected brokers"""
+
+    def __init__(self, user_id: int, timeout: float = None, ttl: float = None):
+        self.user_id = user_id
+        self.timeout = BALANCE_PROVIDER_TIMEOUT if timeout is None else timeout
+        self.ttl = BALANCE_CACHE_TTL if ttl is None else ttl
+
+    def _cached(self, credential_id: int, max_age: float) -> Optional[Tuple[float, Dict[str, Any]]]:
+        with _cache_lock:
+            entry = _cache.get((self.user_id, credential_id))
+        if entry and time.monotonic() - entry[0] <= max_age:
+            return entry
+        return None
+
+    def _fetch_one(self, credential_id: int, provider: str, encrypted: str,
+                   updated_at=None) -> Tuple[Dict, Optional[str]]:
+        from utils.encryption import decrypt_credentials_cached
+        from utils.real_time_data import RealTimeDataFetcher
+
+        fetch = PROVIDER_FETCHERS.get(provider)
+        if fetch is None:
+            return _empty_account(provider), None
+
+        logger.info(f"Processing {provider} credentials for user {self.user_id}")
+        try:
+            account_info, error = fetch(RealTimeDataFetcher(self.user_id), self.user_id,
+                                        encrypted, decrypt_credentials_cached(credential_id, updated_at, encrypted))
+        except Exception as e:
+            logger.error(f"{PROVIDER_LABELS.get(provider, provider)} error for user {self.user_id}: {str(e)}")
+            account_info, error = _empty_account(provider), f'{PROVIDER_LABELS.get(provider, provider)}: {str(e)}'
+
+        if error:
+            account_info['status'] = 'error'
+        else:
+            # Cache even when the request already timed out, so the next load is instant
+            with _cache_lock:
+                _cache[(self.user_id, credential_id)] = (time.monotonic(), account_info)
+        return account_info, error
+
+    @staticmethod
+    def _with_freshness(account_info: Dict[str, Any], source: str, fetched_at: float = None) -> Dict[str, Any]:
+        account_info = dict(account_info)
+        age = 0.0 if fetched_at is None else time.monotonic() - fetched_at
+        account_info['freshness'] = {'source': source, 'age_seconds': round(age, 1)}
+        return account_info
+
+    def aggregate(self, credentials: List[Any], force_refresh: bool = False) -> Dict[str, Any]:
+        """
+        Fetch balances for the given APICredential rows concurrently
+
+        Returns:
+            Dashboard balance payload; each account carries ``freshness`` and
+            credentials get ``test_status``/``last_tested`` updated in place
+        """
+        balance_data = {
+            'total': 0,
+            'breakdown': {},
+            'accounts': [],
+            'last_updated': datetime.utcnow().isoformat(),
+            'errors': []
+        }
+
+        app = current_app._get_current_object()
+        results: Dict[int, Tuple[Dict, Optional[str]]] = {}
+        futures = {}
+        for cred in credentials:
+            if cred.provider not in PROVIDER_FETCHERS:
+                # AI keys and other non-broker credentials have no balance to fetch
+                results[cred.id] = (self._with_freshness(_empty_account(cred.provider), 'live'), None)
+                continue
+            cached = None if force_refresh else self._cached(cred.id, self.ttl)
+            if cached:
+                results[cred.id] = (self._with_freshness(cached[1], 'cache', cached[0]), None)
+                continue
+            futures[cred.id] = _executor.submit(
+                _in_app_context(app, self._fetch_one), cred.id, cred.provider, cred.encrypted_credentials,
+                getattr(cred, 'updated_at', None)
+            )
+
+        # Every provider runs in parallel, so one shared wait bounds them all
+        wait(list(futures.values()), timeout=self.timeout)
+        for cred in credentials:
+            future = futures.get(cred.id)
+            if future is None:
+                continue
+            label = PROVIDER_LABELS.get(cred.provider, cred.provider)
+            if future.done():
+                account_info, error = future.result()
+                results[cred.id] = (self._with_freshness(account_info, 'live'), error)
+                continue
+
+            stale = self._cached(cred.id, BALANCE_STALE_MAX_AGE)
+            if stale:
+                results[cred.id] = (self._with_freshness(stale[1], 'stale', stale[0]), None)
+            else:
+                account_info = self._with_freshness(_empty_account(cred.provider), 'timeout')
+                account_info['status'] = 'timeout'
+                results[cred.id] = (account_info, f'{label}: timed out after {self.timeout:.0f}s')
+
+        for cred in credentials:
+            account_info, error = results[cred.id]
+            if error:
+                balance_data['errors'].append(error)
+                logger.error(f"{cred.provider} balance error for user {self.user_id}: {error}")
+
+            # Only a live answer says anything new about the credential
+            if account_info['freshness']['source'] == 'live':
+                if cred.provider in PROVIDER_FETCHERS:
+                    cred.test_status = 'success' if account_info['status'] == 'connected' else 'failed'
+                cred.last_tested = datetime.utcnow()
+
+            balance_data['accounts'].append(account_info)
+            if account_info['status'] == 'connected' and account_info['balance'] > 0:
+                balance_data['total'] += account_info['balance']
+                balance_data['breakdown'][cred.provider] = account_info['balance']
+
+        return balance_data
+
+
+def invalidate_balance_cache(user_id: int) -> None:
+    """Drop cached balances for a user (e.g. after a trade or credential change)"""
+    with _cache_lock:
+        for key in [k for k in _cache if k[0] == user_id]:
+            del _cache[key]
+
+
+# Row changes that make a cached balance wrong.  Listening on the mappers
+# covers every route and task that saves credentials or executes trades; the
+# cache is per process, so changes committed by other processes (Celery
+# workers) still age out with BALANCE_CACHE_TTL.
+_BALANCE_AFFECTING = {
+    'APICredential': ('encrypted_credentials', 'is_active', 'provider'),
+    'Trade': ('status', 'filled_quantity', 'average_fill_price'),
+}
+
+
+def _invalidate_on_insert_or_delete(mapper, connection, target) -> None:
+    invalidate_balance_cache(target.user_id)
+
+
+def _invalidate_on_update(mapper, connection, target) -> None:
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in _BALANCE_AFFECTING[mapper.class_.__name__]):
+        invalidate_balance_cache(target.user_id)
+
+
+def _register_invalidation_listeners() -> None:
+    from models import APICredential, Trade
+
+    for model in (APICredential, Trade):
+        if not event.contains(model, 'after_update', _invalidate_on_update):
+            event.listen(model, 'after_insert', _invalidate_on_insert_or_delete)
+            event.listen(model, 'after_delete', _invalidate_on_insert_or_delete)
+            event.listen(model, 'after_update', _invalidate_on_update)
+
+
+_register_invalidation_listeners()
@@ -0,0 +1,131 @@
+"""
+Batched Quote Fetching
+Groups symbols into multi-ticker yfinance downloads, so a dashboard of N
+symbols costs ceil(N / QUOTE_BATCH_SIZE) ``yf.download`` calls instead of one
+``Ticker.history`` call per symbol.
+
+``yf.download`` collects results in a module-level dict, so two downloads in
+flight at once can mix up each other's symbols.  Downloads are therefore
+serialized process-wide, and each one fans out over its own symbols with
+yfinance's ``threads`` option instead.
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List
+
+import pandas as pd
+import yfinance as yf
+
+logger = logging.getLogger(__name__)
+
+QUOTE_BATCH_SIZE = int(os.environ.get('QUOTE_BATCH_SIZE', '40'))
+# Threads yf.download uses within one chunk
+QUOTE_BATCH_WORKERS = int(os.environ.get('QUOTE_BATCH_WORKERS', '4'))
+# Bounds concurrent per-symbol ``Ticker.info`` lookups (fundamentals have no batch endpoint)
+QUOTE_INFO_WORKERS = int(os.environ.get('QUOTE_INFO_WORKERS', '8'))
+
+
+def _normalize(symbols: Iterable[str]) -> List[str]:
+    return list(dict.fromkeys(s.upper().strip() for s in symbols if s and s.strip()))
+
+
+def _chunks(symbols: List[str], size: int) -> List[List[str]]:
+    size = max(1, size)
+    return [symbols[i:i + size] for i in range(0, len(symbols), size)]
+
+
+_download_lock = threading.Lock()
+
+
+def _download_chunk(chunk: List[str], period: str, interval: str) -> Dict[str, pd.DataFrame]:
+    try:
+        # auto_adjust=True matches the per-symbol Ticker.history default, so a
+        # quote's close and change are the same whichever path filled the cache
+        with _download_lock:
+            data = yf.download(
+                chunk, period=period, interval=interval, group_by='ticker',
+                auto_adjust=True, progress=False, threads=max(1, QUOTE_BATCH_WORKERS),
+            )
+    except Exception as e:
+        logger.warning(f"Batch download failed for {len(chunk)} symbols: {str(e)}")
+        return {}
+    if data is None or data.empty:
+        return {}
+
+    frames = {}
+    for symbol in chunk:
+        if isinstance(data.columns, pd.MultiIndex):
+            if symbol not in data.columns.get_level_values(0):
+                continue
+            frame = data[symbol]
+        else:
+            frame = data
+        frame = frame.dropna(subset=['Close'])
+        if not frame.empty:
+            frames[symbol] = frame
+    return frames
+
+
+def download_histories(symbols: Iterable[str], period: str = '5d',
+                       interval: str = '1d') -> Dict[str, pd.DataFrame]:
+    """Per-symbol OHLCV frames from chunked multi-ticker downloads"""
+    symbols = _normalize(symbols)
+    chunks = _chunks(symbols, QUOTE_BATCH_SIZE)
+    if not chunks:
+        return {}
+
+    histories: Dict[str, pd.DataFrame] = {}
+    for chunk in chunks:
+        histories.update(_download_chunk(chunk, period, interval))
+    logger.info(f"Batch downloaded {len(histories)}/{len(symbols)} symbols in {len(chunks)} requests")
+    return histories
+
+
+def quote_from_history(symbol: str, hist: pd.DataFrame) -> Dict[str, Any]:
+    """Price/change fields for the last bar of a daily history"""
+    current_price = float(hist['Close'].iloc[-1])
+    prev_close = float(hist['Close'].iloc[-2]) if len(hist) > 1 else current_price
+    change = current_price - prev_close
+    change_percent = (change / prev_close) * 100 if prev_close != 0 else 0
+    return {
+        'symbol': symbol,
+        'price': round(current_price, 2),
+        'change': round(change, 2),
+        'change_percent': round(change_percent, 2),
+        'open': round(float(hist['Open'].iloc[-1]), 2),
+        'high': round(float(hist['High'].iloc[-1]), 2),
+        'low': round(float(hist['Low'].iloc[-1]), 2),
+        'previous_close': round(prev_close, 2),
+        'volume': int(hist['Volume'].iloc[-1]) if pd.notna(hist['Volume'].iloc[-1]) else 0,
+        'timestamp': datetime.utcnow().isoformat()
+    }
+
+
+def fetch_batch_quotes(symbols: Iterable[str], period: str = '5d') -> Dict[str, Dict[str, Any]]:
+    """symbol -> quote for every symbol the batch download returned data for"""
+    return {
+        symbol: quote_from_history(symbol, hist)
+        for symbol, hist in download_histories(symbols, period=period).items()
+    }
+
+
+def fetch_infos(symbols: Iterable[str], info_fn: Callable[[str], Dict[str, Any]] = None) -> Dict[str, Dict[str, Any]]:
+    """Concurrent ``Ticker.info`` lookups; failures map to an empty dict"""
+    info_fn = info_fn or (lambda symbol: yf.Ticker(symbol).info or {})
+    symbols = _normalize(symbols)
+
+    def _safe(symbol):
+        try:
+            return info_fn(symbol)
+        except Exception as e:
+            logger.warning(f"Error fetching info for {symbol}: {str(e)}")
+            return {}
+
+    if not symbols:
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, min(QUOTE_INFO_WORKERS, len(symbols)))) as pool:
+        return dict(zip(symbols, pool.map(_safe, symbols)))
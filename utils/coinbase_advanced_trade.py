@@ -18,6 +18,7 @@ import jwt
 import requests
 
 from utils.encryption import encrypt_credentials, decrypt_credentials
+from utils.http_pool import get_http_session
 
 logger = logging.getLogger(__name__)
 
@@ -125,7 +126,7 @@ class CoinbaseAdvancedTradeClient:
         }
 
         try:
-            resp = requests.request(
+            resp = get_http_session().request(
                 method.upper(), url, headers=headers,
                 json=data if data else None,
                 timeout=30,
@@ -252,7 +253,7 @@ class CoinbaseAdvancedTradeClient:
             try:
                 from analysis.multi_timeframe import MultiTimeframeAnalyzer
                 from analysis.confluence_filter import ConfluenceFilter
-                mtf = MultiTimeframeAnalyzer(user_id=str(user_id or self.user_id))
+                mtf = MultiTimeframeAnalyzer(user_id=str(user_id or self.user_id), concurrent=True)
                 tf_signals = mtf.analyze(product_id)
                 confluence = ConfluenceFilter().evaluate(tf_signals)
                 if not confluence.should_trade:
@@ -327,7 +328,7 @@ class CoinbaseAdvancedTradeClient:
             try:
                 from analysis.multi_timeframe import MultiTimeframeAnalyzer
                 from analysis.confluence_filter import ConfluenceFilter
-                mtf = MultiTimeframeAnalyzer(user_id=str(user_id or self.user_id))
+                mtf = MultiTimeframeAnalyzer(user_id=str(user_id or self.user_id), concurrent=True)
                 tf_signals = mtf.analyze(product_id)
                 confluence = ConfluenceFilter().evaluate(tf_signals)
                 if not confluence.should_trade:
@@ -7,6 +7,7 @@ from datetime import datetime, timedelta
 from urllib.parse import urlencode
 from flask import session, request, redirect, url_for, flash
 from utils.encryption import encrypt_credentials, decrypt_credentials
+from utils.http_pool import get_http_session
 
 logger = logging.getLogger(__name__)
 
@@ -191,7 +192,7 @@ class CoinbaseOAuth:
             logger.info(f"Token exchange using redirect URI: {self.redirect_uri}")
             logger.info(f"Making token request to {self.token_url}")
             
-            response = requests.post(
+            response = get_http_session().post(
                 self.token_url,
                 headers={
                     'Content-Type': 'application/x-www-form-urlencoded',
@@ -286,7 +287,7 @@ class CoinbaseOAuth:
                 'User-Agent': 'Arbion Trading Platform/1.0',
             }
 
-            response = requests.post(
+            response = get_http_session().post(
                 self.token_url,
                 headers=headers,
                 data=token_data,
@@ -497,7 +498,7 @@ class CoinbaseOAuth:
             }
             
             # Test with user endpoint
-            response = requests.get(
+            response = get_http_session().get(
                 f'{self.api_base_url}/user',
                 headers=headers,
                 timeout=30
@@ -529,7 +530,7 @@ class CoinbaseOAuth:
                 'Content-Type': 'application/json'
             }
             
-            response = requests.get(
+            response = get_http_session().get(
                 f'{self.api_base_url}/accounts',
                 headers=headers,
                 timeout=30
@@ -555,7 +556,7 @@ class CoinbaseOAuth:
             
             params = {'limit': limit}
             
-            response = requests.get(
+            response = get_http_session().get(
                 f'{self.api_base_url}/accounts/{account_id}/transactions',
                 headers=headers,
                 params=params,
@@ -600,7 +601,7 @@ class CoinbaseOAuth:
             logger.info(f"Fetching wallet addresses for currencies: {currencies}")
             
             # Step 1: Get all user accounts
-            accounts_response = requests.get(
+            accounts_response = get_http_session().get(
                 f'{self.api_base_url}/accounts',
                 headers=headers,
                 timeout=30
@@ -666,7 +667,7 @@ class CoinbaseOAuth:
                 
                 try:
                     # Get addresses for this account
-                    addresses_response = requests.get(
+                    addresses_response = get_http_session().get(
                         f'{self.api_base_url}/accounts/{account_id}/addresses',
                         headers=headers,
                         timeout=30
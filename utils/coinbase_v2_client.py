@@ -12,6 +12,7 @@ import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 from utils.encryption import encrypt_credentials, decrypt_credentials
+from utils.http_pool import get_http_session
 
 logger = logging.getLogger(__name__)
 
@@ -120,13 +121,13 @@ class CoinbaseV2Client:
         
         try:
             if method == 'GET':
-                response = requests.get(url, headers=headers, timeout=30)
+                response = get_http_session().get(url, headers=headers, timeout=30)
             elif method == 'POST':
-                response = requests.post(url, headers=headers, json=data, timeout=30)
+                response = get_http_session().post(url, headers=headers, json=data, timeout=30)
             elif method == 'PUT':
-                response = requests.put(url, headers=headers, json=data, timeout=30)
+                response = get_http_session().put(url, headers=headers, json=data, timeout=30)
             elif method == 'DELETE':
-                response = requests.delete(url, headers=headers, timeout=30)
+                response = get_http_session().delete(url, headers=headers, timeout=30)
             
             response.raise_for_status()
             return response.json()
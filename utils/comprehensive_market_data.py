@@ -12,6 +12,9 @@ import json
 import time
 import random
 
+from utils.batch_quotes import download_histories, fetch_infos, quote_from_history
+from utils.symbol_universe import get_symbol_universe
+
 logger = logging.getLogger(__name__)
 
 class ComprehensiveMarketDataProvider:
@@ -35,98 +38,8 @@ class ComprehensiveMarketDataProvider:
         self.cache[key] = (data, time.time())
     
     def _load_all_stock_symbols(self) -> List[str]:
-        """Load comprehensive list of all stock symbols from major exchanges"""
-        return [
-            # Major Tech Stocks (NASDAQ)
-            'AAPL', 'GOOGL', 'GOOG', 'MSFT', 'AMZN', 'TSLA', 'NVDA', 'META', 'NFLX',
-            'ADBE', 'PYPL', 'INTC', 'CMCSA', 'CRM', 'AVGO', 'TXN', 'QCOM', 'ORCL',
-            'CSCO', 'AMD', 'UBER', 'ABNB', 'SHOP', 'SNOW', 'CRWD', 'ZM', 'DOCU',
-            'TWLO', 'OKTA', 'DDOG', 'NET', 'PLTR', 'RBLX', 'HOOD', 'COIN', 'SQ',
-            'ROKU', 'PINS', 'SNAP', 'LYFT', 'DASH', 'BYND', 'PTON', 'ZG', 'CHWY',
-            'ETSY', 'UPST', 'AFRM', 'OPEN', 'RDFN', 'CPNG', 'RIVN', 'LCID', 'SOFI',
-            
-            # Healthcare & Biotech
-            'JNJ', 'UNH', 'PFE', 'ABT', 'TMO', 'DHR', 'LLY', 'ABBV', 'BMY', 'MRK',
-            'CVS', 'CI', 'ANTM', 'HUM', 'GILD', 'REGN', 'VRTX', 'BIIB', 'ILMN',
-            'MRNA', 'BNTX', 'NVAX', 'TDOC', 'VEEV', 'DXCM', 'ISRG', 'EW', 'ZBH',
-            'AMGN', 'CELG', 'BMRN', 'ALXN', 'INCY', 'EXAS', 'MYGN', 'TGTX', 'BLUE',
-            
-            # Financial Services (NYSE)
-            'JPM', 'BAC', 'WFC', 'GS', 'MS', 'C', 'AXP', 'BLK', 'SCHW', 'SPGI',
-            'V', 'MA', 'COF', 'USB', 'PNC', 'TFC', 'BK', 'STT', 'NTRS', 'RF',
-            'FITB', 'HBAN', 'KEY', 'CFG', 'ZION', 'CMA', 'PBCT', 'FRC', 'SIVB',
-            'WAL', 'MTB', 'FCNCA', 'ALLY', 'COF', 'DFS', 'SYF', 'PYPL', 'FISV',
-            
-            # Consumer & Retail
-            'WMT', 'HD', 'PG', 'KO', 'PEP', 'COST', 'NKE', 'SBUX', 'MCD', 'DIS',
-            'LOW', 'TJX', 'BKNG', 'CHTR', 'TMUS', 'VZ', 'T', 'TGT', 'CVX', 'XOM',
-            'CL', 'KMB', 'GIS', 'K', 'CPB', 'CAG', 'HSY', 'MDLZ', 'MNST', 'KHC',
-            'YUM', 'CMG', 'WING', 'BLMN', 'CAKE', 'TXRH', 'SHAK', 'DNKN', 'MCD',
-            
-            # Industrial & Energy
-            'BA', 'CAT', 'MMM', 'HON', 'UPS', 'RTX', 'LMT', 'GE', 'DE', 'EMR',
-            'ITW', 'ETN', 'PH', 'CMI', 'FDX', 'NOC', 'LUV', 'DAL', 'UAL', 'AAL',
-            'XOM', 'CVX', 'COP', 'EOG', 'SLB', 'OXY', 'DVN', 'FANG', 'MRO', 'APA',
-            'HAL', 'BKR', 'VLO', 'PSX', 'MPC', 'TSO', 'WMB', 'KMI', 'OKE', 'EPD',
-            
-            # Real Estate & Utilities
-            'AMT', 'PLD', 'CCI', 'EQIX', 'DLR', 'WELL', 'EXR', 'AVB', 'EQR', 'VTR',
-            'NEE', 'SO', 'DUK', 'AEP', 'EXC', 'XEL', 'ES', 'ED', 'ETR', 'FE',
-            'WEC', 'PPL', 'CMS', 'DTE', 'NI', 'LNT', 'AES', 'NRG', 'VST', 'CNP',
-            
-            # Materials & Mining
-            'LIN', 'APD', 'ECL', 'NEM', 'FCX', 'DOW', 'DD', 'PPG', 'SHW', 'ALB',
-            'GOLD', 'SCCO', 'AA', 'X', 'CLF', 'MT', 'VALE', 'RIO', 'BHP', 'STLD',
-            'NUE', 'CMC', 'RS', 'WLK', 'LYB', 'CE', 'VMC', 'MLM', 'NEM', 'AEM',
-            
-            # Small & Mid Cap Growth
-            'ROKU', 'PINS', 'SNAP', 'TWTR', 'LYFT', 'DASH', 'BYND', 'PTON', 'ZG',
-            'CHWY', 'ETSY', 'UPST', 'AFRM', 'OPEN', 'RDFN', 'CPNG', 'RIVN', 'LCID',
-            'SOFI', 'WISH', 'CLOV', 'SPCE', 'NKLA', 'RIDE', 'GOEV', 'CANOO', 'ARVL',
-            
-            # International & Emerging Markets
-            'BABA', 'JD', 'PDD', 'BIDU', 'NIO', 'XPEV', 'LI', 'DIDI', 'BILI', 'IQ',
-            'ASML', 'TSM', 'TCEHY', 'NTES', 'WB', 'MELI', 'SE', 'GRAB', 'CPNG',
-            'BEKE', 'TME', 'FUTU', 'TIGR', 'VIPS', 'DOYU', 'HUYA', 'YY', 'MOMO',
-            
-            # Commodities & Materials
-            'GLD', 'SLV', 'USO', 'UNG', 'DBA', 'DBC', 'JJC', 'JJN', 'JJU', 'JJA',
-            'CORN', 'SOYB', 'WEAT', 'CANE', 'JO', 'NIB', 'BAL', 'CAFE', 'SGG',
-            
-            # Major ETFs covering entire market
-            'SPY', 'QQQ', 'IWM', 'VTI', 'VEA', 'VWO', 'EFA', 'EEM', 'GLD', 'TLT',
-            'HYG', 'LQD', 'IEFA', 'IEMG', 'IJH', 'IJR', 'VB', 'VO', 'VV', 'VUG',
-            'VTV', 'VXUS', 'IXUS', 'FTSE', 'ACWI', 'URTH', 'TOTL', 'AGG', 'BND',
-            
-            # Sector ETFs covering all sectors
-            'XLK', 'XLF', 'XLV', 'XLE', 'XLI', 'XLY', 'XLP', 'XLU', 'XLB', 'XLRE',
-            'SMH', 'IBB', 'XBI', 'SOXX', 'FINX', 'HACK', 'ICLN', 'ARKK', 'ARKG',
-            'ARKQ', 'ARKF', 'ARKW', 'PRNT', 'ROBO', 'BOTZ', 'CIBR', 'SKYY', 'CLOU',
-            
-            # Currency and International
-            'FXI', 'KWEB', 'ASHR', 'MCHI', 'GXC', 'INDA', 'MINDX', 'RSX', 'ERUS',
-            'VGK', 'EWJ', 'EWZ', 'EWU', 'EWG', 'EWL', 'EWQ', 'EWY', 'EWT', 'EWH',
-            
-            # Alternative Investments
-            'REIT', 'VNQ', 'VNQI', 'REM', 'MORT', 'REZ', 'FREL', 'SCHH', 'IYR',
-            'USRT', 'KBWP', 'KBWR', 'KBWY', 'RWR', 'EWRE', 'IRET', 'SRET', 'HOMZ',
-            
-            # Cryptocurrency Related
-            'COIN', 'RIOT', 'MARA', 'BITF', 'HIVE', 'ARBK', 'BTBT', 'CAN', 'EBON',
-            'GBTC', 'ETHE', 'BITO', 'BITI', 'BTCR', 'XBTF', 'BLOK', 'LEGR', 'BKCH',
-            
-            # Penny Stocks and OTC (Sample)
-            'SNDL', 'NAKD', 'GNUS', 'IDEX', 'XSPA', 'IBIO', 'INPX', 'AYTU', 'BIOC',
-            'TNXP', 'CIDM', 'TOMZ', 'NNDM', 'ATOS', 'JAGX', 'SEEL', 'BRTX', 'OBSV',
-            
-            # REITs
-            'O', 'STAG', 'NLY', 'AGNC', 'ARCC', 'MAIN', 'PSEC', 'GAIN', 'HTGC',
-            'BXMT', 'TWO', 'CIM', 'NYMT', 'ORC', 'IVR', 'MFA', 'CHMI', 'EARN',
-            
-            # Emerging Growth Companies
-            'SPAC', 'PSTH', 'CCIV', 'IPOE', 'IPOF', 'SOAC', 'CLOV', 'WISH', 'WKHS',
-            'GOEV', 'HYLN', 'SHLS', 'VLDR', 'LAZR', 'BLNK', 'CHPT', 'EVGO', 'PLUG'
-        ]
+        """Load the deduplicated symbol list from the process-wide symbol universe"""
+        return get_symbol_universe().symbols
     
     def get_comprehensive_market_data(self, limit: int = 50) -> Dict[str, Any]:
         """Get comprehensive market data from entire stock market"""
@@ -140,45 +53,40 @@ class ComprehensiveMarketDataProvider:
             sample_size = min(limit, len(self.all_stock_symbols))
             sampled_symbols = random.sample(self.all_stock_symbols, sample_size)
             
-            # Get real-time data for sampled symbols
+            # One batched price download for the whole sample, fundamentals in parallel
+            histories = download_histories(sampled_symbols, period="5d")
+            infos = fetch_infos(histories)
             market_data = {}
             
-            for symbol in sampled_symbols:
+            for symbol, hist in histories.items():
                 try:
-                    ticker = yf.Ticker(symbol)
-                    info = ticker.info
-                    hist = ticker.history(period="5d")
+                    info = infos.get(symbol, {})
+                    quote = quote_from_history(symbol, hist)
                     
-                    if not hist.empty:
-                        current_price = hist['Close'].iloc[-1]
-                        prev_close = hist['Close'].iloc[-2] if len(hist) > 1 else current_price
-                        change = current_price - prev_close
-                        change_percent = (change / prev_close) * 100 if prev_close != 0 else 0
-                        
-                        market_data[symbol] = {
-                            'symbol': symbol,
-                            'name': info.get('longName', symbol),
-                            'price': round(current_price, 2),
-                            'change': round(change, 2),
-                            'change_percent': round(change_percent, 2),
-                            'volume': info.get('volume', 0),
-                            'market_cap': info.get('marketCap', 0),
-                            'sector': info.get('sector', ''),
-                            'industry': info.get('industry', ''),
-                            'exchange': info.get('exchange', ''),
-                            'currency': info.get('currency', 'USD'),
-                            'country': info.get('country', 'US'),
-                            'pe_ratio': info.get('trailingPE', 0),
-                            'forward_pe': info.get('forwardPE', 0),
-                            'peg_ratio': info.get('pegRatio', 0),
-                            'price_to_book': info.get('priceToBook', 0),
-                            'dividend_yield': info.get('dividendYield', 0),
-                            'beta': info.get('beta', 0),
-                            'high_52_week': info.get('fiftyTwoWeekHigh', 0),
-                            'low_52_week': info.get('fiftyTwoWeekLow', 0),
-                            'avg_volume': info.get('averageVolume', 0),
-                            'timestamp': datetime.utcnow().isoformat()
-                        }
+                    market_data[symbol] = {
+                        'symbol': symbol,
+                        'name': info.get('longName', symbol),
+                        'price': quote['price'],
+                        'change': quote['change'],
+                        'change_percent': quote['change_percent'],
+                        'volume': info.get('volume', 0),
+                        'market_cap': info.get('marketCap', 0),
+                        'sector': info.get('sector', ''),
+                        'industry': info.get('industry', ''),
+                        'exchange': info.get('exchange', ''),
+                        'currency': info.get('currency', 'USD'),
+                        'country': info.get('country', 'US'),
+                        'pe_ratio': info.get('trailingPE', 0),
+                        'forward_pe': info.get('forwardPE', 0),
+                        'peg_ratio': info.get('pegRatio', 0),
+                        'price_to_book': info.get('priceToBook', 0),
+                        'dividend_yield': info.get('dividendYield', 0),
+                        'beta': info.get('beta', 0),
+                        'high_52_week': info.get('fiftyTwoWeekHigh', 0),
+                        'low_52_week': info.get('fiftyTwoWeekLow', 0),
+                        'avg_volume': info.get('averageVolume', 0),
+                        'timestamp': datetime.utcnow().isoformat()
+                    }
                         
                 except Exception as e:
                     logger.warning(f"Error fetching data for {symbol}: {str(e)}")
@@ -193,46 +101,91 @@ class ComprehensiveMarketDataProvider:
             logger.error(f"Error fetching comprehensive market data: {str(e)}")
             return {}
     
+    def get_technical_screen(self, symbols: List[str] = None, limit: int = 50,
+                             period: str = "6mo", interval: str = "1d") -> Dict[str, Any]:
+        """Compute MTF-style technical indicators for many symbols at once.
+
+        Downloads all histories in one multi-ticker request and scores every
+        symbol in a single vectorized pass (analysis.batch_indicators), so the
+        cost grows with bars rather than with one DataFrame pipeline per name.
+        """
+        try:
+            if not symbols:
+                sample_size = min(limit, len(self.all_stock_symbols))
+                symbols = random.sample(self.all_stock_symbols, sample_size)
+            symbols = list(dict.fromkeys(s.upper().strip() for s in symbols if s and s.strip()))
+
+            cache_key = f"technical_screen_{period}_{interval}_{','.join(sorted(symbols))}"
+            cached = self._get_cached_data(cache_key)
+            if cached:
+                return cached
+
+            from analysis.batch_indicators import compute_indicators_batch, matrix_from_columns
+
+            data = yf.download(
+                symbols, period=period, interval=interval,
+                auto_adjust=True, progress=False, threads=True,
+            )
+            if data is None or data.empty:
+                return {}
+            close = data['Close']
+            volume = data['Volume']
+            if not hasattr(close, 'columns'):
+                close = close.to_frame(symbols[0])
+                volume = volume.to_frame(symbols[0])
+
+            closes, volumes = matrix_from_columns(close, volume, symbols)
+            results = compute_indicators_batch(closes, volumes)
+
+            screen = {}
+            for symbol, indicators in zip(symbols, results):
+                if indicators is None:
+                    continue
+                screen[symbol] = {
+                    'symbol': symbol,
+                    **indicators,
+                    'timestamp': datetime.utcnow().isoformat()
+                }
+
+            self._cache_data(cache_key, screen)
+            return screen
+
+        except Exception as e:
+            logger.error(f"Error computing technical screen: {str(e)}")
+            return {}
+
     def search_entire_market(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
         """Search through entire stock market"""
         try:
-            # Filter symbols that match the query
-            matching_symbols = []
-            query_lower = query.lower()
-            
-            for symbol in self.all_stock_symbols:
-                if query_lower in symbol.lower():
-                    matching_symbols.append(symbol)
-                    
-                if len(matching_symbols) >= limit * 2:  # Get more to filter best matches
-                    break
+            # Ranked prefix/fuzzy matches from the symbol universe index
+            listings = {r['symbol']: r for r in get_symbol_universe().search(query, limit)}
+            matching_symbols = list(listings)
             
             # Get detailed data for matching symbols
+            histories = download_histories(matching_symbols[:limit], period="2d")
+            infos = fetch_infos(histories)
             results = []
             for symbol in matching_symbols[:limit]:
+                hist = histories.get(symbol)
+                if hist is None:
+                    continue
                 try:
-                    ticker = yf.Ticker(symbol)
-                    info = ticker.info
-                    hist = ticker.history(period="2d")
+                    info = infos.get(symbol, {})
+                    quote = quote_from_history(symbol, hist)
                     
-                    if not hist.empty:
-                        current_price = hist['Close'].iloc[-1]
-                        prev_close = hist['Close'].iloc[-2] if len(hist) > 1 else current_price
-                        change = current_price - prev_close
-                        change_percent = (change / prev_close) * 100 if prev_close != 0 else 0
-                        
-                        results.append({
-                            'symbol': symbol,
-                            'name': info.get('longName', symbol),
-                            'price': round(current_price, 2),
-                            'change': round(change, 2),
-                            'change_percent': round(change_percent, 2),
-                            'volume': info.get('volume', 0),
-                            'market_cap': info.get('marketCap', 0),
-                            'sector': info.get('sector', ''),
-                            'exchange': info.get('exchange', ''),
-                            'type': 'Stock' if not symbol.endswith('-USD') else 'Crypto'
-                        })
+                    listing = listings[symbol]
+                    results.append({
+                        'symbol': symbol,
+                        'name': info.get('longName', listing['name']),
+                        'price': quote['price'],
+                        'change': quote['change'],
+                        'change_percent': quote['change_percent'],
+                        'volume': info.get('volume', 0),
+                        'market_cap': info.get('marketCap', 0),
+                        'sector': info.get('sector', listing['sector']),
+                        'exchange': info.get('exchange', ''),
+                        'type': 'Crypto' if symbol.endswith('-USD') else listing['type']
+                    })
                         
                 except Exception as e:
                     logger.warning(f"Error fetching search data for {symbol}: {str(e)}")
@@ -261,26 +214,22 @@ class ComprehensiveMarketDataProvider:
                 'Communication Services': 'XLC'
             }
             
+            histories = download_histories(sector_etfs.values(), period="2d")
             sector_data = {}
             
             for sector_name, etf_symbol in sector_etfs.items():
+                hist = histories.get(etf_symbol)
+                if hist is None:
+                    continue
                 try:
-                    ticker = yf.Ticker(etf_symbol)
-                    hist = ticker.history(period="2d")
-                    
-                    if not hist.empty:
-                        current_price = hist['Close'].iloc[-1]
-                        prev_close = hist['Close'].iloc[-2] if len(hist) > 1 else current_price
-                        change = current_price - prev_close
-                        change_percent = (change / prev_close) * 100 if prev_close != 0 else 0
-                        
-                        sector_data[sector_name] = {
-                            'symbol': etf_symbol,
-                            'price': round(current_price, 2),
-                            'change': round(change, 2),
-                            'change_percent': round(change_percent, 2),
-                            'volume': hist['Volume'].iloc[-1] if not hist.empty else 0
-                        }
+                    quote = quote_from_history(etf_symbol, hist)
+                    sector_data[sector_name] = {
+                        'symbol': etf_symbol,
+                        'price': quote['price'],
+                        'change': quote['change'],
+                        'change_percent': quote['change_percent'],
+                        'volume': quote['volume']
+                    }
                         
                 except Exception as e:
                     logger.warning(f"Error fetching sector data for {sector_name}: {str(e)}")
@@ -314,26 +263,22 @@ class ComprehensiveMarketDataProvider:
                 'Corporate Bonds': 'LQD'
             }
             
+            histories = download_histories(indices.values(), period="2d")
             indices_data = {}
             
             for index_name, symbol in indices.items():
+                hist = histories.get(symbol)
+                if hist is None:
+                    continue
                 try:
-                    ticker = yf.Ticker(symbol)
-                    hist = ticker.history(period="2d")
-                    
-                    if not hist.empty:
-                        current_price = hist['Close'].iloc[-1]
-                        prev_close = hist['Close'].iloc[-2] if len(hist) > 1 else current_price
-                        change = current_price - prev_close
-                        change_percent = (change / prev_close) * 100 if prev_close != 0 else 0
-                        
-                        indices_data[index_name] = {
-                            'symbol': symbol,
-                            'price': round(current_price, 2),
-                            'change': round(change, 2),
-                            'change_percent': round(change_percent, 2),
-                            'volume': hist['Volume'].iloc[-1] if not hist.empty else 0
-                        }
+                    quote = quote_from_history(symbol, hist)
+                    indices_data[index_name] = {
+                        'symbol': symbol,
+                        'price': quote['price'],
+                        'change': quote['change'],
+                        'change_percent': quote['change_percent'],
+                        'volume': quote['volume']
+                    }
                         
                 except Exception as e:
                     logger.warning(f"Error fetching index data for {index_name}: {str(e)}")
@@ -1,5 +1,10 @@
 import os
+import copy
 import json
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
@@ -8,10 +13,18 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Decrypted credential dicts are kept in memory for this long (seconds) / this many entries
+CREDENTIAL_CACHE_TTL = int(os.environ.get('CREDENTIAL_CACHE_TTL', '300'))
+CREDENTIAL_CACHE_SIZE = int(os.environ.get('CREDENTIAL_CACHE_SIZE', '1024'))
+
 def get_encryption_key():
     """
     Generate or retrieve encryption key for API credentials
 
+    The key is derived once per distinct key configuration and reused for
+    the life of the process (PBKDF2 with 100,000 iterations is too slow to
+    repeat for every credential).
+
     SECURITY: This function requires ENCRYPTION_KEY or SESSION_SECRET to be set.
     No default fallback to prevent weak encryption in production.
 
@@ -23,8 +36,17 @@ def get_encryption_key():
     Raises:
         ValueError: If no encryption key material is available
     """
+    return _resolve_encryption_key(
+        os.environ.get("ENCRYPTION_KEY"),
+        os.environ.get("ENCRYPTION_SECRET"),
+        os.environ.get("SESSION_SECRET"),
+        os.environ.get("ENCRYPTION_SALT"),
+    )
+
+@lru_cache(maxsize=8)
+def _resolve_encryption_key(encryption_key, encryption_secret, session_secret, encryption_salt):
+    """Key for one configuration; failures raise and are therefore never cached"""
     # Priority 1: Use direct encryption key if provided (recommended for production)
-    encryption_key = os.environ.get("ENCRYPTION_KEY")
     if encryption_key:
         try:
             # Validate it's a proper Fernet key
@@ -35,19 +57,16 @@ def get_encryption_key():
             raise ValueError(f"Invalid ENCRYPTION_KEY: {str(e)}")
 
     # Priority 2: Derive key from ENCRYPTION_SECRET + ENCRYPTION_SALT
-    encryption_secret = os.environ.get("ENCRYPTION_SECRET")
-    encryption_salt = os.environ.get("ENCRYPTION_SALT")
-
     if encryption_secret and encryption_salt:
         password = encryption_secret.encode()
         salt = encryption_salt.encode()
-    elif os.environ.get("SESSION_SECRET") and encryption_salt:
+    elif session_secret and encryption_salt:
         # Priority 3: Fallback to SESSION_SECRET (for backward compatibility)
         logger.warning(
             "Using SESSION_SECRET for encryption. "
             "Set ENCRYPTION_SECRET for better security separation."
         )
-        password = os.environ.get("SESSION_SECRET").encode()
+        password = session_secret.encode()
         salt = encryption_salt.encode()
     else:
         # No valid encryption configuration found
@@ -76,6 +95,14 @@ def get_encryption_key():
         logger.error(f"Failed to derive encryption key: {str(e)}")
         raise ValueError(f"Key derivation failed: {str(e)}")
 
+def get_fernet():
+    """Fernet instance for the configured key, built once per key"""
+    return _fernet_for_key(get_encryption_key())
+
+@lru_cache(maxsize=8)
+def _fernet_for_key(key):
+    return Fernet(key)
+
 def validate_encryption_config():
     """
     Validate encryption configuration on application startup
@@ -111,8 +138,7 @@ def validate_encryption_config():
 def encrypt_credentials(credentials_dict):
     """Encrypt API credentials dictionary"""
     try:
-        key = get_encryption_key()
-        f = Fernet(key)
+        f = get_fernet()
         
         # Convert dict to JSON string
         credentials_json = json.dumps(credentials_dict)
@@ -129,8 +155,7 @@ def encrypt_credentials(credentials_dict):
 def decrypt_credentials(encrypted_data):
     """Decrypt API credentials and return as dictionary"""
     try:
-        key = get_encryption_key()
-        f = Fernet(key)
+        f = get_fernet()
         
         # Decrypt the data
         decrypted_data = f.decrypt(encrypted_data)
@@ -144,6 +169,70 @@ def decrypt_credentials(encrypted_data):
         logging.error(f"Error decrypting credentials: {str(e)}")
         raise
 
+class CredentialCache:
+    """
+    Bounded LRU of decrypted credential dicts keyed by (credential ID, updated_at)
+
+    Each entry also remembers the ciphertext it was decrypted from, so a
+    credential whose blob was replaced but not yet flushed (updated_at
+    unchanged) is decrypted again rather than served stale. Callers get a
+    copy and may mutate it freely.
+    """
+
+    def __init__(self, ttl=CREDENTIAL_CACHE_TTL, max_size=CREDENTIAL_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, encrypted_data):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, blob, credentials = entry
+            if expires < time.monotonic() or blob != encrypted_data:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return copy.deepcopy(credentials)
+
+    def put(self, key, encrypted_data, credentials):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, encrypted_data, copy.deepcopy(credentials))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, credential_id=None):
+        with self._lock:
+            if credential_id is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[0] == credential_id]:
+                    del self._entries[key]
+
+_credential_cache = CredentialCache()
+
+def decrypt_credentials_cached(credential_id, updated_at, encrypted_data):
+    """Decrypt a stored credential, reusing the result while (ID, updated_at, blob) are unchanged"""
+    if credential_id is None or _credential_cache.ttl <= 0:
+        return decrypt_credentials(encrypted_data)
+    key = (credential_id, updated_at)
+    credentials = _credential_cache.get(key, encrypted_data)
+    if credentials is None:
+        credentials = decrypt_credentials(encrypted_data)
+        _credential_cache.put(key, encrypted_data, credentials)
+    return credentials
+
+def decrypt_credential(credential):
+    """Decrypted credentials of an APICredential row (cached, see decrypt_credentials_cached)"""
+    return decrypt_credentials_cached(credential.id, credential.updated_at, credential.encrypted_credentials)
+
+def invalidate_credential_cache(credential_id=None):
+    """Drop cached plaintext for one credential (or all of them)"""
+    _credential_cache.invalidate(credential_id)
+
 def test_encryption():
     """Test encryption/decryption functionality"""
     test_data = {
@@ -11,6 +11,8 @@ from typing import Dict, List, Optional, Any
 import json
 import time
 
+from utils.http_pool import get_http_session
+
 logger = logging.getLogger(__name__)
 
 class EnhancedMarketDataProvider:
@@ -49,7 +51,25 @@ class EnhancedMarketDataProvider:
             if cached:
                 return cached
             
-            # Use Yahoo Finance search API
+            # Typeahead is answered from the in-memory symbol universe index
+            from utils.symbol_universe import get_symbol_universe
+            
+            listings = get_symbol_universe().search(query, limit)
+            if listings:
+                results = [{
+                    'symbol': listing['symbol'],
+                    'name': listing['name'],
+                    'exchange': '',
+                    'type': 'ETF' if listing['type'] == 'ETF' else 'EQUITY',
+                    'sector': listing['sector'],
+                    'industry': '',
+                    'market_cap': 0,
+                    'currency': 'USD'
+                } for listing in listings]
+                self._cache_data(cache_key, results)
+                return results
+            
+            # Fall back to the Yahoo Finance search API for symbols outside the universe
             url = f"https://query1.finance.yahoo.com/v1/finance/search"
             params = {
                 'q': query,
@@ -66,7 +86,7 @@ class EnhancedMarketDataProvider:
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
             }
             
-            response = requests.get(url, params=params, headers=headers, timeout=10)
+            response = get_http_session().get(url, params=params, headers=headers, timeout=10)
             response.raise_for_status()
             
             data = response.json()
@@ -166,20 +186,62 @@ class EnhancedMarketDataProvider:
         """
         Get real-time quotes for multiple symbols
         
+        Uncached symbols are fetched with batched multi-ticker downloads
+        (see utils.batch_quotes).  Batched quotes carry placeholder
+        fundamentals, so they are cached under ``batch_quote_{symbol}`` and
+        never served by get_real_time_quote; full quotes are reused here.
+        
         Args:
             symbols: List of stock symbols
             
         Returns:
             Dictionary of symbol -> quote data
         """
+        from utils.batch_quotes import fetch_batch_quotes
+        
         quotes = {}
+        missing = []
         
         for symbol in symbols:
-            quote = self.get_real_time_quote(symbol)
-            if quote:
-                quotes[symbol] = quote
+            cached = self._get_cached_data(f"quote_{symbol}") or self._get_cached_data(f"batch_quote_{symbol}")
+            if cached:
+                quotes[symbol] = cached
+            else:
+                missing.append(symbol)
+        
+        if missing:
+            try:
+                batch = fetch_batch_quotes(missing)
+            except Exception as e:
+                logger.error(f"Error getting batch quotes: {str(e)}")
+                batch = {}
+            
+            market_state = 'REGULAR' if self._is_market_open() else 'CLOSED'
+            for symbol in missing:
+                quote = batch.get(symbol.upper().strip())
+                if not quote:
+                    continue
+                quote_data = {
+                    'name': symbol,
+                    'avg_volume': 0,
+                    'market_cap': 0,
+                    'currency': 'USD',
+                    'exchange': '',
+                    'sector': '',
+                    'industry': '',
+                    'pe_ratio': 0,
+                    'dividend_yield': 0,
+                    'beta': 0,
+                    **quote,
+                    'symbol': symbol,
+                    'market_state': market_state
+                }
+                self._cache_data(f"batch_quote_{symbol}", quote_data)
+                quotes[symbol] = quote_data
+            
+            logger.info(f"Retrieved {len(quotes)}/{len(symbols)} quotes ({len(missing)} batched)")
         
-        return quotes
+        return {symbol: quotes[symbol] for symbol in symbols if symbol in quotes}
     
     def get_trending_stocks(self, limit: int = 10) -> List[Dict[str, Any]]:
         """
@@ -203,7 +265,7 @@ class EnhancedMarketDataProvider:
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
             }
             
-            response = requests.get(url, headers=headers, timeout=10)
+            response = get_http_session().get(url, headers=headers, timeout=10)
             response.raise_for_status()
             
             data = response.json()
@@ -264,7 +326,7 @@ class EnhancedMarketDataProvider:
                 'include_market_cap': 'true'
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = get_http_session().get(url, params=params, timeout=10)
             response.raise_for_status()
             
             data = response.json()
@@ -0,0 +1,155 @@
+"""
+Shared HTTP Transport
+One process-wide requests.Session for broker and market-data clients: per-host
+keep-alive connection pools, retry with exponential backoff for idempotent
+requests, and per-host latency metrics.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from http.cookiejar import DefaultCookiePolicy
+from typing import Any, Dict
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# Number of distinct hosts whose pools are kept alive
+HTTP_POOL_CONNECTIONS = int(os.environ.get('HTTP_POOL_CONNECTIONS', '32'))
+# Keep-alive connections per host
+HTTP_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', '20'))
+# Per-host overrides, e.g. "api.schwabapi.com=32,api.coinbase.com=16"
+HTTP_POOL_HOST_SIZES = os.environ.get('HTTP_POOL_HOST_SIZES', '')
+HTTP_MAX_RETRIES = int(os.environ.get('HTTP_MAX_RETRIES', '3'))
+HTTP_BACKOFF_FACTOR = float(os.environ.get('HTTP_BACKOFF_FACTOR', '0.5'))
+HTTP_RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Latency samples kept per host for percentiles
+HTTP_LATENCY_WINDOW = 256
+
+
+class _HostStats:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.samples = deque(maxlen=HTTP_LATENCY_WINDOW)
+
+    def snapshot(self) -> Dict[str, Any]:
+        ordered = sorted(self.samples)
+
+        def pct(p):
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 1) if ordered else 0.0
+
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'avg_ms': round(self.total_ms / self.requests, 1) if self.requests else 0.0,
+            'p50_ms': pct(0.50),
+            'p95_ms': pct(0.95),
+            'max_ms': round(self.max_ms, 1),
+        }
+
+
+_stats: Dict[str, _HostStats] = {}
+_stats_lock = threading.Lock()
+
+
+def _record(host: str, elapsed_ms: float, error: bool) -> None:
+    with _stats_lock:
+        stats = _stats.setdefault(host, _HostStats())
+        stats.requests += 1
+        stats.errors += int(error)
+        stats.total_ms += elapsed_ms
+        stats.max_ms = max(stats.max_ms, elapsed_ms)
+        stats.samples.append(elapsed_ms)
+
+
+class InstrumentedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that records wall-clock latency (including retries) per host"""
+
+    def send(self, request, **kwargs):
+        host = urlsplit(request.url).hostname or 'unknown'
+        start = time.monotonic()
+        error = True
+        try:
+            response = super().send(request, **kwargs)
+            error = response.status_code >= 500
+            return response
+        finally:
+            _record(host, (time.monotonic() - start) * 1000.0, error)
+
+
+def _retry_policy() -> Retry:
+    # urllib3's default allowed_methods excludes POST/PATCH, so orders are never replayed
+    return Retry(
+        total=HTTP_MAX_RETRIES,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        status_forcelist=HTTP_RETRY_STATUSES,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+
+def _build_adapter(maxsize: int) -> InstrumentedHTTPAdapter:
+    return InstrumentedHTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=maxsize,
+        max_retries=_retry_policy(),
+        pool_block=False,
+    )
+
+
+def _host_sizes(spec: str) -> Dict[str, int]:
+    sizes = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        host, _, size = item.partition('=')
+        try:
+            sizes[host.strip()] = int(size)
+        except ValueError:
+            logger.warning(f"Ignoring invalid HTTP_POOL_HOST_SIZES entry: {item}")
+    return sizes
+
+
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    # Clients for different users share this session; never carry cookies between them
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+    default_adapter = _build_adapter(HTTP_POOL_MAXSIZE)
+    session.mount('http://', default_adapter)
+    session.mount('https://', default_adapter)
+    for host, size in _host_sizes(HTTP_POOL_HOST_SIZES).items():
+        session.mount(f'https://{host}', _build_adapter(size))
+    return session
+
+
+_http_session = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """Get or create the shared pooled HTTP session"""
+    global _http_session
+    if _http_session is None:
+        with _session_lock:
+            if _http_session is None:
+                _http_session = _build_session()
+    return _http_session
+
+
+def http_pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Per-host request counts, error counts and latency percentiles"""
+    with _stats_lock:
+        return {host: stats.snapshot() for host, stats in _stats.items()}
+
+
+def reset_http_pool_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
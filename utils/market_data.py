@@ -5,6 +5,9 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 import yfinance as yf
 
+from utils.http_pool import get_http_session
+from utils.option_chain import OptionChain, get_option_chain_cache, load_option_chain
+
 class MarketDataProvider:
     """Unified market data provider for real-time and historical data with Redis caching"""
 
@@ -110,67 +113,61 @@ class MarketDataProvider:
             return None
     
     def get_option_chain(self, symbol: str, expiration_date: str = None) -> Optional[Dict]:
-        """Get option chain data for a symbol"""
+        """Get option chain data for a symbol (one expiration, JSON-ready)"""
         try:
-            ticker = yf.Ticker(symbol)
-            
-            # Get available expiration dates
-            expirations = ticker.options
-            
-            if not expirations:
+            chain = self.get_option_chain_columns(
+                symbol,
+                expirations=[expiration_date] if expiration_date else None,
+                max_expirations=None if expiration_date else 1
+            )
+            if chain is None or not chain.expirations:
                 return None
-            
-            # Use specified expiration or next available
-            target_expiration = expiration_date or expirations[0]
-            
-            # Get option chain for the target expiration
-            options = ticker.option_chain(target_expiration)
-            
-            # Process calls and puts
-            calls_data = []
-            puts_data = []
-            
-            for _, call in options.calls.iterrows():
-                calls_data.append({
-                    'strike': call['strike'],
-                    'last_price': call['lastPrice'],
-                    'bid': call['bid'],
-                    'ask': call['ask'],
-                    'volume': call['volume'],
-                    'open_interest': call['openInterest'],
-                    'implied_volatility': call['impliedVolatility'],
-                    'delta': call.get('delta', 0),
-                    'gamma': call.get('gamma', 0),
-                    'theta': call.get('theta', 0),
-                    'vega': call.get('vega', 0)
-                })
-            
-            for _, put in options.puts.iterrows():
-                puts_data.append({
-                    'strike': put['strike'],
-                    'last_price': put['lastPrice'],
-                    'bid': put['bid'],
-                    'ask': put['ask'],
-                    'volume': put['volume'],
-                    'open_interest': put['openInterest'],
-                    'implied_volatility': put['impliedVolatility'],
-                    'delta': put.get('delta', 0),
-                    'gamma': put.get('gamma', 0),
-                    'theta': put.get('theta', 0),
-                    'vega': put.get('vega', 0)
-                })
-            
-            return {
-                'symbol': symbol,
-                'expiration': target_expiration,
-                'calls': calls_data,
-                'puts': puts_data,
-                'timestamp': datetime.utcnow().isoformat()
-            }
+            return chain.to_dict(expiration_date)
         
         except Exception as e:
             self.logger.error(f"Error fetching option chain for {symbol}: {str(e)}")
             return None
+
+    def get_option_chain_columns(self, symbol: str, expirations: Optional[List[str]] = None,
+                                 max_dte: Optional[float] = None,
+                                 max_expirations: Optional[int] = None) -> Optional[OptionChain]:
+        """
+        Columnar option chain across expirations, with IV and Greeks solved per contract
+
+        Expirations load concurrently and the chain is cached per underlying
+        (and selection) for OPTION_CHAIN_TTL seconds.
+
+        Args:
+            symbol: Underlying symbol
+            expirations: Explicit expirations (default: all listed)
+            max_dte: Skip expirations further out than this many days
+            max_expirations: Load at most this many, nearest first
+
+        Returns:
+            OptionChain, or None when no options are listed
+        """
+        cache = get_option_chain_cache()
+        key = (symbol.upper(), tuple(expirations or ()), max_dte, max_expirations)
+        chain = cache.get(key)
+        if chain is not None:
+            return chain
+
+        try:
+            quote = self.get_stock_quote(symbol)
+            chain = load_option_chain(
+                symbol,
+                (quote or {}).get('price') or 0,
+                expirations=expirations,
+                max_dte=max_dte,
+                max_expirations=max_expirations
+            )
+        except Exception as e:
+            self.logger.error(f"Error loading option chain for {symbol}: {str(e)}")
+            return None
+
+        if chain is not None:
+            cache.put(key, chain)
+        return chain
     
     def get_historical_data(self, symbol: str, period: str = '1mo') -> Optional[List[Dict]]:
         """Get historical price data"""
@@ -228,7 +225,7 @@ class MarketDataProvider:
                 'include_market_cap': 'true'
             }
 
-            response = requests.get(url, params=params, timeout=10)
+            response = get_http_session().get(url, params=params, timeout=10)
             response.raise_for_status()
 
             data = response.json()
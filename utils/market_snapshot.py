@@ -0,0 +1,150 @@
+"""
+Cycle-scoped Market Snapshot
+Fetches quotes, option chains and sentiment once for the union of every
+strategy watchlist, then freezes them so all users in an auto-trading cycle
+trade off the same, consistent market view.
+"""
+
+import functools
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAX_WORKERS = int(os.environ.get('MARKET_SNAPSHOT_MAX_WORKERS', '8'))
+# Option expirations loaded per underlying for the cycle (wheel/collar target ~30 DTE)
+SNAPSHOT_OPTION_MAX_DTE = float(os.environ.get('MARKET_SNAPSHOT_OPTION_MAX_DTE', '60'))
+
+
+def _freeze(value: Any) -> Any:
+    """Recursively convert dicts/lists into read-only mappings/tuples"""
+    if isinstance(value, Mapping):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _dedupe(symbols: Iterable[str]) -> Tuple[str, ...]:
+    return tuple(dict.fromkeys(s.upper().strip() for s in symbols if s))
+
+
+class MarketSnapshot:
+    """Immutable per-cycle view of quotes, option chains and sentiment"""
+
+    def __init__(self, quotes: Dict[str, Dict], option_chains: Optional[Dict[str, Dict]] = None,
+                 sentiment: Optional[Dict[str, Dict]] = None, as_of: Optional[datetime] = None):
+        self._quotes = _freeze(quotes)
+        self._option_chains = _freeze(option_chains or {})
+        self._sentiment = _freeze(sentiment or {})
+        self.as_of = as_of or datetime.utcnow()
+
+    @classmethod
+    def build(cls, symbols: Iterable[str], option_symbols: Iterable[str] = (),
+              sentiment_symbols: Iterable[str] = (), market_data=None,
+              price_fallback: Optional[Callable[[str], float]] = None,
+              max_workers: Optional[int] = None) -> 'MarketSnapshot':
+        """
+        Fetch everything the cycle needs in one concurrent pass
+
+        Args:
+            symbols: Symbols needing a quote (union of all watchlists)
+            option_symbols: Symbols whose option chain should be loaded
+            sentiment_symbols: Symbols needing a FinBERT sentiment signal
+            market_data: Provider with get_stock_quote and get_option_chain_columns
+                (or get_option_chain)
+            price_fallback: Called for a price when no live quote is available
+            max_workers: Concurrent provider calls
+
+        Returns:
+            Frozen MarketSnapshot
+        """
+        if market_data is None:
+            from utils.market_data import MarketDataProvider
+            market_data = MarketDataProvider()
+
+        symbols = _dedupe(symbols)
+        option_symbols = _dedupe(option_symbols)
+        sentiment_symbols = _dedupe(sentiment_symbols)
+        workers = max(1, min(max_workers or SNAPSHOT_MAX_WORKERS, len(symbols) + len(option_symbols) + 1))
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='market-snapshot') as pool:
+            sentiment_future = pool.submit(cls._fetch_sentiment, sentiment_symbols) if sentiment_symbols else None
+            quote_futures = {s: pool.submit(cls._safe_call, market_data.get_stock_quote, s) for s in symbols}
+            # Columnar chains across expirations when the provider has them
+            load_chain = getattr(market_data, 'get_option_chain_columns', None)
+            if load_chain is not None:
+                load_chain = functools.partial(load_chain, max_dte=SNAPSHOT_OPTION_MAX_DTE)
+            else:
+                load_chain = market_data.get_option_chain
+            chain_futures = {s: pool.submit(cls._safe_call, load_chain, s) for s in option_symbols}
+
+            quotes = {}
+            for symbol, future in quote_futures.items():
+                quote = future.result()
+                if not quote or not quote.get('price'):
+                    if price_fallback is None:
+                        continue
+                    quote = {'symbol': symbol, 'price': price_fallback(symbol), 'simulated': True}
+                quotes[symbol] = quote
+
+            option_chains = {s: f.result() for s, f in chain_futures.items() if f.result()}
+            sentiment = sentiment_future.result() if sentiment_future else {}
+
+        logger.info(
+            f"Market snapshot built: {len(quotes)} quotes, {len(option_chains)} option chains, "
+            f"{len(sentiment)} sentiment signals"
+        )
+        return cls(quotes, option_chains, sentiment)
+
+    @staticmethod
+    def _safe_call(fetch, symbol):
+        try:
+            return fetch(symbol)
+        except Exception as e:
+            logger.warning(f"Snapshot fetch failed for {symbol}: {e}")
+            return None
+
+    @staticmethod
+    def _fetch_sentiment(symbols: Tuple[str, ...]) -> Dict[str, Dict]:
+        try:
+            from sentiment.sentiment_engine import SentimentEngine
+            from sentiment.sentiment_aggregator import SentimentAggregator
+            analyses = SentimentEngine().analyze_tickers(list(symbols))
+            signals = SentimentAggregator().aggregate_batch(analyses)
+            return {
+                ticker: {'score': signal.score, 'momentum': signal.momentum}
+                for ticker, signal in signals.items()
+            }
+        except Exception as e:
+            logger.debug(f"Sentiment unavailable for snapshot: {e}")
+            return {}
+
+    # ------------------------------------------------------------------
+    # Read API
+    # ------------------------------------------------------------------
+
+    @property
+    def symbols(self) -> Tuple[str, ...]:
+        return tuple(self._quotes)
+
+    def quote(self, symbol: str) -> Optional[Mapping]:
+        return self._quotes.get(symbol.upper())
+
+    def price(self, symbol: str) -> Optional[float]:
+        quote = self.quote(symbol)
+        return quote['price'] if quote else None
+
+    def option_chain(self, symbol: str) -> Optional[Mapping]:
+        return self._option_chains.get(symbol.upper())
+
+    def sentiment(self, symbol: str) -> Tuple[float, float]:
+        """(score, momentum) for *symbol*; neutral when unavailable"""
+        signal = self._sentiment.get(symbol.upper())
+        if not signal:
+            return 0.0, 0.0
+        return signal['score'], signal['momentum']
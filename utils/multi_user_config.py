@@ -8,7 +8,7 @@ deployment with proper user isolation and security.
 import logging
 from typing import Dict, List, Optional, Any
 from models import User, APICredential, OAuthClientCredential, Trade, AutoTradingSettings
-from utils.encryption import decrypt_credentials, encrypt_credentials
+from utils.encryption import decrypt_credential, encrypt_credentials
 from app import db
 
 logger = logging.getLogger(__name__)
@@ -42,7 +42,7 @@ class MultiUserConfigManager:
                 logger.warning(f"No {provider} credentials found for user {user_id}")
                 return None
             
-            return decrypt_credentials(credential.encrypted_credentials)
+            return decrypt_credential(credential)
             
         except Exception as e:
             logger.error(f"Error getting {provider} credentials for user {user_id}: {str(e)}")
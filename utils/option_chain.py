@@ -0,0 +1,333 @@
+"""
+Columnar Option Chains
+An OptionChain holds every loaded contract of an underlying (all expirations,
+calls and puts) as parallel NumPy arrays, with IV and Greeks solved for the
+whole chain in one vectorized pass.  Filters are boolean masks, so queries
+like "puts with |delta| in [0.25, 0.35] and 20-45 DTE" never touch per-contract
+Python objects; dict/JSON conversion happens only at the API edge.
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import yfinance as yf
+
+from utils.options_pricing import chain_greeks
+
+logger = logging.getLogger(__name__)
+
+OPTION_CHAIN_TTL = int(os.environ.get('OPTION_CHAIN_TTL', '60'))
+OPTION_CHAIN_WORKERS = int(os.environ.get('OPTION_CHAIN_WORKERS', '8'))
+
+# yfinance DataFrame column -> chain column
+_FEED_COLUMNS = {
+    'strike': 'strike',
+    'bid': 'bid',
+    'ask': 'ask',
+    'lastPrice': 'last_price',
+    'volume': 'volume',
+    'openInterest': 'open_interest',
+    'impliedVolatility': 'feed_iv',
+}
+GREEK_COLUMNS = ('iv', 'delta', 'gamma', 'theta', 'vega', 'rho')
+# Contract fields exposed at the API edge, in the legacy get_option_chain order
+RECORD_COLUMNS = ('strike', 'last_price', 'bid', 'ask', 'volume', 'open_interest',
+                  'implied_volatility', 'delta', 'gamma', 'theta', 'vega', 'rho')
+
+
+MARKET_TIMEZONE = ZoneInfo('America/New_York')
+
+
+def days_to_expiration(expiration: str, now: Optional[datetime] = None) -> float:
+    """Fractional days until the 16:00 New York close on the expiration date (*now* is naive UTC)"""
+    close = datetime.strptime(expiration, '%Y-%m-%d').replace(hour=16, tzinfo=MARKET_TIMEZONE)
+    expiry = close.astimezone(timezone.utc).replace(tzinfo=None)
+    return max((expiry - (now or datetime.utcnow())).total_seconds() / 86400.0, 0.0)
+
+
+class OptionChain:
+    """Struct-of-arrays option chain for one underlying"""
+
+    def __init__(self, symbol: str, underlying_price: float, expirations: Sequence[str],
+                 expiry_index: np.ndarray, is_call: np.ndarray, columns: Dict[str, np.ndarray],
+                 as_of: Optional[datetime] = None):
+        self.symbol = symbol
+        self.underlying_price = underlying_price
+        self.expirations = tuple(expirations)
+        self.expiry_index = expiry_index
+        self.is_call = is_call
+        self.columns = columns
+        self.as_of = as_of or datetime.utcnow()
+        # Chains are shared through caches and frozen snapshots
+        for values in (expiry_index, is_call, *columns.values()):
+            values.flags.writeable = False
+
+    @classmethod
+    def from_frames(cls, symbol: str, underlying_price: float, frames: Dict[str, Tuple],
+                    now: Optional[datetime] = None) -> 'OptionChain':
+        """
+        Build a chain from per-expiration (calls, puts) DataFrames and solve
+        IV/Greeks for every contract at once
+
+        Args:
+            symbol: Underlying symbol
+            underlying_price: Spot used for the IV solve (0 leaves Greeks NaN)
+            frames: expiration (YYYY-MM-DD) -> (calls DataFrame, puts DataFrame)
+        """
+        now = now or datetime.utcnow()
+        expirations = sorted(frames)
+        parts: Dict[str, List[np.ndarray]] = {name: [] for name in _FEED_COLUMNS.values()}
+        expiry_index, is_call, dte = [], [], []
+
+        for i, expiration in enumerate(expirations):
+            days = days_to_expiration(expiration, now)
+            for frame, call_flag in zip(frames[expiration], (True, False)):
+                if frame is None or frame.empty:
+                    continue
+                n = len(frame)
+                for feed_column, name in _FEED_COLUMNS.items():
+                    if feed_column in frame:
+                        parts[name].append(frame[feed_column].to_numpy(dtype=float, na_value=np.nan))
+                    else:
+                        parts[name].append(np.full(n, np.nan))
+                expiry_index.append(np.full(n, i, dtype=np.int32))
+                is_call.append(np.full(n, call_flag))
+                dte.append(np.full(n, days))
+
+        if not expiry_index:
+            return cls(symbol, underlying_price, expirations, np.empty(0, dtype=np.int32),
+                       np.empty(0, dtype=bool), {name: np.empty(0) for name in
+                                                  (*_FEED_COLUMNS.values(), 'dte', 'mid', *GREEK_COLUMNS)}, now)
+
+        columns = {name: np.concatenate(arrays) for name, arrays in parts.items()}
+        columns['dte'] = np.concatenate(dte)
+        expiry_index = np.concatenate(expiry_index)
+        is_call = np.concatenate(is_call)
+
+        bid, ask = np.nan_to_num(columns['bid']), np.nan_to_num(columns['ask'])
+        mid = np.where((bid > 0) & (ask >= bid), 0.5 * (bid + ask), columns['last_price'])
+        if underlying_price:
+            greeks = chain_greeks(underlying_price, columns['strike'], columns['dte'], mid, is_call,
+                                  fallback_iv=columns['feed_iv'])
+        else:
+            greeks = {name: np.full(len(is_call), np.nan) for name in GREEK_COLUMNS}
+        columns['mid'] = mid
+        for name in GREEK_COLUMNS:
+            columns[name] = greeks[name]
+        return cls(symbol, underlying_price, expirations, expiry_index, is_call, columns, now)
+
+    def __len__(self) -> int:
+        return len(self.is_call)
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.columns[column]
+
+    # ------------------------------------------------------------------
+    # Filters
+    # ------------------------------------------------------------------
+
+    def select(self, mask: np.ndarray) -> 'OptionChain':
+        """Sub-chain of the contracts where ``mask`` is True"""
+        return OptionChain(self.symbol, self.underlying_price, self.expirations,
+                           self.expiry_index[mask], self.is_call[mask],
+                           {name: values[mask] for name, values in self.columns.items()}, self.as_of)
+
+    def mask(self, is_call: Optional[bool] = None, abs_delta: Optional[Tuple[float, float]] = None,
+             dte: Optional[Tuple[float, float]] = None, strike: Optional[Tuple[float, float]] = None,
+             expiration: Optional[str] = None, min_open_interest: Optional[float] = None) -> np.ndarray:
+        """Boolean mask for the given constraints (ranges are inclusive; NaN never matches)"""
+        mask = np.ones(len(self), dtype=bool)
+        if is_call is not None:
+            mask &= self.is_call == is_call
+        if abs_delta is not None:
+            delta = np.abs(self.columns['delta'])
+            mask &= (delta >= abs_delta[0]) & (delta <= abs_delta[1])
+        if dte is not None:
+            mask &= (self.columns['dte'] >= dte[0]) & (self.columns['dte'] <= dte[1])
+        if strike is not None:
+            mask &= (self.columns['strike'] >= strike[0]) & (self.columns['strike'] <= strike[1])
+        if expiration is not None:
+            index = self.expirations.index(expiration) if expiration in self.expirations else -1
+            mask &= self.expiry_index == index
+        if min_open_interest is not None:
+            mask &= np.nan_to_num(self.columns['open_interest']) >= min_open_interest
+        return mask
+
+    def filter(self, **constraints) -> 'OptionChain':
+        """e.g. ``chain.filter(is_call=False, abs_delta=(0.25, 0.35), dte=(20, 45))``"""
+        return self.select(self.mask(**constraints))
+
+    def nearest_delta(self, target_delta: float, is_call: bool,
+                      dte: Optional[Tuple[float, float]] = None,
+                      expiration: Optional[str] = None) -> Optional[Dict]:
+        """Contract whose |delta| is closest to ``target_delta`` (None without solved Greeks)"""
+        mask = self.mask(is_call=is_call, dte=dte, expiration=expiration)
+        delta = np.abs(self.columns['delta'])
+        usable = mask & (delta > 0) & (self.columns['iv'] > 0)
+        if not usable.any():
+            return None
+        distance = np.where(usable, np.abs(delta - abs(target_delta)), np.inf)
+        return self.record(int(np.argmin(distance)))
+
+    def nearest_expiration(self, target_dte: float,
+                           dte: Optional[Tuple[float, float]] = None) -> Optional[Tuple[str, float]]:
+        """
+        (expiration, days) closest to ``target_dte`` that lists priced puts and
+        calls, so multi-leg structures can trade both legs in one expiration
+        """
+        usable = (self.columns['iv'] > 0) & (np.abs(self.columns['delta']) > 0)
+        if dte is not None:
+            usable &= self.mask(dte=dte)
+        best = None
+        for i, expiration in enumerate(self.expirations):
+            in_expiry = usable & (self.expiry_index == i)
+            if not (in_expiry & self.is_call).any() or not (in_expiry & ~self.is_call).any():
+                continue
+            days = float(self.columns['dte'][in_expiry][0])
+            if best is None or abs(days - target_dte) < abs(best[1] - target_dte):
+                best = (expiration, days)
+        return best
+
+    # ------------------------------------------------------------------
+    # API edge
+    # ------------------------------------------------------------------
+
+    def record(self, i: int) -> Dict:
+        """One contract as a plain dict (NaN Greeks become 0, like the legacy chain)"""
+        values = {name: self.columns['iv' if name == 'implied_volatility' else name][i]
+                  for name in RECORD_COLUMNS}
+        record = {name: (0.0 if np.isnan(value) else float(value)) for name, value in values.items()}
+        record.update(
+            type='call' if self.is_call[i] else 'put',
+            expiration=self.expirations[self.expiry_index[i]],
+            days_to_expiration=round(float(self.columns['dte'][i]), 2),
+        )
+        return record
+
+    def to_records(self) -> List[Dict]:
+        """Every contract as a plain dict, built column-wise"""
+        columns = [np.nan_to_num(self.columns['iv' if name == 'implied_volatility' else name]).tolist()
+                   for name in RECORD_COLUMNS]
+        types = np.where(self.is_call, 'call', 'put').tolist()
+        expirations = [self.expirations[i] for i in self.expiry_index.tolist()]
+        dtes = np.round(self.columns['dte'], 2).tolist()
+        return [
+            dict(zip(RECORD_COLUMNS, values), type=kind, expiration=expiration, days_to_expiration=dte)
+            for values, kind, expiration, dte in zip(zip(*columns), types, expirations, dtes)
+        ]
+
+    def to_dict(self, expiration: Optional[str] = None) -> Dict:
+        """
+        Legacy get_option_chain payload for one expiration (default: nearest)
+        """
+        expiration = expiration or (self.expirations[0] if self.expirations else None)
+        side = self.filter(expiration=expiration) if expiration else self
+        records = side.to_records()
+        return {
+            'symbol': self.symbol,
+            'expiration': expiration,
+            'expirations': list(self.expirations),
+            'underlying_price': self.underlying_price,
+            'days_to_expiration': days_to_expiration(expiration, self.as_of) if expiration else 0.0,
+            'calls': [r for r in records if r['type'] == 'call'],
+            'puts': [r for r in records if r['type'] == 'put'],
+            'timestamp': self.as_of.isoformat()
+        }
+
+
+def _fetch_expiration(symbol: str, expiration: str):
+    try:
+        options = yf.Ticker(symbol).option_chain(expiration)
+        return options.calls, options.puts
+    except Exception as e:
+        logger.warning(f"Option chain fetch failed for {symbol} {expiration}: {e}")
+        return None
+
+
+def load_option_chain(symbol: str, underlying_price: float, expirations: Optional[Sequence[str]] = None,
+                      max_dte: Optional[float] = None, max_expirations: Optional[int] = None,
+                      max_workers: Optional[int] = None) -> Optional[OptionChain]:
+    """
+    Fetch expirations concurrently and build one columnar chain
+
+    Args:
+        symbol: Underlying symbol
+        underlying_price: Spot used to solve IV and Greeks
+        expirations: Explicit expirations to load (default: every listed one)
+        max_dte: Skip expirations further out than this many days
+        max_expirations: Load at most this many (nearest first)
+        max_workers: Concurrent expiration fetches
+
+    Returns:
+        OptionChain, or None when the symbol has no listed options
+    """
+    listed = list(yf.Ticker(symbol).options or ())
+    if not listed:
+        return None
+
+    now = datetime.utcnow()
+    wanted = set(expirations or ())
+    selected = [e for e in listed if e in wanted] if wanted else listed
+    if max_dte is not None:
+        selected = [e for e in selected if days_to_expiration(e, now) <= max_dte] or selected[:1]
+    if max_expirations:
+        selected = selected[:max_expirations]
+    if not selected:
+        return None
+
+    workers = max(1, min(max_workers or OPTION_CHAIN_WORKERS, len(selected)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='option-chain') as pool:
+        fetched = list(pool.map(lambda e: _fetch_expiration(symbol, e), selected))
+
+    frames = {e: result for e, result in zip(selected, fetched) if result is not None}
+    if not frames:
+        return None
+    return OptionChain.from_frames(symbol, underlying_price, frames, now)
+
+
+class OptionChainCache:
+    """Per-underlying TTL cache of columnar chains (chains are never mutated in place)"""
+
+    def __init__(self, ttl: int = OPTION_CHAIN_TTL):
+        self.ttl = ttl
+        self._entries: Dict[tuple, Tuple[float, OptionChain]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[OptionChain]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            return entry[1]
+
+    def put(self, key: tuple, chain: OptionChain) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, chain)
+            # Drop expired chains so the cache only holds live underlyings
+            now = time.monotonic()
+            for stale in [k for k, (expires, _) in self._entries.items() if expires < now]:
+                del self._entries[stale]
+
+
+_chain_cache: Optional[OptionChainCache] = None
+_chain_cache_lock = threading.Lock()
+
+
+def get_option_chain_cache() -> OptionChainCache:
+    """Process-wide option chain cache shared by every MarketDataProvider"""
+    global _chain_cache
+    if _chain_cache is None:
+        with _chain_cache_lock:
+            if _chain_cache is None:
+                _chain_cache = OptionChainCache()
+    return _chain_cache
@@ -0,0 +1,265 @@
+"""
+Vectorized Options Pricing
+Black-Scholes-Merton prices and Greeks over NumPy arrays, so a whole chain
+(strikes x expirations) or a whole watchlist is priced in one call, plus a
+closed-form inverse that solves for the strike at a target delta and an
+array-based implied-volatility solver.
+
+All inputs broadcast against each other: pass ``strikes[:, None]`` and
+``days[None, :]`` for a strike x expiration grid.
+"""
+
+import logging
+import math
+import os
+from typing import Dict
+
+import numpy as np
+
+try:
+    from scipy.special import ndtr as _ndtr, ndtri as _ndtri
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+RISK_FREE_RATE = float(os.environ.get("OPTIONS_RISK_FREE_RATE", "0.04"))
+DAYS_PER_YEAR = 365.0
+
+IV_MIN, IV_MAX = 1e-4, 5.0
+IV_TOLERANCE = 1e-6
+IV_MAX_ITER = 50
+
+_SQRT_2PI = math.sqrt(2.0 * math.pi)
+
+# Acklam's rational approximation of the inverse normal CDF (|rel. error| < 1.2e-9)
+_PPF_A = (-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+          1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00)
+_PPF_B = (-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+          6.680131188771972e+01, -1.328068155288572e+01)
+_PPF_C = (-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+          -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00)
+_PPF_D = (7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00,
+          3.754408661907416e+00)
+_PPF_LOW = 0.02425
+
+
+def norm_pdf(x) -> np.ndarray:
+    x = np.asarray(x, dtype=float)
+    return np.exp(-0.5 * x * x) / _SQRT_2PI
+
+
+def norm_cdf(x) -> np.ndarray:
+    """Standard normal CDF (SciPy's ndtr when installed, else A&S 26.2.17, error < 7.5e-8)."""
+    if SCIPY_AVAILABLE:
+        return _ndtr(x)
+    x = np.asarray(x, dtype=float)
+    t = 1.0 / (1.0 + 0.2316419 * np.abs(x))
+    poly = t * (0.319381530 + t * (-0.356563782 + t * (1.781477937 + t * (-1.821255978 + t * 1.330274429))))
+    upper = norm_pdf(x) * poly
+    return np.where(x >= 0, 1.0 - upper, upper)
+
+
+def norm_ppf(p) -> np.ndarray:
+    """Inverse standard normal CDF (SciPy's ndtri when installed, else Acklam's approximation)."""
+    if SCIPY_AVAILABLE:
+        return _ndtri(p)
+    p = np.clip(np.asarray(p, dtype=float), 1e-300, 1.0 - 1e-16)
+    a, b, c, d = _PPF_A, _PPF_B, _PPF_C, _PPF_D
+
+    q = np.minimum(p, 1.0 - p)
+    r = np.sqrt(-2.0 * np.log(q))
+    tail = ((((((c[0] * r + c[1]) * r + c[2]) * r + c[3]) * r + c[4]) * r + c[5])
+            / ((((d[0] * r + d[1]) * r + d[2]) * r + d[3]) * r + 1.0))
+
+    u = p - 0.5
+    s = u * u
+    central = ((((((a[0] * s + a[1]) * s + a[2]) * s + a[3]) * s + a[4]) * s + a[5]) * u
+               / (((((b[0] * s + b[1]) * s + b[2]) * s + b[3]) * s + b[4]) * s + 1.0))
+
+    return np.where(q < _PPF_LOW, np.where(p < 0.5, tail, -tail), central)
+
+
+def black_scholes(spot, strike, days, volatility, is_call=True,
+                  rate: float = RISK_FREE_RATE, dividend: float = 0.0) -> Dict[str, np.ndarray]:
+    """
+    Price options and compute Greeks for every element of the broadcast inputs
+
+    Args:
+        spot: Underlying price(s)
+        strike: Strike price(s)
+        days: Calendar days to expiration
+        volatility: Annualized implied volatility (0.25 = 25%)
+        is_call: True for calls, False for puts (scalar or boolean array)
+        rate: Continuously compounded risk-free rate
+        dividend: Continuous dividend yield
+
+    Returns:
+        Dict of arrays: price, delta, gamma, theta (per calendar day),
+        vega (per 1 vol point) and rho (per 1% rate move).  Expired or
+        zero-volatility contracts are valued at intrinsic with step delta.
+    """
+    spot, strike, days, volatility, is_call = np.broadcast_arrays(
+        np.asarray(spot, dtype=float), np.asarray(strike, dtype=float),
+        np.asarray(days, dtype=float), np.asarray(volatility, dtype=float),
+        np.asarray(is_call, dtype=bool),
+    )
+    t = np.maximum(days, 0.0) / DAYS_PER_YEAR
+    live = (t > 0) & (volatility > 0) & (strike > 0) & (spot > 0)
+
+    # Dummy values for dead contracts keep the arithmetic finite; masked below
+    t_ = np.where(live, t, 1.0)
+    vol = np.where(live, volatility, 1.0)
+    k = np.where(live, strike, 1.0)
+    s = np.where(live, spot, 1.0)
+
+    sqrt_t = np.sqrt(t_)
+    vol_sqrt_t = vol * sqrt_t
+    d1 = (np.log(s / k) + (rate - dividend + 0.5 * vol * vol) * t_) / vol_sqrt_t
+    d2 = d1 - vol_sqrt_t
+    disc_r = np.exp(-rate * t_)
+    disc_q = np.exp(-dividend * t_)
+    pdf_d1 = norm_pdf(d1)
+    n_d1, n_d2 = norm_cdf(d1), norm_cdf(d2)
+    n_neg_d1, n_neg_d2 = norm_cdf(-d1), norm_cdf(-d2)
+
+    call_price = s * disc_q * n_d1 - k * disc_r * n_d2
+    put_price = k * disc_r * n_neg_d2 - s * disc_q * n_neg_d1
+
+    decay = -s * disc_q * pdf_d1 * vol / (2.0 * sqrt_t)
+    call_theta = decay - rate * k * disc_r * n_d2 + dividend * s * disc_q * n_d1
+    put_theta = decay + rate * k * disc_r * n_neg_d2 - dividend * s * disc_q * n_neg_d1
+
+    intrinsic = np.where(is_call, np.maximum(spot - strike, 0.0), np.maximum(strike - spot, 0.0))
+    in_the_money = np.where(is_call, spot > strike, spot < strike)
+    step_delta = np.where(in_the_money, np.where(is_call, 1.0, -1.0), 0.0)
+
+    return {
+        'price': np.where(live, np.where(is_call, call_price, put_price), intrinsic),
+        'delta': np.where(live, np.where(is_call, disc_q * n_d1, -disc_q * n_neg_d1), step_delta),
+        'gamma': np.where(live, disc_q * pdf_d1 / (s * vol_sqrt_t), 0.0),
+        'theta': np.where(live, np.where(is_call, call_theta, put_theta) / DAYS_PER_YEAR, 0.0),
+        'vega': np.where(live, s * disc_q * pdf_d1 * sqrt_t / 100.0, 0.0),
+        'rho': np.where(live, np.where(is_call, k * t_ * disc_r * n_d2,
+                                       -k * t_ * disc_r * n_neg_d2) / 100.0, 0.0),
+    }
+
+
+def price_chain(spot: float, strikes, days, volatility, is_call=True,
+                rate: float = RISK_FREE_RATE, dividend: float = 0.0) -> Dict[str, np.ndarray]:
+    """Price a strike x expiration grid; every returned array has shape (len(strikes), len(days))."""
+    strikes = np.asarray(strikes, dtype=float)[:, None]
+    days = np.asarray(days, dtype=float)[None, :]
+    return black_scholes(spot, strikes, days, volatility, is_call, rate, dividend)
+
+
+def strike_for_delta(spot, target_delta, days, volatility, is_call=True,
+                     rate: float = RISK_FREE_RATE, dividend: float = 0.0) -> np.ndarray:
+    """
+    Closed-form inverse of Black-Scholes delta: the strike whose delta equals
+    ``target_delta`` (sign ignored) for each broadcast element.
+
+    Call delta is e^(-qT) N(d1) and put delta is -e^(-qT) N(-d1), so d1 comes
+    straight from the inverse normal CDF and the strike from the d1 definition.
+    """
+    spot, target_delta, days, volatility, is_call = np.broadcast_arrays(
+        np.asarray(spot, dtype=float), np.abs(np.asarray(target_delta, dtype=float)),
+        np.asarray(days, dtype=float), np.asarray(volatility, dtype=float),
+        np.asarray(is_call, dtype=bool),
+    )
+    t = np.maximum(days, 1.0) / DAYS_PER_YEAR
+    scaled = np.clip(target_delta * np.exp(dividend * t), 1e-6, 1.0 - 1e-6)
+    d1 = norm_ppf(np.where(is_call, scaled, 1.0 - scaled))
+    return spot * np.exp(-d1 * volatility * np.sqrt(t) + (rate - dividend + 0.5 * volatility ** 2) * t)
+
+
+def implied_volatility(price, spot, strike, days, is_call=True,
+                       rate: float = RISK_FREE_RATE, dividend: float = 0.0,
+                       tol: float = IV_TOLERANCE, max_iter: int = IV_MAX_ITER) -> np.ndarray:
+    """
+    Solve Black-Scholes implied volatility for every element of the broadcast inputs
+
+    Newton steps on vega run on the whole array at once; any element whose
+    step leaves its bracket (or whose vega vanishes) takes a bisection step
+    instead, so deep ITM/OTM contracts still converge.  Only unconverged
+    elements are re-priced each iteration.
+
+    Returns:
+        IV array; NaN where the price is outside the no-arbitrage bounds or
+        the contract is expired.
+    """
+    price, spot, strike, days, is_call = np.broadcast_arrays(
+        np.asarray(price, dtype=float), np.asarray(spot, dtype=float),
+        np.asarray(strike, dtype=float), np.asarray(days, dtype=float),
+        np.asarray(is_call, dtype=bool),
+    )
+    shape = price.shape
+    price, spot, strike, days, is_call = (a.ravel() for a in (price, spot, strike, days, is_call))
+    t = np.maximum(days, 0.0) / DAYS_PER_YEAR
+
+    forward_spot = spot * np.exp(-dividend * t)
+    disc_strike = strike * np.exp(-rate * t)
+    lower = np.where(is_call, np.maximum(forward_spot - disc_strike, 0.0),
+                     np.maximum(disc_strike - forward_spot, 0.0))
+    upper = np.where(is_call, forward_spot, disc_strike)
+    valid = (t > 0) & (spot > 0) & (strike > 0) & np.isfinite(price) & (price > lower) & (price < upper)
+
+    iv = np.full(price.shape, np.nan)
+    idx = np.flatnonzero(valid)
+    if idx.size == 0:
+        return iv.reshape(shape)
+
+    lo = np.full(idx.size, IV_MIN)
+    hi = np.full(idx.size, IV_MAX)
+    # Brenner-Subrahmanyam starting point, kept inside the bracket
+    sigma = np.clip(price[idx] / spot[idx] * np.sqrt(2.0 * np.pi / t[idx]), 0.05, 2.0)
+
+    for _ in range(max_iter):
+        result = black_scholes(spot[idx], strike[idx], days[idx], sigma, is_call[idx], rate, dividend)
+        diff = result['price'] - price[idx]
+        done = np.abs(diff) < tol
+        iv[idx[done]] = sigma[done]
+        keep = ~done
+        if not keep.any():
+            break
+        idx, sigma, diff, lo, hi = idx[keep], sigma[keep], diff[keep], lo[keep], hi[keep]
+        vega = result['vega'][keep] * 100.0
+
+        # Price is increasing in sigma, so the sign of diff tightens the bracket
+        hi = np.where(diff > 0, sigma, hi)
+        lo = np.where(diff < 0, sigma, lo)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            newton = sigma - diff / vega
+        bisect = 0.5 * (lo + hi)
+        sigma = np.where((vega > 1e-8) & (newton > lo) & (newton < hi), newton, bisect)
+    else:
+        # Out of iterations: accept whatever bracket midpoint/Newton point we reached
+        iv[idx] = sigma
+
+    return iv.reshape(shape)
+
+
+def chain_greeks(spot, strike, days, price, is_call=True, fallback_iv=None,
+                 rate: float = RISK_FREE_RATE, dividend: float = 0.0) -> Dict[str, np.ndarray]:
+    """
+    Implied volatility plus Greeks for every contract of a chain in one pass
+
+    Args:
+        spot: Underlying price
+        strike, days, price, is_call: Per-contract arrays (price is the mid/last quote)
+        fallback_iv: Per-contract IV used where the solver finds none (e.g. the
+            feed's own impliedVolatility); contracts with neither get NaN Greeks
+
+    Returns:
+        Dict of arrays: iv plus everything black_scholes returns
+    """
+    iv = implied_volatility(price, spot, strike, days, is_call, rate, dividend)
+    if fallback_iv is not None:
+        fallback = np.asarray(fallback_iv, dtype=float)
+        iv = np.where(np.isnan(iv) & (fallback > 0), fallback, iv)
+    result = black_scholes(spot, strike, days, np.nan_to_num(iv), is_call, rate, dividend)
+    missing = np.isnan(iv)
+    greeks = {name: np.where(missing, np.nan, values) for name, values in result.items()}
+    greeks['iv'] = iv
+    return greeks
@@ -4,22 +4,88 @@ Provides helpers for options trading strategies including pricing, Greeks calcul
 """
 
 import logging
-import math
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 import random
 
+import numpy as np
+
+from utils.options_pricing import black_scholes, price_chain, strike_for_delta
+
 logger = logging.getLogger(__name__)
 
+DEFAULT_VOLATILITY = 0.25
+
+
+def _contract_premium(contract) -> float:
+    """Mid of a two-sided market, else the last trade"""
+    bid, ask = contract.get('bid') or 0, contract.get('ask') or 0
+    if bid > 0 and ask >= bid:
+        return round((bid + ask) / 2, 2)
+    return round(float(contract.get('last_price') or 0), 2)
+
+
+def _usable_contracts(contracts) -> bool:
+    return any(abs(c.get('delta') or 0.0) > 0 and (c.get('implied_volatility') or 0.0) > 0
+               for c in contracts or ())
+
+
+def common_expiration(option_chain, dte: int) -> Optional[Tuple[str, float]]:
+    """
+    (expiration, days) near ``dte`` listing priced puts and calls, or None
+
+    Uses the same window as WheelStrategy.resolve_contract.
+    """
+    tolerance = max(7, dte * 0.5)
+    window = (dte - tolerance, dte + tolerance)
+    if hasattr(option_chain, 'nearest_expiration'):
+        return option_chain.nearest_expiration(dte, dte=window)
+
+    chain = option_chain or {}
+    days = chain.get('days_to_expiration')
+    if (chain.get('expiration') and days and window[0] <= days <= window[1]
+            and _usable_contracts(chain.get('calls')) and _usable_contracts(chain.get('puts'))):
+        return chain['expiration'], float(days)
+    return None
+
+
+def nearest_delta_contract(option_chain, target_delta: float, is_call: bool,
+                           dte: Optional[Tuple[float, float]] = None,
+                           expiration: Optional[str] = None) -> Optional[Dict]:
+    """
+    Listed contract whose solved |delta| is closest to ``target_delta``
+
+    Columnar chains (OptionChain) are searched across every loaded expiration
+    inside the ``dte`` window (or only ``expiration`` when given);
+    single-expiration dict chains ignore the window.  The result carries its
+    expiration and days_to_expiration.  None without usable Greeks.
+    """
+    if hasattr(option_chain, 'nearest_delta'):
+        return option_chain.nearest_delta(target_delta, is_call, dte=dte, expiration=expiration)
+
+    if expiration and (option_chain or {}).get('expiration') != expiration:
+        return None
+    contracts = (option_chain or {}).get('calls' if is_call else 'puts') or ()
+    if not contracts:
+        return None
+    deltas = np.array([abs(c.get('delta') or 0.0) for c in contracts])
+    ivs = np.array([c.get('implied_volatility') or 0.0 for c in contracts])
+    distance = np.where((deltas > 0) & (ivs > 0), np.abs(deltas - abs(target_delta)), np.inf)
+    best = int(np.argmin(distance))
+    if not np.isfinite(distance[best]):
+        return None
+    return dict(contracts[best], expiration=option_chain.get('expiration'),
+                days_to_expiration=option_chain.get('days_to_expiration'))
+
 
 class OptionsCalculator:
-    """Calculator for options pricing and Greeks"""
+    """Calculator for options pricing and Greeks (Black-Scholes, vectorized)"""
 
     @staticmethod
     def calculate_option_price(stock_price: float, strike: float, days_to_expiration: int,
                                volatility: float = 0.25, is_call: bool = True) -> float:
         """
-        Simplified Black-Scholes option pricing
+        Black-Scholes option pricing
 
         Args:
             stock_price: Current stock price
@@ -32,21 +98,8 @@ class OptionsCalculator:
             Estimated option price
         """
         try:
-            # Simplified pricing model for demonstration
-            # In production, you'd use a proper Black-Scholes implementation
-            time_value = days_to_expiration / 365.0
-
-            if is_call:
-                intrinsic_value = max(0, stock_price - strike)
-            else:
-                intrinsic_value = max(0, strike - stock_price)
-
-            # Time value decreases as expiration approaches
-            time_premium = stock_price * volatility * math.sqrt(time_value)
-
-            option_price = intrinsic_value + time_premium
-
-            return round(option_price, 2)
+            result = black_scholes(stock_price, strike, days_to_expiration, volatility, is_call)
+            return round(float(result['price']), 2)
 
         except Exception as e:
             logger.error(f"Error calculating option price: {e}")
@@ -69,35 +122,38 @@ class OptionsCalculator:
             Delta value between -1 and 1
         """
         try:
-            # Simplified delta calculation
-            moneyness = (stock_price - strike) / stock_price
-            time_factor = math.sqrt(days_to_expiration / 365.0)
-
-            if is_call:
-                # Call delta ranges from 0 to 1
-                if stock_price > strike:
-                    delta = 0.5 + (moneyness * 2)
-                else:
-                    delta = 0.5 - abs(moneyness * 2)
-            else:
-                # Put delta ranges from -1 to 0
-                if stock_price < strike:
-                    delta = -0.5 - abs(moneyness * 2)
-                else:
-                    delta = -0.5 + (moneyness * 2)
-
-            # Clamp delta to valid range
-            if is_call:
-                delta = max(0.05, min(0.95, delta))
-            else:
-                delta = max(-0.95, min(-0.05, delta))
-
-            return round(delta, 2)
+            result = black_scholes(stock_price, strike, days_to_expiration, volatility, is_call)
+            return round(float(result['delta']), 2)
 
         except Exception as e:
             logger.error(f"Error calculating delta: {e}")
             return 0.5 if is_call else -0.5
 
+    @staticmethod
+    def calculate_greeks(stock_price: float, strike: float, days_to_expiration: int,
+                         volatility: float = 0.25, is_call: bool = True) -> Dict[str, float]:
+        """Price, delta, gamma, theta, vega and rho for a single contract"""
+        result = black_scholes(stock_price, strike, days_to_expiration, volatility, is_call)
+        return {name: float(value) for name, value in result.items()}
+
+    @staticmethod
+    def price_chain(stock_price: float, strikes, expirations_dte, volatility=0.25,
+                    is_call=True) -> Dict[str, np.ndarray]:
+        """
+        Price a whole chain in one call
+
+        Args:
+            stock_price: Current stock price
+            strikes: Strike prices
+            expirations_dte: Days to expiration for each expiration date
+            volatility: Scalar IV or a (strikes x expirations) IV grid
+            is_call: True for calls, False for puts
+
+        Returns:
+            Dict of (strikes x expirations) arrays: price, delta, gamma, theta, vega, rho
+        """
+        return price_chain(stock_price, strikes, expirations_dte, volatility, is_call)
+
 
 class WheelStrategy:
     """Implements the Wheel options strategy"""
@@ -105,8 +161,30 @@ class WheelStrategy:
     def __init__(self):
         self.calculator = OptionsCalculator()
 
+    def find_strikes_for_target_delta(self, stock_prices, target_delta: float, dte: int,
+                                      is_call: bool = True,
+                                      volatility=0.25) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Solve the target-delta strike for many underlyings at once
+
+        Args:
+            stock_prices: Current prices, one per underlying
+            target_delta: Target delta (e.g., 0.30 for 30 delta)
+            dte: Days to expiration
+            is_call: True for call, False for put
+            volatility: Scalar IV or one IV per underlying
+
+        Returns:
+            Tuple of (strike array rounded to cents, actual delta array at those strikes)
+        """
+        stock_prices = np.asarray(stock_prices, dtype=float)
+        strikes = np.round(strike_for_delta(stock_prices, target_delta, dte, volatility, is_call), 2)
+        deltas = black_scholes(stock_prices, strikes, dte, volatility, is_call)['delta']
+        return strikes, deltas
+
     def find_strike_for_target_delta(self, stock_price: float, target_delta: float,
-                                     dte: int, is_call: bool = True) -> Tuple[float, float]:
+                                     dte: int, is_call: bool = True,
+                                     volatility: float = 0.25) -> Tuple[float, float]:
         """
         Find strike price that matches target delta
 
@@ -115,43 +193,86 @@ class WheelStrategy:
             target_delta: Target delta (e.g., 0.30 for 30 delta)
             dte: Days to expiration
             is_call: True for call, False for put
+            volatility: Implied volatility
 
         Returns:
             Tuple of (strike_price, actual_delta)
         """
         try:
-            # Start with ATM strike
-            strike_increment = stock_price * 0.01  # 1% increments
-
-            if is_call:
-                # For calls, higher strike = lower delta
-                strike = stock_price
-                for _ in range(20):  # Try up to 20% OTM
-                    delta = self.calculator.calculate_delta(stock_price, strike, dte, is_call=True)
-                    if abs(delta - target_delta) < 0.05:
-                        return round(strike, 2), delta
-                    strike += strike_increment
-            else:
-                # For puts, lower strike = lower delta (less negative)
-                strike = stock_price
-                for _ in range(20):  # Try up to 20% OTM
-                    delta = self.calculator.calculate_delta(stock_price, strike, dte, is_call=False)
-                    if abs(abs(delta) - target_delta) < 0.05:
-                        return round(strike, 2), delta
-                    strike -= strike_increment
-
-            # Default to reasonable OTM strike
-            if is_call:
-                return round(stock_price * 1.05, 2), target_delta
-            else:
-                return round(stock_price * 0.95, 2), -target_delta
+            strikes, deltas = self.find_strikes_for_target_delta(
+                [stock_price], target_delta, dte, is_call=is_call, volatility=volatility
+            )
+            return float(strikes[0]), round(float(deltas[0]), 2)
 
         except Exception as e:
             logger.error(f"Error finding strike for delta: {e}")
             return stock_price, target_delta if is_call else -target_delta
 
+    def resolve_contract(self, stock_price: float, target_delta: float, dte: int,
+                         is_call: bool, option_chain=None,
+                         expiration: Optional[Tuple[str, float]] = None) -> Dict:
+        """
+        Pick the contract to trade at a target delta
+
+        With an option chain listing an expiration close to ``dte``, the
+        contract nearest the target delta is used with its quoted premium and
+        solved IV/delta.  Otherwise the strike is solved from the model, priced
+        at the chain's IV near that delta (or DEFAULT_VOLATILITY without a chain).
+
+        Args:
+            expiration: (expiration, days) from common_expiration; pins the
+                contract (and the model fallback) to that expiration
+
+        Returns:
+            Dict with strike, delta, premium, implied_volatility, dte,
+            expiration_date and source ('chain' or 'model')
+        """
+        if expiration:
+            window = (expiration[1], expiration[1])
+            contract = nearest_delta_contract(option_chain, target_delta, is_call, expiration=expiration[0])
+        else:
+            tolerance = max(7, dte * 0.5)
+            window = (dte - tolerance, dte + tolerance)
+            contract = nearest_delta_contract(option_chain, target_delta, is_call, dte=window)
+        chain_dte = contract.get('days_to_expiration') if contract else None
+        if chain_dte and (expiration or window[0] <= chain_dte <= window[1]):
+            premium = _contract_premium(contract)
+            if premium > 0:
+                return {
+                    'strike': float(contract['strike']),
+                    'delta': round(float(contract['delta']), 2),
+                    'premium': premium,
+                    'implied_volatility': round(float(contract['implied_volatility']), 4),
+                    'dte': max(1, int(round(chain_dte))),
+                    'expiration_date': contract['expiration'],
+                    'source': 'chain',
+                }
+
+        # No listed contract near the target expiry: price the model at the
+        # chain's IV around this delta
+        contract = contract or nearest_delta_contract(option_chain, target_delta, is_call)
+        volatility = float(contract['implied_volatility']) if contract else DEFAULT_VOLATILITY
+        if expiration:
+            dte = max(1, int(round(expiration[1])))
+        strike, delta = self.find_strike_for_target_delta(
+            stock_price, target_delta, dte, is_call=is_call, volatility=volatility
+        )
+        return {
+            'strike': strike,
+            'delta': delta,
+            'premium': self.calculator.calculate_option_price(
+                stock_price, strike, dte, volatility=volatility, is_call=is_call
+            ),
+            'implied_volatility': round(volatility, 4),
+            'dte': dte,
+            'expiration_date': (expiration[0] if expiration
+                                else (datetime.now() + timedelta(days=dte)).strftime('%Y-%m-%d')),
+            'source': 'model',
+        }
+
     def get_cash_secured_put_details(self, symbol: str, stock_price: float,
-                                    target_delta: float = 0.30, dte: int = 30) -> Dict:
+                                    target_delta: float = 0.30, dte: int = 30,
+                                    option_chain=None) -> Dict:
         """
         Generate cash-secured put trade details
 
@@ -160,18 +281,15 @@ class WheelStrategy:
             stock_price: Current stock price
             target_delta: Target delta for the put
             dte: Days to expiration
+            option_chain: Option chain with solved IV/Greeks (from MarketDataProvider)
 
         Returns:
             Dictionary with trade details
         """
         try:
-            strike, actual_delta = self.find_strike_for_target_delta(
-                stock_price, target_delta, dte, is_call=False
-            )
-
-            premium = self.calculator.calculate_option_price(
-                stock_price, strike, dte, is_call=False
-            )
+            contract = self.resolve_contract(stock_price, target_delta, dte, False, option_chain)
+            strike, actual_delta, premium = contract['strike'], contract['delta'], contract['premium']
+            dte = contract['dte']
 
             # Cash requirement is strike * 100 (shares per contract)
             cash_required = strike * 100
@@ -181,16 +299,16 @@ class WheelStrategy:
             return_on_risk = (premium_collected / cash_required) * 100
             annualized_return = (return_on_risk * 365 / dte)
 
-            expiration_date = datetime.now() + timedelta(days=dte)
-
             return {
                 'strategy': 'cash_secured_put',
                 'symbol': symbol,
                 'stock_price': stock_price,
                 'strike': strike,
-                'expiration_date': expiration_date.strftime('%Y-%m-%d'),
+                'expiration_date': contract['expiration_date'],
                 'days_to_expiration': dte,
                 'delta': actual_delta,
+                'implied_volatility': contract['implied_volatility'],
+                'pricing_source': contract['source'],
                 'premium': premium,
                 'premium_collected': premium_collected,
                 'cash_required': cash_required,
@@ -207,7 +325,7 @@ class WheelStrategy:
 
     def get_covered_call_details(self, symbol: str, stock_price: float,
                                 target_delta: float = 0.30, dte: int = 30,
-                                shares_owned: int = 100) -> Dict:
+                                shares_owned: int = 100, option_chain=None) -> Dict:
         """
         Generate covered call trade details
 
@@ -217,18 +335,15 @@ class WheelStrategy:
             target_delta: Target delta for the call
             dte: Days to expiration
             shares_owned: Number of shares owned (must be multiple of 100)
+            option_chain: Option chain with solved IV/Greeks (from MarketDataProvider)
 
         Returns:
             Dictionary with trade details
         """
         try:
-            strike, actual_delta = self.find_strike_for_target_delta(
-                stock_price, target_delta, dte, is_call=True
-            )
-
-            premium = self.calculator.calculate_option_price(
-                stock_price, strike, dte, is_call=True
-            )
+            contract = self.resolve_contract(stock_price, target_delta, dte, True, option_chain)
+            strike, actual_delta, premium = contract['strike'], contract['delta'], contract['premium']
+            dte = contract['dte']
 
             # Calculate returns
             premium_collected = premium * 100
@@ -240,16 +355,16 @@ class WheelStrategy:
             capital_gain = (strike - stock_price) * shares_owned
             total_return = premium_collected + capital_gain
 
-            expiration_date = datetime.now() + timedelta(days=dte)
-
             return {
                 'strategy': 'covered_call',
                 'symbol': symbol,
                 'stock_price': stock_price,
                 'strike': strike,
-                'expiration_date': expiration_date.strftime('%Y-%m-%d'),
+                'expiration_date': contract['expiration_date'],
                 'days_to_expiration': dte,
                 'delta': actual_delta,
+                'implied_volatility': contract['implied_volatility'],
+                'pricing_source': contract['source'],
                 'premium': premium,
                 'premium_collected': premium_collected,
                 'shares_covered': shares_owned,
@@ -276,7 +391,8 @@ class CollarStrategy:
                           shares_owned: int = 100,
                           put_delta: float = 0.20,
                           call_delta: float = 0.30,
-                          dte: int = 30) -> Dict:
+                          dte: int = 30,
+                          option_chain=None) -> Dict:
         """
         Generate collar strategy trade details
 
@@ -292,6 +408,7 @@ class CollarStrategy:
             put_delta: Target delta for protective put
             call_delta: Target delta for covered call
             dte: Days to expiration
+            option_chain: Option chain with solved IV/Greeks (from MarketDataProvider)
 
         Returns:
             Dictionary with collar trade details
@@ -299,24 +416,15 @@ class CollarStrategy:
         try:
             wheel_strategy = WheelStrategy()
 
-            # Find protective put strike (below current price)
-            put_strike, actual_put_delta = wheel_strategy.find_strike_for_target_delta(
-                stock_price, put_delta, dte, is_call=False
-            )
-
-            # Find covered call strike (above current price)
-            call_strike, actual_call_delta = wheel_strategy.find_strike_for_target_delta(
-                stock_price, call_delta, dte, is_call=True
-            )
-
-            # Calculate option premiums
-            put_premium = self.calculator.calculate_option_price(
-                stock_price, put_strike, dte, is_call=False
-            )
-
-            call_premium = self.calculator.calculate_option_price(
-                stock_price, call_strike, dte, is_call=True
-            )
+            # Both legs must share one expiration: pick it first, then resolve the
+            # protective put (below current price) and covered call (above it) in it
+            expiration = common_expiration(option_chain, dte) or (
+                (datetime.now() + timedelta(days=dte)).strftime('%Y-%m-%d'), float(dte))
+            put = wheel_strategy.resolve_contract(stock_price, put_delta, dte, False, option_chain, expiration)
+            call = wheel_strategy.resolve_contract(stock_price, call_delta, dte, True, option_chain, expiration)
+            put_strike, actual_put_delta, put_premium = put['strike'], put['delta'], put['premium']
+            call_strike, actual_call_delta, call_premium = call['strike'], call['delta'], call['premium']
+            dte = put['dte']
 
             # Net cost/credit
             put_cost = put_premium * 100
@@ -330,8 +438,6 @@ class CollarStrategy:
             max_loss = downside_protection + net_cost
             max_gain = upside_capped - net_cost
 
-            expiration_date = datetime.now() + timedelta(days=dte)
-
             return {
                 'strategy': 'collar',
                 'symbol': symbol,
@@ -342,20 +448,25 @@ class CollarStrategy:
                 # Protective put details
                 'put_strike': put_strike,
                 'put_delta': actual_put_delta,
+                'put_iv': put['implied_volatility'],
                 'put_premium': put_premium,
                 'put_cost': put_cost,
+                'put_source': put['source'],
 
                 # Covered call details
                 'call_strike': call_strike,
                 'call_delta': actual_call_delta,
+                'call_iv': call['implied_volatility'],
                 'call_premium': call_premium,
                 'call_credit': call_credit,
+                'call_source': call['source'],
 
                 # Overall collar details
                 'net_cost': net_cost,
                 'net_debit_credit': 'CREDIT' if net_cost < 0 else 'DEBIT',
-                'expiration_date': expiration_date.strftime('%Y-%m-%d'),
+                'expiration_date': put['expiration_date'],
                 'days_to_expiration': dte,
+                'pricing_source': put['source'] if put['source'] == call['source'] else 'mixed',
 
                 # Risk/Reward
                 'downside_protected_at': put_strike,
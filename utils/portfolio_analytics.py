@@ -8,8 +8,13 @@ from app import db
 import numpy as np
 import yfinance as yf
 
+from utils.symbol_universe import get_symbol_universe
+
 logger = logging.getLogger(__name__)
 
+# Rows fetched per round trip when streaming trades for the overview
+OVERVIEW_BATCH_SIZE = 1000
+
 class PortfolioAnalytics:
     """Advanced portfolio analytics and performance tracking"""
     
@@ -24,63 +29,36 @@ class PortfolioAnalytics:
                 end_date = datetime.utcnow()
                 start_date = end_date - timedelta(days=period_days)
                 
-                # Get all trades for the period
-                trades = Trade.query.filter(
+                # Stream column-only rows instead of ORM objects so memory stays
+                # flat; each row's execution_details JSON is parsed exactly once
+                rows = db.session.query(
+                    Trade.strategy,
+                    Trade.provider,
+                    Trade.amount,
+                    Trade.created_at,
+                    Trade.execution_details
+                ).filter(
                     and_(
                         Trade.user_id == user_id,
                         Trade.created_at >= start_date,
                         Trade.status == 'executed'
                     )
-                ).order_by(Trade.created_at.desc()).all()
-                
-                # Calculate performance metrics
-                total_pnl = 0
-                winning_trades = 0
-                losing_trades = 0
-                total_volume = 0
-                strategy_performance = {}
-                provider_performance = {}
-                daily_pnl = {}
-                
-                for trade in trades:
-                    # Extract P&L from execution details
-                    pnl = self._extract_pnl(trade)
-                    total_pnl += pnl
-                    total_volume += trade.amount or 0
-                    
-                    # Track wins/losses
-                    if pnl > 0:
-                        winning_trades += 1
-                    elif pnl < 0:
-                        losing_trades += 1
-                    
-                    # Strategy performance breakdown
-                    strategy = trade.strategy or 'manual'
-                    if strategy not in strategy_performance:
-                        strategy_performance[strategy] = {'trades': 0, 'pnl': 0, 'volume': 0}
-                    strategy_performance[strategy]['trades'] += 1
-                    strategy_performance[strategy]['pnl'] += pnl
-                    strategy_performance[strategy]['volume'] += trade.amount or 0
-                    
-                    # Provider performance breakdown
-                    provider = trade.provider
-                    if provider not in provider_performance:
-                        provider_performance[provider] = {'trades': 0, 'pnl': 0, 'volume': 0}
-                    provider_performance[provider]['trades'] += 1
-                    provider_performance[provider]['pnl'] += pnl
-                    provider_performance[provider]['volume'] += trade.amount or 0
-                    
-                    # Daily P&L tracking
-                    date_key = trade.created_at.strftime('%Y-%m-%d')
-                    if date_key not in daily_pnl:
-                        daily_pnl[date_key] = 0
-                    daily_pnl[date_key] += pnl
-                
+                ).order_by(Trade.created_at.desc()).execution_options(yield_per=OVERVIEW_BATCH_SIZE)
+
+                totals = self._aggregate_trade_rows(rows)
+                total_trades = totals['total_trades']
+                total_pnl = totals['total_pnl']
+                total_volume = totals['total_volume']
+                winning_trades = totals['winning_trades']
+                losing_trades = totals['losing_trades']
+                strategy_performance = totals['strategy_performance']
+                provider_performance = totals['provider_performance']
+                daily_pnl = totals['daily_pnl']
+
                 # Calculate key metrics
-                total_trades = len(trades)
                 win_rate = (winning_trades / total_trades * 100) if total_trades > 0 else 0
-                avg_win = sum(self._extract_pnl(t) for t in trades if self._extract_pnl(t) > 0) / winning_trades if winning_trades > 0 else 0
-                avg_loss = sum(self._extract_pnl(t) for t in trades if self._extract_pnl(t) < 0) / losing_trades if losing_trades > 0 else 0
+                avg_win = totals['gross_profit'] / winning_trades if winning_trades > 0 else 0
+                avg_loss = totals['gross_loss'] / losing_trades if losing_trades > 0 else 0
                 profit_factor = abs(avg_win * winning_trades / (avg_loss * losing_trades)) if losing_trades > 0 and avg_loss != 0 else 0
                 
                 # Calculate Sharpe ratio (simplified)
@@ -307,13 +285,63 @@ class PortfolioAnalytics:
     
     def _extract_pnl(self, trade: Trade) -> float:
         """Extract P&L from trade execution details"""
-        try:
-            if trade.execution_details:
-                details = json.loads(trade.execution_details)
-                return float(details.get('pnl', 0))
+        return self._pnl_from_details(trade.execution_details)
+
+    @staticmethod
+    def _pnl_from_details(execution_details: Optional[str]) -> float:
+        """Parse P&L from an execution_details JSON string (0 when absent)"""
+        # Most executions carry no pnl key; skip the JSON parse for those
+        if not execution_details or '"pnl"' not in execution_details:
             return 0
+        try:
+            return float(json.loads(execution_details).get('pnl', 0))
         except:
             return 0
+
+    def _aggregate_trade_rows(self, rows) -> Dict:
+        """
+        Single pass over (strategy, provider, amount, created_at, execution_details)
+        rows computing totals, win/loss counts and per-strategy, per-provider and
+        daily P&L.  Daily keys keep the order the rows arrive in.
+        """
+        totals = {
+            'total_trades': 0, 'total_pnl': 0, 'total_volume': 0,
+            'winning_trades': 0, 'losing_trades': 0,
+            'gross_profit': 0, 'gross_loss': 0,
+            'strategy_performance': {}, 'provider_performance': {}, 'daily_pnl': {},
+        }
+        strategy_performance = totals['strategy_performance']
+        provider_performance = totals['provider_performance']
+        daily_pnl = totals['daily_pnl']
+
+        for strategy, provider, amount, created_at, execution_details in rows:
+            pnl = self._pnl_from_details(execution_details)
+            amount = amount or 0
+            totals['total_trades'] += 1
+            totals['total_pnl'] += pnl
+            totals['total_volume'] += amount
+
+            # Track wins/losses
+            if pnl > 0:
+                totals['winning_trades'] += 1
+                totals['gross_profit'] += pnl
+            elif pnl < 0:
+                totals['losing_trades'] += 1
+                totals['gross_loss'] += pnl
+
+            for breakdown, key in ((strategy_performance, strategy or 'manual'),
+                                   (provider_performance, provider)):
+                entry = breakdown.get(key)
+                if entry is None:
+                    entry = breakdown[key] = {'trades': 0, 'pnl': 0, 'volume': 0}
+                entry['trades'] += 1
+                entry['pnl'] += pnl
+                entry['volume'] += amount
+
+            date_key = created_at.strftime('%Y-%m-%d')
+            daily_pnl[date_key] = daily_pnl.get(date_key, 0) + pnl
+
+        return totals
     
     def _calculate_sharpe_ratio(self, returns: List[float]) -> float:
         """Calculate Sharpe ratio for returns"""
@@ -347,10 +375,13 @@ class PortfolioAnalytics:
             return 0
 
     def _get_sector(self, symbol: str) -> str:
-        """Get sector for a symbol using yfinance"""
+        """Get sector for a symbol from the symbol universe, falling back to yfinance"""
         try:
             if symbol.endswith('-USD'):
                 return 'Cryptocurrency'
+            sector = get_symbol_universe().sector(symbol)
+            if sector:
+                return sector
             ticker = yf.Ticker(symbol)
             info = ticker.info
             return info.get('sector', 'Other')
@@ -8,6 +8,8 @@ import requests
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 
+from utils.http_pool import get_http_session
+
 logger = logging.getLogger(__name__)
 
 class RealTimeDataFetcher:
@@ -88,7 +90,7 @@ class RealTimeDataFetcher:
                 }
                 
                 # Get accounts
-                response = requests.get(
+                response = get_http_session().get(
                     'https://api.coinbase.com/v2/accounts',
                     headers=headers,
                     timeout=10
@@ -223,7 +225,7 @@ class RealTimeDataFetcher:
         Coinbase we now query Coinbase's public price endpoint directly.
         """
         try:
-            response = requests.get(
+            response = get_http_session().get(
                 f"https://api.coinbase.com/v2/prices/{currency}-USD/spot",
                 timeout=5,
             )
@@ -250,7 +252,7 @@ class RealTimeDataFetcher:
                     try:
                         # Use Alpha Vantage or similar for real-time stock data
                         # For now, using a simple quote endpoint
-                        response = requests.get(
+                        response = get_http_session().get(
                             f'https://query1.finance.yahoo.com/v8/finance/quote?symbols={symbol}',
                             timeout=5
                         )
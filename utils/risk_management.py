@@ -1,8 +1,17 @@
 import logging
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 import json
 
+import numpy as np
+
+from utils.stop_engine import notify_trade_changed
+
+STOP_QUOTE_WORKERS = int(os.environ.get('STOP_QUOTE_WORKERS', '8'))
+
 class RiskManager:
     """Advanced risk management system for trading operations with stop-loss enforcement"""
 
@@ -317,6 +326,7 @@ class RiskManager:
 
                     if self.db:
                         self.db.session.commit()
+                    notify_trade_changed(trade)
 
                     self.logger.info(f"Placed stop-loss order {stop_order_id} for trade {trade_id} at ${stop_price}")
                     return True, f"Stop-loss order placed at ${stop_price}", stop_order_id
@@ -336,14 +346,48 @@ class RiskManager:
             self.logger.error(f"Error placing stop-loss order: {str(e)}")
             return False, f"Stop-loss placement error: {str(e)}", None
 
-    def monitor_stop_losses(self, user_id: int, api_client) -> Dict:
+    def monitor_stop_losses(self, user_id: int, api_client,
+                            skip_symbols: Optional[set] = None) -> Dict:
         """
         Monitor all open positions and enforce stop-losses
         CRITICAL: This should be called periodically (e.g., every minute via Celery task)
 
+        Polling is the fallback to the event-driven StopLossEngine: symbols the
+        stream has ticked recently are passed in ``skip_symbols`` and left to it.
+
         Args:
             user_id: User ID to monitor positions for
             api_client: Broker API client
+            skip_symbols: Symbols currently covered by streamed ticks
+
+        Returns:
+            Dict with monitoring results and actions taken
+        """
+        return self.monitor_stop_losses_batch({user_id: api_client}, skip_symbols=skip_symbols)
+
+    def _quote_prices(self, api_client, symbols: List[str]) -> Dict[str, float]:
+        """Mark prices for many symbols from one broker quote request."""
+        market_data = api_client.get_market_data(symbols) or {}
+        prices = {}
+        for symbol in symbols:
+            entry = market_data.get(symbol) or {}
+            price = entry.get('mark') or (entry.get('quote') or {}).get('mark')
+            if price:
+                prices[symbol] = float(price)
+        return prices
+
+    def monitor_stop_losses_batch(self, api_clients: Dict[int, object],
+                                  skip_symbols: Optional[set] = None) -> Dict:
+        """
+        Batched polling pass over every user's stop-protected positions
+
+        Loads all open stop-loss trades in one query, issues one multi-symbol
+        quote request per broker credential (in parallel), then evaluates every
+        trigger at once with array comparisons before closing crossed positions.
+
+        Args:
+            api_clients: Broker API client per user ID
+            skip_symbols: Symbols currently covered by streamed ticks
 
         Returns:
             Dict with monitoring results and actions taken
@@ -351,65 +395,94 @@ class RiskManager:
         try:
             from models import Trade
 
+            if not api_clients:
+                return {'trades_monitored': 0, 'trades_streamed': 0, 'quote_requests': 0,
+                        'stop_losses_triggered': 0, 'positions_closed': 0, 'errors': [],
+                        'timestamp': datetime.utcnow().isoformat()}
+
             # Get all open positions with stop losses
             open_trades = Trade.query.filter(
-                Trade.user_id == user_id,
+                Trade.user_id.in_(list(api_clients)),
                 Trade.status == 'executed',
                 Trade.stop_loss_price.isnot(None)
             ).all()
 
+            skip_symbols = {s.upper() for s in (skip_symbols or ())}
+            streamed = [t for t in open_trades if t.symbol.upper() in skip_symbols]
+            open_trades = [t for t in open_trades if t.symbol.upper() not in skip_symbols]
+
             results = {
                 'trades_monitored': len(open_trades),
+                'trades_streamed': len(streamed),
+                'quote_requests': 0,
                 'stop_losses_triggered': 0,
                 'positions_closed': 0,
                 'errors': [],
                 'timestamp': datetime.utcnow().isoformat()
             }
 
-            for trade in open_trades:
+            # Group by user credential: one quote request covers all of a user's
+            # accounts and each symbol only once
+            trades = [t for t in open_trades if t.provider == 'schwab']  # Skip non-Schwab for now
+            symbols_by_user = defaultdict(set)
+            for trade in trades:
+                symbols_by_user[trade.user_id].add(trade.symbol)
+            if not symbols_by_user:
+                return results
+
+            prices_by_user = {}
+            workers = min(STOP_QUOTE_WORKERS, len(symbols_by_user))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='stop-quotes') as pool:
+                futures = {
+                    user_id: pool.submit(self._quote_prices, api_clients[user_id], sorted(symbols))
+                    for user_id, symbols in symbols_by_user.items()
+                }
+                for user_id, future in futures.items():
+                    try:
+                        prices_by_user[user_id] = future.result()
+                    except Exception as e:
+                        self.logger.error(f"Error fetching stop-loss quotes for user {user_id}: {str(e)}")
+                        results['errors'].append({'user_id': user_id, 'error': str(e)})
+                        prices_by_user[user_id] = {}
+            results['quote_requests'] = len(futures)
+
+            # Evaluate every trigger at once; missing quotes are NaN and never trigger
+            current = np.array([prices_by_user[t.user_id].get(t.symbol, np.nan) for t in trades])
+            stops = np.array([t.stop_loss_price for t in trades], dtype=float)
+            is_long = np.array([t.side == 'buy' for t in trades])
+            triggered = np.where(is_long, current <= stops, current >= stops)
+
+            missing = sorted({t.symbol for t, px in zip(trades, current) if np.isnan(px)})
+            if missing:
+                self.logger.warning(f"Could not get market price for {', '.join(missing)}")
+
+            for i in np.flatnonzero(triggered):
+                trade = trades[i]
+                current_price = float(current[i])
                 try:
-                    # Get current market price
-                    if trade.provider == 'schwab':
-                        market_data = api_client.get_market_data([trade.symbol])
-                        if market_data and trade.symbol in market_data:
-                            current_price = market_data[trade.symbol].get('mark', 0)
-                        else:
-                            self.logger.warning(f"Could not get market price for {trade.symbol}")
-                            continue
-                    else:
-                        continue  # Skip non-Schwab for now
-
-                    # Check if stop loss is breached
-                    stop_triggered = False
-                    if trade.side == 'buy' and current_price <= trade.stop_loss_price:
-                        stop_triggered = True
-                    elif trade.side == 'sell' and current_price >= trade.stop_loss_price:
-                        stop_triggered = True
-
-                    if stop_triggered:
-                        self.logger.warning(
-                            f"Stop loss triggered for trade {trade.id}: {trade.symbol} "
-                            f"current=${current_price} stop=${trade.stop_loss_price}"
+                    self.logger.warning(
+                        f"Stop loss triggered for trade {trade.id}: {trade.symbol} "
+                        f"current=${current_price} stop=${trade.stop_loss_price}"
+                    )
+                    results['stop_losses_triggered'] += 1
+
+                    # Force close the position
+                    close_success, close_msg = self.force_close_position(trade.id, api_clients[trade.user_id],
+                                                                         reason='stop_loss_triggered')
+                    if close_success:
+                        results['positions_closed'] += 1
+                        self.log_risk_event(
+                            trade.user_id,
+                            'STOP_LOSS_EXECUTED',
+                            f"Position {trade.symbol} closed at ${current_price} (stop: ${trade.stop_loss_price})",
+                            severity='warning'
                         )
-                        results['stop_losses_triggered'] += 1
-
-                        # Force close the position
-                        close_success, close_msg = self.force_close_position(trade.id, api_client,
-                                                                             reason='stop_loss_triggered')
-                        if close_success:
-                            results['positions_closed'] += 1
-                            self.log_risk_event(
-                                user_id,
-                                'STOP_LOSS_EXECUTED',
-                                f"Position {trade.symbol} closed at ${current_price} (stop: ${trade.stop_loss_price})",
-                                severity='warning'
-                            )
-                        else:
-                            results['errors'].append({
-                                'trade_id': trade.id,
-                                'symbol': trade.symbol,
-                                'error': close_msg
-                            })
+                    else:
+                        results['errors'].append({
+                            'trade_id': trade.id,
+                            'symbol': trade.symbol,
+                            'error': close_msg
+                        })
 
                 except Exception as e:
                     self.logger.error(f"Error monitoring trade {trade.id}: {str(e)}")
@@ -489,6 +562,7 @@ class RiskManager:
 
                     if self.db:
                         self.db.session.commit()
+                    notify_trade_changed(trade)
 
                     self.logger.info(f"Successfully closed position for trade {trade_id} (reason: {reason})")
                     return True, f"Position closed successfully (reason: {reason})"
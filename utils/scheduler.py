@@ -140,7 +140,7 @@ class TaskScheduler:
             from utils.coinbase_connector import CoinbaseConnector
             from utils.schwab_connector import SchwabConnector
             from utils.openai_trader import OpenAITrader
-            from utils.encryption import decrypt_credentials
+            from utils.encryption import decrypt_credential
             
             # Get all active API credentials
             credentials = APICredential.query.filter_by(is_active=True).all()
@@ -149,7 +149,7 @@ class TaskScheduler:
             for cred in credentials:
                 try:
                     # Decrypt credentials
-                    decrypted_creds = decrypt_credentials(cred.encrypted_credentials)
+                    decrypted_creds = decrypt_credential(cred)
                     
                     # Test connection based on provider
                     if cred.provider == 'coinbase':
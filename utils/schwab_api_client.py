@@ -11,6 +11,8 @@ from datetime import datetime, timedelta
 from typing import Dict, Optional, Any, List
 from urllib.parse import urlencode
 
+from utils.http_pool import get_http_session
+
 logger = logging.getLogger(__name__)
 
 class SchwabAPIClient:
@@ -107,7 +109,7 @@ class SchwabAPIClient:
         logger.debug(f"Request headers: {dict((k, v if k != 'Authorization' else 'Bearer ***') for k, v in request_headers.items())}")
         
         try:
-            response = requests.request(
+            response = get_http_session().request(
                 method=method,
                 url=url,
                 headers=request_headers,
@@ -9,26 +9,9 @@ from datetime import datetime, timedelta
 from flask import session, url_for
 from urllib.parse import urlencode
 
-logger = logging.getLogger(__name__)
+from utils.http_pool import get_http_session  # re-exported for existing callers
 
-# Shared HTTP session for connection pooling
-_http_session = None
-
-def get_http_session():
-    """Get or create shared HTTP session with connection pooling"""
-    global _http_session
-    if _http_session is None:
-        _http_session = requests.Session()
-        # Configure connection pooling
-        adapter = requests.adapters.HTTPAdapter(
-            pool_connections=10,
-            pool_maxsize=20,
-            max_retries=3,
-            pool_block=False
-        )
-        _http_session.mount('http://', adapter)
-        _http_session.mount('https://', adapter)
-    return _http_session
+logger = logging.getLogger(__name__)
 
 class SchwabOAuth:
     """Schwab OAuth2 integration for secure authentication - Multi-user compatible"""
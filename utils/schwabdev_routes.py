@@ -939,6 +939,14 @@ def start_streaming():
         preferred_library = data.get('library', 'schwabdev')
 
         service = get_streaming_service(current_user.id, preferred_library)
+
+        # Route level-one ticks into the stop engine so stops fire on the stream
+        try:
+            from utils.stop_engine import get_stop_engine
+            get_stop_engine().attach_schwab(service)
+        except Exception as e:
+            logger.error(f"Could not attach stop engine to stream: {e}")
+
         result = service.start()
 
         return jsonify(result)
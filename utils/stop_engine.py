@@ -0,0 +1,426 @@
+"""
+Event-Driven Stop Engine - closes positions the moment a streamed tick crosses
+their stop-loss or take-profit level.
+
+Active triggers live in an in-memory price-level index.  Per symbol there are
+two ladders sorted by level: one for levels that fire on a falling price (long
+stops, short take-profits) and one for levels that fire on a rising price
+(long take-profits, short stops), so each tick finds every crossed level with
+a single bisect.  Ticks come from SchwabStreamingService (LEVELONE_EQUITIES),
+and only Schwab positions are armed since that is the only broker with a close
+path; the 60s polling task stays as a fallback and skips symbols the stream
+has covered recently.
+"""
+
+import bisect
+import contextlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from flask import current_app, has_app_context
+
+logger = logging.getLogger(__name__)
+
+STOP_ENGINE_WORKERS = int(os.environ.get("STOP_ENGINE_WORKERS", "4"))
+STOP_ENGINE_RESYNC_SECONDS = float(os.environ.get("STOP_ENGINE_RESYNC_SECONDS", "30"))
+STOP_STREAM_FRESH_SECONDS = float(os.environ.get("STOP_STREAM_FRESH_SECONDS", "15"))
+
+STOP_LOSS = "stop_loss"
+TAKE_PROFIT = "take_profit"
+
+HEARTBEAT_PREFIX = "stop_engine_tick:"
+
+# Providers RiskManager.force_close_position can close; other trades are never armed
+CLOSABLE_PROVIDERS = frozenset({'schwab'})
+
+
+@dataclass(frozen=True)
+class StopTrigger:
+    """One armed price level for an open trade."""
+    trade_id: int
+    user_id: int
+    provider: str
+    symbol: str
+    level: float
+    kind: str  # STOP_LOSS or TAKE_PROFIT
+
+    @property
+    def reason(self) -> str:
+        return f"{self.kind}_triggered"
+
+
+class _Ladder:
+    """Triggers sorted by level, with the levels kept in a parallel list for bisect."""
+
+    __slots__ = ("levels", "triggers")
+
+    def __init__(self):
+        self.levels: List[float] = []
+        self.triggers: List[StopTrigger] = []
+
+    def __len__(self):
+        return len(self.levels)
+
+    def insert(self, trigger: StopTrigger) -> None:
+        i = bisect.bisect_right(self.levels, trigger.level)
+        self.levels.insert(i, trigger.level)
+        self.triggers.insert(i, trigger)
+
+    def remove(self, trigger: StopTrigger) -> None:
+        lo = bisect.bisect_left(self.levels, trigger.level)
+        hi = bisect.bisect_right(self.levels, trigger.level, lo=lo)
+        for i in range(lo, hi):
+            if self.triggers[i] == trigger:
+                del self.levels[i]
+                del self.triggers[i]
+                return
+
+    def pop_at_or_above(self, price: float) -> List[StopTrigger]:
+        i = bisect.bisect_left(self.levels, price)
+        fired = self.triggers[i:]
+        del self.levels[i:], self.triggers[i:]
+        return fired
+
+    def pop_at_or_below(self, price: float) -> List[StopTrigger]:
+        i = bisect.bisect_right(self.levels, price)
+        fired = self.triggers[:i]
+        del self.levels[:i], self.triggers[:i]
+        return fired
+
+
+def _triggers_for(trade) -> List[StopTrigger]:
+    if trade.provider not in CLOSABLE_PROVIDERS:
+        return []
+    triggers = []
+    for kind, level in ((STOP_LOSS, trade.stop_loss_price), (TAKE_PROFIT, trade.take_profit_price)):
+        if level:
+            triggers.append(StopTrigger(trade.id, trade.user_id, trade.provider,
+                                        trade.symbol.upper(), float(level), kind))
+    return triggers
+
+
+def _falls_on_cross(trigger: StopTrigger, side: str) -> bool:
+    """True when the level fires on a falling price (price <= level)."""
+    is_long = side == 'buy'
+    return is_long if trigger.kind == STOP_LOSS else not is_long
+
+
+_schwab_clients: Dict[int, tuple] = {}
+_schwab_clients_lock = threading.Lock()
+
+
+def schwab_client_for_credential(cred):
+    """Schwab client for an APICredential, reused until the stored credentials change.
+
+    Clients are keyed by credential ID and rebuilt (and the blob decrypted)
+    only when the encrypted payload differs, e.g. after a token refresh.
+    """
+    from utils.encryption import decrypt_credentials
+    from utils.schwab_api import SchwabAPIClient
+
+    with _schwab_clients_lock:
+        cached = _schwab_clients.get(cred.id)
+    if cached and cached[0] == cred.encrypted_credentials:
+        return cached[1]
+
+    access_token = decrypt_credentials(cred.encrypted_credentials).get('access_token')
+    client = SchwabAPIClient(access_token=access_token) if access_token else None
+    with _schwab_clients_lock:
+        _schwab_clients[cred.id] = (cred.encrypted_credentials, client)
+    return client
+
+
+def schwab_client_for_user(user_id: int, provider: str):
+    """Build a broker client for closing a user's position (Schwab only, like force_close_position)."""
+    if provider not in CLOSABLE_PROVIDERS:
+        return None
+    from models import APICredential
+
+    cred = APICredential.query.filter_by(user_id=user_id, provider='schwab', is_active=True).first()
+    return schwab_client_for_credential(cred) if cred else None
+
+
+class StopLossEngine:
+    """Process-wide index of armed stop-loss / take-profit levels fed by market ticks.
+
+    A crossed trigger is removed from the index together with its sibling level
+    for the same trade, and the close is handed to a small executor so the
+    streaming thread is never blocked on a broker round trip. Trades with a
+    close in flight are never re-armed (a resync still sees them as
+    'executed'), so one crossing can't send two closing orders.
+    """
+
+    def __init__(self, close_position: Optional[Callable] = None,
+                 client_factory: Optional[Callable] = None,
+                 heartbeat=None, workers: int = STOP_ENGINE_WORKERS,
+                 resync_seconds: float = STOP_ENGINE_RESYNC_SECONDS):
+        self._close_position = close_position or self._force_close
+        self._client_factory = client_factory or schwab_client_for_user
+        self._heartbeat = heartbeat
+        self._resync_seconds = resync_seconds
+        self._falls: Dict[str, _Ladder] = {}
+        self._rises: Dict[str, _Ladder] = {}
+        self._by_trade: Dict[int, List[StopTrigger]] = {}
+        self._sides: Dict[int, str] = {}
+        self._closing: Set[int] = set()
+        self._last_tick: Dict[str, float] = {}
+        self._last_published: Dict[str, float] = {}
+        self._attached: Set[int] = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='stop-engine')
+        self._app = None
+        self._last_sync = 0.0
+        self._syncing = False
+        self.stats = {"ticks": 0, "fired": 0, "closed": 0, "failed": 0}
+
+    # ------------------------------------------------------------------
+    # Index maintenance
+    # ------------------------------------------------------------------
+    def _ladder(self, book: Dict[str, _Ladder], symbol: str) -> _Ladder:
+        ladder = book.get(symbol)
+        if ladder is None:
+            ladder = book[symbol] = _Ladder()
+        return ladder
+
+    def _discard(self, trade_id: int) -> None:
+        for trigger in self._by_trade.pop(trade_id, []):
+            falls = _falls_on_cross(trigger, self._sides.get(trade_id))
+            ladder = (self._falls if falls else self._rises).get(trigger.symbol)
+            if ladder is not None:
+                ladder.remove(trigger)
+        self._sides.pop(trade_id, None)
+
+    def _arm(self, trade) -> None:
+        if trade.id in self._closing:
+            return
+        triggers = _triggers_for(trade)
+        if not triggers:
+            return
+        self._by_trade[trade.id] = triggers
+        self._sides[trade.id] = trade.side
+        for trigger in triggers:
+            book = self._falls if _falls_on_cross(trigger, trade.side) else self._rises
+            self._ladder(book, trigger.symbol).insert(trigger)
+
+    def add_trade(self, trade) -> None:
+        """Arm (or re-arm) the stop-loss / take-profit levels of an open trade."""
+        with self._lock:
+            self._discard(trade.id)
+            if trade.status == 'executed':
+                self._arm(trade)
+
+    def remove_trade(self, trade_id: int) -> None:
+        with self._lock:
+            self._discard(trade_id)
+
+    def sync(self, user_id: Optional[int] = None) -> int:
+        """Rebuild the index from open trades (all users, or one user's trades)."""
+        from models import Trade
+
+        if has_app_context():
+            self._app = current_app._get_current_object()
+        query = Trade.query.filter(
+            Trade.status == 'executed',
+            Trade.provider.in_(CLOSABLE_PROVIDERS),
+            (Trade.stop_loss_price.isnot(None)) | (Trade.take_profit_price.isnot(None)),
+        )
+        if user_id is not None:
+            query = query.filter(Trade.user_id == user_id)
+        trades = query.all()
+
+        with self._lock:
+            stale = [tid for tid, triggers in self._by_trade.items()
+                     if user_id is None or triggers[0].user_id == user_id]
+            for trade_id in stale:
+                self._discard(trade_id)
+            for trade in trades:
+                self._arm(trade)
+            if user_id is None:
+                self._last_sync = time.time()
+        logger.info(f"Stop engine armed {len(trades)} trades" + (f" for user {user_id}" if user_id else ""))
+        return len(trades)
+
+    def symbols(self, user_id: Optional[int] = None) -> List[str]:
+        with self._lock:
+            return sorted({t.symbol for triggers in self._by_trade.values() for t in triggers
+                           if user_id is None or t.user_id == user_id})
+
+    # ------------------------------------------------------------------
+    # Tick handling
+    # ------------------------------------------------------------------
+    def on_tick(self, symbol: str, price: float, ts: Optional[float] = None) -> List[StopTrigger]:
+        """Fire every trigger the price has crossed; returns the triggers fired."""
+        if not symbol or not price or price <= 0:
+            return []
+        symbol = symbol.upper()
+        now = time.time() if ts is None else ts
+        with self._lock:
+            self.stats["ticks"] += 1
+            self._last_tick[symbol] = now
+            fired = []
+            falls = self._falls.get(symbol)
+            if falls:
+                fired.extend(falls.pop_at_or_above(price))
+            rises = self._rises.get(symbol)
+            if rises:
+                fired.extend(rises.pop_at_or_below(price))
+            # A closed position must not fire again on its sibling level
+            for trigger in fired:
+                self._discard(trigger.trade_id)
+                self._closing.add(trigger.trade_id)
+            self.stats["fired"] += len(fired)
+
+        for trigger in fired:
+            logger.warning(
+                f"{trigger.kind} crossed for trade {trigger.trade_id}: {symbol} "
+                f"tick=${price} level=${trigger.level}"
+            )
+            self._executor.submit(self._execute, trigger, price)
+
+        self._publish_heartbeat(symbol, now)
+        self._maybe_resync(now)
+        return fired
+
+    def _execute(self, trigger: StopTrigger, price: float):
+        context = self._app.app_context() if self._app is not None else contextlib.nullcontext()
+        success, message = False, 'close interrupted'
+        try:
+            with context:
+                client = self._client_factory(trigger.user_id, trigger.provider)
+                success, message = self._close_position(trigger.trade_id, client, trigger.reason)
+        except Exception as e:
+            success, message = False, str(e)
+        finally:
+            # A failed close becomes armable again on the next resync
+            with self._lock:
+                self._closing.discard(trigger.trade_id)
+                self.stats["closed" if success else "failed"] += 1
+        if not success:
+            # The polling task retries anything still open on its next pass
+            logger.error(f"Stop engine could not close trade {trigger.trade_id}: {message}")
+        return success, message
+
+    @staticmethod
+    def _force_close(trade_id: int, api_client, reason: str):
+        from app import db
+        from utils.risk_management import RiskManager
+
+        return RiskManager(db=db).force_close_position(trade_id, api_client, reason=reason)
+
+    def _maybe_resync(self, now: float) -> None:
+        """Pick up trades opened or edited elsewhere (other processes, direct DB edits)."""
+        if self._app is None or not self._resync_seconds or self._syncing:
+            return
+        if now - self._last_sync < self._resync_seconds:
+            return
+        self._syncing = True
+
+        def _resync():
+            try:
+                with self._app.app_context():
+                    self.sync()
+            except Exception as e:
+                logger.error(f"Stop engine resync failed: {e}")
+            finally:
+                self._syncing = False
+
+        self._executor.submit(_resync)
+
+    # ------------------------------------------------------------------
+    # Stream coverage (lets the polling fallback skip streamed symbols)
+    # ------------------------------------------------------------------
+    def _heartbeat_store(self):
+        if self._heartbeat is None:
+            try:
+                from app import cache
+                self._heartbeat = cache
+            except Exception:
+                self._heartbeat = False
+        return self._heartbeat or None
+
+    def _publish_heartbeat(self, symbol: str, now: float) -> None:
+        # Throttled to one write per symbol per second
+        if now - self._last_published.get(symbol, 0.0) < 1.0:
+            return
+        self._last_published[symbol] = now
+        store = self._heartbeat_store()
+        if store is None:
+            return
+        try:
+            store.set(HEARTBEAT_PREFIX + symbol, now, timeout=int(STOP_STREAM_FRESH_SECONDS * 4))
+        except Exception as e:
+            logger.debug(f"Stop engine heartbeat write error: {e}")
+
+    def streamed_symbols(self, symbols: Iterable[str],
+                         max_age: float = STOP_STREAM_FRESH_SECONDS) -> Set[str]:
+        """Symbols that received a tick in the last ``max_age`` seconds, in any process."""
+        symbols = [s.upper() for s in symbols]
+        cutoff = time.time() - max_age
+        with self._lock:
+            fresh = {s for s in symbols if self._last_tick.get(s, 0.0) >= cutoff}
+        remaining = [s for s in symbols if s not in fresh]
+        store = self._heartbeat_store()
+        if remaining and store is not None:
+            try:
+                values = store.get_many(*[HEARTBEAT_PREFIX + s for s in remaining])
+                fresh.update(s for s, ts in zip(remaining, values) if ts and ts >= cutoff)
+            except Exception as e:
+                logger.debug(f"Stop engine heartbeat read error: {e}")
+        return fresh
+
+    # ------------------------------------------------------------------
+    # Stream adapters
+    # ------------------------------------------------------------------
+    def handle_schwab_level_one(self, data: Dict[str, Any]) -> None:
+        """Handler for SchwabStreamingService.LEVEL_ONE_EQUITY messages.
+
+        Accepts both a schwab-py message (``content`` list with named fields)
+        and a single schwabdev content item (numeric field keys, "3" = last).
+        """
+        items = data.get('content', [data]) if isinstance(data, dict) else []
+        for item in items:
+            symbol = item.get('key') or item.get('SYMBOL')
+            price = item.get('LAST_PRICE') or item.get('3') or item.get('MARK')
+            if symbol and price:
+                self.on_tick(symbol, float(price))
+
+    def attach_schwab(self, service) -> Dict[str, Any]:
+        """Feed a user's Schwab stream into the engine and subscribe their protected symbols."""
+        self.sync(service.user_id)
+        if id(service) not in self._attached:
+            service.add_handler(service.LEVEL_ONE_EQUITY, self.handle_schwab_level_one)
+            self._attached.add(id(service))
+
+        symbols = self.symbols(service.user_id)
+        if symbols:
+            current = service.get_status()['subscriptions'].get(service.LEVEL_ONE_EQUITY, {})
+            service.subscribe_level_one_equity(sorted(set(current.get('symbols', [])) | set(symbols)))
+        return {'success': True, 'symbols': symbols}
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+
+_engine: Optional[StopLossEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_stop_engine() -> StopLossEngine:
+    """Process-wide stop engine shared by every streaming service."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = StopLossEngine()
+    return _engine
+
+
+def notify_trade_changed(trade) -> None:
+    """Keep an already running engine in step with stop/close changes made in this process."""
+    if _engine is not None:
+        _engine.add_trade(trade)
@@ -0,0 +1,162 @@
+"""
+Symbol Universe Index
+Loads the deduplicated listing file (symbol, name, sector, type) once per
+process and answers typeahead queries from in-memory indexes: a sorted symbol
+list and sorted name-word list for prefix lookups via bisect, plus a trigram
+index for fuzzy matches.
+"""
+
+import bisect
+import csv
+import logging
+import os
+import re
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SYMBOL_UNIVERSE_PATH = os.environ.get(
+    'SYMBOL_UNIVERSE_PATH',
+    os.path.join(os.path.dirname(__file__), 'data', 'symbol_universe.csv')
+)
+# Fuzzy matches must share at least this fraction of the query's trigrams
+FUZZY_MIN_SIMILARITY = 0.4
+
+# Rank buckets, best first
+EXACT, SYMBOL_PREFIX, NAME_PREFIX, FUZZY = range(4)
+
+_WORD_RE = re.compile(r'[a-z0-9]+')
+
+
+def _trigrams(text: str) -> set:
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _prefix_range(keys: List[str], prefix: str) -> range:
+    start = bisect.bisect_left(keys, prefix)
+    end = bisect.bisect_left(keys, prefix + '￿', lo=start)
+    return range(start, end)
+
+
+class SymbolUniverse:
+    """Immutable in-memory index over the listing file"""
+
+    def __init__(self, records: Iterable[Dict[str, str]]):
+        self._records: Dict[str, Dict[str, str]] = {}
+        for record in records:
+            symbol = (record.get('symbol') or '').upper().strip()
+            if symbol and symbol not in self._records:
+                self._records[symbol] = {
+                    'symbol': symbol,
+                    'name': (record.get('name') or symbol).strip(),
+                    'sector': (record.get('sector') or 'Other').strip(),
+                    'type': (record.get('type') or 'Stock').strip(),
+                }
+
+        self._sorted_symbols = sorted(self._records)
+        name_words = []
+        self._trigram_index: Dict[str, set] = defaultdict(set)
+        for symbol, record in self._records.items():
+            name = record['name'].lower()
+            for word in set(_WORD_RE.findall(name)):
+                name_words.append((word, symbol))
+            for gram in _trigrams(symbol.lower()) | _trigrams(name):
+                self._trigram_index[gram].add(symbol)
+        name_words.sort()
+        self._name_words = [word for word, _ in name_words]
+        self._name_word_symbols = [symbol for _, symbol in name_words]
+
+    @classmethod
+    def from_csv(cls, path: str) -> 'SymbolUniverse':
+        with open(path, newline='', encoding='utf-8') as handle:
+            universe = cls(csv.DictReader(handle))
+        logger.info(f"Loaded symbol universe: {len(universe)} symbols from {path}")
+        return universe
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol.upper().strip() in self._records
+
+    @property
+    def symbols(self) -> List[str]:
+        """All symbols in listing-file order"""
+        return list(self._records)
+
+    def get(self, symbol: str) -> Optional[Dict[str, str]]:
+        record = self._records.get(symbol.upper().strip())
+        return dict(record) if record else None
+
+    def sector(self, symbol: str) -> Optional[str]:
+        record = self._records.get(symbol.upper().strip())
+        return record['sector'] if record else None
+
+    def search(self, query: str, limit: int = 10, fuzzy: bool = True) -> List[Dict[str, Any]]:
+        """
+        Ranked typeahead matches for a symbol or company-name query
+
+        Exact symbol, then symbol prefix (shorter first), then company-name
+        word prefix, then trigram similarity for misspellings.
+        """
+        query = (query or '').strip()
+        if not query or limit <= 0:
+            return []
+        upper, lower = query.upper(), query.lower()
+        ranked: Dict[str, tuple] = {}
+
+        def consider(symbol, bucket, score):
+            key = (bucket, score, symbol)
+            if symbol not in ranked or key < ranked[symbol]:
+                ranked[symbol] = key
+
+        if upper in self._records:
+            consider(upper, EXACT, 0)
+        for i in _prefix_range(self._sorted_symbols, upper):
+            symbol = self._sorted_symbols[i]
+            consider(symbol, SYMBOL_PREFIX, len(symbol))
+
+        words = _WORD_RE.findall(lower)
+        if words:
+            # Every query word must prefix some word of the name
+            matches = None
+            for word in words:
+                hits = {self._name_word_symbols[i] for i in _prefix_range(self._name_words, word)}
+                matches = hits if matches is None else matches & hits
+            for symbol in matches or ():
+                consider(symbol, NAME_PREFIX, len(self._records[symbol]['name']))
+
+        if fuzzy and len(ranked) < limit and len(lower) >= 3:
+            grams = _trigrams(lower)
+            counts: Dict[str, int] = defaultdict(int)
+            for gram in grams:
+                for symbol in self._trigram_index.get(gram, ()):
+                    counts[symbol] += 1
+            for symbol, count in counts.items():
+                similarity = count / len(grams)
+                if similarity >= FUZZY_MIN_SIMILARITY:
+                    consider(symbol, FUZZY, -similarity)
+
+        ordered = sorted(ranked.values())[:limit]
+        return [dict(self._records[symbol], match=bucket) for bucket, _, symbol in ordered]
+
+
+_universe: Optional[SymbolUniverse] = None
+_universe_lock = threading.Lock()
+
+
+def get_symbol_universe() -> SymbolUniverse:
+    """Process-wide universe, built on first use"""
+    global _universe
+    if _universe is None:
+        with _universe_lock:
+            if _universe is None:
+                try:
+                    _universe = SymbolUniverse.from_csv(SYMBOL_UNIVERSE_PATH)
+                except OSError as e:
+                    logger.error(f"Could not load symbol universe from {SYMBOL_UNIVERSE_PATH}: {str(e)}")
+                    _universe = SymbolUniverse([])
+    return _universe
@@ -7,18 +7,27 @@ Handles automatic token refresh with:
 - Token rotation: if the provider returns a new refresh_token, it is persisted
   immediately to avoid stale-token failures (critical for Coinbase).
 - API keys are never refreshed or deactivated.
+- The maintenance sweep orders tokens by expiry and refreshes only those
+  inside the refresh window, concurrently per provider, committing each
+  provider's results as soon as its refreshes finish.
 
 NEVER sets is_active=False on a credential — the record must remain visible so
 the UI can show a "Reconnect" CTA with the exact provider error.
 """
 
+import heapq
 import logging
+import os
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
 from typing import Dict, Optional, Any
 
+from flask import current_app, has_app_context
+
 from models import APICredential, User
-from utils.encryption import decrypt_credentials, encrypt_credentials
+from utils.encryption import (decrypt_credential, decrypt_credentials_cached, encrypt_credentials,
+                              invalidate_credential_cache)
 from utils.schwab_oauth import SchwabOAuth
 from utils.coinbase_oauth import CoinbaseOAuth
 from app import db
@@ -32,6 +41,12 @@ OAUTH_PROVIDERS = {'schwab', 'coinbase'}
 MAX_RETRIES = 3
 RETRY_BASE_DELAY_SECONDS = 2  # 2s, 4s, 8s
 
+# Maintenance sweep: refresh tokens expiring within this window (two 5-minute
+# maintenance intervals, so a token is never left to expire between sweeps),
+# with at most this many concurrent refreshes per provider
+TOKEN_REFRESH_WINDOW_SECONDS = int(os.environ.get('TOKEN_REFRESH_WINDOW_SECONDS', '600'))
+TOKEN_REFRESH_CONCURRENCY = int(os.environ.get('TOKEN_REFRESH_CONCURRENCY', '4'))
+
 
 class TokenManager:
     """
@@ -66,7 +81,7 @@ class TokenManager:
 
             # API keys never expire — return immediately
             if credential.is_api_key() or provider not in OAUTH_PROVIDERS:
-                creds = decrypt_credentials(credential.encrypted_credentials)
+                creds = decrypt_credential(credential)
                 return creds
 
             # If credential already marked as needing reauth, tell the caller
@@ -76,7 +91,7 @@ class TokenManager:
                     'message': credential.last_error or f'Please reconnect your {provider} account.',
                 }
 
-            creds = decrypt_credentials(credential.encrypted_credentials)
+            creds = decrypt_credential(credential)
 
             if not TokenManager._needs_refresh(creds):
                 return creds
@@ -92,11 +107,19 @@ class TokenManager:
             return None
 
     @staticmethod
-    def validate_all_tokens() -> Dict[str, Any]:
+    def validate_all_tokens(window_seconds: Optional[int] = None,
+                            max_per_provider: Optional[int] = None) -> Dict[str, Any]:
         """
         Validate and refresh all tokens for all active users.
         Called by the token_maintenance background task.
 
+        Credentials are ordered by token expiry in a min-heap; only those
+        expiring within the refresh window are popped and refreshed, soonest
+        first, with at most ``max_per_provider`` provider calls in flight per
+        provider. Row updates are applied on the calling thread and committed
+        once per provider as its refreshes finish, so the cost of a sweep
+        scales with the tokens nearing expiry.
+
         Returns:
             dict with counts and list of credentials requiring re-authentication.
         """
@@ -105,65 +128,36 @@ class TokenManager:
             'errors': 0,
             'reauth_required': [],
             'skipped_api_keys': 0,
+            'due': 0,
         }
+        window = TOKEN_REFRESH_WINDOW_SECONDS if window_seconds is None else window_seconds
+        per_provider = max_per_provider or TOKEN_REFRESH_CONCURRENCY
 
         try:
             logger.info("Starting token validation for all users")
 
-            credentials = APICredential.query.filter_by(is_active=True).all()
-
-            for credential in credentials:
-                try:
-                    provider = credential.provider
-                    user_id = credential.user_id
-
-                    # Skip non-OAuth providers (API keys, OpenAI, etc.)
-                    if credential.is_api_key() or provider not in OAUTH_PROVIDERS:
-                        result['skipped_api_keys'] += 1
-                        continue
-
-                    # Skip credentials already flagged for reauth
-                    if credential.needs_reauth():
-                        result['reauth_required'].append({
-                            'user_id': user_id,
-                            'provider': provider,
-                            'reason': credential.last_error or 'Re-authentication required',
-                        })
-                        continue
-
-                    current_creds = decrypt_credentials(credential.encrypted_credentials)
-
-                    if not TokenManager._needs_refresh(current_creds):
-                        continue  # Token is still valid
-
-                    # Attempt refresh with retry
-                    new_creds = TokenManager._refresh_with_retry(
-                        user_id, provider, credential, current_creds
-                    )
-
-                    if new_creds and isinstance(new_creds, dict):
-                        if new_creds.get('reauth_required'):
-                            result['reauth_required'].append({
-                                'user_id': user_id,
-                                'provider': provider,
-                                'reason': new_creds.get('message', 'Re-authentication required'),
-                            })
-                        elif 'access_token' in new_creds:
-                            result['refreshed'] += 1
-                        else:
-                            result['errors'] += 1
-                    else:
-                        result['errors'] += 1
-
-                except Exception as e:
-                    logger.error(f"Error processing credential {credential.id}: {e}")
-                    result['errors'] += 1
-
-            # Single commit for all changes made during this cycle
-            db.session.commit()
+            expiry_heap = TokenManager._expiry_heap(result)
+            cutoff = datetime.utcnow() + timedelta(seconds=window)
+            due = []
+            while expiry_heap and expiry_heap[0][0] <= cutoff:
+                due.append(heapq.heappop(expiry_heap))
+            result['due'] = len(due)
+
+            if due:
+                rows = {
+                    credential.id: credential
+                    for credential in APICredential.query.filter(
+                        APICredential.id.in_([entry[1] for entry in due])
+                    ).all()
+                }
+                # Providers may already have invalidated the old refresh tokens,
+                # so each provider's rotated tokens are committed as soon as its
+                # pool finishes instead of waiting for the whole sweep
+                for provider, batch in TokenManager._refresh_by_provider(due, per_provider):
+                    TokenManager._persist_refresh_batch(provider, batch, rows, result)
 
             # Log summary
-            parts = [f"{result['refreshed']} refreshed", f"{result['errors']} errors"]
+            parts = [f"{result['due']} due", f"{result['refreshed']} refreshed", f"{result['errors']} errors"]
             if result['reauth_required']:
                 parts.append(f"{len(result['reauth_required'])} need reauth")
             if result['skipped_api_keys']:
@@ -243,16 +237,162 @@ class TokenManager:
     @staticmethod
     def _needs_refresh(credentials: Dict[str, Any]) -> bool:
         """Check if token needs to be refreshed (5-minute buffer)."""
+        return datetime.utcnow() + timedelta(minutes=5) >= TokenManager._expires_at(credentials)
+
+    @staticmethod
+    def _expires_at(credentials: Dict[str, Any]) -> datetime:
+        """Token expiry; datetime.min (refresh now) when missing or unparseable."""
         try:
             if 'expires_at' not in credentials:
-                return True
-
-            expires_at = datetime.fromisoformat(credentials['expires_at'])
-            return datetime.utcnow() + timedelta(minutes=5) >= expires_at
+                return datetime.min
+            return datetime.fromisoformat(credentials['expires_at'])
 
         except Exception as e:
             logger.error(f"Error checking token expiration: {e}")
-            return True
+            return datetime.min
+
+    @staticmethod
+    def _expiry_heap(result: Dict[str, Any]) -> list:
+        """
+        Min-heap of (expires_at, credential_id, user_id, provider, refresh_token)
+        for every refreshable credential.
+
+        Reads plain columns rather than ORM rows and decrypts through the
+        credential cache, so unchanged credentials cost a cache lookup per
+        sweep. API-key and reauth-required credentials are tallied into
+        ``result`` instead.
+        """
+        rows = db.session.query(
+            APICredential.id, APICredential.user_id, APICredential.provider,
+            APICredential.credential_type, APICredential.status, APICredential.last_error,
+            APICredential.updated_at, APICredential.encrypted_credentials,
+        ).filter(APICredential.is_active.is_(True)).all()
+
+        heap = []
+        for (credential_id, user_id, provider, credential_type, status, last_error,
+             updated_at, encrypted) in rows:
+            # Skip non-OAuth providers (API keys, OpenAI, etc.)
+            if credential_type == 'api_key' or provider not in OAUTH_PROVIDERS:
+                result['skipped_api_keys'] += 1
+                continue
+
+            # Skip credentials already flagged for reauth
+            if status == 'reauth_required':
+                result['reauth_required'].append({
+                    'user_id': user_id,
+                    'provider': provider,
+                    'reason': last_error or 'Re-authentication required',
+                })
+                continue
+
+            try:
+                creds = decrypt_credentials_cached(credential_id, updated_at, encrypted)
+            except Exception as e:
+                logger.error(f"Error processing credential {credential_id}: {e}")
+                result['errors'] += 1
+                continue
+            heap.append((TokenManager._expires_at(creds), credential_id, user_id, provider,
+                         creds.get('refresh_token')))
+
+        heapq.heapify(heap)
+        return heap
+
+    @staticmethod
+    def _refresh_by_provider(due: list, per_provider: int):
+        """
+        Run provider refreshes for ``due`` heap entries, one bounded pool per
+        provider so a slow provider can't starve the other. Entries are
+        submitted soonest-expiry first.
+
+        Yields:
+            (provider, [(entry, outcome), ...]) as soon as every refresh for
+            that provider has finished
+        """
+        app = current_app._get_current_object() if has_app_context() else None
+
+        def refresh(user_id, provider, refresh_token_value):
+            if app is None:
+                return TokenManager._request_refresh(user_id, provider, refresh_token_value)
+            with app.app_context():
+                return TokenManager._request_refresh(user_id, provider, refresh_token_value)
+
+        def outcome_of(future):
+            try:
+                return future.result()
+            except Exception as e:
+                return {'status': 'failed', 'message': str(e)}
+
+        pools = {
+            provider: ThreadPoolExecutor(max_workers=per_provider,
+                                         thread_name_prefix=f'token-refresh-{provider}')
+            for provider in {entry[3] for entry in due}
+        }
+        try:
+            by_provider: Dict[str, list] = {}
+            for entry in due:
+                _, _, user_id, provider, refresh_token_value = entry
+                future = pools[provider].submit(refresh, user_id, provider, refresh_token_value)
+                by_provider.setdefault(provider, []).append((entry, future))
+
+            waiting = set(by_provider)
+            while waiting:
+                running = [future for provider in waiting for _, future in by_provider[provider]
+                           if not future.done()]
+                if running:
+                    wait(running, return_when=FIRST_COMPLETED)
+                for provider in [p for p in waiting if all(f.done() for _, f in by_provider[p])]:
+                    waiting.discard(provider)
+                    yield provider, [(entry, outcome_of(future)) for entry, future in by_provider[provider]]
+        finally:
+            for pool in pools.values():
+                pool.shutdown(wait=False)
+
+    @staticmethod
+    def _persist_refresh_batch(provider: str, batch: list, rows: Dict[int, APICredential],
+                               result: Dict[str, Any]) -> None:
+        """
+        Apply one provider's refresh outcomes to their rows and commit them.
+
+        Each credential is guarded on its own, so one bad outcome can't roll
+        back the rotated tokens of the others.
+        """
+        refreshed_ids = []
+        for (_, credential_id, user_id, _, _), outcome in batch:
+            credential = rows.get(credential_id)
+            if credential is None:
+                continue
+            try:
+                new_creds = TokenManager._apply_refresh_outcome(credential, outcome)
+            except Exception as e:
+                logger.error(f"Error recording refresh for credential {credential_id}: {e}")
+                result['errors'] += 1
+                continue
+
+            if new_creds and isinstance(new_creds, dict):
+                if new_creds.get('reauth_required'):
+                    result['reauth_required'].append({
+                        'user_id': user_id,
+                        'provider': provider,
+                        'reason': new_creds.get('message', 'Re-authentication required'),
+                    })
+                elif 'access_token' in new_creds:
+                    refreshed_ids.append(credential_id)
+                else:
+                    result['errors'] += 1
+            else:
+                result['errors'] += 1
+
+        try:
+            db.session.commit()
+        except Exception as e:
+            logger.error(f"Failed to persist {provider} token refreshes: {e}")
+            db.session.rollback()
+            result['errors'] += len(refreshed_ids)
+            return
+
+        result['refreshed'] += len(refreshed_ids)
+        for credential_id in refreshed_ids:
+            invalidate_credential_cache(credential_id)
 
     @staticmethod
     def _refresh_with_retry(
@@ -268,20 +408,34 @@ class TokenManager:
         On hard failure: marks credential reauth_required, returns reauth dict.
         On transient failure after all retries: increments failure counter, returns None.
         """
-        refresh_token_value = current_creds.get('refresh_token')
+        credential.status = 'refreshing'
+        outcome = TokenManager._request_refresh(user_id, provider, current_creds.get('refresh_token'))
+        result = TokenManager._apply_refresh_outcome(credential, outcome)
+        db.session.commit()
+        if outcome['status'] == 'refreshed':
+            # Don't keep the superseded tokens' plaintext around
+            invalidate_credential_cache(credential.id)
+        return result
+
+    @staticmethod
+    def _request_refresh(
+        user_id: int, provider: str, refresh_token_value: Optional[str],
+    ) -> Dict[str, Any]:
+        """
+        Call the provider with exponential backoff, without touching the DB
+        (safe to run off the request thread).
+
+        Returns:
+            dict with 'status' ('refreshed', 'reauth_required' or 'failed'),
+            'message', and on success 'credentials' and 'attempt'.
+        """
         if not refresh_token_value:
             logger.error(f"No refresh token for user {user_id}, provider {provider}")
-            credential.mark_refresh_failure(
-                f'No refresh token stored. Please reconnect your {provider} account.',
-                is_hard_failure=True,
-            )
-            db.session.commit()
             return {
-                'reauth_required': True,
+                'status': 'reauth_required',
                 'message': f'No refresh token stored. Please reconnect your {provider} account.',
             }
 
-        credential.status = 'refreshing'
         last_result = None
 
         for attempt in range(1, MAX_RETRIES + 1):
@@ -292,15 +446,15 @@ class TokenManager:
 
                 if refresh_result and refresh_result.get('success'):
                     # --- Success ---
-                    new_creds = refresh_result['credentials']
-                    credential.encrypted_credentials = encrypt_credentials(new_creds)
-                    credential.mark_refresh_success()
-                    db.session.commit()
                     logger.info(
                         f"Token refreshed for user {user_id}, provider {provider} "
                         f"(attempt {attempt})"
                     )
-                    return new_creds
+                    return {
+                        'status': 'refreshed',
+                        'credentials': refresh_result['credentials'],
+                        'attempt': attempt,
+                    }
 
                 # --- Failure ---
                 last_result = refresh_result or {}
@@ -308,15 +462,10 @@ class TokenManager:
                 if last_result.get('reauth_required'):
                     # Hard failure — no point retrying
                     error_msg = last_result.get('message', 'Re-authentication required')
-                    credential.mark_refresh_failure(error_msg, is_hard_failure=True)
-                    db.session.commit()
                     logger.warning(
                         f"Hard refresh failure for user {user_id}, provider {provider}: {error_msg}"
                     )
-                    return {
-                        'reauth_required': True,
-                        'message': error_msg,
-                    }
+                    return {'status': 'reauth_required', 'message': error_msg}
 
                 # Transient failure — retry with backoff
                 if attempt < MAX_RETRIES:
@@ -338,14 +487,38 @@ class TokenManager:
                     delay = RETRY_BASE_DELAY_SECONDS * (2 ** (attempt - 1))
                     time.sleep(delay)
 
-        # All retries exhausted — mark transient failure
+        # All retries exhausted — transient failure
         error_msg = (last_result or {}).get('message', 'Token refresh failed after retries')
-        credential.mark_refresh_failure(error_msg, is_hard_failure=False)
-        db.session.commit()
         logger.error(
             f"All {MAX_RETRIES} refresh attempts failed for user {user_id}, "
             f"provider {provider}: {error_msg}"
         )
+        return {'status': 'failed', 'message': error_msg}
+
+    @staticmethod
+    def _apply_refresh_outcome(
+        credential: APICredential, outcome: Dict[str, Any],
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Record a _request_refresh outcome on the credential row (caller commits).
+
+        Returns new creds on success, a reauth dict on hard failure, None otherwise.
+        """
+        if outcome['status'] == 'refreshed':
+            new_creds = outcome['credentials']
+            credential.encrypted_credentials = encrypt_credentials(new_creds)
+            credential.mark_refresh_success()
+            return new_creds
+
+        error_msg = outcome.get('message') or 'Token refresh failed after retries'
+        if outcome['status'] == 'reauth_required':
+            credential.mark_refresh_failure(error_msg, is_hard_failure=True)
+            return {
+                'reauth_required': True,
+                'message': error_msg,
+            }
+
+        credential.mark_refresh_failure(error_msg, is_hard_failure=False)
         return None
 
     @staticmethod
@@ -102,7 +102,7 @@ def update_api_status():
     Handles both OAuth and API-key credential formats."""
     try:
         from models import APICredential
-        from utils.encryption import decrypt_credentials
+        from utils.encryption import decrypt_credential
         from datetime import datetime
 
         credentials = APICredential.query.filter_by(is_active=True).all()
@@ -115,7 +115,7 @@ def update_api_status():
                     continue
 
                 try:
-                    decrypted_creds = decrypt_credentials(cred.encrypted_credentials)
+                    decrypted_creds = decrypt_credential(cred)
                 except Exception as decrypt_err:
                     print(f"Skipping credential {cred.id} - decryption failed: {decrypt_err}")
                     cred.test_status = 'failed'
@@ -186,10 +186,9 @@ def monitor_stop_losses():
     }
     """
     try:
-        from models import User, APICredential, Trade
-        from utils.encryption import decrypt_credentials
-        from utils.schwab_api import SchwabAPIClient
+        from models import APICredential, Trade
         from utils.risk_management import RiskManager
+        from utils.stop_engine import get_stop_engine, schwab_client_for_credential
         from app import db
         from datetime import datetime
         import logging
@@ -201,69 +200,62 @@ def monitor_stop_losses():
         risk_manager = RiskManager(db=db)
 
         # Get all users with active trades that have stop losses
-        users_with_stop_losses = db.session.query(Trade.user_id).filter(
+        users_with_stop_losses = [row[0] for row in db.session.query(Trade.user_id).filter(
             Trade.status == 'executed',
             Trade.stop_loss_price.isnot(None)
-        ).distinct().all()
+        ).distinct().all()]
 
-        total_monitored = 0
-        total_triggered = 0
-        total_closed = 0
-        errors = []
+        # Symbols the streaming stop engine has ticked recently are already
+        # protected event-driven; polling only covers the rest
+        protected_symbols = [row[0] for row in db.session.query(Trade.symbol).filter(
+            Trade.status == 'executed',
+            Trade.stop_loss_price.isnot(None)
+        ).distinct().all()]
+        streamed_symbols = get_stop_engine().streamed_symbols(protected_symbols)
 
-        for user_tuple in users_with_stop_losses:
-            user_id = user_tuple[0]
+        errors = []
+        api_clients = {}
+
+        # One credential query for every user; clients are reused across runs
+        # and only rebuilt (and decrypted) when the stored credentials change
+        credentials = APICredential.query.filter(
+            APICredential.user_id.in_(users_with_stop_losses),
+            APICredential.provider == 'schwab',
+            APICredential.is_active.is_(True)
+        ).all() if users_with_stop_losses else []
+        creds_by_user = {}
+        for cred in credentials:
+            creds_by_user.setdefault(cred.user_id, cred)
 
+        for user_id in users_with_stop_losses:
+            schwab_cred = creds_by_user.get(user_id)
+            if not schwab_cred:
+                logger.warning(f"No Schwab credentials found for user {user_id}, skipping")
+                continue
             try:
-                # Get Schwab credentials for this user
-                schwab_cred = APICredential.query.filter_by(
-                    user_id=user_id,
-                    provider='schwab',
-                    is_active=True
-                ).first()
-
-                if not schwab_cred:
-                    logger.warning(f"No Schwab credentials found for user {user_id}, skipping")
-                    continue
-
-                # Decrypt credentials and initialize API client
-                decrypted = decrypt_credentials(schwab_cred.encrypted_credentials)
-                access_token = decrypted.get('access_token')
-
-                if not access_token:
-                    logger.warning(f"No access token for user {user_id}, skipping")
-                    continue
-
-                api_client = SchwabAPIClient(access_token=access_token)
-
-                # Monitor stop losses for this user
-                result = risk_manager.monitor_stop_losses(user_id, api_client)
-
-                total_monitored += result.get('trades_monitored', 0)
-                total_triggered += result.get('stop_losses_triggered', 0)
-                total_closed += result.get('positions_closed', 0)
-
-                if result.get('errors'):
-                    errors.extend(result['errors'])
-
-                logger.info(
-                    f"User {user_id}: monitored={result.get('trades_monitored', 0)}, "
-                    f"triggered={result.get('stop_losses_triggered', 0)}, "
-                    f"closed={result.get('positions_closed', 0)}"
-                )
-
+                api_client = schwab_client_for_credential(schwab_cred)
             except Exception as e:
-                logger.error(f"Error monitoring stop losses for user {user_id}: {str(e)}")
-                errors.append({
-                    'user_id': user_id,
-                    'error': str(e)
-                })
+                logger.error(f"Error building Schwab client for user {user_id}: {str(e)}")
+                errors.append({'user_id': user_id, 'error': str(e)})
+                continue
+            if api_client is None:
+                logger.warning(f"No access token for user {user_id}, skipping")
+                continue
+            api_clients[user_id] = api_client
+
+        # One batched pass: a single multi-symbol quote request per credential
+        result = risk_manager.monitor_stop_losses_batch(api_clients, skip_symbols=streamed_symbols)
+        if result.get('error'):
+            errors.append({'error': result['error']})
+        errors.extend(result.get('errors', []))
 
         result_summary = {
             'users_processed': len(users_with_stop_losses),
-            'total_trades_monitored': total_monitored,
-            'total_stop_losses_triggered': total_triggered,
-            'total_positions_closed': total_closed,
+            'total_trades_monitored': result.get('trades_monitored', 0),
+            'streamed_symbols': len(streamed_symbols),
+            'quote_requests': result.get('quote_requests', 0),
+            'total_stop_losses_triggered': result.get('stop_losses_triggered', 0),
+            'total_positions_closed': result.get('positions_closed', 0),
             'errors': errors,
             'timestamp': datetime.utcnow().isoformat()
         }